@@ -0,0 +1,595 @@
+"""
+ヘッドレスCLI
+GUIを起動せずにタスクの追加・一覧・完了・インポート/エクスポート・統計を行う
+
+使い方:
+    python Src/cli.py list --status 未完了
+    python -m Src.cli add "レポート作成" --priority 高 --due 2025-08-01 --tags 仕事,重要
+
+起動を軽くするため、最初に読み込むのは modules.task だけにして、
+検索・統計・転送のモジュールは必要なコマンドでのみ読み込む。
+"""
+import time
+
+# 起動時間計測の基準
+CLI_START = time.perf_counter()
+
+import os
+import sys
+
+# モジュールのパスを追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from modules.task import Task, TaskManager
+
+
+STATUS_CHOICES = ["すべて", "未完了", "完了済み", "期限切れ"]
+
+
+def build_parser():
+    """引数パーサーを作成"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="taskmaster",
+        description="タスクマスター Pro のヘッドレスCLI"
+    )
+    parser.add_argument("--data", default="tasks.json", help="タスクデータのファイル（既定: tasks.json）")
+    parser.add_argument("--timing", action="store_true", help="起動からコマンド完了までの時間を表示")
+    parser.add_argument("--metrics", metavar="FILE", default=None,
+                        help="処理時間を計測し、Prometheus 形式でファイルに書き出す（- なら標準エラー出力）")
+    parser.add_argument("--archive-days", type=int, default=None,
+                        help="archive run で移すタスクの完了からの日数"
+                             "（既定: 環境変数 TASKMASTER_ARCHIVE_DAYS、なければ 90）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="タスクを追加")
+    add_parser.add_argument("title", help="タスク名")
+    add_parser.add_argument("--description", default="", help="説明")
+    add_parser.add_argument("--priority", default="中", choices=["高", "中", "低"], help="優先度")
+    add_parser.add_argument("--due", default=None, help="期限日（YYYY-MM-DD）")
+    add_parser.add_argument("--category", default="一般", help="カテゴリ")
+    add_parser.add_argument("--tags", default="", help="タグ（カンマ区切り）")
+    add_parser.add_argument("--estimate", type=int, default=25, help="予想作業時間（分）")
+    add_parser.add_argument("--progress", type=int, default=0, help="進捗率（0-100）")
+
+    list_parser = subparsers.add_parser("list", help="タスクの一覧を表示")
+    list_parser.add_argument("--status", default="すべて", choices=STATUS_CHOICES, help="ステータスで絞り込み")
+    list_parser.add_argument("--search", default="", help="検索（#タグ @カテゴリ !優先度 due:開始..終了 も可）")
+    list_parser.add_argument("--sort", default="added",
+                             choices=["added", "due_date", "priority", "progress", "estimated_time"],
+                             help="並び替え")
+    list_parser.add_argument("--json", action="store_true", help="JSON形式で出力")
+
+    complete_parser = subparsers.add_parser("complete", help="タスクを完了にする")
+    complete_parser.add_argument("ids", nargs="+", help="タスクID")
+
+    import_parser = subparsers.add_parser("import", help="JSONファイルからタスクをインポート")
+    import_parser.add_argument("file", help="読み込むファイル")
+
+    export_parser = subparsers.add_parser("export", help="タスクをJSONファイルにエクスポート")
+    export_parser.add_argument("file", help="書き出すファイル")
+
+    convert_parser = subparsers.add_parser(
+        "convert", help="データファイルを別の形式で書き出す（拡張子が .tmdb ならバイナリ形式、それ以外はJSON）")
+    convert_parser.add_argument("file", help="書き出すデータファイル（既にあるファイルには書き出さない）")
+
+    stats_parser = subparsers.add_parser("stats", help="統計を表示")
+    stats_parser.add_argument("--output", default=None, help="統計データをJSONファイルに書き出す")
+    stats_parser.add_argument("--json", action="store_true", help="JSON形式で出力")
+
+    migrate_parser = subparsers.add_parser(
+        "migrate", help="古いスキーマのまま保存されているタスクをすべて現在のスキーマに移行して保存")
+    migrate_parser.add_argument("--batch-size", type=int, default=None, help="1回のロックで移行する件数")
+
+    archive_parser = subparsers.add_parser("archive", help="完了済みタスクのアーカイブ（移動・検索・復元）")
+    archive_subparsers = archive_parser.add_subparsers(dest="archive_command", required=True)
+    archive_run_parser = archive_subparsers.add_parser("run", help="完了から指定日数が経ったタスクをアーカイブへ移す")
+    archive_run_parser.add_argument("--days", type=int, default=None,
+                                    help="日数（既定: --archive-days と同じ）")
+    archive_search_parser = archive_subparsers.add_parser("search", help="アーカイブのタスクを検索")
+    archive_search_parser.add_argument("query", nargs="?", default="",
+                                       help="検索（#タグ @カテゴリ !優先度 due:開始..終了 も可）")
+    archive_search_parser.add_argument("--from", dest="month_from", default=None, help="完了月の下限（YYYY-MM）")
+    archive_search_parser.add_argument("--to", dest="month_to", default=None, help="完了月の上限（YYYY-MM）")
+    archive_search_parser.add_argument("--limit", type=int, default=None, help="最大件数")
+    archive_search_parser.add_argument("--json", action="store_true", help="JSON形式で出力")
+    archive_restore_parser = archive_subparsers.add_parser("restore", help="アーカイブのタスクを一覧に戻す")
+    archive_restore_parser.add_argument("ids", nargs="+", help="タスクID")
+    archive_stats_parser = archive_subparsers.add_parser("stats", help="完了月・カテゴリごとの件数")
+    archive_stats_parser.add_argument("--json", action="store_true", help="JSON形式で出力")
+    archive_subparsers.add_parser("compact", help="復元済みのタスクを除いてアーカイブファイルを作り直す")
+
+    recur_parser = subparsers.add_parser("recur", help="繰り返しタスク（規則の設定・一覧・スキップ）")
+    recur_subparsers = recur_parser.add_subparsers(dest="recur_command", required=True)
+    recur_set_parser = recur_subparsers.add_parser(
+        "set", help="タスクを繰り返しのテンプレートにする（期限日は開始日として使い、テンプレートからは消す）")
+    recur_set_parser.add_argument("id", help="タスクID")
+    recur_set_parser.add_argument("--every", required=True, choices=["daily", "weekly", "monthly"],
+                                  help="毎日・毎週・毎月")
+    recur_set_parser.add_argument("--interval", type=int, default=1, help="間隔（2 なら2日・2週・2か月ごと）")
+    recur_set_parser.add_argument("--weekdays", default="", help="毎週の曜日（mon,wed や 月,水。既定: 開始日の曜日）")
+    recur_set_parser.add_argument("--day", type=int, default=None, help="毎月の日（既定: 開始日の日。ない月は月末）")
+    recur_set_parser.add_argument("--start", default=None, help="開始日（YYYY-MM-DD、既定: タスクの期限日、なければ今日）")
+    recur_set_parser.add_argument("--until", default=None, help="終了日（YYYY-MM-DD）")
+    recur_clear_parser = recur_subparsers.add_parser("clear", help="繰り返しをやめる（完了・編集した回は残る）")
+    recur_clear_parser.add_argument("id", help="テンプレートのタスクID")
+    recur_list_parser = recur_subparsers.add_parser("list", help="繰り返しの規則と期間内の回を表示")
+    recur_list_parser.add_argument("--days", type=int, default=7, help="今日から何日分の回を表示するか")
+    recur_skip_parser = recur_subparsers.add_parser("skip", help="繰り返しの回をスキップする")
+    recur_skip_parser.add_argument("ids", nargs="+", help="回のID（テンプレートのID@YYYY-MM-DD）")
+
+    depend_parser = subparsers.add_parser("depend", help="タスクの依存関係（追加・削除・着手可能・順序・クリティカルパス）")
+    depend_subparsers = depend_parser.add_subparsers(dest="depend_command", required=True)
+    depend_add_parser = depend_subparsers.add_parser("add", help="タスクが他のタスクにブロックされていることを記録")
+    depend_add_parser.add_argument("id", help="ブロックされているタスクのID")
+    depend_add_parser.add_argument("blockers", nargs="+", help="ブロックしているタスクのID")
+    depend_remove_parser = depend_subparsers.add_parser("remove", help="依存関係を削除")
+    depend_remove_parser.add_argument("id", help="ブロックされているタスクのID")
+    depend_remove_parser.add_argument("blockers", nargs="+", help="ブロックしているタスクのID")
+    depend_subparsers.add_parser("ready", help="すぐに着手できる未完了のタスクを表示")
+    depend_subparsers.add_parser("order", help="依存関係のあるタスクを着手できる順に表示")
+    depend_subparsers.add_parser("critical", help="見積もり時間の合計が最大になる依存関係の経路を表示")
+
+    plan_parser = subparsers.add_parser("plan", help="未完了のタスクをポモドーロの作業枠に割り当てた計画を表示")
+    plan_parser.add_argument("--hours", type=float, default=6, help="作業に使える時間")
+    plan_parser.add_argument("--start", default=None, help="開始時刻（HH:MM、既定: 現在時刻）")
+    plan_parser.add_argument("--whole", action="store_true", help="残りをすべて割り当てられるタスクだけを入れる")
+    plan_parser.add_argument("--json", action="store_true", help="JSON形式で出力")
+
+    memory_parser = subparsers.add_parser("memory", help="読み込んだタスクのメモリ使用量と内訳を表示")
+    memory_parser.add_argument("--sizes", default=None,
+                               help="データの先頭から計測する件数（カンマ区切り、既定: 1000, 10000, ... と全件）")
+    memory_parser.add_argument("--gui", action="store_true", help="GUI の行ウィジェットも計測する")
+    memory_parser.add_argument("--json", action="store_true", help="JSON形式で出力")
+
+    return parser
+
+
+def cmd_add(task_manager: TaskManager, args) -> int:
+    """タスクを追加"""
+    if args.due:
+        from datetime import datetime
+        try:
+            datetime.strptime(args.due, "%Y-%m-%d")
+        except ValueError:
+            print("エラー: 期限日はYYYY-MM-DD形式で入力してください。", file=sys.stderr)
+            return 1
+
+    tags = [tag.strip() for tag in args.tags.split(",") if tag.strip()]
+    task = Task(
+        title=args.title,
+        description=args.description,
+        priority=args.priority,
+        due_date=args.due,
+        category=args.category,
+        tags=tags,
+        estimated_time=args.estimate,
+        progress=max(0, min(100, args.progress))
+    )
+    task_manager.add_task(task)
+    print(task.id)
+    return 0
+
+
+def cmd_list(task_manager: TaskManager, args) -> int:
+    """タスクの一覧を表示"""
+    status = None if args.status == "すべて" else args.status
+
+    if args.search:
+        from modules.search import TaskIndex, parse_query
+        tasks = TaskIndex(task_manager).search(parse_query(args.search), status, include_occurrences=True)
+    elif status == "未完了":
+        tasks = task_manager.get_incomplete_tasks()
+    elif status == "完了済み":
+        tasks = task_manager.get_completed_tasks()
+    elif status == "期限切れ":
+        tasks = task_manager.get_overdue_tasks()
+    else:
+        tasks = task_manager.tasks
+
+    if args.sort != "added":
+        from modules.task_view import TaskView
+        tasks = TaskView(task_manager).sort(tasks, args.sort)
+
+    if args.json:
+        import json
+        print(json.dumps([task.to_dict() for task in tasks], ensure_ascii=False, indent=2))
+        return 0
+
+    rules = task_manager.recurrences.rules
+    for task in tasks:
+        line = f"{task.id}  {task}"
+        if task.due_date:
+            line += f"  📅 {task.due_date}"
+            if task.is_overdue():
+                line += " ⚠️"
+        if task.id in rules:
+            line += f"  🔁 {rules[task.id].describe()}"
+        elif task_manager.get_task(task.id) is None:
+            line += "  🔁 予定"  # まだ実体化していない繰り返しの回
+        if not task.completed and task_manager.is_blocked(task.id):
+            line += "  ⛔"
+        print(line)
+    print(f"{len(tasks)}件", file=sys.stderr)
+    return 0
+
+
+def cmd_complete(task_manager: TaskManager, args) -> int:
+    """タスクを完了にする"""
+    status = 0
+    for task_id in args.ids:
+        # 繰り返しの回のID（テンプレートのID@YYYY-MM-DD）なら実体化する
+        task = task_manager.get_task(task_id) or task_manager.materialize_occurrence(task_id)
+        if task is None:
+            print(f"エラー: タスク {task_id} が見つかりません。", file=sys.stderr)
+            status = 1
+        elif not task.completed:
+            task_manager.toggle_task_completion(task_id)
+            print(f"完了: {task}")
+    return status
+
+
+def cmd_import(task_manager: TaskManager, args) -> int:
+    """JSONファイルからタスクをインポート"""
+    from modules.transfer import read_tasks_file
+
+    tasks, skipped = read_tasks_file(args.file)
+    imported_count = task_manager.add_tasks(tasks)
+    skipped += len(tasks) - imported_count
+    print(f"{imported_count}件のタスクをインポートしました。（スキップ: {skipped}件）")
+    return 0
+
+
+def cmd_export(task_manager: TaskManager, args) -> int:
+    """タスクをJSONファイルにエクスポート"""
+    from modules.transfer import write_tasks_file
+
+    count = write_tasks_file(task_manager.tasks, args.file)
+    print(f"{count}件のタスクを {args.file} にエクスポートしました。")
+    return 0
+
+
+def cmd_convert(task_manager: TaskManager, args) -> int:
+    """データファイルを別の形式で書き出す（変更番号と差分同期の状態も引き継ぐ）"""
+    if os.path.exists(args.file):
+        print(f"エラー: {args.file} は既に存在します。", file=sys.stderr)
+        return 1
+    target = TaskManager(data_file=args.file)
+    if not target.write_snapshot(task_manager.snapshot(), task_manager.get_sync_state(),
+                                 task_manager.get_dependency_data()):
+        print(f"エラー: 書き出し中に {args.file} が作成されました。", file=sys.stderr)
+        return 1
+    print(f"{len(task_manager.tasks)}件のタスクを {args.file} に書き出しました。")
+    return 0
+
+
+def cmd_stats(task_manager: TaskManager, args) -> int:
+    """統計を表示"""
+    from modules.statistics import TaskStatistics
+
+    statistics = TaskStatistics(task_manager)
+    if args.output:
+        statistics.export_statistics(args.output)
+        print(f"統計データを {args.output} にエクスポートしました。")
+        return 0
+
+    stats = {
+        'status': task_manager.get_task_count_by_status(),
+        'productivity': statistics.get_productivity_stats(),
+        'categories': statistics.get_category_stats(),
+        'priorities': statistics.get_priority_stats(),
+        'tag_usage': statistics.get_tag_usage(),
+        'recurrence': statistics.get_recurrence_stats()
+    }
+    if args.json:
+        import json
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        return 0
+
+    status = stats['status']
+    productivity = stats['productivity']
+    print(f"総タスク数: {status['total']}  未完了: {status['incomplete']}  "
+          f"完了済み: {status['completed']}  期限切れ: {status['overdue']}")
+    # 繰り返しのまだ保存していない回は上の件数とカテゴリ別に含めず、🔁 の行に分けて表示する
+    print(f"📈 完了率: {productivity['completion_rate']}%  "
+          f"⏱️ 総作業時間: {productivity['total_actual_time']}分  "
+          f"🍅 総ポモドーロ: {productivity['total_pomodoros']}回")
+    if productivity['archived_tasks']:
+        print(f"🗄️ アーカイブ済み: {productivity['archived_tasks']}件（完了率・作業時間・カテゴリ別に含む）")
+    recurrence = stats['recurrence']
+    if recurrence['series']:
+        print(f"🔁 繰り返し: {recurrence['series']}件  完了した回: {recurrence['completed_occurrences']}  "
+              f"期限切れの回（未保存）: {recurrence['overdue_occurrences']}  今後7日の回: {recurrence['upcoming_occurrences']}")
+    for category, category_stats in stats['categories'].items():
+        print(f"📁 {category}: 総数{category_stats['total']} | 完了{category_stats['completed']} | "
+              f"進行中{category_stats['in_progress']} | 期限切れ{category_stats['overdue']}")
+    return 0
+
+
+def cmd_migrate(task_manager: TaskManager, args) -> int:
+    """古いスキーマのタスクをまとめて移行（進捗とスループットを表示）"""
+    from modules.transfer import MIGRATION_BATCH_SIZE, migrate_all_job
+
+    if task_manager.readonly_reason is not None:
+        print(f"エラー: {task_manager.readonly_reason}", file=sys.stderr)
+        return 1
+    job = migrate_all_job(task_manager, args.batch_size or MIGRATION_BATCH_SIZE)
+    job.start()
+    try:
+        while not job.done:
+            time.sleep(0.2)
+            progress = job.get_progress()
+            print(f"\r移行中: {progress['processed']}/{progress['total']}件"
+                  f"（{progress['throughput']:.0f}件/秒）", end="", file=sys.stderr)
+    except KeyboardInterrupt:
+        job.cancel()
+        while not job.done:
+            time.sleep(0.05)
+    print("", file=sys.stderr)
+
+    progress = job.get_progress()
+    if job.error is not None:
+        print(f"エラー: 移行を中断しました（{progress['processed']}件は保存済み）: {job.error}", file=sys.stderr)
+        return 1
+    if not job.result:
+        print("移行が必要なタスクはありません。")
+        return 0
+    print(f"{job.result}件のタスクを移行しました（{progress['elapsed']:.1f}秒、"
+          f"{progress['throughput']:.0f}件/秒）。")
+    return 0
+
+
+def cmd_archive(task_manager: TaskManager, args) -> int:
+    """完了済みタスクのアーカイブを操作"""
+    import re
+
+    archive = task_manager.archive
+    if args.archive_command == "run":
+        days = args.days if args.days is not None else args.archive_days
+        from modules.archive import ARCHIVE_AFTER_DAYS, archive_days_from_env, normalize_archive_days
+        days = normalize_archive_days(days) if days is not None else archive_days_from_env(ARCHIVE_AFTER_DAYS)
+        if days is None:
+            print("エラー: 日数を指定してください。", file=sys.stderr)
+            return 1
+        count = task_manager.archive_completed(days)
+        print(f"完了から{days}日以上経った{count}件のタスクをアーカイブに移しました。")
+        return 0
+
+    if args.archive_command == "search":
+        for month in (args.month_from, args.month_to):
+            if month is not None and not re.fullmatch(r"\d{4}-\d{2}", month):
+                print("エラー: 完了月はYYYY-MM形式で入力してください。", file=sys.stderr)
+                return 1
+        from modules.search import parse_query
+        tasks = archive.search(parse_query(args.query), args.month_from, args.month_to, args.limit)
+        if args.json:
+            import json
+            print(json.dumps([task.to_dict() for task in tasks], ensure_ascii=False, indent=2))
+            return 0
+        for task in tasks:
+            print(f"{task.id}  {task}  完了 {(task.updated_at or '')[:10]}")
+        print(f"{len(tasks)}件", file=sys.stderr)
+        return 0
+
+    if args.archive_command == "restore":
+        restored = task_manager.restore_archived(args.ids)
+        missing = [task_id for task_id in args.ids if task_manager.get_task(task_id) is None]
+        for task_id in missing:
+            print(f"エラー: タスク {task_id} がアーカイブに見つかりません。", file=sys.stderr)
+        print(f"{restored}件のタスクをアーカイブから戻しました。")
+        return 1 if missing else 0
+
+    if args.archive_command == "stats":
+        buckets = archive.buckets()
+        if args.json:
+            import json
+            print(json.dumps(buckets, ensure_ascii=False, indent=2))
+            return 0
+        for bucket in buckets:
+            print(f"{bucket['month']}  📁 {bucket['category']}: {bucket['count']}件  "
+                  f"⏱️ {bucket['actual_time']}分  🍅 {bucket['pomodoros']}回")
+        print(f"合計 {sum(bucket['count'] for bucket in buckets)}件  "
+              f"（{os.path.getsize(archive.path) if archive.exists() else 0:,} バイト）")
+        return 0
+
+    before, after = archive.compact()
+    print(f"アーカイブを作り直しました: {before:,} → {after:,} バイト")
+    return 0
+
+
+def cmd_recur(task_manager: TaskManager, args) -> int:
+    """繰り返しタスクを操作"""
+    from datetime import datetime, timedelta
+    from modules.recurrence import RecurrenceRule, parse_weekdays
+
+    if args.recur_command == "set":
+        task = task_manager.get_task(args.id)
+        if task is None:
+            print(f"エラー: タスク {args.id} が見つかりません。", file=sys.stderr)
+            return 1
+        try:
+            rule = RecurrenceRule(args.every, args.start or task.due_date or datetime.now().date(),
+                                  interval=args.interval, weekdays=parse_weekdays(args.weekdays),
+                                  month_day=args.day, until=args.until)
+        except ValueError as e:
+            print(f"エラー: {e}", file=sys.stderr)
+            return 1
+        rule = task_manager.set_recurrence(args.id, rule)
+        print(f"🔁 {task.title}: {rule.describe()}（{rule.start.isoformat()}から）")
+        return 0
+
+    if args.recur_command == "clear":
+        if not task_manager.remove_recurrence(args.id):
+            print(f"エラー: タスク {args.id} は繰り返しではありません。", file=sys.stderr)
+            return 1
+        print("繰り返しをやめました。")
+        return 0
+
+    if args.recur_command == "skip":
+        status = 0
+        for task_id in args.ids:
+            if task_manager.skip_occurrence(task_id):
+                print(f"スキップ: {task_id}")
+            else:
+                print(f"エラー: {task_id} は繰り返しの回ではありません。", file=sys.stderr)
+                status = 1
+        return status
+
+    today = datetime.now().date()
+    for template_id, rule in task_manager.recurrences.rules.items():
+        template = task_manager.get_task(template_id)
+        if template is None:
+            continue
+        state = "（停止中）" if template.completed else ""
+        print(f"{template_id}  {template.title}  🔁 {rule.describe()}{state}")
+    for task in task_manager.get_overdue_occurrences():
+        print(f"  {task.id}  {task.title} ⚠️")
+    for task in task_manager.get_occurrences(today, today + timedelta(days=args.days - 1)):
+        print(f"  {task.id}  {task.title}")
+    return 0
+
+
+def cmd_depend(task_manager: TaskManager, args) -> int:
+    """タスクの依存関係を操作"""
+    from modules.task import DependencyCycleError
+
+    if args.depend_command in ("add", "remove"):
+        status = 0
+        for blocker_id in args.blockers:
+            try:
+                if args.depend_command == "add":
+                    changed = task_manager.add_dependency(args.id, blocker_id)
+                else:
+                    changed = task_manager.remove_dependency(args.id, blocker_id)
+            except KeyError as e:
+                print(f"エラー: タスク {e.args[0]} が見つかりません。", file=sys.stderr)
+                status = 1
+                continue
+            except DependencyCycleError as e:
+                print(f"エラー: {e}", file=sys.stderr)
+                status = 1
+                continue
+            if changed:
+                print(f"{'追加' if args.depend_command == 'add' else '削除'}: {args.id} ← {blocker_id}")
+        return status
+
+    if args.depend_command == "critical":
+        path = task_manager.get_critical_path()
+        for task in path['tasks']:
+            print(f"{task.id}  {task}  ⏱ {0 if task.completed else task.estimated_time}分")
+        print(f"合計: {path['total_time']}分（{len(path['tasks'])}件）", file=sys.stderr)
+        return 0
+
+    if args.depend_command == "ready":
+        tasks = task_manager.get_ready_tasks()
+    else:
+        tasks = task_manager.get_topological_order()
+    for task in tasks:
+        line = f"{task.id}  {task}"
+        if not task.completed and task_manager.is_blocked(task.id):
+            blockers = [blocker.title for blocker in task_manager.get_blockers(task.id) if not blocker.completed]
+            line += f"  ⛔ {', '.join(blockers)}"
+        print(line)
+    print(f"{len(tasks)}件", file=sys.stderr)
+    return 0
+
+
+def cmd_plan(task_manager: TaskManager, args) -> int:
+    """今日の作業計画を表示"""
+    from datetime import datetime
+    from modules.planner import DayPlanner
+
+    start = None
+    if args.start:
+        try:
+            start = datetime.combine(datetime.now().date(), datetime.strptime(args.start, "%H:%M").time())
+        except ValueError:
+            print(f"エラー: 開始時刻 {args.start} は HH:MM の形式で指定してください。", file=sys.stderr)
+            return 1
+    plan = DayPlanner(task_manager).plan(args.hours, start, whole=args.whole)
+
+    if args.json:
+        import json
+        print(json.dumps(plan.to_dict(), ensure_ascii=False, indent=2))
+        return 0
+
+    for slot in plan.slots:
+        title = slot.task.title if slot.task is not None else "（空き）"
+        print(f"{slot.start:%H:%M}-{slot.end:%H:%M}  🍅 {title}")
+    for task, count, remaining in plan.assignments:
+        if count < remaining:
+            print(f"  {task.title}: 残り {remaining} ポモドーロのうち {count}", file=sys.stderr)
+    for task in plan.overflow:
+        print(f"⚠️ 今日までに終わらない: {task.id}  {task.title}", file=sys.stderr)
+    print(f"{len(plan.slots) - plan.free_slots}/{len(plan.slots)}枠", file=sys.stderr)
+    return 0
+
+
+def cmd_memory(args) -> int:
+    """メモリ使用量のレポートを表示（計測のためにデータファイルを自分で読み込む）"""
+    from modules.memory_report import build_report, format_report
+
+    sizes = None
+    if args.sizes:
+        try:
+            sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+        except ValueError:
+            print("エラー: --sizes は整数のカンマ区切りで指定してください", file=sys.stderr)
+            return 1
+    try:
+        report = build_report(args.data, sizes, include_gui=args.gui)
+    except (OSError, ValueError) as e:
+        print(f"エラー: データファイルを読み込めません: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        import json
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report))
+    return 0
+
+
+COMMANDS = {
+    'add': cmd_add,
+    'list': cmd_list,
+    'complete': cmd_complete,
+    'import': cmd_import,
+    'export': cmd_export,
+    'convert': cmd_convert,
+    'stats': cmd_stats,
+    'migrate': cmd_migrate,
+    'archive': cmd_archive,
+    'recur': cmd_recur,
+    'depend': cmd_depend,
+    'plan': cmd_plan
+}
+
+
+def main(argv=None) -> int:
+    """メイン関数"""
+    args = build_parser().parse_args(argv)
+    if args.metrics:
+        from modules.metrics import registry
+        registry.enabled = True
+
+    if args.command == "memory":
+        status = cmd_memory(args)
+    else:
+        # 一覧・統計・エクスポートなどでデータファイルを書き換えないように、
+        # 完了済みタスクのアーカイブへの移動は archive run でだけ行う
+        task_manager = TaskManager(data_file=args.data)
+        task_manager.load_tasks()
+        status = COMMANDS[args.command](task_manager, args)
+
+    if args.timing:
+        elapsed_ms = (time.perf_counter() - CLI_START) * 1000
+        print(f"[timing] 起動からコマンド完了まで: {elapsed_ms:.1f} ms（目標 100 ms）", file=sys.stderr)
+    if args.metrics:
+        from modules.metrics import write_prometheus
+        write_prometheus(args.metrics)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,20 +2,40 @@
 美しいGUIタスク管理アプリケーション
 CustomTkinterを使用したモダンなデザイン
 """
+import time
+
+# 起動時間計測の基準（重いGUIライブラリの読み込みより前に記録する）
+PROCESS_START = time.perf_counter()
+
 import customtkinter as ctk
 from tkinter import messagebox, filedialog
 import tkinter as tk
 from datetime import datetime, timedelta
 import os
 import sys
-import json
+import threading
 
 # モジュールのパスを追加
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from modules.task import Task, TaskManager
+from modules.archive import archive_days_from_env
+from modules.metrics import registry as metrics, write_prometheus
 from modules.pomodoro import PomodoroTimer
 from modules.notifications import NotificationManager
 from modules.statistics import TaskStatistics
+from modules.task_list import VirtualTaskList
+from modules.refresh import RefreshScheduler
+from modules.responsiveness import ResponsivenessMonitor, tracked
+from modules.search import TaskIndex, parse_query
+from modules.task_view import GROUP_OPTIONS, SORT_OPTIONS, TaskView
+from modules.transfer import (
+    TransferCancelled, export_statistics_job, export_tasks_job, import_tasks_job
+)
+
+EXTERNAL_CHECK_INTERVAL_MS = 3000  # 他のプロセスによるデータファイルの変更を確認する間隔（ミリ秒）
+METRICS_REFRESH_INTERVAL_MS = 1000  # 設定タブ表示中に計測結果の表示を更新する間隔（ミリ秒）
+
+metrics.describe("gui_update_task_list_seconds", "タスク一覧の再描画（絞り込み・並び替えを含む）")
 
 
 class TaskApp:
@@ -30,9 +50,17 @@ class TaskApp:
         self.root.geometry("1400x900")
         self.root.minsize(1000, 700)
         
-        # タスクマネージャーの初期化
+        # タスクマネージャーの初期化（読み込みはウィンドウ表示後にバックグラウンドで行う）
         self.task_manager = TaskManager()
-        self.task_manager.load_tasks()
+        self.task_manager.archive_after_days = archive_days_from_env()  # 環境変数で指定した場合だけ読み込み時にアーカイブへ
+        self.tasks_loaded = False
+        
+        # 検索インデックス（変更通知で更新される）
+        self.task_index = TaskIndex(self.task_manager)
+        self.search_query = parse_query("")
+        
+        # 並び替え・グループ化ビュー（並び替えキーを事前計算して保持）
+        self.task_view = TaskView(self.task_manager)
         
         # 新機能の初期化
         self.pomodoro_timer = PomodoroTimer()
@@ -57,17 +85,96 @@ class TaskApp:
         # 現在選択されているタスク
         self.selected_task = None
         
+        # 実行中のインポート/エクスポート
+        self.transfer_job = None
+        
         # テーマ設定
         self.current_theme = "dark"
         
-        # UI要素の初期化
+        # 再描画スケジューラ（同じパネルの再描画はアイドル時に1回へまとめる）
+        self.refresh = RefreshScheduler(self.root)
+        
+        # UI要素の初期化（表示中のタスク管理タブのみ。他のタブは初回表示時に作成）
         self.setup_ui()
-        self.update_task_list()
-        self.update_statistics()
+        self.refresh.register("list", self.update_task_list)
+        self.refresh.register("counters", self.update_counters)
+        self.refresh.register(
+            "detailed_stats",
+            self.update_detailed_statistics,
+            is_visible=lambda: self.tabview.get() == "📊 統計"
+        )
+        self.refresh.register(
+            "combobox",
+            self.update_task_combobox,
+            is_visible=lambda: "🍅 ポモドーロ" in self.built_tabs
+        )
+        
+        # イベントループの応答性の計測（TASKMASTER_UI_MONITOR=1 または設定タブで有効化）
+        self.ui_monitor = ResponsivenessMonitor(self.root)
+        if os.environ.get("TASKMASTER_UI_MONITOR") == "1":
+            self.ui_monitor.start()
+        
+        # 初回描画までの時間を計測し、描画後にタスクを読み込む
+        self.root.bind("<Map>", self.on_first_paint, add="+")
         
         # ウィンドウを閉じる際の処理
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
+    def on_first_paint(self, event):
+        """ウィンドウの初回表示時の処理"""
+        if event.widget is not self.root:
+            return
+        self.root.unbind("<Map>")
+        self.root.after_idle(self.log_first_paint)
+        self.start_loading_tasks()
+    
+    def log_first_paint(self):
+        """初回描画までの時間をログ出力（目標: 300ms未満）"""
+        elapsed_ms = (time.perf_counter() - PROCESS_START) * 1000
+        status = "OK" if elapsed_ms < 300 else "目標超過"
+        print(f"[startup] 初回描画までの時間: {elapsed_ms:.1f} ms（目標 300 ms: {status}）")
+    
+    def start_loading_tasks(self):
+        """tasks.json をバックグラウンドスレッドで読み込む"""
+        self.add_button.configure(state="disabled")
+        self.load_started_at = time.perf_counter()
+        
+        load_thread = threading.Thread(target=self.task_manager.load_tasks)
+        load_thread.daemon = True
+        load_thread.start()
+        self.root.after(20, lambda: self.wait_for_tasks(load_thread))
+    
+    @tracked
+    def wait_for_tasks(self, load_thread):
+        """読み込み完了を待って一覧を描画"""
+        if load_thread.is_alive():
+            self.root.after(20, lambda: self.wait_for_tasks(load_thread))
+            return
+        
+        self.tasks_loaded = True
+        self.add_button.configure(state="normal")
+        
+        # 以降の変更は通知から差分更新する
+        self.task_manager.add_listener(self.on_task_change)
+        self.refresh.mark_dirty("list", "counters", "detailed_stats", "combobox")
+        
+        elapsed_ms = (time.perf_counter() - self.load_started_at) * 1000
+        print(f"[startup] タスク読み込み: {len(self.task_manager.tasks)}件 / {elapsed_ms:.1f} ms")
+        
+        self.root.after(EXTERNAL_CHECK_INTERVAL_MS, self.check_external_changes)
+    
+    @tracked
+    def check_external_changes(self):
+        """他のプロセス（別ウィンドウ・スクリプトなど）がデータファイルを変更していれば取り込む"""
+        try:
+            result = self.task_manager.reload_if_changed()
+        except Exception as e:
+            print(f"データファイルの再読み込み中にエラーが発生しました: {e}")
+            result = None
+        if result and result['conflicts']:
+            print(f"他のプロセスと同じタスクを変更していました（{result['conflicts']}件、新しい方を残しました）")
+        self.root.after(EXTERNAL_CHECK_INTERVAL_MS, self.check_external_changes)
+    
     def setup_ui(self):
         """UIレイアウトをセットアップ"""
         # メインフレームの作成
@@ -75,20 +182,28 @@ class TaskApp:
         self.main_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
         # タブビューの作成
-        self.tabview = ctk.CTkTabview(self.main_frame)
+        self.tabview = ctk.CTkTabview(self.main_frame, command=self.on_tab_change)
         self.tabview.pack(fill="both", expand=True)
         
-        # タブの追加
-        self.tabview.add("📋 タスク管理")
-        self.tabview.add("🍅 ポモドーロ")
-        self.tabview.add("📊 統計")
-        self.tabview.add("⚙️ 設定")
+        # タブの追加（中身は初回表示時に作成する）
+        self.tab_builders = {
+            "📋 タスク管理": self.setup_task_tab,
+            "🍅 ポモドーロ": self.setup_pomodoro_tab,
+            "📊 統計": self.setup_statistics_tab,
+            "⚙️ 設定": self.setup_settings_tab
+        }
+        for tab_name in self.tab_builders:
+            self.tabview.add(tab_name)
         
-        # 各タブのセットアップ
-        self.setup_task_tab()
-        self.setup_pomodoro_tab()
-        self.setup_statistics_tab()
-        self.setup_settings_tab()
+        self.built_tabs = set()
+        self.build_tab("📋 タスク管理")
+    
+    def build_tab(self, tab_name):
+        """タブの中身が未作成なら作成"""
+        if tab_name in self.built_tabs:
+            return
+        self.built_tabs.add(tab_name)
+        self.tab_builders[tab_name]()
     
     def setup_task_tab(self):
         """タスク管理タブのセットアップ"""
@@ -193,6 +308,59 @@ class TaskApp:
         )
         self.toggle_button.pack(fill="x", padx=15, pady=(5, 15))
         
+        # 一括変更フレーム（Ctrl/Shift クリックで複数選択したタスクをまとめて変更）
+        self.bulk_frame = ctk.CTkFrame(self.left_panel)
+        self.bulk_frame.pack(fill="x", padx=20, pady=(0, 20))
+        
+        self.bulk_label = ctk.CTkLabel(
+            self.bulk_frame,
+            text="📦 一括変更（0件選択）",
+            font=ctk.CTkFont(size=16, weight="bold")
+        )
+        self.bulk_label.pack(pady=(15, 10))
+        
+        self.bulk_priority_var = tk.StringVar(value="優先度を変更")
+        self.bulk_priority_menu = ctk.CTkOptionMenu(
+            self.bulk_frame,
+            variable=self.bulk_priority_var,
+            values=["高", "中", "低"],
+            command=self.bulk_set_priority,
+            state="disabled"
+        )
+        self.bulk_priority_menu.pack(fill="x", padx=15, pady=5)
+        
+        self.bulk_category_button = ctk.CTkButton(
+            self.bulk_frame,
+            text="📁 カテゴリを変更",
+            command=self.bulk_set_category,
+            height=30,
+            state="disabled"
+        )
+        self.bulk_category_button.pack(fill="x", padx=15, pady=5)
+        
+        tag_frame = ctk.CTkFrame(self.bulk_frame, fg_color="transparent")
+        tag_frame.pack(fill="x", padx=15, pady=(5, 15))
+        
+        self.bulk_add_tag_button = ctk.CTkButton(
+            tag_frame,
+            text="🏷️ タグ追加",
+            command=lambda: self.bulk_retag(add=True),
+            height=30,
+            width=90,
+            state="disabled"
+        )
+        self.bulk_add_tag_button.pack(side="left", fill="x", expand=True, padx=(0, 5))
+        
+        self.bulk_remove_tag_button = ctk.CTkButton(
+            tag_frame,
+            text="🏷️ タグ削除",
+            command=lambda: self.bulk_retag(add=False),
+            height=30,
+            width=90,
+            state="disabled"
+        )
+        self.bulk_remove_tag_button.pack(side="left", fill="x", expand=True, padx=(5, 0))
+        
         # フィルターフレーム
         self.filter_frame = ctk.CTkFrame(self.left_panel)
         self.filter_frame.pack(fill="x", padx=20, pady=(0, 20))
@@ -214,7 +382,50 @@ class TaskApp:
             values=filter_options,
             command=self.apply_filter
         )
-        self.filter_menu.pack(fill="x", padx=15, pady=(0, 15))
+        self.filter_menu.pack(fill="x", padx=15, pady=(0, 10))
+        
+        # 検索ボックス（入力が止まってから検索する）
+        self.search_entry = ctk.CTkEntry(
+            self.filter_frame,
+            placeholder_text="🔎 検索（#タグ @カテゴリ !高 due:開始..終了）"
+        )
+        self.search_entry.pack(fill="x", padx=15)
+        self.search_entry.bind("<KeyRelease>", self.on_search_input)
+        self.search_after_id = None
+        
+        self.result_count_label = ctk.CTkLabel(
+            self.filter_frame,
+            text="",
+            font=ctk.CTkFont(size=11),
+            text_color="gray"
+        )
+        self.result_count_label.pack(anchor="w", padx=15, pady=(2, 10))
+        
+        # 並び替え・グループ化
+        view_option_frame = ctk.CTkFrame(self.filter_frame, fg_color="transparent")
+        view_option_frame.pack(fill="x", padx=15, pady=(0, 15))
+        
+        self.sort_names = {label: key for key, label in SORT_OPTIONS.items()}
+        self.sort_var = tk.StringVar(value=SORT_OPTIONS["added"])
+        ctk.CTkLabel(view_option_frame, text="並び替え:").grid(row=0, column=0, sticky="w")
+        ctk.CTkOptionMenu(
+            view_option_frame,
+            variable=self.sort_var,
+            values=list(SORT_OPTIONS.values()),
+            command=self.apply_view_options,
+            width=150
+        ).grid(row=0, column=1, sticky="ew", padx=(10, 0), pady=2)
+        
+        self.group_names = {label: key for key, label in GROUP_OPTIONS.items()}
+        self.group_var = tk.StringVar(value=GROUP_OPTIONS["none"])
+        ctk.CTkLabel(view_option_frame, text="グループ:").grid(row=1, column=0, sticky="w")
+        ctk.CTkOptionMenu(
+            view_option_frame,
+            variable=self.group_var,
+            values=list(GROUP_OPTIONS.values()),
+            command=self.apply_view_options,
+            width=150
+        ).grid(row=1, column=1, sticky="ew", padx=(10, 0), pady=2)
     
     def setup_pomodoro_tab(self):
         """ポモドーロタブのセットアップ"""
@@ -493,6 +704,73 @@ class TaskApp:
             width=150
         )
         import_tasks_button.pack(side="left")
+        
+        # 転送処理の進捗
+        self.transfer_status_label = ctk.CTkLabel(data_frame, text="", font=ctk.CTkFont(size=12))
+        self.transfer_status_label.pack(anchor="w", padx=20)
+        
+        transfer_progress_frame = ctk.CTkFrame(data_frame, fg_color="transparent")
+        transfer_progress_frame.pack(fill="x", padx=20, pady=(5, 15))
+        
+        self.transfer_progress = ctk.CTkProgressBar(transfer_progress_frame)
+        self.transfer_progress.pack(side="left", fill="x", expand=True)
+        self.transfer_progress.set(0)
+        
+        self.transfer_cancel_button = ctk.CTkButton(
+            transfer_progress_frame,
+            text="⏹️ キャンセル",
+            command=self.cancel_transfer,
+            width=100,
+            fg_color="red",
+            hover_color="darkred",
+            state="disabled"
+        )
+        self.transfer_cancel_button.pack(side="left", padx=(10, 0))
+        
+        # パフォーマンス計測（デバッグ用）
+        metrics_frame = ctk.CTkFrame(settings_main)
+        metrics_frame.pack(fill="both", expand=True, padx=40, pady=20)
+        
+        ctk.CTkLabel(
+            metrics_frame,
+            text="🛠️ パフォーマンス計測（デバッグ）",
+            font=ctk.CTkFont(size=18, weight="bold")
+        ).pack(pady=(15, 10))
+        
+        metrics_control_frame = ctk.CTkFrame(metrics_frame, fg_color="transparent")
+        metrics_control_frame.pack(fill="x", padx=20, pady=(0, 10))
+        
+        self.metrics_enabled_var = tk.BooleanVar(value=metrics.enabled)
+        ctk.CTkCheckBox(
+            metrics_control_frame,
+            text="処理時間を計測する",
+            variable=self.metrics_enabled_var,
+            command=self.toggle_metrics
+        ).pack(side="left")
+        
+        self.ui_monitor_var = tk.BooleanVar(value=self.ui_monitor.running)
+        ctk.CTkCheckBox(
+            metrics_control_frame,
+            text="UIの応答性を監視する（終了時に結果を表示）",
+            variable=self.ui_monitor_var,
+            command=self.toggle_ui_monitor
+        ).pack(side="left", padx=(20, 0))
+        
+        for text, command in (("📤 Prometheus形式で保存", self.export_metrics),
+                              ("🧹 リセット", self.reset_metrics),
+                              ("🔄 更新", self.update_metrics_panel)):
+            ctk.CTkButton(metrics_control_frame, text=text, command=command, width=100).pack(
+                side="right", padx=(10, 0))
+        
+        self.metrics_text = ctk.CTkTextbox(
+            metrics_frame,
+            height=160,
+            wrap="none",
+            font=ctk.CTkFont(family="Consolas", size=12)
+        )
+        self.metrics_text.pack(fill="both", expand=True, padx=20, pady=(0, 15))
+        self.update_metrics_panel()
+        self.root.after(METRICS_REFRESH_INTERVAL_MS, self.refresh_metrics_panel)
     
     def setup_right_panel(self):
         """右側パネルのセットアップ"""
@@ -508,218 +786,167 @@ class TaskApp:
         )
         list_title.pack(pady=(20, 10))
         
-        # スクロール可能なタスクリスト
-        self.scrollable_frame = ctk.CTkScrollableFrame(self.task_list_frame)
-        self.scrollable_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
-        
-        # タスクアイテムを格納するリスト
-        self.task_items = []
-    
-    def create_task_item(self, task):
-        """個別のタスクアイテムを作成"""
-        # タスクアイテムフレーム
-        item_frame = ctk.CTkFrame(self.scrollable_frame)
-        item_frame.pack(fill="x", padx=5, pady=5)
-        
-        # タスクが選択された時の処理
-        def on_task_select():
-            self.selected_task = task
-            self.update_button_states()
-            # 他のタスクの選択を解除
-            for item in self.task_items:
-                if item != item_frame:
-                    item.configure(border_width=0)
-            # このタスクを選択状態にする
-            item_frame.configure(border_width=2, border_color="blue")
-        
-        # クリックイベントを追加
-        item_frame.bind("<Button-1>", lambda e: on_task_select())
-        
-        # タスク情報のレイアウト
-        info_frame = ctk.CTkFrame(item_frame, fg_color="transparent")
-        info_frame.pack(fill="x", padx=15, pady=10)
-        
-        # タイトル行
-        title_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
-        title_frame.pack(fill="x")
-        
-        # 完了状態のアイコン
-        status_icon = "✅" if task.completed else "⭕"
-        status_label = ctk.CTkLabel(
-            title_frame,
-            text=status_icon,
-            font=ctk.CTkFont(size=16)
-        )
-        status_label.pack(side="left")
-        
-        # タイトル
-        title_text = task.title
-        if task.completed:
-            title_text = f"~~{title_text}~~"
-        
-        title_label = ctk.CTkLabel(
-            title_frame,
-            text=title_text,
-            font=ctk.CTkFont(size=14, weight="bold"),
-            anchor="w"
-        )
-        title_label.pack(side="left", padx=(10, 0), fill="x", expand=True)
-        
-        # 優先度バッジ
-        priority_color = task.get_priority_color()
-        priority_label = ctk.CTkLabel(
-            title_frame,
-            text=f"[{task.priority}]",
-            text_color=priority_color,
-            font=ctk.CTkFont(size=12, weight="bold")
+        # 仮想化タスクリスト（表示領域分の行だけを生成して再利用）
+        self.task_list = VirtualTaskList(
+            self.task_list_frame,
+            on_select=self.on_task_select,
+            order_key=self.get_list_order_key()
         )
-        priority_label.pack(side="right")
-        
-        # 詳細情報行
-        if task.description or task.due_date or task.category or task.progress > 0:
-            details_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
-            details_frame.pack(fill="x", pady=(5, 0))
-            
-            details_text = ""
-            if task.category:
-                details_text += f"📁 {task.category}  "
-            if task.due_date:
-                details_text += f"📅 {task.due_date}  "
-                if task.is_overdue():
-                    details_text += "⚠️ 期限切れ"
-            if task.pomodoro_count > 0:
-                details_text += f"  🍅 {task.pomodoro_count}ポモドーロ"
-            
-            if details_text:
-                details_label = ctk.CTkLabel(
-                    details_frame,
-                    text=details_text,
-                    font=ctk.CTkFont(size=11),
-                    text_color="gray",
-                    anchor="w"
-                )
-                details_label.pack(side="left")
-            
-            # プログレスバー
-            if task.progress > 0:
-                progress_frame = ctk.CTkFrame(details_frame, fg_color="transparent")
-                progress_frame.pack(fill="x", pady=(5, 0))
-                
-                progress_label = ctk.CTkLabel(
-                    progress_frame,
-                    text=f"進捗: {task.progress}%",
-                    font=ctk.CTkFont(size=10),
-                    text_color=task.get_progress_color()
-                )
-                progress_label.pack(side="left")
-                
-                progress_bar = ctk.CTkProgressBar(
-                    progress_frame,
-                    width=150,
-                    height=8,
-                    progress_color=task.get_progress_color()
-                )
-                progress_bar.pack(side="left", padx=(10, 0))
-                progress_bar.set(task.progress / 100)
-            
-            if task.description:
-                desc_label = ctk.CTkLabel(
-                    details_frame,
-                    text=f"💭 {task.description[:50]}..." if len(task.description) > 50 else f"💭 {task.description}",
-                    font=ctk.CTkFont(size=11),
-                    text_color="lightgray",
-                    anchor="w"
-                )
-                desc_label.pack(fill="x", pady=(2, 0))
-        
-        # すべての子ウィジェットにクリックイベントを追加
-        def bind_click_recursive(widget):
-            widget.bind("<Button-1>", lambda e: on_task_select())
-            for child in widget.winfo_children():
-                bind_click_recursive(child)
-        
-        bind_click_recursive(item_frame)
-        
-        self.task_items.append(item_frame)
-        return item_frame
+        self.task_list.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+    
+    def on_task_select(self, task):
+        """タスクリストで選択が変わった時の処理"""
+        self.selected_task = task
+        self.update_button_states()
     
+    @tracked
+    @metrics.timed("gui_update_task_list_seconds")
     def update_task_list(self):
         """タスクリストを更新"""
-        # 既存のタスクアイテムを削除
-        for item in self.task_items:
-            item.destroy()
-        self.task_items.clear()
-        
-        # フィルター適用
+        # フィルター適用（スクロール位置と選択状態はリスト側で維持される）
         tasks = self.get_filtered_tasks()
+        self.task_list.order_key = self.get_list_order_key()
+        self.task_list.set_tasks(
+            self.task_view.arrange(tasks, self.get_sort_by(), self.get_group_by())
+        )
+        self.update_result_count()
         
-        if not tasks:
-            # タスクがない場合のメッセージ
-            no_tasks_label = ctk.CTkLabel(
-                self.scrollable_frame,
-                text="📝 タスクがありません\n\n「新しいタスク」ボタンから\nタスクを追加してください",
-                font=ctk.CTkFont(size=16),
-                text_color="gray"
-            )
-            no_tasks_label.pack(expand=True)
-            self.task_items.append(no_tasks_label)
+        self.selected_task = self.task_list.get_selected_task()
+        self.update_button_states()
+    
+    @tracked
+    def on_task_change(self, event, task):
+        """TaskManagerの変更通知から一覧を差分更新"""
+        # ポモドーロタイマーのスレッドから呼ばれた場合はメインスレッドで処理する
+        if threading.current_thread() is not threading.main_thread():
+            self.root.after(0, lambda: self.on_task_change(event, task))
+            return
+        
+        if event == "reset" or self.task_list.grouped:
+            # グループ化表示は見出しの件数も変わるため一覧ごと再描画する
+            self.refresh.mark_dirty("list")
+        elif event == "removed":
+            self.task_list.remove_task(task.id)
+        elif self.matches_filter(task):
+            self.task_list.insert_task(task)
         else:
-            # タスクアイテムを作成
-            for task in tasks:
-                self.create_task_item(task)
+            self.task_list.remove_task(task.id)
         
-        # 選択状態をリセット
-        self.selected_task = None
+        self.selected_task = self.task_list.get_selected_task()
         self.update_button_states()
+        self.update_result_count()
+        self.update_statistics()
     
-    def get_filtered_tasks(self):
-        """フィルターに基づいてタスクを取得"""
+    @tracked
+    def on_tab_change(self):
+        """タブ切り替え時に未作成のタブを作成し、保留中の再描画を処理"""
+        tab_name = self.tabview.get()
+        self.build_tab(tab_name)
+        
+        if tab_name == "📊 統計":
+            self.refresh.flush_panel("detailed_stats")
+        elif tab_name == "🍅 ポモドーロ":
+            self.refresh.flush_panel("combobox")
+        elif tab_name == "⚙️ 設定":
+            self.update_metrics_panel()
+    
+    def get_sort_by(self):
+        """並び替えメニューの値を並び替えの種類に変換"""
+        return self.sort_names[self.sort_var.get()]
+    
+    def get_group_by(self):
+        """グループ化メニューの値をグループ化の種類に変換"""
+        return self.group_names[self.group_var.get()]
+    
+    def get_list_order_key(self):
+        """一覧への差分挿入に使う並び順キー"""
+        sort_by = self.get_sort_by()
+        if sort_by == "added":
+            return lambda task: self.task_manager.get_order(task.id)
+        return self.task_view.sort_key(sort_by)
+    
+    @tracked
+    def apply_view_options(self, value=None):
+        """並び替え・グループ化を適用"""
+        self.refresh.mark_dirty("list")
+    
+    def get_filter_status(self):
+        """フィルターメニューの値を検索用のステータスに変換"""
         filter_value = self.filter_var.get()
-        
-        if filter_value == "未完了":
-            return self.task_manager.get_incomplete_tasks()
-        elif filter_value == "完了済み":
-            return self.task_manager.get_completed_tasks()
-        elif filter_value == "期限切れ":
-            return self.task_manager.get_overdue_tasks()
+        return None if filter_value == "すべて" else filter_value
+    
+    def matches_filter(self, task):
+        """タスクが現在のフィルター・検索条件に一致するか判定"""
+        return self.task_index.matches(task, self.search_query, self.get_filter_status())
+    
+    def get_filtered_tasks(self):
+        """フィルター・検索条件に基づいてタスクを取得（インデックスから検索）"""
+        return self.task_index.search(self.search_query, self.get_filter_status())
+    
+    @tracked
+    def on_search_input(self, event=None):
+        """検索ボックスの入力（デバウンスしてから検索）"""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(150, self.apply_search)
+    
+    @tracked
+    def apply_search(self):
+        """検索条件を更新して一覧を再描画"""
+        self.search_after_id = None
+        self.search_query = parse_query(self.search_entry.get())
+        self.refresh.mark_dirty("list")
+    
+    def update_result_count(self):
+        """検索結果の件数を表示"""
+        shown = self.task_list.task_count
+        total = len(self.task_manager.tasks)
+        if shown == total:
+            self.result_count_label.configure(text=f"{total}件")
         else:
-            return self.task_manager.tasks
+            self.result_count_label.configure(text=f"{shown}件 / {total}件中")
     
     def update_statistics(self):
-        """統計情報を更新"""
+        """統計情報パネルを再描画待ちにする"""
+        self.refresh.mark_dirty("counters", "detailed_stats", "combobox")
+    
+    @tracked
+    def update_counters(self):
+        """左パネルのタスク数を更新"""
         stats = self.task_manager.get_task_count_by_status()
         
         self.total_label.configure(text=f"総タスク数: {stats['total']}")
         self.incomplete_label.configure(text=f"未完了: {stats['incomplete']}")
         self.completed_label.configure(text=f"完了済み: {stats['completed']}")
-        self.overdue_label.configure(text=f"期限切れ: {stats['overdue']}")
-        
-        # 詳細統計も更新（統計タブが存在する場合）
-        try:
-            self.update_detailed_statistics()
-        except AttributeError:
-            # まだ統計タブが作成されていない場合は無視
-            pass
-        
-        # ポモドーロタブのタスクリストも更新
-        try:
-            self.task_combobox.configure(values=self.get_incomplete_task_titles())
-        except AttributeError:
-            # まだポモドーロタブが作成されていない場合は無視
-            pass
+        overdue_text = f"期限切れ: {stats['overdue']}"
+        if stats['overdue_occurrences']:
+            overdue_text += f"（ほかに繰り返しの回 {stats['overdue_occurrences']}）"
+        self.overdue_label.configure(text=overdue_text)
+    
+    @tracked
+    def update_task_combobox(self):
+        """ポモドーロタブのタスク選択肢を更新"""
+        self.task_combobox.configure(values=self.get_incomplete_task_titles())
     
     def update_button_states(self):
         """ボタンの有効/無効状態を更新"""
-        has_selection = self.selected_task is not None
+        selected_count = len(self.task_list.selected_ids)
         
-        state = "normal" if has_selection else "disabled"
-        self.edit_button.configure(state=state)
+        state = "normal" if selected_count else "disabled"
+        # 編集は1件選択時のみ
+        self.edit_button.configure(state="normal" if selected_count == 1 else "disabled")
         self.delete_button.configure(state=state)
         self.toggle_button.configure(state=state)
+        
+        self.bulk_label.configure(text=f"📦 一括変更（{selected_count}件選択）")
+        for widget in (self.bulk_priority_menu, self.bulk_category_button,
+                       self.bulk_add_tag_button, self.bulk_remove_tag_button):
+            widget.configure(state=state)
     
+    @tracked
     def apply_filter(self, value):
         """フィルターを適用"""
-        self.update_task_list()
+        self.refresh.mark_dirty("list")
     
     def show_add_task_dialog(self):
         """新規タスク追加ダイアログを表示"""
@@ -738,8 +965,6 @@ class TaskApp:
                 progress=dialog.result['progress']
             )
             self.task_manager.add_task(task)
-            self.update_task_list()
-            self.update_statistics()
             
             # 通知音
             self.notification_manager.play_sound('task_complete')
@@ -753,7 +978,8 @@ class TaskApp:
         self.root.wait_window(dialog.dialog)
         
         if dialog.result:
-            self.selected_task.update(
+            self.task_manager.update_task(
+                self.selected_task.id,
                 title=dialog.result['title'],
                 description=dialog.result['description'],
                 priority=dialog.result['priority'],
@@ -763,39 +989,84 @@ class TaskApp:
                 estimated_time=dialog.result['estimated_time'],
                 progress=dialog.result['progress']
             )
-            self.task_manager.save_tasks()
-            self.update_task_list()
-            self.update_statistics()
     
+    def get_selected_ids(self):
+        """選択中のタスクIDの一覧"""
+        return [task.id for task in self.task_list.get_selected_tasks()]
+    
+    @tracked
     def delete_task(self):
-        """選択されたタスクを削除"""
-        if not self.selected_task:
+        """選択されたタスクを削除（複数選択時はまとめて削除）"""
+        task_ids = self.get_selected_ids()
+        if not task_ids:
             return
         
-        result = messagebox.askyesno(
-            "確認",
-            f"タスク「{self.selected_task.title}」を削除しますか？"
-        )
+        if len(task_ids) == 1:
+            message = f"タスク「{self.task_manager.get_task(task_ids[0]).title}」を削除しますか？"
+        else:
+            message = f"選択した{len(task_ids)}件のタスクを削除しますか？"
         
-        if result:
-            self.task_manager.remove_task(self.selected_task.id)
-            self.update_task_list()
-            self.update_statistics()
+        if messagebox.askyesno("確認", message):
+            self.task_manager.delete_tasks(task_ids)
     
+    @tracked
     def toggle_task_completion(self):
-        """選択されたタスクの完了状態を切り替え"""
-        if not self.selected_task:
+        """選択されたタスクの完了状態を切り替え（複数選択時は未完了が残っていればすべて完了にする）"""
+        tasks = self.task_list.get_selected_tasks()
+        if not tasks:
             return
         
-        self.selected_task.toggle_completion()
-        self.task_manager.save_tasks()
-        self.update_task_list()
-        self.update_statistics()
+        if len(tasks) == 1:
+            self.task_manager.toggle_task_completion(tasks[0].id)
+        else:
+            completed = not all(task.completed for task in tasks)
+            self.task_manager.complete_tasks([task.id for task in tasks], completed)
+    
+    @tracked
+    def bulk_set_priority(self, priority):
+        """選択中のタスクの優先度をまとめて変更"""
+        self.bulk_priority_var.set("優先度を変更")
+        self.task_manager.reprioritize_tasks(self.get_selected_ids(), priority)
+    
+    @tracked
+    def bulk_set_category(self):
+        """選択中のタスクのカテゴリをまとめて変更"""
+        task_ids = self.get_selected_ids()
+        if not task_ids:
+            return
+        
+        dialog = ctk.CTkInputDialog(text=f"{len(task_ids)}件のタスクの新しいカテゴリ", title="カテゴリを変更")
+        category = (dialog.get_input() or "").strip()
+        if category:
+            self.task_manager.recategorize_tasks(task_ids, category)
+    
+    @tracked
+    def bulk_retag(self, add: bool):
+        """選択中のタスクにタグをまとめて追加（add=False なら削除）"""
+        task_ids = self.get_selected_ids()
+        if not task_ids:
+            return
+        
+        action = "追加" if add else "削除"
+        dialog = ctk.CTkInputDialog(text=f"{action}するタグ (カンマ区切り)", title=f"タグを{action}")
+        tags = [tag.strip() for tag in (dialog.get_input() or "").split(",") if tag.strip()]
+        if not tags:
+            return
+        
+        if add:
+            self.task_manager.retag_tasks(task_ids, add=tags)
+        else:
+            self.task_manager.retag_tasks(task_ids, remove=tags)
     
     def on_closing(self):
         """アプリケーション終了時の処理"""
         self.pomodoro_timer.stop()
-        self.task_manager.save_tasks()
+        if self.ui_monitor.lags.count:
+            self.ui_monitor.stop()
+            print(self.ui_monitor.format_report())
+        # 読み込み完了前に保存すると空のリストで上書きしてしまうため保存しない
+        if self.tasks_loaded:
+            self.task_manager.save_tasks()
         self.root.destroy()
     
     # ポモドーロタイマー関連メソッド
@@ -853,13 +1124,11 @@ class TaskApp:
             # 作業セッション完了
             task_title = self.current_task_var.get()
             if task_title and task_title != "タスクを選択してください":
-                # 選択されたタスクのポモドーロ回数を増加
-                for task in self.task_manager.tasks:
+                # 選択されたタスクのポモドーロ回数を増加（タイマーのスレッドなのでスナップショットから探す）
+                for task in self.task_manager.snapshot():
                     if task.title == task_title:
-                        task.increment_pomodoro()
+                        self.task_manager.increment_pomodoro(task.id)
                         break
-                self.task_manager.save_tasks()
-                self.update_task_list()
             
             self.notification_manager.show_notification(
                 "ポモドーロ完了！",
@@ -881,6 +1150,7 @@ class TaskApp:
         return ["タスクを選択してください"] + titles if titles else ["タスクを選択してください"]
     
     # 統計関連メソッド
+    @tracked
     def update_detailed_statistics(self):
         """詳細統計を更新"""
         # 生産性統計の更新
@@ -897,6 +1167,7 @@ class TaskApp:
         🍅 総ポモドーロ: {productivity_stats['total_pomodoros']}回
         📊 効率性: {productivity_stats['efficiency']}%
         ⌚ 平均タスク時間: {productivity_stats['average_task_time']}分
+        🗄️ アーカイブ済み: {productivity_stats['archived_tasks']}件
         """
         
         ctk.CTkLabel(
@@ -923,20 +1194,20 @@ class TaskApp:
                 justify="left"
             ).pack(anchor="w", pady=2)
     
+    @tracked
     def export_statistics(self):
         """統計データをエクスポート"""
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".json",
-                filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
-                title="統計データを保存"
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            title="統計データを保存"
+        )
+        
+        if filename:
+            self.run_transfer(
+                export_statistics_job(self.statistics, filename),
+                lambda result: messagebox.showinfo("成功", f"統計データを {filename} にエクスポートしました。")
             )
-            
-            if filename:
-                self.statistics.export_statistics(filename)
-                messagebox.showinfo("成功", f"統計データを {filename} にエクスポートしました。")
-        except Exception as e:
-            messagebox.showerror("エラー", f"エクスポートに失敗しました: {e}")
     
     # 設定関連メソッド
     def change_theme(self, new_theme):
@@ -948,49 +1219,145 @@ class TaskApp:
         """サウンドの有効/無効を切り替え"""
         self.notification_manager.set_sound_enabled(self.sound_enabled_var.get())
     
+    def toggle_metrics(self):
+        """処理時間の計測の有効/無効を切り替え"""
+        metrics.enabled = self.metrics_enabled_var.get()
+        self.update_metrics_panel()
+    
+    def toggle_ui_monitor(self):
+        """UIの応答性の監視の開始/停止を切り替え"""
+        if self.ui_monitor_var.get():
+            self.ui_monitor.start()
+        else:
+            self.ui_monitor.stop()
+    
+    @tracked
+    def update_metrics_panel(self):
+        """計測結果の表示を更新"""
+        text = metrics.format_summary()
+        if not metrics.enabled:
+            text = "計測は無効です（有効にすると以降の処理時間を記録します）\n\n" + text
+        self.metrics_text.configure(state="normal")
+        self.metrics_text.delete("1.0", "end")
+        self.metrics_text.insert("1.0", text)
+        self.metrics_text.configure(state="disabled")
+    
+    def refresh_metrics_panel(self):
+        """設定タブの表示中だけ計測結果を定期的に更新"""
+        if metrics.enabled and self.tabview.get() == "⚙️ 設定":
+            self.update_metrics_panel()
+        self.root.after(METRICS_REFRESH_INTERVAL_MS, self.refresh_metrics_panel)
+    
+    def reset_metrics(self):
+        """計測結果を消去"""
+        metrics.reset()
+        self.update_metrics_panel()
+    
+    def export_metrics(self):
+        """計測結果を Prometheus のテキスト形式で保存"""
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".prom",
+            filetypes=[("Prometheus text", "*.prom"), ("All files", "*.*")],
+            title="計測結果を保存"
+        )
+        
+        if filename:
+            try:
+                write_prometheus(filename)
+            except OSError as e:
+                messagebox.showerror("エラー", f"計測結果の保存に失敗しました: {e}")
+    
+    @tracked
     def export_tasks(self):
-        """タスクをJSONファイルにエクスポート"""
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".json",
-                filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
-                title="タスクデータを保存"
+        """タスクをJSONファイルにエクスポート（バックグラウンドで実行）"""
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            title="タスクデータを保存"
+        )
+        
+        if filename:
+            self.run_transfer(
+                export_tasks_job(self.task_manager.snapshot(), filename),
+                lambda count: messagebox.showinfo("成功", f"タスクデータを {filename} にエクスポートしました。")
             )
-            
-            if filename:
-                tasks_data = [task.to_dict() for task in self.task_manager.tasks]
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(tasks_data, f, ensure_ascii=False, indent=2)
-                messagebox.showinfo("成功", f"タスクデータを {filename} にエクスポートしました。")
-        except Exception as e:
-            messagebox.showerror("エラー", f"エクスポートに失敗しました: {e}")
     
+    @tracked
     def import_tasks(self):
-        """JSONファイルからタスクをインポート"""
-        try:
-            filename = filedialog.askopenfilename(
-                filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
-                title="タスクデータを読み込み"
-            )
-            
-            if filename:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    tasks_data = json.load(f)
-                
-                imported_count = 0
-                for task_data in tasks_data:
-                    try:
-                        task = Task.from_dict(task_data)
-                        self.task_manager.add_task(task)
-                        imported_count += 1
-                    except Exception:
-                        continue  # 無効なタスクデータはスキップ
-                
-                self.update_task_list()
-                self.update_statistics()
-                messagebox.showinfo("成功", f"{imported_count}件のタスクをインポートしました。")
-        except Exception as e:
-            messagebox.showerror("エラー", f"インポートに失敗しました: {e}")
+        """JSONファイルからタスクをインポート（バックグラウンドで実行）"""
+        if not self.tasks_loaded:
+            messagebox.showinfo("お待ちください", "タスクの読み込みが完了してから実行してください。")
+            return
+        
+        filename = filedialog.askopenfilename(
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            title="タスクデータを読み込み"
+        )
+        
+        if filename:
+            self.run_transfer(import_tasks_job(filename), self.on_import_finished)
+    
+    @tracked
+    def on_import_finished(self, result):
+        """インポート結果をまとめてTaskManagerに反映"""
+        tasks, skipped = result
+        imported_count = self.task_manager.add_tasks(tasks)
+        skipped += len(tasks) - imported_count
+        
+        message = f"{imported_count}件のタスクをインポートしました。"
+        if skipped:
+            message += f"\n（{skipped}件は無効または重複のためスキップしました）"
+        messagebox.showinfo("成功", message)
+    
+    def run_transfer(self, job, on_success):
+        """転送ジョブを開始し、完了まで進捗を表示"""
+        if self.transfer_job is not None and not self.transfer_job.done:
+            messagebox.showinfo("実行中", "別のインポート/エクスポートが実行中です。")
+            return
+        
+        # 進捗の表示は設定タブにある（統計タブから呼ばれた場合は未作成のことがある）
+        self.build_tab("⚙️ 設定")
+        self.transfer_job = job
+        self.transfer_progress.set(0)
+        self.transfer_cancel_button.configure(state="normal")
+        job.start()
+        self.poll_transfer(job, on_success)
+    
+    @tracked
+    def poll_transfer(self, job, on_success):
+        """転送ジョブの進捗を定期的に反映"""
+        progress = job.get_progress()
+        self.transfer_progress.set(progress['fraction'])
+        
+        if progress['unit'] == "バイト":
+            processed = f"{progress['processed'] / 1024 / 1024:.1f} MB"
+            throughput = f"{progress['throughput'] / 1024 / 1024:.1f} MB/秒"
+        else:
+            processed = f"{progress['processed']}/{progress['total']}{progress['unit']}"
+            throughput = f"{progress['throughput']:.0f}{progress['unit']}/秒"
+        self.transfer_status_label.configure(
+            text=f"{job.name}: {processed}（{throughput}）"
+        )
+        
+        if not job.done:
+            self.root.after(100, lambda: self.poll_transfer(job, on_success))
+            return
+        
+        self.transfer_cancel_button.configure(state="disabled")
+        if isinstance(job.error, TransferCancelled):
+            self.transfer_status_label.configure(text=f"{job.name}をキャンセルしました")
+            self.transfer_progress.set(0)
+        elif job.error is not None:
+            self.transfer_status_label.configure(text=f"{job.name}に失敗しました")
+            messagebox.showerror("エラー", f"{job.name}に失敗しました: {job.error}")
+        else:
+            self.transfer_progress.set(1)
+            on_success(job.result)
+    
+    def cancel_transfer(self):
+        """実行中の転送ジョブをキャンセル"""
+        if self.transfer_job is not None:
+            self.transfer_job.cancel()
     
     def run(self):
         """アプリケーションを実行"""
@@ -0,0 +1,505 @@
+"""
+完了済みタスクのアーカイブ
+完了してから一定の日数が経ったタスクをデータファイルから外し、圧縮した追記専用の
+アーカイブファイル（tasks.json なら tasks.archive）に移す。
+
+ファイルの構成:
+    ヘッダー   マジック "TMAR"・形式のバージョン・世代（詰め直すたびに変わる）（HEADER）
+    フレーム   (長さ, CRC32)（FRAME）と zlib で圧縮したJSON の並び。1回の移動で
+               完了月（updated_at の年月）とカテゴリの組ごとに1フレームを追記する。
+               復元は復元したIDを記録したフレームの追記で表し、既存のフレームは書き換えない
+
+索引ファイル（tasks.archive.idx）には完了月・カテゴリごとのフレームの位置と集計
+（件数・作業時間・優先度・タグなど）と、アーカイブ中のタスクの ID -> フレームの位置を持つ。
+統計は集計を足し込むだけで求め、検索は条件に合う完了月・カテゴリのフレームだけを展開する。
+索引はアーカイブファイルから作り直せるキャッシュで、他のプロセスが追記した分は
+次に参照したときに末尾のフレームだけを読んで取り込む。
+
+完了した日時は記録していないため、完了済みタスクの updated_at を完了日時とみなす
+（statistics の「最も生産性の高い曜日」などと同じ扱い）。
+"""
+import json
+import os
+import struct
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, Optional
+from modules.file_lock import FileLock
+from modules.metrics import registry as metrics
+from modules.search import task_matches
+from modules.task import Task
+
+
+MAGIC = b"TMAR"
+FORMAT_VERSION = 1
+INDEX_VERSION = 1
+HEADER = struct.Struct("<4sH16s")  # マジック, バージョン, 世代
+FRAME = struct.Struct("<II")  # 圧縮したJSONの長さ, CRC32
+COMPRESS_LEVEL = 6
+
+ARCHIVE_AFTER_DAYS = 90  # archive run で日数を指定しなかった場合に、完了から何日経ったタスクを移すか
+# 週別進捗・最近の完了数（直近7日）がデータファイルのタスクだけで求まるように、これより短くしない
+MIN_ARCHIVE_AFTER_DAYS = 7
+ARCHIVE_DAYS_ENV = "TASKMASTER_ARCHIVE_DAYS"
+UNKNOWN_MONTH = "不明"  # updated_at が読めないタスクの完了月
+
+metrics.describe("task_archive_seconds", "アーカイブの操作（op は append / restore / search / compact）")
+
+
+class ArchiveFormatError(ValueError):
+    """アーカイブファイルではない、または対応していない形式"""
+
+
+def normalize_archive_days(days: Optional[int]) -> Optional[int]:
+    """アーカイブに移すまでの日数（None と 0 以下は移さない、短すぎる日数は下限に揃える）"""
+    if days is None or days <= 0:
+        return None
+    return max(days, MIN_ARCHIVE_AFTER_DAYS)
+
+
+def archive_days_from_env(default: Optional[int] = None) -> Optional[int]:
+    """
+    環境変数 TASKMASTER_ARCHIVE_DAYS の日数（0 は移さない。未設定なら default）
+
+    読み込み時のアーカイブは、既定では行わない（環境変数か --archive-days で有効にする）。
+    """
+    value = os.environ.get(ARCHIVE_DAYS_ENV)
+    if value is None or not value.strip():
+        return normalize_archive_days(default)
+    try:
+        return normalize_archive_days(int(value))
+    except ValueError:
+        print(f"{ARCHIVE_DAYS_ENV} は日数（整数）で指定してください: {value}")
+        return normalize_archive_days(default)
+
+
+def completion_month(data: dict) -> str:
+    """タスクの辞書の完了月（YYYY-MM）"""
+    try:
+        return datetime.fromisoformat(data.get('updated_at') or "").strftime('%Y-%m')
+    except (TypeError, ValueError):
+        return UNKNOWN_MONTH
+
+
+def new_rollup() -> dict:
+    """集計の初期値"""
+    return {'count': 0, 'estimated_time': 0, 'actual_time': 0, 'pomodoros': 0,
+            'completion_days': 0, 'priorities': {}, 'tags': {}, 'weekdays': {}}
+
+
+def merge_rollup(total: dict, rollup: dict) -> dict:
+    """rollup を total に足し込む（total を返す）"""
+    for name, value in rollup.items():
+        if isinstance(value, dict):
+            counts = total.setdefault(name, {})
+            for key, count in value.items():
+                counts[key] = counts.get(key, 0) + count
+        else:
+            total[name] = total.get(name, 0) + value
+    return total
+
+
+def _bucket_order(key: tuple) -> tuple:
+    """(完了月, カテゴリ) の並び順（カテゴリが None でも比べられるように）"""
+    month, category = key
+    return (month, category or "")
+
+
+def _add_count(counts: dict, key: str, sign: int):
+    count = counts.get(key, 0) + sign
+    if count:
+        counts[key] = count
+    else:
+        counts.pop(key, None)
+
+
+def _apply_rollup(rollup: dict, data: dict, sign: int):
+    """1件のタスクを集計に加える（sign=-1 なら取り除く）"""
+    rollup['count'] += sign
+    rollup['estimated_time'] += sign * (data.get('estimated_time') or 0)
+    rollup['actual_time'] += sign * (data.get('actual_time') or 0)
+    rollup['pomodoros'] += sign * (data.get('pomodoro_count') or 0)
+    _add_count(rollup['priorities'], data.get('priority', '中'), sign)
+    for tag in data.get('tags') or ():
+        _add_count(rollup['tags'], tag, sign)
+    try:
+        completed_at = datetime.fromisoformat(data['updated_at'])
+        days = (completed_at - datetime.fromisoformat(data['created_at'])).days
+    except (KeyError, TypeError, ValueError):
+        return
+    rollup['completion_days'] += sign * days
+    _add_count(rollup['weekdays'], completed_at.strftime('%A'), sign)
+
+
+class TaskArchive:
+    """
+    完了済みタスクのアーカイブファイル
+
+    複数のスレッド・プロセスから使ってよい（操作ごとにアーカイブファイルのロックを取る）。
+    アーカイブファイルがなければ、追記するまでファイルを作らない。
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): アーカイブファイルのパス（索引はパスに .idx を付けたファイル）
+        """
+        self.path = path
+        self.index_file = path + ".idx"
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(path + ".lock")
+        self._index_loaded = False
+        self._reset(None)
+        self._state = None  # 最後に取り込んだときのアーカイブファイルの (サイズ, 更新時刻)
+
+    def _reset(self, generation: Optional[str]):
+        self._generation = generation
+        self._size = HEADER.size  # 索引に取り込んだバイト数（正しく読めたフレームの末尾）
+        self._buckets = {}  # (完了月, カテゴリ) -> {'frames': [位置], 'rollup': 集計}
+        self._locations = {}  # アーカイブ中のタスクの ID -> フレームの位置
+        self._frame_keys = {}  # フレームの位置 -> (完了月, カテゴリ)
+        self._frame_cache = (None, None)  # 最後に展開したフレームの (位置, 内容)
+
+    @contextmanager
+    def _locked(self):
+        """スレッドとプロセスの両方を排他して、他のプロセスの追記を取り込んだ状態で実行"""
+        with self._lock, self._file_lock.acquire():
+            self._refresh()
+            yield
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _file_state(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    # --- 索引 ---
+
+    def _refresh(self):
+        """アーカイブファイルの変更（他のプロセスの追記・詰め直し）を索引に取り込む"""
+        state = self._file_state()
+        if state == self._state:
+            return
+        if state is None:
+            self._reset(None)
+            self._state = None
+            return
+        if not self._index_loaded:
+            self._load_index()
+        generation = self._read_generation()
+        if generation != self._generation or state[0] < self._size:
+            self._reset(generation)
+        if state[0] > self._size:
+            size = self._size
+            self._replay()
+            if self._size != size:
+                self._save_index()
+        self._state = state
+
+    def _read_generation(self) -> str:
+        with open(self.path, 'rb') as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ArchiveFormatError(f"アーカイブファイルが壊れています: {self.path}")
+        magic, version, generation = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ArchiveFormatError(f"アーカイブファイルではありません: {self.path}")
+        if version > FORMAT_VERSION:
+            raise ArchiveFormatError(f"対応していないアーカイブの形式です（バージョン {version}）")
+        return generation.hex()
+
+    def _load_index(self):
+        """索引ファイルを読み込む（読めなければアーカイブファイルから作り直す）"""
+        self._index_loaded = True
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') != INDEX_VERSION:
+                return
+            self._reset(index['generation'])
+            for bucket in index['buckets']:
+                key = (bucket['month'], bucket['category'])
+                self._buckets[key] = {'frames': bucket['frames'], 'rollup': bucket['rollup']}
+                for offset in bucket['frames']:
+                    self._frame_keys[offset] = key
+            self._locations = index['tasks']
+            self._size = index['size']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"アーカイブの索引を読み込めません（作り直します）: {e}")
+            self._reset(None)
+
+    def _save_index(self):
+        index = {
+            'version': INDEX_VERSION,
+            'generation': self._generation,
+            'size': self._size,
+            'buckets': [{'month': month, 'category': category, 'frames': bucket['frames'],
+                         'rollup': bucket['rollup']}
+                        for (month, category), bucket in self._buckets.items()],
+            'tasks': self._locations
+        }
+        temp_file = self.index_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(temp_file, self.index_file)
+
+    def _replay(self):
+        """索引に取り込んだ位置より後のフレームを取り込む（途中で壊れていればそこまで）"""
+        with open(self.path, 'rb') as f:
+            f.seek(self._size)
+            while True:
+                offset = f.tell()
+                record = self._read_record(f)
+                if record is None:
+                    break
+                self._apply(offset, record)
+                self._size = f.tell()
+
+    @staticmethod
+    def _read_record(f) -> Optional[dict]:
+        header = f.read(FRAME.size)
+        if len(header) < FRAME.size:
+            return None
+        length, crc = FRAME.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return None
+        return json.loads(zlib.decompress(payload))
+
+    def _read_frame(self, offset: int) -> dict:
+        """位置を指定してフレームを展開（直前に展開したフレームは使い回す）"""
+        cached_offset, record = self._frame_cache
+        if cached_offset == offset:
+            return record
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            record = self._read_record(f)
+        if record is None:
+            raise ArchiveFormatError(f"アーカイブのフレームを読めません（位置 {offset}）")
+        self._frame_cache = (offset, record)
+        return record
+
+    def _archived_data(self, task_id: str) -> Optional[dict]:
+        """アーカイブ中のタスクの辞書"""
+        offset = self._locations.get(task_id)
+        if offset is None:
+            return None
+        return next((data for data in self._read_frame(offset)['tasks'] if data.get('id') == task_id), None)
+
+    def _apply(self, offset: int, record: dict):
+        """フレームの内容を索引と集計に反映"""
+        if record.get('op') == 'archive':
+            key = (record['month'], record['category'])
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = {'frames': [], 'rollup': new_rollup()}
+            bucket['frames'].append(offset)
+            self._frame_keys[offset] = key
+            for data in record['tasks']:
+                self._remove(data['id'])  # 同じタスクが再びアーカイブされた場合は新しい方を残す
+                self._locations[data['id']] = offset
+                _apply_rollup(bucket['rollup'], data, 1)
+        elif record.get('op') == 'restore':
+            for task_id in record['ids']:
+                self._remove(task_id)
+
+    def _remove(self, task_id: str):
+        data = self._archived_data(task_id)
+        if data is None:
+            return
+        offset = self._locations.pop(task_id)
+        _apply_rollup(self._buckets[self._frame_keys[offset]]['rollup'], data, -1)
+
+    # --- 書き込み ---
+
+    @staticmethod
+    def _encode(record: dict) -> bytes:
+        payload = zlib.compress(json.dumps(record, ensure_ascii=False).encode('utf-8'), COMPRESS_LEVEL)
+        return FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+    def _append_records(self, records: list):
+        """フレームを追記し、索引に反映して保存（ロック中に呼ぶ）"""
+        if not self.exists():
+            generation = uuid.uuid4().bytes
+            with open(self.path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, FORMAT_VERSION, generation))
+            self._reset(generation.hex())
+        with open(self.path, 'r+b') as f:
+            # 途中で止まった書き込みの残りがあれば切り詰めてから追記する
+            f.seek(self._size)
+            f.truncate()
+            for record in records:
+                offset = f.tell()
+                f.write(self._encode(record))
+                self._apply(offset, record)
+            f.flush()
+            os.fsync(f.fileno())
+            self._size = f.tell()
+        self._state = self._file_state()
+        self._save_index()
+
+    @metrics.timed("task_archive_seconds", op="append")
+    def append(self, tasks: Iterable[Task]) -> int:
+        """
+        タスクをアーカイブに追記し、追記した件数を返す
+
+        既にアーカイブ中のタスクは追記しない（データファイルから外す前に止まった場合の
+        やり直しで重複しないように）。完了月とカテゴリの組ごとに1フレームにまとめる。
+        """
+        groups = {}
+        archived_at = datetime.now().isoformat()
+        with self._locked():
+            for task in tasks:
+                if task.id in self._locations:
+                    continue
+                data = task.to_dict()
+                groups.setdefault((completion_month(data), data.get('category')), []).append(data)
+            if not groups:
+                return 0
+            self._append_records([
+                {'op': 'archive', 'month': month, 'category': category,
+                 'archived_at': archived_at, 'tasks': items}
+                for (month, category), items in sorted(groups.items(), key=lambda item: _bucket_order(item[0]))
+            ])
+        return sum(len(items) for items in groups.values())
+
+    def get_tasks(self, task_ids: Iterable[str]) -> list:
+        """アーカイブ中のタスク（見つからないIDは除く）"""
+        if not self.exists():
+            return []
+        with self._locked():
+            return [Task.from_dict(data) for data in map(self._archived_data, dict.fromkeys(task_ids))
+                    if data is not None]
+
+    @metrics.timed("task_archive_seconds", op="restore")
+    def mark_restored(self, task_ids: Iterable[str]) -> int:
+        """
+        タスクをアーカイブから外す（データファイルに戻した後に呼ぶ）
+
+        外した件数を返す。フレームは書き換えず、復元の記録を追記する。
+        """
+        if not self.exists():
+            return 0
+        with self._locked():
+            restored = [task_id for task_id in dict.fromkeys(task_ids) if task_id in self._locations]
+            if restored:
+                self._append_records([{'op': 'restore', 'ids': restored,
+                                       'restored_at': datetime.now().isoformat()}])
+        return len(restored)
+
+    @metrics.timed("task_archive_seconds", op="compact")
+    def compact(self) -> tuple:
+        """
+        復元済みのタスクを除いてアーカイブファイルを作り直す（完了月・カテゴリごとに1フレーム）
+
+        (作り直す前のバイト数, 後のバイト数) を返す。
+        """
+        if not self.exists():
+            return (0, 0)
+        with self._locked():
+            before = self._size
+            records = []
+            for (month, category), bucket in sorted(self._buckets.items(), key=lambda item: _bucket_order(item[0])):
+                items = [data for offset in bucket['frames'] for data in self._read_frame(offset)['tasks']
+                         if self._locations.get(data.get('id')) == offset]
+                if items:
+                    records.append({'op': 'archive', 'month': month, 'category': category,
+                                    'archived_at': datetime.now().isoformat(), 'tasks': items})
+
+            generation = uuid.uuid4().bytes
+            temp_file = self.path + ".tmp"
+            with open(temp_file, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, FORMAT_VERSION, generation))
+                for record in records:
+                    f.write(self._encode(record))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.path)
+            self._reset(generation.hex())
+            self._replay()
+            self._state = self._file_state()
+            self._save_index()
+            return (before, self._size)
+
+    # --- 参照 ---
+
+    def __len__(self) -> int:
+        """アーカイブ中のタスク数"""
+        if not self.exists():
+            return 0
+        with self._locked():
+            return len(self._locations)
+
+    def __contains__(self, task_id: str) -> bool:
+        if not self.exists():
+            return False
+        with self._locked():
+            return task_id in self._locations
+
+    def buckets(self) -> list:
+        """
+        完了月・カテゴリごとの集計（完了月の順）
+
+        各要素は {'month', 'category'} と new_rollup の各項目（件数・予想時間・実作業時間・
+        ポモドーロ回数・完了までの日数の合計・優先度別・タグ別・完了した曜日別の件数）。
+        """
+        if not self.exists():
+            return []
+        with self._locked():
+            return [dict(merge_rollup(new_rollup(), bucket['rollup']), month=month, category=category)
+                    for (month, category), bucket in sorted(self._buckets.items(), key=lambda item: _bucket_order(item[0]))
+                    if bucket['rollup']['count']]
+
+    def summary(self) -> dict:
+        """全体の集計（new_rollup の各項目）"""
+        total = new_rollup()
+        for bucket in self.buckets():
+            bucket = dict(bucket)
+            del bucket['month'], bucket['category']
+            merge_rollup(total, bucket)
+        return total
+
+    @metrics.timed("task_archive_seconds", op="search")
+    def search(self, query: dict, month_from: Optional[str] = None, month_to: Optional[str] = None,
+               limit: Optional[int] = None) -> list:
+        """
+        アーカイブ中のタスクを検索（完了日時の新しい順）
+
+        カテゴリと完了月（YYYY-MM、両端を含む）で展開するフレームを絞り込み、
+        残りの条件はフレーム内のタスクごとに判定する。
+
+        Args:
+            query (dict): parse_query の結果
+            month_from (Optional[str]): 完了月の下限
+            month_to (Optional[str]): 完了月の上限
+            limit (Optional[int]): 最大件数
+        """
+        if not self.exists():
+            return []
+        category = query.get('category')
+        results = []
+        with self._locked():
+            keys = [key for key, bucket in self._buckets.items()
+                    if bucket['rollup']['count']
+                    and (category is None or key[1] == category)
+                    and (month_from is None or key[0] >= month_from)
+                    and (month_to is None or key[0] <= month_to)]
+            for key in sorted(keys, key=_bucket_order, reverse=True):
+                for offset in reversed(self._buckets[key]['frames']):
+                    for data in self._read_frame(offset)['tasks']:
+                        if self._locations.get(data.get('id')) != offset:
+                            continue
+                        task = Task.from_dict(data)
+                        if task_matches(task, query):
+                            results.append(task)
+        results.sort(key=lambda task: task.updated_at or "", reverse=True)
+        return results[:limit] if limit is not None else results
@@ -0,0 +1,352 @@
+"""
+バイナリ形式のタスクデータファイル
+JSON の代わりに固定長のレコード表と文字列ヒープでタスクを保存する。
+読み込みはファイルを mmap で開くだけで、タスクの属性は参照したときにレコードから読み込む。
+
+ファイルの構成（リトルエンディアン）:
+    ヘッダー       マジック "TMDB"・形式のバージョン・レコード数・各領域の位置（HEADER）
+    レコード表     1タスク1レコードの固定長（RECORD）。文字列はヒープ上の (位置, 長さ)
+    文字列ヒープ   タイトル・説明・タグなどの UTF-8。優先度・カテゴリ・期限日・タグは
+                   同じ内容を1回だけ置いて共有する
+    ID 索引        (ID の CRC32, レコード番号) を CRC32 の順に並べたもの（二分探索で引く）
+
+保存時は元のファイルのヒープをそのまま引き継ぎ、変更していないタスクのレコードは
+バイト列のまま写す。変更・削除したタスクの文字列はヒープに残るため、そうした
+レコードの数（stale_records）が残っているレコードの数を超えたら全体を詰め直す。
+
+Windows では mmap したファイルを置き換えられないため、ファイル全体をメモリに読み込む
+（レコードの遅延読み込みはそのまま）。
+"""
+import mmap
+import os
+import struct
+import zlib
+from typing import Iterator, Optional
+
+
+MAGIC = b"TMDB"
+FORMAT_VERSION = 1
+BINARY_EXTENSION = ".tmdb"  # この拡張子のデータファイルはバイナリ形式で保存する
+
+USE_MMAP = os.name != "nt"
+
+# マジック, バージョン, フラグ, レコード長, レコード数, 不要になったレコード数,
+# レコード表の位置, ヒープの位置, ヒープの長さ, 索引の位置
+HEADER = struct.Struct("<4sHHIQQQQQQ")
+# revision, 文字列の (位置, 長さ) × 9, 整数 × 4, completed
+RECORD = struct.Struct("<Q18I4iB3x")
+INDEX_ENTRY = struct.Struct("<II")
+REVISION = struct.Struct("<Q")  # レコードの先頭
+ID_REF = struct.Struct("<II")  # revision の次（id の位置と長さ）
+
+NONE_LENGTH = 0xFFFFFFFF  # 文字列が None であることを表す長さ
+TAG_SEPARATOR = "\x1f"  # タグを1つの文字列にまとめるときの区切り
+
+STRING_FIELDS = ('id', 'title', 'description', 'priority', 'category', 'due_date', 'tags',
+                 'created_at', 'updated_at')
+INT_FIELDS = ('estimated_time', 'progress', 'pomodoro_count', 'actual_time')
+FIELDS = STRING_FIELDS + INT_FIELDS + ('completed', 'revision')
+SHARED_FIELDS = frozenset(('priority', 'category', 'due_date', 'tags'))  # ヒープで共有する文字列
+# 絞り込みや統計で参照する小さな属性（どれかを読むときにまとめて読む）
+SUMMARY_FIELDS = frozenset(SHARED_FIELDS | set(INT_FIELDS) | {'completed'})
+
+# 属性名 -> RECORD を展開したタプル内の位置（文字列は位置と長さの先頭）
+_SLOTS = {'revision': 0, 'completed': 23}
+_SLOTS.update((name, 1 + index * 2) for index, name in enumerate(STRING_FIELDS))
+_SLOTS.update((name, 19 + index) for index, name in enumerate(INT_FIELDS))
+_STRING_SLOTS = tuple((name, _SLOTS[name]) for name in STRING_FIELDS)
+_INT_SLOTS = tuple((name, _SLOTS[name]) for name in INT_FIELDS)
+_ID_SLOT = _SLOTS['id']
+
+
+class StoreFormatError(ValueError):
+    """バイナリ形式として読めないファイル"""
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def is_binary_store(path: str) -> bool:
+    """ファイルがバイナリ形式か（先頭のマジックで判定。ファイルがなければ False）"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except FileNotFoundError:
+        return False
+
+
+class BinaryTaskStore:
+    """
+    バイナリ形式のデータファイルを読むクラス
+
+    開くときに読むのはヘッダーだけで、レコードは要求されたものだけを読む。
+    ファイルを置き換えても、開いている間は開いた時点の内容を読める。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            if USE_MMAP and os.fstat(f.fileno()).st_size:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._buffer = f.read()
+
+        if len(self._buffer) < HEADER.size:
+            raise StoreFormatError(f"バイナリ形式のデータファイルではありません: {path}")
+        (magic, self.version, _flags, record_size, self.count, self.stale_records, self._records_offset,
+         self._heap_offset, self._heap_size, self._index_offset) = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise StoreFormatError(f"バイナリ形式のデータファイルではありません: {path}")
+        if self.version > FORMAT_VERSION:
+            raise StoreFormatError(f"新しい形式（バージョン {self.version}）のデータファイルは読み込めません: {path}")
+        if record_size != RECORD.size or (self._index_offset + self.count * INDEX_ENTRY.size
+                                          > len(self._buffer)):
+            raise StoreFormatError(f"データファイルが壊れています: {path}")
+        self._shared = {}  # ヒープ上の位置 -> デコードした共有文字列
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def _unpack(self, record: int) -> tuple:
+        return RECORD.unpack_from(self._buffer, self._records_offset + record * RECORD.size)
+
+    def _raw_record(self, record: int) -> bytes:
+        start = self._records_offset + record * RECORD.size
+        return self._buffer[start:start + RECORD.size]
+
+    def _raw_string(self, offset: int, length: int) -> Optional[bytes]:
+        if length == NONE_LENGTH:
+            return None
+        start = self._heap_offset + offset
+        return self._buffer[start:start + length]
+
+    def _decode(self, name: str, offset: int, length: int):
+        if length == NONE_LENGTH:
+            return None
+        if name in SHARED_FIELDS:
+            value = self._shared.get(offset)
+            if value is None:
+                value = self._shared[offset] = self._raw_string(offset, length).decode('utf-8')
+            if name == 'tags':
+                return value.split(TAG_SEPARATOR) if value else []
+            return value
+        start = self._heap_offset + offset
+        return self._buffer[start:start + length].decode('utf-8')
+
+    def _value(self, values: tuple, name: str):
+        slot = _SLOTS[name]
+        if name in STRING_FIELDS:
+            return self._decode(name, values[slot], values[slot + 1])
+        if name == 'completed':
+            return bool(values[slot])
+        return values[slot]
+
+    def read_field(self, record: int, name: str):
+        """レコードの1つの属性を読む（tags はリスト）"""
+        return self._value(self._unpack(record), name)
+
+    def read_summary(self, record: int) -> dict:
+        """レコードの SUMMARY_FIELDS の属性をまとめて読む（タイトル・説明・日時は読まない）"""
+        (_, _, _, _, _, _, _, priority, priority_length, category, category_length, due_date, due_date_length,
+         tags, tags_length, _, _, _, _, estimated_time, progress, pomodoro_count, actual_time,
+         completed) = self._unpack(record)
+        decode = self._decode
+        return {
+            'priority': decode('priority', priority, priority_length),
+            'category': decode('category', category, category_length),
+            'due_date': decode('due_date', due_date, due_date_length),
+            'tags': decode('tags', tags, tags_length),
+            'estimated_time': estimated_time,
+            'progress': progress,
+            'pomodoro_count': pomodoro_count,
+            'actual_time': actual_time,
+            'completed': bool(completed)
+        }
+
+    def read_fields(self, record: int) -> dict:
+        """レコードの全属性を Task.to_dict と同じ形の辞書で読む"""
+        values = self._unpack(record)
+        decode = self._decode
+        data = {name: decode(name, values[slot], values[slot + 1]) for name, slot in _STRING_SLOTS}
+        data.update((name, values[slot]) for name, slot in _INT_SLOTS)
+        data['completed'] = bool(values[_SLOTS['completed']])
+        data['revision'] = values[0]
+        return data
+
+    def scan(self, field: str = 'revision') -> Iterator[tuple]:
+        """全レコードの (レコード番号, id, 指定した属性の値) を順に返す"""
+        slot = _SLOTS[field]
+        string_field = field in STRING_FIELDS
+        buffer = self._buffer
+        heap_offset = self._heap_offset
+        end = self._records_offset + self.count * RECORD.size
+        with memoryview(buffer) as view:
+            records = view[self._records_offset:end]
+            try:
+                for record, values in enumerate(RECORD.iter_unpack(records)):
+                    start = heap_offset + values[_ID_SLOT]
+                    task_id = buffer[start:start + values[_ID_SLOT + 1]].decode('utf-8')
+                    value = self._decode(field, values[slot], values[slot + 1]) if string_field else values[slot]
+                    yield record, task_id, value
+            finally:
+                records.release()
+
+    def find(self, task_id: str) -> Optional[int]:
+        """ID のレコード番号（なければ None）。ID 索引を二分探索する"""
+        encoded = task_id.encode('utf-8')
+        key = zlib.crc32(encoded)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if INDEX_ENTRY.unpack_from(self._buffer, self._index_offset + middle * INDEX_ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        # CRC32 が同じ ID が複数ある場合は順に比べる
+        while low < self.count:
+            entry_key, record = INDEX_ENTRY.unpack_from(self._buffer, self._index_offset + low * INDEX_ENTRY.size)
+            if entry_key != key:
+                break
+            values = self._unpack(record)
+            if self._raw_string(values[_ID_SLOT], values[_ID_SLOT + 1]) == encoded:
+                return record
+            low += 1
+        return None
+
+    def updated_at_map(self) -> 'StoredUpdatedAt':
+        """ID -> updated_at の読み取り専用の対応（他のプロセスの変更の検出用）"""
+        return StoredUpdatedAt(self)
+
+
+class StoredUpdatedAt:
+    """
+    ファイル上の ID -> updated_at（辞書と同じ読み方ができる）
+
+    TaskManager が最後に読み書きしたときの状態として、全件の辞書を作らずに持つ。
+    """
+
+    def __init__(self, store: BinaryTaskStore):
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __contains__(self, task_id) -> bool:
+        return self.store.find(task_id) is not None
+
+    def __getitem__(self, task_id: str) -> Optional[str]:
+        record = self.store.find(task_id)
+        if record is None:
+            raise KeyError(task_id)
+        return self.store.read_field(record, 'updated_at')
+
+    def get(self, task_id: str, default=None):
+        record = self.store.find(task_id)
+        return default if record is None else self.store.read_field(record, 'updated_at')
+
+    def items(self) -> Iterator[tuple]:
+        for _, task_id, updated_at in self.store.scan('updated_at'):
+            yield task_id, updated_at
+
+    def __iter__(self):
+        for task_id, _ in self.items():
+            yield task_id
+
+
+def can_reuse_heap(store: BinaryTaskStore, copied: int) -> bool:
+    """store のレコードを copied 件写すとき、ヒープを引き継いでよいか（不要な文字列が多すぎないか）"""
+    return store.stale_records + store.count - copied <= copied
+
+
+class BinaryStoreWriter:
+    """バイナリ形式のデータファイルを作るクラス"""
+
+    def __init__(self, base: Optional[BinaryTaskStore] = None):
+        """
+        Args:
+            base (Optional[BinaryTaskStore]): ヒープを引き継ぐ元のファイル。このファイルからの
+                copy_record はバイト列のまま写す（can_reuse_heap で確認してから渡す）
+        """
+        self._records = bytearray()
+        self._shared = {}  # 共有する文字列のバイト列 -> ヒープ上の位置
+        self._index = []  # (ID の CRC32, レコード番号)
+        self._base = base
+        self._copied = 0  # base から写したレコード数
+        if base is None:
+            self._heap = bytearray()
+        else:
+            start = base._heap_offset
+            self._heap = bytearray(base._buffer[start:start + base._heap_size])
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _add_string(self, data: Optional[bytes], shared: bool) -> tuple:
+        if data is None:
+            return 0, NONE_LENGTH
+        if shared:
+            offset = self._shared.get(data)
+            if offset is None:
+                offset = self._shared[data] = len(self._heap)
+                self._heap += data
+            return offset, len(data)
+        offset = len(self._heap)
+        self._heap += data
+        return offset, len(data)
+
+    def _add_record(self, revision: int, strings: list, numbers: tuple, completed: bool):
+        refs = []
+        for name, data in zip(STRING_FIELDS, strings):
+            refs.extend(self._add_string(data, name in SHARED_FIELDS))
+        self._index.append((zlib.crc32(strings[0]), len(self._index)))
+        self._records += RECORD.pack(revision, *refs, *numbers, completed)
+
+    def add_task(self, task):
+        """Task（または同じ属性を持つオブジェクト）を1件追加"""
+        tags = TAG_SEPARATOR.join(task.tags)
+        strings = [None if value is None else str(value).encode('utf-8')
+                   for value in (task.id, task.title, task.description, task.priority, task.category,
+                                 task.due_date, tags, task.created_at, task.updated_at)]
+        numbers = (int(task.estimated_time), int(task.progress), int(task.pomodoro_count), int(task.actual_time))
+        self._add_record(int(task.revision), strings, numbers, bool(task.completed))
+
+    def copy_record(self, store: BinaryTaskStore, record: int, revision: Optional[int] = None):
+        """別のファイルのレコードを文字列をデコードせずに写す（revision を指定すれば置き換える）"""
+        if store is self._base:
+            raw = store._raw_record(record)
+            if revision is not None:
+                raw = REVISION.pack(revision) + raw[REVISION.size:]
+            offset, length = ID_REF.unpack_from(raw, REVISION.size)
+            self._index.append((zlib.crc32(self._heap[offset:offset + length]), len(self._index)))
+            self._records += raw
+            self._copied += 1
+            return
+        values = store._unpack(record)
+        strings = [store._raw_string(values[slot], values[slot + 1]) for _, slot in _STRING_SLOTS]
+        numbers = tuple(values[slot] for _, slot in _INT_SLOTS)
+        self._add_record(values[0] if revision is None else revision, strings, numbers,
+                         values[_SLOTS['completed']])
+
+    def write(self, path: str):
+        """ファイルに書き込む（一時ファイルに書いてから置き換える）"""
+        records_offset = _align(HEADER.size)
+        heap_offset = _align(records_offset + len(self._records))
+        index_offset = _align(heap_offset + len(self._heap))
+        stale = self._base.stale_records + self._base.count - self._copied if self._base is not None else 0
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, RECORD.size, len(self._index), stale,
+                             records_offset, heap_offset, len(self._heap), index_offset)
+
+        temp_file = path + ".tmp"
+        with open(temp_file, 'wb') as f:
+            for offset, data in ((0, header), (records_offset, self._records),
+                                 (heap_offset, self._heap)):
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(data)
+            f.write(b"\0" * (index_offset - f.tell()))
+            f.write(b"".join(INDEX_ENTRY.pack(*entry) for entry in sorted(self._index)))
+        os.replace(temp_file, path)
@@ -0,0 +1,127 @@
+"""
+変更フィード
+TaskManager の変更をイベントとして購読者に配信する。
+
+購読者ごとにバッファの上限を持ち、読み出しが追いつかない購読者は
+切り離して再同期（差分同期 API で取り直し）を求める。書き込み側は購読者を待たない。
+イベントは、TaskManager を変更するのと同じスレッドで読み出すこと。
+"""
+import json
+from collections import deque
+from typing import Callable, Optional
+from modules.task import Task, TaskManager
+
+
+class ChangeEvent:
+    """1件の変更イベント（全購読者で共有し、エンコードは1回だけ行う）"""
+
+    __slots__ = ('seq', 'event', 'task_id', 'task', '_sse')
+
+    def __init__(self, seq: int, event: str, task_id: Optional[str], task: Optional[dict]):
+        self.seq = seq  # TaskManager の change_seq
+        self.event = event
+        self.task_id = task_id
+        self.task = task  # 変更後のタスクの辞書（removed と reset は None）
+        self._sse = None
+
+    def to_dict(self) -> dict:
+        return {'seq': self.seq, 'event': self.event, 'id': self.task_id, 'task': self.task}
+
+    def encode_sse(self) -> bytes:
+        """Server-Sent Events 形式のバイト列"""
+        if self._sse is None:
+            data = json.dumps(self.to_dict(), ensure_ascii=False)
+            self._sse = f"id: {self.seq}\nevent: {self.event}\ndata: {data}\n\n".encode('utf-8')
+        return self._sse
+
+
+class Subscription:
+    """購読者ごとのバッファ"""
+
+    def __init__(self, capacity: int, last_seq: int, on_ready: Optional[Callable[[], None]]):
+        """
+        Args:
+            capacity (int): 未読イベントの上限。超えたら切り離して再同期を求める
+            last_seq (int): 購読開始時点の change_seq
+            on_ready (Optional[Callable]): イベントが届いた・切り離されたときに呼ぶ関数
+        """
+        self.capacity = capacity
+        self.buffer = deque()
+        self.last_seq = last_seq  # 最後に読み出したイベントの変更番号
+        self.needs_resync = False
+        self.on_ready = on_ready
+
+    def pop_all(self) -> list:
+        """未読のイベントをすべて取り出す"""
+        events = list(self.buffer)
+        self.buffer.clear()
+        if events:
+            self.last_seq = events[-1].seq
+        return events
+
+
+class ChangeFeed:
+    """TaskManager の変更を購読者に配信するフィード"""
+
+    def __init__(self, task_manager: TaskManager, buffer_size: int = 256):
+        """
+        Args:
+            buffer_size (int): 購読者ごとの未読イベントの上限（既定値）
+        """
+        self.task_manager = task_manager
+        self.buffer_size = buffer_size
+        self._subscriptions = []
+        self.published = 0  # 配信したイベント数
+        self.dropped = 0  # 切り離した購読者数
+        task_manager.add_listener(self._on_task_change)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, on_ready: Optional[Callable[[], None]] = None,
+                  buffer_size: Optional[int] = None) -> Subscription:
+        """購読を開始"""
+        subscription = Subscription(buffer_size or self.buffer_size,
+                                    self.task_manager.change_seq, on_ready)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """購読を解除"""
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+    def _on_task_change(self, event: str, task: Optional[Task]):
+        """TaskManager の変更通知をイベントにして配信"""
+        if task is None or event == "removed":
+            data = None
+        else:
+            data = task.to_dict()
+        change = ChangeEvent(self.task_manager.change_seq, event,
+                             task.id if task is not None else None, data)
+        self.publish(change)
+
+    def publish(self, change: ChangeEvent):
+        """全購読者のバッファに追加（あふれた購読者は切り離す）"""
+        self.published += 1
+        overflowed = []
+        for subscription in self._subscriptions:
+            if len(subscription.buffer) >= subscription.capacity:
+                overflowed.append(subscription)
+                continue
+            subscription.buffer.append(change)
+            if subscription.on_ready is not None:
+                subscription.on_ready()
+
+        for subscription in overflowed:
+            self._drop(subscription)
+
+    def _drop(self, subscription: Subscription):
+        """読み出しが追いつかない購読者を切り離して再同期を求める"""
+        self.unsubscribe(subscription)
+        self.dropped += 1
+        subscription.buffer.clear()
+        subscription.needs_resync = True
+        if subscription.on_ready is not None:
+            subscription.on_ready()
@@ -0,0 +1,336 @@
+"""
+タスクの依存関係（「ブロックされている」の関係）
+タスクIDを頂点、ブロックしているタスク -> ブロックされているタスク を辺とする有向非巡回グラフ。
+
+トポロジカル順序は辺を追加するたびに全体を並べ直さず、Pearce–Kelly の方法で維持する。
+追加する辺が今の順序に合っていれば何もせず、合っていなければ順序の上で2つの頂点の
+間にある頂点だけを探索して並べ替える（この探索で辺の追加先に戻れば循環）。
+未完了のブロック元の数を頂点ごとに持ち、完了状態が変わったときは直後の頂点だけを更新する。
+クリティカルパス（estimated_time の合計が最大の経路）は、順序に沿った1回の走査で求める。
+"""
+import json
+import os
+from typing import Callable, Iterable, Iterator
+
+
+STORE_VERSION = 1
+
+
+class DependencyCycleError(ValueError):
+    """追加すると依存関係が循環する"""
+
+    def __init__(self, cycle: list):
+        self.cycle = cycle  # 循環するタスクIDの並び（先頭と末尾は同じ）
+        super().__init__("依存関係が循環します: " + " → ".join(cycle))
+
+
+class DependencyGraph:
+    """
+    依存関係のグラフ
+
+    頂点は辺を持つタスクだけ。完了状態は set_completed で TaskManager から知らせる。
+    """
+
+    def __init__(self):
+        self._blockers = {}  # task_id -> ブロックしているタスクIDの集合
+        self._dependents = {}  # task_id -> ブロックされているタスクIDの集合
+        self._position = {}  # task_id -> トポロジカル順序での位置
+        self._nodes = []  # 位置 -> task_id（削除した頂点の位置は None）
+        self._holes = 0  # _nodes の None の数
+        self._completed = set()  # 完了済みの頂点
+        self._open_blockers = {}  # task_id -> 未完了のブロック元の数（0 のものは持たない）
+        self.edge_count = 0
+        self.version = 0  # 辺か完了状態が変わるたびに増える（クリティカルパスのキャッシュ用）
+
+    def __len__(self) -> int:
+        return len(self._position)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._position
+
+    def _ensure(self, task_id: str, completed: bool):
+        if task_id not in self._position:
+            self._position[task_id] = len(self._nodes)
+            self._nodes.append(task_id)
+            self._blockers[task_id] = set()
+            self._dependents[task_id] = set()
+            if completed:
+                self._completed.add(task_id)
+
+    def _discard_if_isolated(self, task_id: str):
+        if not self._blockers[task_id] and not self._dependents[task_id]:
+            self._drop(task_id)
+
+    def _drop(self, task_id: str):
+        position = self._position.pop(task_id)
+        self._nodes[position] = None
+        self._holes += 1
+        del self._blockers[task_id]
+        del self._dependents[task_id]
+        self._completed.discard(task_id)
+        self._open_blockers.pop(task_id, None)
+        if self._holes > 1024 and self._holes * 2 > len(self._nodes):
+            self._compact()
+
+    def _compact(self):
+        """削除した頂点の位置を詰める（順序は変えない）"""
+        self._nodes = [task_id for task_id in self._nodes if task_id is not None]
+        self._position = {task_id: position for position, task_id in enumerate(self._nodes)}
+        self._holes = 0
+
+    # --- 辺 ---
+
+    def add_edge(self, task_id: str, blocker_id: str, task_completed: bool = False,
+                 blocker_completed: bool = False) -> bool:
+        """
+        task_id が blocker_id にブロックされている、という辺を追加
+
+        既にあれば False。循環する場合は追加せずに DependencyCycleError を送出する。
+        *_completed は頂点を新しく作るときの完了状態。
+        """
+        if task_id == blocker_id:
+            raise DependencyCycleError([task_id, task_id])
+        if blocker_id in self._blockers.get(task_id, ()):
+            return False
+        self._ensure(task_id, task_completed)
+        self._ensure(blocker_id, blocker_completed)
+        lower = self._position[task_id]
+        upper = self._position[blocker_id]
+        if lower < upper:
+            # ブロック元が後ろにある。間の頂点だけを並べ替える
+            forward = self._search_forward(task_id, blocker_id, upper)
+            backward = self._search_backward(blocker_id, lower)
+            self._reorder(backward, forward)
+        self._blockers[task_id].add(blocker_id)
+        self._dependents[blocker_id].add(task_id)
+        self.edge_count += 1
+        if blocker_id not in self._completed:
+            self._open_blockers[task_id] = self._open_blockers.get(task_id, 0) + 1
+        self.version += 1
+        return True
+
+    def remove_edge(self, task_id: str, blocker_id: str) -> bool:
+        """辺を削除（なければ False）。頂点の順序はそのままで正しい"""
+        blockers = self._blockers.get(task_id)
+        if blockers is None or blocker_id not in blockers:
+            return False
+        blockers.discard(blocker_id)
+        self._dependents[blocker_id].discard(task_id)
+        self.edge_count -= 1
+        if blocker_id not in self._completed:
+            self._decrement_open(task_id)
+        self._discard_if_isolated(task_id)
+        self._discard_if_isolated(blocker_id)
+        self.version += 1
+        return True
+
+    def remove_node(self, task_id: str) -> list:
+        """頂点とその辺を削除し、削除した辺の (task_id, blocker_id) を返す"""
+        if task_id not in self._position:
+            return []
+        edges = [(task_id, blocker_id) for blocker_id in self._blockers[task_id]]
+        edges.extend((dependent_id, task_id) for dependent_id in self._dependents[task_id])
+        for edge in edges:
+            self.remove_edge(*edge)
+        return edges
+
+    def _decrement_open(self, task_id: str):
+        count = self._open_blockers[task_id] - 1
+        if count:
+            self._open_blockers[task_id] = count
+        else:
+            del self._open_blockers[task_id]
+
+    def _search_forward(self, start: str, target: str, upper: int) -> list:
+        """start から辺をたどり、位置が upper 以下の頂点を集める（target に着けば循環）"""
+        position = self._position
+        dependents = self._dependents
+        parents = {start: None}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for dependent in dependents[node]:
+                if dependent == target:
+                    # target -> start（追加する辺）と start -> … -> target で循環する
+                    cycle = [target, node]
+                    while parents[cycle[-1]] is not None:
+                        cycle.append(parents[cycle[-1]])
+                    cycle.append(target)
+                    raise DependencyCycleError(cycle[::-1])
+                if dependent not in parents and position[dependent] < upper:
+                    parents[dependent] = node
+                    stack.append(dependent)
+        return list(parents)
+
+    def _search_backward(self, start: str, lower: int) -> list:
+        """start から辺を逆にたどり、位置が lower 以上の頂点を集める"""
+        position = self._position
+        blockers = self._blockers
+        seen = {start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for blocker in blockers[node]:
+                if blocker not in seen and position[blocker] > lower:
+                    seen.add(blocker)
+                    stack.append(blocker)
+        return list(seen)
+
+    def _reorder(self, backward: list, forward: list):
+        """backward（ブロック元側）を forward より前になるよう、両者が使っていた位置に並べ直す"""
+        position = self._position
+        backward.sort(key=position.__getitem__)
+        forward.sort(key=position.__getitem__)
+        nodes = backward + forward
+        slots = sorted(position[node] for node in nodes)
+        for slot, node in zip(slots, nodes):
+            position[node] = slot
+            self._nodes[slot] = node
+
+    # --- 完了状態 ---
+
+    def set_completed(self, task_id: str, completed: bool):
+        """頂点の完了状態を更新し、ブロックしている頂点の未完了のブロック元の数を直す"""
+        if task_id not in self._position or (task_id in self._completed) == completed:
+            return
+        if completed:
+            self._completed.add(task_id)
+            for dependent in self._dependents[task_id]:
+                self._decrement_open(dependent)
+        else:
+            self._completed.discard(task_id)
+            for dependent in self._dependents[task_id]:
+                self._open_blockers[dependent] = self._open_blockers.get(dependent, 0) + 1
+        self.version += 1
+
+    def is_blocked(self, task_id: str) -> bool:
+        """未完了のブロック元があるか"""
+        return task_id in self._open_blockers
+
+    def blocked_ids(self) -> set:
+        """未完了のブロック元があるタスクのID（変更しないこと）"""
+        return self._open_blockers.keys()
+
+    def blockers(self, task_id: str) -> set:
+        return set(self._blockers.get(task_id, ()))
+
+    def dependents(self, task_id: str) -> set:
+        return set(self._dependents.get(task_id, ()))
+
+    # --- 順序・経路 ---
+
+    def order(self) -> Iterator[str]:
+        """トポロジカル順序（ブロック元が先）で頂点を返す"""
+        return (task_id for task_id in self._nodes if task_id is not None)
+
+    def critical_path(self, duration: Callable[[str], int]) -> tuple:
+        """
+        所要時間の合計が最大の経路を (合計, ブロック元から順のタスクID) で返す
+
+        完了済みの頂点の所要時間は 0 として、未完了の頂点だけの時間を数える。
+        """
+        finish = {}
+        previous = {}
+        best = (0, None)
+        for task_id in self.order():
+            start, before = 0, None
+            for blocker in self._blockers[task_id]:
+                if finish[blocker] > start:
+                    start, before = finish[blocker], blocker
+            own = 0 if task_id in self._completed else max(0, duration(task_id) or 0)
+            finish[task_id] = start + own
+            previous[task_id] = before
+            if finish[task_id] > best[0]:
+                best = (finish[task_id], task_id)
+        path = []
+        node = best[1]
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        path.reverse()
+        return best[0], path
+
+    def edges(self) -> Iterator[tuple]:
+        """すべての辺の (task_id, blocker_id)"""
+        for task_id, blockers in self._blockers.items():
+            for blocker_id in blockers:
+                yield task_id, blocker_id
+
+    def check(self) -> bool:
+        """順序がすべての辺と合っているか（検証用）"""
+        position = self._position
+        return all(position[blocker_id] < position[task_id] for task_id, blocker_id in self.edges())
+
+    # --- 保存 ---
+
+    def to_dict(self) -> dict:
+        return {'version': STORE_VERSION,
+                'blocked_by': {task_id: sorted(blockers) for task_id, blockers in self._blockers.items()
+                               if blockers}}
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[tuple], is_completed: Callable[[str], bool]) -> tuple:
+        """
+        辺の集まりからグラフを作り、(グラフ, 追加できなかった辺の数) を返す
+
+        まとめて作る場合は辺ごとの並べ替えをせず、Kahn の方法で順序を1回で求める。
+        循環している辺（壊れたファイルなど）は1本ずつ追加し直して、循環するものを捨てる。
+        """
+        graph = cls()
+        pairs = list(dict.fromkeys((task_id, blocker_id) for task_id, blocker_id in edges
+                                   if task_id != blocker_id))
+        for task_id, blocker_id in pairs:
+            for node in (task_id, blocker_id):
+                if node not in graph._blockers:
+                    graph._blockers[node] = set()
+                    graph._dependents[node] = set()
+            graph._blockers[task_id].add(blocker_id)
+            graph._dependents[blocker_id].add(task_id)
+
+        indegree = {node: len(blockers) for node, blockers in graph._blockers.items()}
+        ready = [node for node, count in indegree.items() if not count]
+        order = []
+        while ready:
+            node = ready.pop()
+            order.append(node)
+            for dependent in graph._dependents[node]:
+                indegree[dependent] -= 1
+                if not indegree[dependent]:
+                    ready.append(dependent)
+        if len(order) < len(indegree):
+            graph = cls()
+            rejected = 0
+            for task_id, blocker_id in pairs:
+                try:
+                    graph.add_edge(task_id, blocker_id, is_completed(task_id), is_completed(blocker_id))
+                except DependencyCycleError:
+                    rejected += 1
+            return graph, rejected
+
+        graph._nodes = order
+        graph._position = {node: position for position, node in enumerate(order)}
+        graph.edge_count = len(pairs)
+        graph._completed = {node for node in order if is_completed(node)}
+        for task_id, blocker_id in pairs:
+            if blocker_id not in graph._completed:
+                graph._open_blockers[task_id] = graph._open_blockers.get(task_id, 0) + 1
+        return graph, 0
+
+
+def read_dependencies(path: str) -> list:
+    """依存関係のファイルの辺の (task_id, blocker_id) のリスト（ファイルがなければ空）"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return []
+    return [(task_id, blocker_id) for task_id, blockers in data.get('blocked_by', {}).items()
+            for blocker_id in blockers]
+
+
+def write_dependencies(path: str, data: dict):
+    """依存関係のファイルを書き込む（一時ファイルに書いてから置き換える）"""
+    temp_file = path + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_file, path)
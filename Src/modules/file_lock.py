@@ -0,0 +1,77 @@
+"""
+プロセス間のファイルロック
+データファイルの隣にロックファイルを置き、アドバイザリロックを取る。
+POSIX では fcntl.flock（共有・排他）、Windows では msvcrt.locking（排他のみ）を使い、
+どちらも使えない環境ではロックしない。
+"""
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+class FileLockTimeout(Exception):
+    """ロックを取得できなかった（他のプロセスが長時間ロックしている）"""
+
+
+class FileLock:
+    """ロックファイルによるプロセス間のアドバイザリロック"""
+
+    def __init__(self, path: str, timeout: float = 10.0, poll_interval: float = 0.02):
+        """
+        Args:
+            path (str): ロックファイルのパス（なければ作成する）
+            timeout (float): ロックを待つ最大秒数
+            poll_interval (float): ロックを再試行する間隔（秒）
+        """
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    @contextmanager
+    def acquire(self, shared: bool = False):
+        """
+        ロックを取得している間だけブロック内を実行
+
+        shared=True は読み込み用の共有ロック（複数のプロセスが同時に取れる）。
+        同じスレッドで入れ子にすると待ち続けるため、入れ子にしないこと。
+        """
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            self._lock(fd, shared)
+            try:
+                yield
+            finally:
+                self._unlock(fd)
+        finally:
+            os.close(fd)
+
+    def _lock(self, fd: int, shared: bool):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+                elif msvcrt is not None:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise FileLockTimeout(f"ロックを取得できませんでした: {self.path}")
+                time.sleep(self.poll_interval)
+
+    def _unlock(self, fd: int):
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        elif msvcrt is not None:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
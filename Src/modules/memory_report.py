@@ -0,0 +1,258 @@
+"""
+メモリ使用量のレポート
+タスクデータを読み込み、1件あたりの常駐バイト数と内訳（Task の属性・タグのリスト・
+ISO 日時文字列・インデックス・GUI の行ウィジェット）を報告する。
+
+件数を変えて（データの先頭から指定件数ずつ）計測し、件数に対する増え方を確認できる。
+合計は tracemalloc で計測し、内訳は sys.getsizeof でオブジェクトをたどって求める
+（同じオブジェクトは1回だけ数える）。サーバーのメモリ見積もりや、
+Task の表現を小さくしたときの効果の確認に使う。
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from typing import Optional
+from modules.migrations import split_store
+from modules.task import TaskManager
+
+
+TIMESTAMP_FIELDS = ('created_at', 'updated_at')  # ISO 日時文字列として集計する属性
+TOP_ALLOCATIONS = 5  # 読み込みで多く確保した箇所を何件表示するか
+
+# 内訳の表示名
+BREAKDOWN_LABELS = {
+    'task_objects': "Task オブジェクト（属性の辞書を含む）",
+    'attributes': "属性の値",
+    'tags': "タグのリストとタグ文字列",
+    'timestamps': "ISO 日時文字列（created_at / updated_at）",
+    'manager_index': "TaskManager の一覧・インデックス",
+    'unattributed': "その他・誤差（計測した合計 − 内訳の合計）"
+}
+STRUCTURE_LABELS = {
+    'snapshot': "スナップショット（FrozenTask）",
+    'search_index': "検索インデックス（TaskIndex）",
+    'task_view': "並び替えビュー（TaskView、全種類の並び替えキー）",
+    'gui_rows': "GUI の行ウィジェット"
+}
+
+
+def _traced_bytes() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+class _SizeCounter:
+    """sys.getsizeof の合計（同じオブジェクトは1回だけ数える）"""
+
+    def __init__(self):
+        self.seen = set()
+
+    def size(self, obj) -> int:
+        if id(obj) in self.seen:
+            return 0
+        self.seen.add(id(obj))
+        return sys.getsizeof(obj)
+
+
+def task_breakdown(task_manager: TaskManager) -> dict:
+    """読み込んだタスクのバイト数の内訳"""
+    counter = _SizeCounter()
+    breakdown = {'task_objects': 0, 'attributes': {}, 'tags': 0, 'timestamps': 0, 'manager_index': 0}
+    attributes = breakdown['attributes']
+
+    for task in task_manager.tasks:
+        breakdown['task_objects'] += counter.size(task) + counter.size(task.__dict__)
+        for name, value in task.__dict__.items():
+            if name == 'tags':
+                breakdown['tags'] += counter.size(value) + sum(counter.size(tag) for tag in value)
+            elif name in TIMESTAMP_FIELDS:
+                breakdown['timestamps'] += counter.size(value)
+            else:
+                attributes[name] = attributes.get(name, 0) + counter.size(value)
+
+    # 一覧・ID 索引・追加順・変更記録・ディスク上の状態（値の文字列はタスクと共有）
+    for container in (task_manager.tasks, task_manager._tasks_by_id, task_manager._order,
+                      task_manager._change_log, task_manager._tombstones, task_manager._disk_base):
+        breakdown['manager_index'] += counter.size(container)
+        if isinstance(container, dict):
+            breakdown['manager_index'] += sum(counter.size(value) for value in container.values())
+    return breakdown
+
+
+def measure_gui_rows(task_manager: TaskManager) -> dict:
+    """
+    仮想化リストの行ウィジェットのメモリ量（表示できる環境でのみ計測）
+
+    行は表示領域の分だけ作って使い回すため、タスク数によらずほぼ一定になる。
+    Tk のウィジェット本体は tracemalloc の対象外のため、Python 側の確保量のみ。
+    """
+    try:
+        import customtkinter as ctk
+        from modules.task_list import VirtualTaskList
+        root = ctk.CTk()
+    except Exception as e:
+        return {'skipped': f"GUI を作成できません: {e}"}
+
+    try:
+        root.geometry("1000x900")
+        before = _traced_bytes()
+        task_list = VirtualTaskList(root)
+        task_list.pack(fill="both", expand=True)
+        task_list.set_tasks(task_manager.tasks)
+        root.update()
+        rows = len(task_list.rows_by_key) + len(task_list.free_rows)
+        total = _traced_bytes() - before
+        return {'bytes': total, 'rows': rows, 'bytes_per_row': total // rows if rows else 0}
+    finally:
+        root.destroy()
+
+
+def measure_store(data_file: str, include_gui: bool = False) -> dict:
+    """
+    1つのデータファイルを読み込んでメモリ量を計測
+
+    tracemalloc を開始した状態で呼ぶこと。
+    """
+    baseline = _traced_bytes()
+    snapshot_before = tracemalloc.take_snapshot()
+    task_manager = TaskManager(data_file=data_file)
+    task_manager.autosave = False
+    task_manager.load_tasks()
+    loaded = _traced_bytes()
+    snapshot_after = tracemalloc.take_snapshot()
+
+    count = len(task_manager.tasks)
+    total = loaded - baseline
+    breakdown = task_breakdown(task_manager)
+    attributed = (breakdown['task_objects'] + sum(breakdown['attributes'].values())
+                  + breakdown['tags'] + breakdown['timestamps'] + breakdown['manager_index'])
+    breakdown['unattributed'] = total - attributed
+
+    # 読み込み後に作られる構造を順に作り、増えた分をそれぞれの量とする
+    from modules.search import TaskIndex
+    from modules.task_view import SORT_OPTIONS, TaskView
+
+    def build_view():
+        view = TaskView(task_manager)
+        for sort_by in SORT_OPTIONS:
+            view.sort(task_manager.tasks, sort_by)
+        return view
+
+    structures = {}
+    current = loaded
+    steps = [
+        ('snapshot', task_manager.snapshot),
+        ('search_index', lambda: TaskIndex(task_manager)),
+        ('task_view', build_view)
+    ]
+    keep = []  # 計測が終わるまで作った構造を保持する
+    for name, build in steps:
+        keep.append(build())
+        measured = _traced_bytes()
+        structures[name] = measured - current
+        current = measured
+    if include_gui:
+        structures['gui_rows'] = measure_gui_rows(task_manager)
+
+    top = []
+    for stat in snapshot_after.compare_to(snapshot_before, 'lineno')[:TOP_ALLOCATIONS]:
+        frame = stat.traceback[0]
+        top.append({'location': f"{os.path.basename(frame.filename)}:{frame.lineno}",
+                    'bytes': stat.size_diff, 'blocks': stat.count_diff})
+
+    return {
+        'tasks': count,
+        'total_bytes': total,
+        'bytes_per_task': round(total / count, 1) if count else 0,
+        'breakdown': breakdown,
+        'structures': structures,
+        'top_allocations': top
+    }
+
+
+def default_sizes(total: int) -> list:
+    """全件と、それより小さい 10 のべき乗の件数（1000 件以上）"""
+    sizes = []
+    size = 1000
+    while size < total:
+        sizes.append(size)
+        size *= 10
+    sizes.append(total)
+    return sizes
+
+
+def build_report(data_file: str, sizes: Optional[list] = None, include_gui: bool = False) -> dict:
+    """
+    データファイルの先頭から各件数分を読み込み、件数ごとのメモリ量を計測
+
+    Args:
+        data_file (str): タスクデータのファイル
+        sizes (Optional[list]): 計測する件数（既定: default_sizes）。全件より多い件数は全件とみなす
+        include_gui (bool): GUI の行ウィジェットも計測する（表示できる環境のみ）
+    """
+    with open(data_file, 'r', encoding='utf-8') as f:
+        records = split_store(json.load(f))[1]
+    total = len(records)
+    sizes = sorted({min(size, total) for size in (sizes or default_sizes(total))})
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in sizes:
+            path = data_file
+            if size < total:
+                path = os.path.join(temp_dir, f"tasks_{size}.json")
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(records[:size], f, ensure_ascii=False)
+            if size == sizes[-1]:
+                records = None  # 最後の計測では元のデータを手放しておく
+            tracemalloc.start()
+            try:
+                results.append(measure_store(path, include_gui))
+            finally:
+                tracemalloc.stop()
+    return {'data_file': data_file, 'python': sys.version.split()[0], 'results': results}
+
+
+def format_report(report: dict) -> str:
+    """レポートを表形式の文字列にする（数値を先に並べる）"""
+    lines = [f"データ: {report['data_file']}（Python {report['python']}）"]
+    for result in report['results']:
+        count = result['tasks'] or 1
+        lines.append("")
+        lines.append(f"■ {result['tasks']}件  合計 {result['total_bytes'] / 1024 / 1024:.2f} MB  "
+                     f"1件あたり {result['bytes_per_task']:.0f} バイト")
+        breakdown = result['breakdown']
+        for key, label in BREAKDOWN_LABELS.items():
+            value = breakdown[key]
+            if key == 'attributes':
+                lines.append(f"  {sum(value.values()) / count:9.1f} バイト/件  {label}")
+                for name, size in sorted(value.items(), key=lambda item: -item[1]):
+                    lines.append(f"  {size / count:9.1f} バイト/件    {name}")
+            else:
+                lines.append(f"  {value / count:9.1f} バイト/件  {label}")
+        lines.append("  読み込み後に作る構造:")
+        for key, value in result['structures'].items():
+            label = STRUCTURE_LABELS[key]
+            if not isinstance(value, dict):
+                lines.append(f"  {value / count:9.1f} バイト/件  {label}")
+            elif 'skipped' in value:
+                lines.append(f"  {'-':>9} バイト/件  {label}（{value['skipped']}）")
+            else:
+                lines.append(f"  {value['bytes'] / 1024:9.1f} KB（合計） {label}"
+                             f"（{value['rows']}行、1行 {value['bytes_per_row']} バイト）")
+        lines.append("  読み込みで多く確保した箇所:")
+        for entry in result['top_allocations']:
+            lines.append(f"  {entry['bytes'] / 1024:9.1f} KB  {entry['location']}（{entry['blocks']}ブロック）")
+
+    if len(report['results']) > 1:
+        lines.append("")
+        lines.append("件数ごとの1件あたりのバイト数（読み込み / 読み込み後の構造を含む）")
+        for result in report['results']:
+            structures = sum(value for value in result['structures'].values() if isinstance(value, int))
+            count = result['tasks'] or 1
+            lines.append(f"  {result['tasks']:>9}件  {result['bytes_per_task']:>9.0f}  "
+                         f"{(result['total_bytes'] + structures) / count:>9.0f}")
+    return "\n".join(lines)
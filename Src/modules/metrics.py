@@ -0,0 +1,262 @@
+"""
+計測（メトリクス）
+処理時間のタイマーと回数のカウンターを記録し、設定タブのデバッグパネルでの表示や
+Prometheus のテキスト形式での書き出しに使う。
+
+無効な間（既定）は enabled を確認するだけで何も記録しない。
+環境変数 TASKMASTER_METRICS=1 で起動時から有効にできる。
+
+使い方:
+    from modules.metrics import registry as metrics
+
+    metrics.describe("task_save_seconds", "タスクの保存にかかった時間")
+
+    with metrics.time("task_save_seconds"):
+        ...
+    metrics.inc("task_index_updates_total", op="add")
+
+    @metrics.timed("statistics_seconds", method="tags")
+    def get_tag_usage(self): ...
+"""
+import bisect
+import functools
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable
+
+PREFIX = "taskmaster_"  # 書き出すメトリクス名の接頭辞
+
+# タイマーのヒストグラムの区切り（秒）
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NULL_CONTEXT = nullcontext()
+
+
+class Counter:
+    """回数・量の累計"""
+
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Timer:
+    """処理時間のヒストグラム（回数・合計・最大とバケットごとの回数）"""
+
+    kind = "histogram"
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # 最後は最大の区切りを超えたもの
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        """処理時間を1件記録"""
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """q 分位点の見積もり（その値を含むバケットの上限。最大値を超えない）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.bucket_counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class _TimerContext:
+    """with ブロックの処理時間を Timer に記録する"""
+
+    __slots__ = ("timer", "started")
+
+    def __init__(self, timer: Timer):
+        self.timer = timer
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.observe(time.perf_counter() - self.started)
+        return False
+
+
+class MetricsRegistry:
+    """メトリクスを名前とラベルごとに保持する"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._families = {}  # 名前 -> {ラベルのタプル: Counter または Timer}
+        self._kinds = {}  # 名前 -> Counter / Timer
+        self._help = {}  # 名前 -> 説明
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str):
+        """メトリクスの説明を登録（書き出し時の HELP に使う）"""
+        self._help[name] = help_text
+
+    def _get(self, kind: type, name: str, labels: dict):
+        key = tuple(sorted(labels.items()))
+        family = self._families.get(name)
+        metric = family.get(key) if family is not None else None
+        if metric is not None:
+            return metric
+        with self._lock:
+            if self._kinds.setdefault(name, kind) is not kind:
+                raise ValueError(f"メトリクス {name} は別の種類で登録されています")
+            family = self._families.setdefault(name, {})
+            return family.setdefault(key, kind())
+
+    def counter(self, name: str, **labels) -> Counter:
+        """カウンターを取得（なければ作成）"""
+        return self._get(Counter, name, labels)
+
+    def timer(self, name: str, **labels) -> Timer:
+        """タイマーを取得（なければ作成）"""
+        return self._get(Timer, name, labels)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """カウンターを増やす（無効なら何もしない）"""
+        if self.enabled:
+            self._get(Counter, name, labels).inc(amount)
+
+    def time(self, name: str, **labels):
+        """with ブロックの処理時間を記録するコンテキストマネージャー（無効なら何もしない）"""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _TimerContext(self._get(Timer, name, labels))
+
+    def timed(self, name: str, **labels) -> Callable:
+        """関数の処理時間を記録するデコレーター"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _TimerContext(self._get(Timer, name, labels)):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        """記録した値をすべて消す（説明は残す）"""
+        with self._lock:
+            self._families = {}
+            self._kinds = {}
+
+    def collect(self) -> list:
+        """
+        記録した値の一覧（名前とラベル順）
+
+        Returns:
+            list: {'name', 'labels', 'kind', ...} の辞書のリスト。
+                カウンターは value、タイマーは count / sum / max / p50 / p95（秒）を持つ
+        """
+        with self._lock:
+            families = [(name, self._kinds[name], dict(family)) for name, family in self._families.items()]
+        rows = []
+        for name, kind, family in sorted(families, key=lambda item: item[0]):
+            for key, metric in sorted(family.items()):
+                row = {'name': name, 'labels': dict(key), 'kind': kind.kind}
+                if kind is Counter:
+                    row['value'] = metric.value
+                else:
+                    row.update(count=metric.count, sum=metric.sum, max=metric.max,
+                               p50=metric.quantile(0.5), p95=metric.quantile(0.95))
+                rows.append(row)
+        return rows
+
+    def format_summary(self) -> str:
+        """デバッグ表示用の表（タイマーはミリ秒）"""
+        lines = []
+        for row in self.collect():
+            label = ",".join(f"{key}={value}" for key, value in row['labels'].items())
+            name = f"{row['name']}{{{label}}}" if label else row['name']
+            if row['kind'] == "counter":
+                lines.append(f"{name:<52} {row['value']:>10g}")
+            else:
+                average = row['sum'] / row['count'] * 1000 if row['count'] else 0.0
+                lines.append(f"{name:<52} {row['count']:>10} 回  平均 {average:9.3f} ms  "
+                             f"p95 {row['p95'] * 1000:9.3f} ms  最大 {row['max'] * 1000:9.3f} ms")
+        return "\n".join(lines) if lines else "（まだ記録がありません）"
+
+    def to_prometheus(self) -> str:
+        """Prometheus のテキスト形式（version 0.0.4）で書き出す"""
+        with self._lock:
+            families = [(name, self._kinds[name], dict(family)) for name, family in self._families.items()]
+        lines = []
+        for name, kind, family in sorted(families, key=lambda item: item[0]):
+            full_name = PREFIX + name
+            help_text = self._help.get(name)
+            if help_text:
+                lines.append(f"# HELP {full_name} {_escape_help(help_text)}")
+            lines.append(f"# TYPE {full_name} {kind.kind}")
+            for key, metric in sorted(family.items()):
+                if kind is Counter:
+                    lines.append(f"{full_name}{_format_labels(key)} {_format_value(metric.value)}")
+                    continue
+                with metric._lock:
+                    bucket_counts = list(metric.bucket_counts)
+                    count, total = metric.count, metric.sum
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets + (float("inf"),), bucket_counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    lines.append(f"{full_name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                lines.append(f"{full_name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{full_name}_count{_format_labels(key)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    pairs = []
+    for name, value in key:
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# アプリ全体で共有するレジストリ
+registry = MetricsRegistry(enabled=os.environ.get("TASKMASTER_METRICS") == "1")
+
+
+def write_prometheus(path: str):
+    """Prometheus 形式で書き出す（path が "-" なら標準エラー出力）"""
+    text = registry.to_prometheus()
+    if path == "-":
+        sys.stderr.write(text)
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
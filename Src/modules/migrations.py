@@ -0,0 +1,128 @@
+"""
+データファイル（JSON）の形式のバージョンと移行
+データファイルの配列の先頭にヘッダー（形式名・ファイルの形式のバージョン・レコードの
+スキーマのバージョン）を置き、各レコードには書き込んだときのスキーマのバージョン
+（schema_version。ないものは 0）を記録する。
+
+古いバージョンのレコードは読み込み時には変換せず、タスクの属性を初めて参照したときに
+バージョンごとの移行関数を順に適用する（migrate_record）。変更していないレコードは
+保存時もそのまま書き込むため、スキーマを変えてもファイル全体の書き換えは起きない。
+まとめて移行する場合は transfer.migrate_all_job を使う。
+
+スキーマを変えるときは SCHEMA_VERSION を1つ上げ、@migration(変更前のバージョン) を付けた
+移行関数を追加する。id・revision・updated_at は移行前のレコードからそのまま読むため、
+移行関数ではこれらの意味を変えないこと。
+バイナリ形式（binary_store）のレコードは固定長の全項目を持つため、この移行の対象外。
+"""
+from datetime import datetime
+from typing import Callable, Optional
+
+
+STORE_FORMAT = "taskmaster-tasks"  # ヘッダーの形式名
+STORE_VERSION = 1  # ファイルの形式（0 はヘッダーのないタスクの配列）
+SCHEMA_VERSION = 1  # レコードのスキーマ
+VERSION_KEY = "schema_version"  # レコードのスキーマのバージョンを記録するキー
+
+# 変更前のバージョン -> 1つ新しいバージョンに変換する関数
+MIGRATIONS = {}
+
+
+class UnsupportedVersionError(ValueError):
+    """このバージョンより新しい形式のデータ（読み込むと内容が失われるおそれがある）"""
+
+
+def migration(from_version: int) -> Callable[[Callable[[dict], dict]], Callable[[dict], dict]]:
+    """from_version のレコードを from_version + 1 に変換する移行関数を登録するデコレーター"""
+    def register(func: Callable[[dict], dict]) -> Callable[[dict], dict]:
+        MIGRATIONS[from_version] = func
+        return func
+    return register
+
+
+def store_header() -> dict:
+    """データファイルの先頭に置くヘッダー"""
+    return {'format': STORE_FORMAT, 'store_version': STORE_VERSION, 'schema_version': SCHEMA_VERSION}
+
+
+def is_store_header(item) -> bool:
+    return isinstance(item, dict) and item.get('format') == STORE_FORMAT
+
+
+def check_header(header: Optional[dict]):
+    """ヘッダーのバージョンがこのバージョンで読めるか確認（読めなければ UnsupportedVersionError）"""
+    if header is None:
+        return
+    store_version = header.get('store_version', 0)
+    schema_version = header.get('schema_version', 0)
+    if store_version > STORE_VERSION or schema_version > SCHEMA_VERSION:
+        raise UnsupportedVersionError(
+            f"新しいバージョンのアプリで保存されたデータファイルです"
+            f"（形式 {store_version}、スキーマ {schema_version}）。アプリを更新してください")
+
+
+def split_store(items: list) -> tuple:
+    """
+    データファイルの配列を (ヘッダー, レコードのリスト) に分ける
+
+    ヘッダーのない古いファイルのヘッダーは None。新しすぎるバージョンなら UnsupportedVersionError。
+    """
+    if items and is_store_header(items[0]):
+        check_header(items[0])
+        return items[0], items[1:]
+    return None, items
+
+
+def record_version(record: dict) -> int:
+    """レコードのスキーマのバージョン"""
+    return record.get(VERSION_KEY, 0)
+
+
+def is_current(record: dict) -> bool:
+    return record.get(VERSION_KEY, 0) == SCHEMA_VERSION
+
+
+def migrate_record(record: dict) -> dict:
+    """
+    レコードを現在のスキーマに移行
+
+    現在のスキーマのレコードはそのまま返し、古いものは移行関数を順に適用した
+    新しい辞書を返す（元の辞書は変更しない）。
+    """
+    version = record.get(VERSION_KEY, 0)
+    if version == SCHEMA_VERSION:
+        return record
+    if version > SCHEMA_VERSION:
+        raise UnsupportedVersionError(
+            f"タスク {record.get('id')} は新しいスキーマ（バージョン {version}）で保存されています")
+    while version < SCHEMA_VERSION:
+        record = MIGRATIONS[version](record)
+        version += 1
+        record[VERSION_KEY] = version
+    return record
+
+
+@migration(0)
+def _fill_defaults(record: dict) -> dict:
+    """
+    バージョン 0（バージョンを記録していなかったもの）-> 1
+
+    欠けている項目を Task の既定値で補い、値の型を揃える。作成日時がなければ
+    更新日時を使う（読み込んだ時刻にすると、読み込むたびに作成日が変わるため）。
+    """
+    record = dict(record)
+    for name, default in (('description', ""), ('priority', "中"), ('due_date', None),
+                          ('category', "一般"), ('estimated_time', 25), ('progress', 0),
+                          ('pomodoro_count', 0), ('actual_time', 0), ('completed', False),
+                          ('revision', 0)):
+        if record.get(name) is None:
+            record[name] = default
+    tags = record.get('tags')
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    record['tags'] = list(tags or [])
+    record['progress'] = max(0, min(100, int(record['progress'])))
+    record['completed'] = bool(record['completed'])
+    now = datetime.now().isoformat()
+    record['created_at'] = record.get('created_at') or record.get('updated_at') or now
+    record['updated_at'] = record.get('updated_at') or record['created_at']
+    return record
@@ -4,6 +4,11 @@
 import winsound
 import threading
 from typing import Optional
+from modules.metrics import registry as metrics
+
+metrics.describe("notifications_total", "表示した通知の数（sound はサウンドの種類）")
+metrics.describe("notification_show_seconds", "通知の表示（呼び出し元をブロックする時間）")
+metrics.describe("notification_sound_seconds", "サウンドの再生（別スレッド）")
 
 
 class NotificationManager:
@@ -25,10 +30,11 @@ class NotificationManager:
         
         def play():
             try:
-                if sound_type in self.custom_sounds:
-                    self.custom_sounds[sound_type]()
-                else:
-                    winsound.Beep(800, 300)
+                with metrics.time("notification_sound_seconds", sound=sound_type):
+                    if sound_type in self.custom_sounds:
+                        self.custom_sounds[sound_type]()
+                    else:
+                        winsound.Beep(800, 300)
             except Exception:
                 # サウンド再生失敗時は無視
                 pass
@@ -63,8 +69,10 @@ class NotificationManager:
         # 優しい通知音
         winsound.Beep(600, 400)
     
+    @metrics.timed("notification_show_seconds")
     def show_notification(self, title: str, message: str, sound_type: str = 'timer_alert'):
         """通知を表示（Windows標準の通知システムを使用）"""
+        metrics.inc("notifications_total", sound=sound_type)
         try:
             import plyer
             plyer.notification.notify(
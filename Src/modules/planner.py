@@ -0,0 +1,301 @@
+"""
+ポモドーロの作業枠への1日の計画
+使える時間を PomodoroTimer と同じ長さの作業枠と休憩（4回ごとに長い休憩）に分け、
+未完了のタスクの残りのポモドーロ数（estimated_time から progress の分を差し引いたもの）を割り当てる。
+
+枠1つあたりの価値は期限（期限切れ・今日・近日中・それ以降）と優先度の重みの積とし、
+価値の高い順にヒープから取り出して枠を埋める。タスクを翌日以降に分けてよい場合はこの方法で
+価値の合計が最大になる。分けない場合（whole）は入りきらないタスクを飛ばして小さいものを詰め、
+候補が exact_limit 件以下なら動的計画法で価値の合計が最大の組み合わせを求める。
+未完了のタスクにブロックされているタスク（依存関係）と繰り返しのテンプレートは割り当てない。
+
+候補の情報は TaskManager の変更通知で差分更新し、割り当ては計画に影響する変更が
+あったときだけ作り直す。
+"""
+import heapq
+from datetime import date, datetime, timedelta
+from typing import Optional
+from modules.pomodoro import PomodoroTimer
+from modules.task import Task, TaskManager
+
+
+PRIORITY_WEIGHTS = {"高": 3, "中": 2, "低": 1}
+
+# 期限の区分の重み（期限切れ・今日・SOON_DAYS 日以内・それ以降と期限なし）
+OVERDUE_WEIGHT = 8
+TODAY_WEIGHT = 4
+SOON_WEIGHT = 2
+LATER_WEIGHT = 1
+SOON_DAYS = 3
+
+EXACT_LIMIT = 200  # whole の場合に厳密に解く候補数の上限
+
+NO_DUE = date.max.toordinal() + 1  # 期限なしのタスクの期限（並び替え用）
+
+
+def remaining_pomodoros(task: Task, work_minutes: int = 25) -> int:
+    """
+    進捗の分を差し引いた残りのポモドーロ数（完了済みなら 0、未完了なら 1 以上）
+
+    進捗 0% で作業枠が25分なら Task.get_estimated_pomodoros と同じ。
+    """
+    if task.completed:
+        return 0
+    remaining = max(0, task.estimated_time or 0) * (100 - max(0, min(100, task.progress or 0)))
+    return max(1, -(-remaining // (work_minutes * 100)))
+
+
+def _due_ordinal(due_date: Optional[str]) -> int:
+    """期限日の通し日数（期限なし・不正な日付は NO_DUE）"""
+    if not due_date:
+        return NO_DUE
+    try:
+        return date.fromisoformat(due_date).toordinal()
+    except ValueError:
+        # "2025-7-1" のような形式は is_overdue と同じく strptime で解釈する
+        try:
+            return datetime.strptime(due_date, '%Y-%m-%d').toordinal()
+        except ValueError:
+            return NO_DUE
+
+
+def slot_value(priority_weight: int, due: int, today: int) -> int:
+    """作業枠1つあたりの価値（today は今日の通し日数）"""
+    if due < today:
+        weight = OVERDUE_WEIGHT
+    elif due == today:
+        weight = TODAY_WEIGHT
+    elif due <= today + SOON_DAYS:
+        weight = SOON_WEIGHT
+    else:
+        weight = LATER_WEIGHT
+    return weight * priority_weight
+
+
+class PlanSlot:
+    """計画の作業枠1つ"""
+
+    __slots__ = ('start', 'end', 'task')
+
+    def __init__(self, start: datetime, end: datetime, task: Optional[Task]):
+        self.start = start
+        self.end = end
+        self.task = task  # 割り当てたタスク（空き枠は None）
+
+    def to_dict(self) -> dict:
+        return {'start': self.start.isoformat(timespec='minutes'), 'end': self.end.isoformat(timespec='minutes'),
+                'task_id': self.task.id if self.task is not None else None}
+
+
+class DayPlan:
+    """1日の計画"""
+
+    def __init__(self, slots: list, assignments: list, overflow: list, exact: bool):
+        self.slots = slots  # PlanSlot のリスト（時刻順）
+        self.assignments = assignments  # (タスク, 割り当てた枠の数, 残りのポモドーロ数) の割り当て順のリスト
+        self.overflow = overflow  # 今日までが期限なのに残りをすべて割り当てられなかったタスク
+        self.exact = exact  # 動的計画法で厳密に解いたか
+
+    @property
+    def free_slots(self) -> int:
+        return sum(1 for slot in self.slots if slot.task is None)
+
+    def to_dict(self) -> dict:
+        return {'slots': [slot.to_dict() for slot in self.slots],
+                'tasks': [{'task_id': task.id, 'title': task.title, 'pomodoros': count, 'remaining': remaining}
+                          for task, count, remaining in self.assignments],
+                'overflow': [task.id for task in self.overflow],
+                'free_slots': self.free_slots,
+                'exact': self.exact}
+
+
+class DayPlanner:
+    """
+    未完了のタスクをポモドーロの作業枠に割り当てる計画
+
+    使い方:
+        planner = DayPlanner(task_manager)
+        plan = planner.plan(hours=6)
+        for slot in plan.slots:
+            print(slot.start, slot.task)
+    """
+
+    def __init__(self, task_manager: TaskManager, timer: Optional[PomodoroTimer] = None):
+        timer = timer or PomodoroTimer()
+        self.task_manager = task_manager
+        self.work_minutes = max(1, timer.work_duration // 60)
+        self.short_break = timer.short_break // 60
+        self.long_break = timer.long_break // 60
+        self._entries = None  # task.id -> (優先度の重み, 期限の通し日数, 残りのポモドーロ数, 追加順)（None なら作り直す）
+        # (条件, 割り当て, 割り当てたタスクID, 最後に割り当てたタスクのキー, 厳密に解いたか, overflow)
+        self._selection = None
+        task_manager.add_listener(self._on_task_change)
+
+    def _entry(self, task: Task) -> Optional[tuple]:
+        if task.completed:
+            return None
+        return (PRIORITY_WEIGHTS.get(task.priority, 1), _due_ordinal(task.due_date),
+                remaining_pomodoros(task, self.work_minutes), self.task_manager.get_order(task.id))
+
+    def _build_entries(self) -> dict:
+        entries = {}
+        for task in self.task_manager.tasks:
+            entry = self._entry(task)
+            if entry is not None:
+                entries[task.id] = entry
+        return entries
+
+    def _on_task_change(self, event: str, task: Optional[Task]):
+        """TaskManager の変更通知（候補を差分更新し、計画に影響するときだけ割り当てを捨てる）"""
+        if event == "reset" or self._entries is None:
+            self._entries = None
+            self._selection = None
+            return
+        old = self._entries.pop(task.id, None)
+        new = self._entry(task) if event != "removed" else None
+        if new is not None:
+            self._entries[task.id] = new
+        if self._selection is not None and not self._unaffected(task.id, old, new):
+            self._selection = None
+
+    def _unaffected(self, task_id: str, old: Optional[tuple], new: Optional[tuple]) -> bool:
+        """
+        変更が今の計画を変えないか
+
+        割り当てていない、期限が今日より後のタスクで、変更後も最後に割り当てたタスクより
+        価値が低いままなら変わらない（枠がすべて埋まっていて、タスクを分けてよい場合だけ判定できる）。
+        """
+        conditions, _, selected, cutoff, _, _ = self._selection
+        today = conditions[0]
+        if cutoff is None or task_id in selected or (old is not None and old[1] <= today):
+            return False
+        return new is None or (new[1] > today and self._key(task_id, new, today) > cutoff)
+
+    @staticmethod
+    def _key(task_id: str, entry: tuple, today: int) -> tuple:
+        priority_weight, due, _, order = entry
+        return (-slot_value(priority_weight, due, today), due, order, task_id)
+
+    def slot_times(self, hours: float, start: datetime) -> list:
+        """start から hours 時間に入る作業枠の (開始, 終了) のリスト（休憩は PomodoroTimer と同じ）"""
+        limit = start + timedelta(hours=hours)
+        work = timedelta(minutes=self.work_minutes)
+        slots = []
+        current = start
+        while current + work <= limit:
+            slots.append((current, current + work))
+            current += work + timedelta(minutes=self.long_break if len(slots) % 4 == 0 else self.short_break)
+        return slots
+
+    def plan(self, hours: float, start: Optional[datetime] = None, whole: bool = False,
+             exact_limit: int = EXACT_LIMIT) -> DayPlan:
+        """
+        start（既定: 現在時刻）から hours 時間の計画を作る
+
+        whole なら残りのポモドーロをすべて割り当てられるタスクだけを入れる
+        （候補が exact_limit 件以下なら厳密に解く）。割り当ては変更がなければ使い回す。
+        """
+        start = start or datetime.now().replace(second=0, microsecond=0)
+        times = self.slot_times(hours, start)
+        today = start.toordinal()
+        task_manager = self.task_manager
+        if self._entries is None:
+            self._entries = self._build_entries()
+            self._selection = None
+
+        rules = task_manager.recurrences.rules
+        conditions = (today, len(times), whole, exact_limit, task_manager.dependency_version, rules)
+        if self._selection is None or not self._same_conditions(self._selection[0], conditions):
+            self._selection = (conditions,) + self._select(today, len(times), whole, exact_limit, rules)
+        _, assignments, _, _, exact, overflow = self._selection
+
+        owners = [task for task, count, _ in assignments for _ in range(count)]
+        owners.extend([None] * (len(times) - len(owners)))
+        slots = [PlanSlot(slot_start, slot_end, task) for (slot_start, slot_end), task in zip(times, owners)]
+        return DayPlan(slots, assignments, list(overflow), exact)
+
+    @staticmethod
+    def _same_conditions(cached: tuple, conditions: tuple) -> bool:
+        # 繰り返しの規則は変更のたびに別の辞書になるため、同じものかどうかで比べる
+        return cached[:-1] == conditions[:-1] and cached[-1] is conditions[-1]
+
+    def _candidates(self, today: int, rules: dict) -> tuple:
+        """
+        (キー, タスクID, 残りのポモドーロ数) の候補と、まだ実体化していない繰り返しの回
+        （期限切れと今日の回。task.id -> 回）を返す
+        """
+        key = self._key
+        candidates = [(key(task_id, entry, today), task_id, entry[2]) for task_id, entry in self._entries.items()
+                      if task_id not in rules]
+        virtual = {}
+        if rules:
+            day = date.fromordinal(today)
+            for task in self.task_manager.get_overdue_occurrences() + self.task_manager.get_occurrences(day, day):
+                entry = self._entry(task)
+                if entry is not None:
+                    candidates.append((key(task.id, entry, today), task.id, entry[2]))
+                    virtual[task.id] = task
+        return candidates, virtual
+
+    def _select(self, today: int, capacity: int, whole: bool, exact_limit: int, rules: dict) -> tuple:
+        """(割り当て, 割り当てたタスクID, 最後に割り当てたタスクのキー, 厳密に解いたか, overflow) を返す"""
+        is_blocked = self.task_manager.is_blocked
+        candidates, virtual = self._candidates(today, rules)
+        due = [candidate for candidate in candidates if candidate[0][1] <= today and not is_blocked(candidate[1])]
+        cutoff = None
+        fitting = None
+        if whole and capacity:
+            fitting = [candidate for candidate in candidates
+                       if candidate[2] <= capacity and not is_blocked(candidate[1])]
+        exact = fitting is not None and len(fitting) <= exact_limit
+        if exact:
+            chosen = self._select_exact(fitting, capacity)
+        else:
+            heapq.heapify(candidates)
+            chosen = []
+            left = capacity
+            while left and candidates:
+                key, task_id, remaining = heapq.heappop(candidates)
+                if is_blocked(task_id) or (whole and remaining > left):
+                    continue
+                count = min(remaining, left)
+                chosen.append((task_id, count, remaining))
+                left -= count
+                cutoff = key
+            if whole or left:
+                # 割り当てなかったタスクの変更でも結果が変わりうる
+                cutoff = None
+
+        assigned = {task_id: count for task_id, count, _ in chosen}
+        assignments = [(self._resolve(task_id, virtual), count, remaining) for task_id, count, remaining in chosen]
+        due.sort()
+        overflow = [self._resolve(task_id, virtual) for _, task_id, remaining in due
+                    if assigned.get(task_id, 0) < remaining]
+        return assignments, set(assigned), cutoff, exact, overflow
+
+    def _select_exact(self, candidates: list, capacity: int) -> list:
+        """残りのポモドーロをすべて入れるタスクの組み合わせを動的計画法で選ぶ（0/1 ナップサック）"""
+        candidates.sort()
+        best = [0] * (capacity + 1)  # 枠の数 -> その数までに入る組み合わせの価値の合計の最大
+        taken = []  # 候補ごとに、その候補を入れたときに best が増えた枠の数の集合
+        for key, _, size in candidates:
+            value = -key[0] * size
+            improved = set()
+            for used in range(capacity, size - 1, -1):
+                if best[used - size] + value > best[used]:
+                    best[used] = best[used - size] + value
+                    improved.add(used)
+            taken.append(improved)
+
+        used = max(range(capacity + 1), key=lambda used: (best[used], -used))
+        chosen = []
+        for index in range(len(candidates) - 1, -1, -1):
+            if used in taken[index]:
+                _, task_id, size = candidates[index]
+                chosen.append((task_id, size, size))
+                used -= size
+        chosen.reverse()
+        return chosen
+
+    def _resolve(self, task_id: str, virtual: dict) -> Task:
+        return self.task_manager.get_task(task_id) or virtual[task_id]
@@ -5,6 +5,10 @@ import time
 import threading
 from typing import Callable, Optional
 from datetime import datetime, timedelta
+from modules.metrics import registry as metrics
+
+metrics.describe("pomodoro_tick_lag_seconds", "タイマーの1秒ごとの処理の予定時刻からの遅れ")
+metrics.describe("pomodoro_tick_callback_seconds", "毎秒のコールバック（表示の更新）")
 
 
 class PomodoroTimer:
@@ -66,17 +70,26 @@ class PomodoroTimer:
     
     def _run_timer(self):
         """タイマーのメインループ"""
+        last_tick = None  # 直前に1秒分を処理した時刻（一時停止中は None）
         while self.is_running and self.remaining_time > 0:
             if not self.is_paused:
                 self.remaining_time -= 1
                 
+                now = time.perf_counter()
+                if last_tick is not None and metrics.enabled:
+                    metrics.timer("pomodoro_tick_lag_seconds").observe(max(0.0, now - last_tick - 1.0))
+                last_tick = now
+                
                 # 毎秒コールバックを呼び出し
                 if self.on_tick:
-                    self.on_tick(self.remaining_time)
+                    with metrics.time("pomodoro_tick_callback_seconds"):
+                        self.on_tick(self.remaining_time)
                 
                 # セッション完了チェック
                 if self.remaining_time <= 0:
                     self._complete_session()
+            else:
+                last_tick = None
             
             time.sleep(1)
         
@@ -0,0 +1,409 @@
+"""
+繰り返しタスク
+テンプレートのタスクに繰り返しの規則（毎日・N日ごと・毎週の指定した曜日・毎月）を付け、
+各回のタスクは保存せずに、要求された期間の分だけジェネレーターで作る（仮想の回）。
+完了・編集した回だけを通常のタスクとして保存する（実体化）。
+
+規則はデータファイルの隣のファイル（tasks.json なら tasks.recurrence.json）に
+テンプレートのタスクID -> 規則 で保存する。実体化した回のIDは
+「テンプレートのID@YYYY-MM-DD」で、IDから日付の回が実体化済みかどうかが分かるため、
+回とタスクの対応は記録しない。テンプレート自体は期限日を持たない通常のタスクで、
+完了にすると繰り返しを止める（規則は残る）。
+
+期限切れの判定のために、規則は「それより前の回はすべて完了・スキップ済み」の日
+（pending_from）を持つ。期限切れの仮想の回は pending_from から昨日までの回だけを
+作るため、古い繰り返しでも過去の回をすべて展開することはない。
+"""
+import calendar
+import heapq
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Iterator, Optional
+from modules.file_lock import FileLock
+from modules.task import FrozenTask, Task
+
+
+STORE_VERSION = 1
+FREQUENCIES = ("daily", "weekly", "monthly")
+WEEKDAY_KEYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+WEEKDAY_NAMES = ("月", "火", "水", "木", "金", "土", "日")
+OCCURRENCE_SEPARATOR = "@"  # 回のID（テンプレートのID@YYYY-MM-DD）の区切り
+
+
+def parse_date(value) -> Optional[date]:
+    """YYYY-MM-DD の文字列を date に変換（date と None はそのまま）"""
+    if value is None or isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def parse_weekdays(text: str) -> tuple:
+    """"mon,wed" や "月,水" を曜日の番号（月曜が 0）のタプルに変換"""
+    weekdays = []
+    for name in text.replace("・", ",").split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name[:3] in WEEKDAY_KEYS:
+            weekdays.append(WEEKDAY_KEYS.index(name[:3]))
+        elif name[:1] in WEEKDAY_NAMES:
+            weekdays.append(WEEKDAY_NAMES.index(name[:1]))
+        else:
+            raise ValueError(f"曜日を解釈できません: {name}")
+    return tuple(sorted(set(weekdays)))
+
+
+class RecurrenceRule:
+    """
+    繰り返しの規則（変更しない。変更するときは replace で新しい規則を作る）
+
+    変更しないため、スナップショットと同じく別スレッドからロックなしで読んでよい。
+    """
+
+    __slots__ = ('frequency', 'interval', 'weekdays', 'month_day', 'start', 'until',
+                 'exdates', 'pending_from')
+
+    def __init__(self, frequency: str, start, interval: int = 1, weekdays: Iterable[int] = (),
+                 month_day: Optional[int] = None, until=None, exdates: Iterable = (), pending_from=None):
+        """
+        Args:
+            frequency (str): "daily"（interval 日ごと）, "weekly"（interval 週ごとの weekdays）,
+                "monthly"（interval か月ごとの month_day 日。ない日は月末）
+            start (date | str): 最初の回の日付（YYYY-MM-DD）
+            interval (int): 間隔
+            weekdays (Iterable[int]): 曜日（月曜が 0。省略すると start の曜日）
+            month_day (Optional[int]): 日（省略すると start の日）
+            until (date | str | None): 最後の回の日付の上限（None は終わりなし）
+            exdates (Iterable): スキップした回の日付
+            pending_from (date | str | None): これより前の回はすべて完了・スキップ済み（None は start）
+        """
+        start = parse_date(start)
+        until = parse_date(until)
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"繰り返しの種類は {'・'.join(FREQUENCIES)} のいずれかです")
+        if int(interval) < 1:
+            raise ValueError("繰り返しの間隔は1以上にしてください")
+        weekdays = tuple(sorted(set(int(weekday) for weekday in weekdays))) or (start.weekday(),)
+        if any(not 0 <= weekday <= 6 for weekday in weekdays):
+            raise ValueError("曜日は 0（月）から 6（日）で指定してください")
+        month_day = int(month_day) if month_day is not None else start.day
+        if not 1 <= month_day <= 31:
+            raise ValueError("日は 1 から 31 で指定してください")
+        if until is not None and until < start:
+            raise ValueError("繰り返しの終了日が開始日より前です")
+
+        set_ = object.__setattr__
+        set_(self, 'frequency', frequency)
+        set_(self, 'interval', int(interval))
+        set_(self, 'weekdays', weekdays if frequency == "weekly" else ())
+        set_(self, 'month_day', month_day if frequency == "monthly" else None)
+        set_(self, 'start', start)
+        set_(self, 'until', until)
+        set_(self, 'exdates', frozenset(parse_date(day) for day in exdates))
+        set_(self, 'pending_from', parse_date(pending_from) or start)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("繰り返しの規則は変更できません（replace を使う）")
+
+    def replace(self, **changes) -> 'RecurrenceRule':
+        """一部の項目を変えた規則"""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return RecurrenceRule(**values)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RecurrenceRule) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def to_dict(self) -> dict:
+        return {
+            'frequency': self.frequency,
+            'interval': self.interval,
+            'weekdays': list(self.weekdays),
+            'month_day': self.month_day,
+            'start': self.start.isoformat(),
+            'until': self.until.isoformat() if self.until else None,
+            'exdates': sorted(day.isoformat() for day in self.exdates),
+            'pending_from': self.pending_from.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RecurrenceRule':
+        return cls(data['frequency'], data['start'], interval=data.get('interval', 1),
+                   weekdays=data.get('weekdays') or (), month_day=data.get('month_day'),
+                   until=data.get('until'), exdates=data.get('exdates') or (),
+                   pending_from=data.get('pending_from'))
+
+    def describe(self) -> str:
+        """規則の説明（"毎週 月・水" など）"""
+        if self.frequency == "daily":
+            text = "毎日" if self.interval == 1 else f"{self.interval}日ごと"
+        elif self.frequency == "weekly":
+            text = ("毎週" if self.interval == 1 else f"{self.interval}週ごと") + " " + \
+                "・".join(WEEKDAY_NAMES[weekday] for weekday in self.weekdays)
+        else:
+            text = ("毎月" if self.interval == 1 else f"{self.interval}か月ごと") + f" {self.month_day}日"
+        if self.until is not None:
+            text += f"（{self.until.isoformat()}まで）"
+        return text
+
+    def iter_dates(self, date_from: Optional[date] = None, date_to: Optional[date] = None) -> Iterator[date]:
+        """
+        期間内（両端を含む）の回の日付を順に返すジェネレーター（スキップした回も含む）
+
+        最初の回は start から順にたどらずに計算で求める。date_to も until も None なら
+        終わりがないため、呼び出し側で打ち切ること。
+        """
+        first = self.start if date_from is None or date_from < self.start else date_from
+        last = date_to
+        if self.until is not None and (last is None or self.until < last):
+            last = self.until
+        if last is not None and first > last:
+            return iter(())
+        if self.frequency == "daily":
+            return self._daily(first, last)
+        if self.frequency == "weekly":
+            return self._weekly(first, last)
+        return self._monthly(first, last)
+
+    def _daily(self, first: date, last: Optional[date]) -> Iterator[date]:
+        step = self.interval
+        offset = (first - self.start).days
+        day = self.start + timedelta(days=-(-offset // step) * step)
+        delta = timedelta(days=step)
+        while last is None or day <= last:
+            yield day
+            day += delta
+
+    def _weekly(self, first: date, last: Optional[date]) -> Iterator[date]:
+        week0 = self.start - timedelta(days=self.start.weekday())
+        week = (first - week0).days // 7
+        week += -week % self.interval  # 間隔の倍数の週に切り上げる
+        monday = week0 + timedelta(weeks=week)
+        delta = timedelta(weeks=self.interval)
+        while True:
+            for weekday in self.weekdays:
+                day = monday + timedelta(days=weekday)
+                if day < first:
+                    continue
+                if last is not None and day > last:
+                    return
+                yield day
+            monday += delta
+
+    def _monthly(self, first: date, last: Optional[date]) -> Iterator[date]:
+        months = (first.year - self.start.year) * 12 + first.month - self.start.month
+        months += -months % self.interval
+        while True:
+            year, month = divmod(self.start.month - 1 + months, 12)
+            year += self.start.year
+            month += 1
+            day = date(year, month, min(self.month_day, calendar.monthrange(year, month)[1]))
+            if day >= first:
+                if last is not None and day > last:
+                    return
+                yield day
+            months += self.interval
+
+    def occurs_on(self, day: date) -> bool:
+        """day が回の日付か（スキップした回も含む）"""
+        return next(self.iter_dates(day, day), None) == day
+
+    def settle(self, is_done: Callable[[date], bool]) -> 'RecurrenceRule':
+        """
+        pending_from を最初の未処理の回まで進めた規則
+
+        is_done は実体化した回が完了済みかどうかを返す関数。pending_from より前の
+        スキップの記録は不要になるため捨てる。
+        """
+        pending = None
+        for day in self.iter_dates(self.pending_from):
+            if day not in self.exdates and not is_done(day):
+                pending = day
+                break
+        if pending is None:
+            pending = self.until + timedelta(days=1)  # 最後の回まで処理済み
+        if pending == self.pending_from:
+            return self
+        return self.replace(pending_from=pending, exdates=[day for day in self.exdates if day >= pending])
+
+    def skip(self, days: Iterable[date]) -> 'RecurrenceRule':
+        """days の回をスキップした規則（処理済みの回は記録しない）"""
+        days = {day for day in days if day >= self.pending_from} - self.exdates
+        if not days:
+            return self
+        return self.replace(exdates=self.exdates | days)
+
+
+def occurrence_id(template_id: str, day: date) -> str:
+    """回のタスクID"""
+    return f"{template_id}{OCCURRENCE_SEPARATOR}{day.isoformat()}"
+
+
+def parse_occurrence_id(task_id: str) -> Optional[tuple]:
+    """回のタスクIDを (テンプレートのID, 日付) に分ける（回のIDでなければ None）"""
+    template_id, separator, day = task_id.rpartition(OCCURRENCE_SEPARATOR)
+    if not separator or not template_id:
+        return None
+    try:
+        return template_id, parse_date(day)
+    except ValueError:
+        return None
+
+
+class OccurrenceTask(FrozenTask):
+    """
+    まだ実体化していない回（仮想のタスク）
+
+    ID・期限日以外の属性はテンプレートのスナップショットを参照し、完了状態・進捗・
+    ポモドーロ回数は初期値。変更はできない（TaskManager の変更操作に ID を渡すと実体化する）。
+    """
+
+    __slots__ = ('template',)
+
+    def __init__(self, template: FrozenTask, day: date):
+        object.__setattr__(self, '__dict__', {
+            'id': occurrence_id(template.id, day),
+            'due_date': day.isoformat(),
+            'completed': False,
+            'progress': 0,
+            'pomodoro_count': 0,
+            'actual_time': 0,
+            'revision': 0
+        })
+        object.__setattr__(self, 'template', template)
+
+    def __getattr__(self, name):
+        # ID・期限日など以外はテンプレートの属性
+        if name.startswith('__') or name == 'template':
+            raise AttributeError(name)
+        return getattr(self.template, name)
+
+
+def materialize(template: Task, day: date) -> Task:
+    """回を通常のタスクとして作成（テンプレートの属性をコピーし、期限日を回の日付にする）"""
+    data = template.to_dict()
+    now = datetime.now().isoformat()
+    data.update(id=occurrence_id(template.id, day), due_date=day.isoformat(), progress=0,
+                pomodoro_count=0, actual_time=0, completed=False, revision=0,
+                created_at=now, updated_at=now)
+    return Task.from_dict(data)
+
+
+def expand(rules: dict, get_template: Callable[[str], Optional[FrozenTask]],
+           get_task: Callable[[str], Optional[Task]], date_from: Optional[date],
+           date_to: date) -> Iterator[OccurrenceTask]:
+    """
+    期間内（両端を含む）の仮想の回を期限日の順に返すジェネレーター
+
+    実体化済み・スキップした回と、テンプレートがない・完了済みの規則は除く。
+    date_from が None なら各規則の pending_from から（期限切れの判定用）。
+    date_to を必ず指定するため、終わりのない繰り返しでも期間内の回だけを作る。
+
+    Args:
+        rules (dict): テンプレートのID -> RecurrenceRule
+        get_template: テンプレートのIDからスナップショット用のタスクを返す関数
+        get_task: IDから実体化済みの回を返す関数（なければ None）
+    """
+    def series(template: FrozenTask, rule: RecurrenceRule) -> Iterator[OccurrenceTask]:
+        # pending_from より前の回は実体化済み（アーカイブ済みを含む）かスキップ済み
+        start = rule.pending_from if date_from is None else max(date_from, rule.pending_from)
+        for day in rule.iter_dates(start, date_to):
+            if day not in rule.exdates and get_task(occurrence_id(template.id, day)) is None:
+                yield OccurrenceTask(template, day)
+
+    generators = []
+    for template_id, rule in rules.items():
+        template = get_template(template_id)
+        if template is not None and not template.completed:
+            generators.append(series(template, rule))
+    # 各規則の回は日付順なので、マージするだけで全体が日付順になる
+    return heapq.merge(*generators, key=lambda task: task.due_date)
+
+
+def expand_overdue(rules: dict, get_template: Callable[[str], Optional[FrozenTask]],
+                   get_task: Callable[[str], Optional[Task]], today: Optional[date] = None) -> Iterator[OccurrenceTask]:
+    """期限切れ（昨日まで）の仮想の回（各規則の pending_from から）"""
+    today = today or datetime.now().date()
+    return expand(rules, get_template, get_task, None, today - timedelta(days=1))
+
+
+class RecurrenceStore:
+    """
+    繰り返しの規則のファイル（テンプレートのタスクID -> RecurrenceRule）
+
+    rules は変更のたびに新しい辞書に置き換えるため、取得した辞書はロックなしで読んでよい。
+    変更はファイルのロックを取り、他のプロセスの変更を読み直してから書き込む。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(path + ".lock")
+        self._state = None  # 最後に読み書きしたときのファイルの (更新時刻, サイズ)
+        self._rules = {}
+
+    def _file_state(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self):
+        """他のプロセスがファイルを変更していれば読み直す"""
+        state = self._file_state()
+        if state == self._state:
+            return
+        rules = {}
+        if state is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                rules = {template_id: RecurrenceRule.from_dict(rule)
+                         for template_id, rule in data.get('rules', {}).items()}
+            except Exception as e:
+                print(f"繰り返しの規則の読み込み中にエラーが発生しました: {e}")
+        self._rules = rules
+        self._state = state
+
+    @property
+    def rules(self) -> dict:
+        """テンプレートのタスクID -> RecurrenceRule（変更しないこと）"""
+        with self._lock:
+            self._refresh()
+            return self._rules
+
+    def get(self, template_id: str) -> Optional[RecurrenceRule]:
+        return self.rules.get(template_id)
+
+    def update(self, changes: dict) -> dict:
+        """
+        規則を変更して保存し、変更後の rules を返す
+
+        Args:
+            changes (dict): テンプレートのID -> RecurrenceRule（None なら削除）、
+                または RecurrenceRule を受け取って新しい規則（None なら削除）を返す関数
+        """
+        with self._lock, self._file_lock.acquire():
+            self._refresh()
+            rules = dict(self._rules)
+            for template_id, change in changes.items():
+                rule = change(rules.get(template_id)) if callable(change) else change
+                if rule is None:
+                    rules.pop(template_id, None)
+                else:
+                    rules[template_id] = rule
+            if rules == self._rules:
+                return self._rules
+            data = {'version': STORE_VERSION,
+                    'rules': {template_id: rule.to_dict() for template_id, rule in rules.items()}}
+            temp_file = self.path + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.path)
+            self._rules = rules
+            self._state = self._file_state()
+            return rules
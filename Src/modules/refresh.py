@@ -0,0 +1,63 @@
+"""
+UI再描画スケジューラ
+ハンドラーは再描画が必要なパネルを「ダーティ」として記録するだけにし、
+アイドル時に1回だけまとめて再描画する
+"""
+from typing import Callable, Optional
+from modules.responsiveness import tracked
+
+
+class RefreshScheduler:
+    """パネル単位で再描画をまとめるスケジューラ"""
+    
+    def __init__(self, root):
+        """
+        Args:
+            root: after_idle を持つTkウィジェット（通常はメインウィンドウ）
+        """
+        self.root = root
+        self._panels = {}  # パネル名 -> (再描画関数, 表示判定関数)
+        self._dirty = set()
+        self._pending = None
+    
+    def register(self, panel: str, callback: Callable[[], None],
+                 is_visible: Optional[Callable[[], bool]] = None):
+        """
+        パネルを登録
+        
+        Args:
+            panel (str): パネル名
+            callback (Callable): 再描画関数
+            is_visible (Optional[Callable]): 表示中かどうかを返す関数。
+                False の間は再描画を保留し、flush_panel で表示時に処理する
+        """
+        self._panels[panel] = (callback, is_visible)
+    
+    def mark_dirty(self, *panels: str):
+        """パネルを再描画待ちにする（アイドル時にまとめて処理）"""
+        self._dirty.update(panels)
+        if self._pending is None:
+            self._pending = self.root.after_idle(self.flush)
+    
+    def is_dirty(self, panel: str) -> bool:
+        """パネルが再描画待ちかどうか"""
+        return panel in self._dirty
+    
+    @tracked
+    def flush(self):
+        """再描画待ちのパネルを登録順に1回ずつ再描画"""
+        self._pending = None
+        for panel in self._panels:
+            self.flush_panel(panel)
+    
+    def flush_panel(self, panel: str):
+        """パネルが再描画待ちかつ表示中なら再描画"""
+        if panel not in self._dirty:
+            return
+        
+        callback, is_visible = self._panels[panel]
+        if is_visible is not None and not is_visible():
+            return
+        
+        self._dirty.discard(panel)
+        callback()
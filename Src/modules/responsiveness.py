@@ -0,0 +1,230 @@
+"""
+GUI の応答性モニター
+Tk のメインループに一定間隔のハートビートを登録し、予定より遅れて呼ばれた時間
+（イベントループが処理をブロックしていた時間）を記録する。
+
+@tracked を付けたハンドラーの実行区間を覚えておき、長い遅れ（ストール）を
+その間に動いていたハンドラーに割り当てる。終了時に遅れのヒストグラムと
+最も長かったストールを表示する。
+
+動作していない間は @tracked はモニターの有無を確認するだけで何もしない。
+環境変数 TASKMASTER_UI_MONITOR=1 で起動時から有効にできる。
+"""
+import functools
+import heapq
+import threading
+import time
+from collections import deque
+from typing import Optional
+from modules.metrics import Timer, registry as metrics
+
+
+HEARTBEAT_INTERVAL_MS = 50  # ハートビートの間隔（ミリ秒）
+STALL_THRESHOLD = 0.1  # これより長い遅れをストールとして記録する（秒）
+WORST_STALLS = 10  # 終了時に表示するストールの数
+RECENT_SPANS = 256  # ストールの割り当てに使う、直近に終わったハンドラーの実行区間の数
+UNTRACKED = "（計測対象外の処理）"
+
+# 遅れのヒストグラムの区切り（秒。60fps の1フレーム、30fps、…）
+LAG_BUCKETS = (0.016, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+
+metrics.describe("gui_event_loop_lag_seconds", "Tk のイベントループの遅れ（ハートビートが予定より遅れた時間）")
+
+_active = None  # 動作中のモニター
+
+
+def tracked(func):
+    """ハンドラーの実行区間をモニターに記録するデコレーター（メインスレッドでの呼び出しのみ）"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        monitor = _active
+        if monitor is None or threading.get_ident() != monitor.thread_id:
+            return func(*args, **kwargs)
+        monitor._enter(func.__name__)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            monitor._exit()
+    return wrapper
+
+
+class HandlerStats:
+    """ハンドラーごとの実行時間の集計"""
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.stalls = 0  # このハンドラーに割り当てたストールの数
+
+
+class ResponsivenessMonitor:
+    """Tk のイベントループの遅れを計測するモニター"""
+
+    def __init__(self, root, interval_ms: int = HEARTBEAT_INTERVAL_MS,
+                 stall_threshold: float = STALL_THRESHOLD):
+        """
+        Args:
+            root: after を持つTkウィジェット（通常はメインウィンドウ）
+            interval_ms (int): ハートビートの間隔（ミリ秒）
+            stall_threshold (float): ストールとして記録する遅れ（秒）
+        """
+        self.root = root
+        self.interval_ms = interval_ms
+        self.stall_threshold = stall_threshold
+        self.thread_id = None
+        self.lags = Timer(LAG_BUCKETS)
+        self.handlers = {}  # ハンドラー名 -> HandlerStats
+        self.worst = []  # (遅れ, 連番, 発生時刻, ハンドラー) の最小ヒープ（最も長い WORST_STALLS 件）
+        self.started_at = None
+        self._stack = []  # 実行中のハンドラーの (呼び出し経路, 開始時刻)
+        self._recent = deque(maxlen=RECENT_SPANS)  # 終わったハンドラーの (呼び出し経路, 開始, 終了)
+        self._last_beat = None
+        self._after_id = None
+        self._stall_count = 0
+
+    @property
+    def running(self) -> bool:
+        return self._after_id is not None
+
+    def start(self):
+        """計測を開始（メインスレッドから呼ぶ）"""
+        global _active
+        if self.running:
+            return
+        self.thread_id = threading.get_ident()
+        self.started_at = self.started_at or time.time()
+        self._last_beat = time.perf_counter()
+        self._after_id = self.root.after(self.interval_ms, self._beat)
+        _active = self
+
+    def stop(self):
+        """計測を停止（記録した値は残す）"""
+        global _active
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if _active is self:
+            _active = None
+
+    def _enter(self, name: str):
+        path = f"{self._stack[-1][0]} > {name}" if self._stack else name
+        self._stack.append((path, time.perf_counter()))
+
+    def _exit(self):
+        if not self._stack:
+            return
+        path, started = self._stack.pop()
+        ended = time.perf_counter()
+        self._recent.append((path, started, ended))
+        stats = self.handlers.get(path)
+        if stats is None:
+            stats = self.handlers[path] = HandlerStats()
+        elapsed = ended - started
+        stats.calls += 1
+        stats.total += elapsed
+        if elapsed > stats.max:
+            stats.max = elapsed
+
+    def _beat(self):
+        now = time.perf_counter()
+        lag = max(0.0, now - self._last_beat - self.interval_ms / 1000)
+        self.lags.observe(lag)
+        if metrics.enabled:
+            metrics.timer("gui_event_loop_lag_seconds").observe(lag)
+        if lag >= self.stall_threshold:
+            self._record_stall(lag, self._last_beat, now)
+        self._last_beat = now
+        self._after_id = self.root.after(self.interval_ms, self._beat)
+
+    def _blame(self, window_start: float, window_end: float, lag: float) -> str:
+        """
+        ストールの原因のハンドラーを選ぶ
+
+        前回のハートビートからの間に動いていたハンドラーのうち、遅れの半分以上を
+        占めるものの中で最も内側（呼び出し経路が深いもの）を選ぶ。
+        該当がなければ最も長く重なったもの、実行中のハンドラーの順に探す。
+        """
+        candidates = []
+        for path, started, ended in self._recent:
+            overlap = min(ended, window_end) - max(started, window_start)
+            if overlap > 0:
+                candidates.append((overlap, path))
+        dominant = [(path.count(" > "), overlap, path) for overlap, path in candidates if overlap >= lag / 2]
+        if dominant:
+            return max(dominant)[2]
+        if candidates:
+            return max(candidates)[1]
+        if self._stack:
+            return self._stack[-1][0]
+        return UNTRACKED
+
+    def _record_stall(self, lag: float, window_start: float, window_end: float):
+        handler = self._blame(window_start, window_end, lag)
+        stats = self.handlers.get(handler)
+        if stats is not None:
+            stats.stalls += 1
+        self._stall_count += 1
+        entry = (lag, self._stall_count, time.time(), handler)
+        if len(self.worst) < WORST_STALLS:
+            heapq.heappush(self.worst, entry)
+        elif lag > self.worst[0][0]:
+            heapq.heapreplace(self.worst, entry)
+
+    def get_report(self) -> dict:
+        """計測結果（時間はミリ秒）"""
+        lags = self.lags
+        histogram = []
+        previous = 0.0
+        for bound, count in zip(lags.buckets + (None,), lags.bucket_counts):
+            histogram.append({'from_ms': previous * 1000, 'to_ms': bound * 1000 if bound else None,
+                              'count': count})
+            previous = bound or previous
+        return {
+            'beats': lags.count,
+            'lag_p50_ms': round(lags.quantile(0.5) * 1000, 1),
+            'lag_p95_ms': round(lags.quantile(0.95) * 1000, 1),
+            'lag_max_ms': round(lags.max * 1000, 1),
+            'stalls': self._stall_count,
+            'histogram': histogram,
+            'worst_stalls': [
+                {'lag_ms': round(lag * 1000, 1), 'handler': handler,
+                 'at': time.strftime('%H:%M:%S', time.localtime(at))}
+                for lag, _, at, handler in sorted(self.worst, reverse=True)
+            ],
+            'handlers': {
+                path: {'calls': stats.calls, 'total_ms': round(stats.total * 1000, 1),
+                       'max_ms': round(stats.max * 1000, 1), 'stalls': stats.stalls}
+                for path, stats in sorted(self.handlers.items(), key=lambda item: -item[1].max)
+            }
+        }
+
+    def format_report(self) -> str:
+        """表示用の計測結果"""
+        report = self.get_report()
+        if not report['beats']:
+            return "[ui] 計測結果はありません"
+        lines = [f"[ui] イベントループの遅れ: p50 {report['lag_p50_ms']} ms  p95 {report['lag_p95_ms']} ms  "
+                 f"最大 {report['lag_max_ms']} ms（{report['beats']}回、"
+                 f"{self.stall_threshold * 1000:.0f} ms 以上のストール {report['stalls']}回）"]
+        width = max(entry['count'] for entry in report['histogram']) or 1
+        for entry in report['histogram']:
+            upper = f"{entry['to_ms']:.0f} ms" if entry['to_ms'] is not None else "    ∞"
+            bar = "#" * round(entry['count'] / width * 40)
+            lines.append(f"[ui]   {entry['from_ms']:6.0f} - {upper:>7}  {entry['count']:>7}  {bar}")
+        if report['worst_stalls']:
+            lines.append("[ui] 長かったストール:")
+            for stall in report['worst_stalls']:
+                lines.append(f"[ui]   {stall['lag_ms']:8.1f} ms  {stall['at']}  {stall['handler']}")
+        slow = [(path, stats) for path, stats in report['handlers'].items() if stats['max_ms'] >= 1]
+        if slow:
+            lines.append("[ui] ハンドラー（最大時間の順）:")
+            for path, stats in slow[:WORST_STALLS]:
+                lines.append(f"[ui]   最大 {stats['max_ms']:8.1f} ms  合計 {stats['total_ms']:9.1f} ms  "
+                             f"{stats['calls']:>6}回  ストール {stats['stalls']}回  {path}")
+        return "\n".join(lines)
+
+
+def get_active() -> Optional[ResponsivenessMonitor]:
+    """動作中のモニター（なければ None）"""
+    return _active
@@ -0,0 +1,318 @@
+"""
+タスク検索モジュール
+TaskManager の変更通知でインデックスを更新し、一覧を走査せずに検索する
+"""
+import bisect
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+from modules.task import Task, TaskManager
+
+
+STATUS_INCOMPLETE = "未完了"
+STATUS_COMPLETED = "完了済み"
+STATUS_OVERDUE = "期限切れ"
+
+
+def parse_query(text: str) -> dict:
+    """
+    検索ボックスの入力を検索条件に変換
+    
+    書式（空白区切りで組み合わせ可能）:
+        #タグ  @カテゴリ  !優先度（高/中/低）  due:開始..終了（YYYY-MM-DD、片側省略可）
+        それ以外の語はタイトル・説明・タグの部分一致（すべての語を含むもの）
+    """
+    query = {'text': [], 'tags': [], 'category': None, 'priority': None,
+             'due_from': None, 'due_to': None}
+    
+    for term in text.split():
+        if term.startswith('#') and len(term) > 1:
+            query['tags'].append(term[1:])
+        elif term.startswith('@') and len(term) > 1:
+            query['category'] = term[1:]
+        elif term.startswith('!') and len(term) > 1:
+            query['priority'] = term[1:]
+        elif term.startswith('due:'):
+            start, _, end = term[4:].partition('..')
+            # 2026-1-5 のようなゼロ埋めのない日付もインデックスと同じ形式にそろえる
+            query['due_from'] = TaskIndex._valid_due_date(start) or start or None
+            query['due_to'] = TaskIndex._valid_due_date(end) or end or None
+        else:
+            query['text'].append(term.lower())
+    
+    return query
+
+
+def _text_grams(text: str) -> set:
+    """部分一致検索用の1文字・2文字のグラムを作成"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def task_matches(task: Task, query: dict, status: Optional[str] = None) -> bool:
+    """
+    1件のタスクが検索条件に一致するか判定（インデックスを使わない）
+    
+    Args:
+        task (Task): 判定するタスク
+        query (dict): parse_query の結果
+        status (Optional[str]): "未完了", "完了済み", "期限切れ"（None はすべて）
+    """
+    if status == STATUS_INCOMPLETE and task.completed:
+        return False
+    if status == STATUS_COMPLETED and not task.completed:
+        return False
+    if status == STATUS_OVERDUE and not task.is_overdue():
+        return False
+    if query.get('category') is not None and task.category != query['category']:
+        return False
+    if query.get('priority') is not None and task.priority != query['priority']:
+        return False
+    if any(tag not in task.tags for tag in query.get('tags', [])):
+        return False
+    if query.get('due_from') or query.get('due_to'):
+        due = TaskIndex._valid_due_date(task.due_date)
+        if due is None:
+            return False
+        if query.get('due_from') and due < query['due_from']:
+            return False
+        if query.get('due_to') and due > query['due_to']:
+            return False
+    if query.get('text'):
+        text = " ".join([task.title, task.description] + list(task.tags)).lower()
+        if not all(term in text for term in query['text']):
+            return False
+    return True
+
+
+class TaskIndex:
+    """
+    検索用インデックス
+    
+    変更通知は変更したスレッド（ポモドーロタイマーや取り込みのワーカー）から届くため、
+    インデックスの更新と検索はロックで1つずつ行う。
+    """
+    
+    def __init__(self, task_manager: TaskManager):
+        self.task_manager = task_manager
+        self._lock = threading.RLock()
+        self._clear()
+        task_manager.add_listener(self._on_task_change)
+        self.rebuild()
+    
+    def _clear(self):
+        # 各インデックスはタスクの追加順の通し番号（整数）の集合で持つ。
+        # 整数の集合は積集合が速く、ソートするだけで一覧の並び順になる
+        self.by_category = defaultdict(set)
+        self.by_tag = defaultdict(set)
+        self.by_priority = defaultdict(set)
+        self.by_gram = defaultdict(set)
+        self.completed = set()
+        self.incomplete = set()
+        self.due_dates = []  # (期限日, 通し番号) の昇順リスト
+        self.due_keys = []  # due_dates と同じ並びの通し番号（集合への変換用）
+        self._tasks = {}  # 通し番号 -> Task
+        self._texts = {}  # 通し番号 -> 検索対象テキスト（小文字）
+        self._entries = {}  # task.id -> インデックス登録時の値（削除用）
+    
+    def rebuild(self):
+        """全タスクからインデックスを再構築"""
+        with self._lock:
+            self._clear()
+            for task in self.task_manager.tasks:
+                self._add(task)
+            self.due_dates.sort()
+            self.due_keys = [key for _, key in self.due_dates]
+    
+    def _on_task_change(self, event: str, task: Optional[Task]):
+        """TaskManager の変更通知"""
+        with self._lock:
+            if event == "reset":
+                self.rebuild()
+            elif event == "added":
+                self._add(task, keep_sorted=True)
+            elif event == "removed":
+                self._remove(task.id)
+            elif event in ("updated", "pomodoro_incremented"):
+                self._remove(task.id)
+                self._add(task, keep_sorted=True)
+    
+    def _add(self, task: Task, keep_sorted: bool = False):
+        key = self.task_manager.get_order(task.id)
+        text = " ".join([task.title, task.description] + list(task.tags)).lower()
+        grams = _text_grams(text)
+        due = self._valid_due_date(task.due_date)
+        entry = (key, task.category, tuple(task.tags), task.priority, task.completed, due, grams)
+        self._entries[task.id] = entry
+        self._tasks[key] = task
+        self._texts[key] = text
+        
+        self.by_category[task.category].add(key)
+        for tag in task.tags:
+            self.by_tag[tag].add(key)
+        self.by_priority[task.priority].add(key)
+        (self.completed if task.completed else self.incomplete).add(key)
+        for gram in grams:
+            self.by_gram[gram].add(key)
+        if due is not None:
+            if keep_sorted:
+                index = bisect.bisect_left(self.due_dates, (due, key))
+                self.due_dates.insert(index, (due, key))
+                self.due_keys.insert(index, key)
+            else:
+                self.due_dates.append((due, key))
+    
+    def _remove(self, task_id: str):
+        entry = self._entries.pop(task_id, None)
+        if entry is None:
+            return
+        key, category, tags, priority, completed, due, grams = entry
+        self._tasks.pop(key, None)
+        self._texts.pop(key, None)
+        
+        self._discard(self.by_category, category, key)
+        for tag in tags:
+            self._discard(self.by_tag, tag, key)
+        self._discard(self.by_priority, priority, key)
+        (self.completed if completed else self.incomplete).discard(key)
+        for gram in grams:
+            self._discard(self.by_gram, gram, key)
+        if due is not None:
+            index = bisect.bisect_left(self.due_dates, (due, key))
+            if index < len(self.due_dates) and self.due_dates[index] == (due, key):
+                del self.due_dates[index]
+                del self.due_keys[index]
+    
+    @staticmethod
+    def _discard(index: dict, value, key: int):
+        keys = index.get(value)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[value]
+    
+    @staticmethod
+    def _valid_due_date(due_date: Optional[str]) -> Optional[str]:
+        """
+        YYYY-MM-DD形式の期限日だけを返す（is_overdue と同じ判定）
+        
+        文字列の順で範囲を調べるため、ゼロ埋めのない日付（2026-1-5）は 2026-01-05 に直して返す。
+        """
+        if not due_date:
+            return None
+        try:
+            return datetime.strptime(due_date, '%Y-%m-%d').date().isoformat()
+        except ValueError:
+            return None
+    
+    def _due_range(self, due_from: Optional[str], due_to: Optional[str],
+                   inclusive_end: bool = True) -> set:
+        """期限日が範囲内のタスクの通し番号"""
+        start = bisect.bisect_left(self.due_dates, (due_from,)) if due_from else 0
+        if due_to is None:
+            end = len(self.due_dates)
+        elif inclusive_end:
+            end = bisect.bisect_right(self.due_dates, (due_to, float('inf')))
+        else:
+            end = bisect.bisect_left(self.due_dates, (due_to,))
+        return set(self.due_keys[start:end])
+    
+    def _text_candidates(self, term: str) -> set:
+        """語を含むタスクの候補（グラムの積集合）"""
+        if len(term) == 1:
+            return set(self.by_gram.get(term, ()))
+        grams = sorted((term[i:i + 2] for i in range(len(term) - 1)),
+                       key=lambda gram: len(self.by_gram.get(gram, ())))
+        result = set(self.by_gram.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not result:
+                break
+            result &= self.by_gram.get(gram, set())
+        return result
+    
+    def search(self, query: dict, status: Optional[str] = None, include_occurrences: bool = False) -> list:
+        """
+        条件に一致するタスクを一覧の並び順で取得
+        
+        Args:
+            query (dict): parse_query の結果
+            status (Optional[str]): "未完了", "完了済み", "期限切れ"（None はすべて）
+            include_occurrences (bool): 繰り返しの仮想の回も末尾に加える（search_occurrences）
+        """
+        with self._lock:
+            tasks = self._search(query, status)
+        if include_occurrences:
+            tasks.extend(self.search_occurrences(query, status))
+        return tasks
+    
+    def search_occurrences(self, query: dict, status: Optional[str] = None) -> list:
+        """
+        条件に一致する繰り返しの仮想の回（期限日の順）
+        
+        終わりのない繰り返しを展開しないように、期限切れ（status）か、期限日の範囲の
+        両端（due:開始..終了）を指定した場合だけ探す。それ以外は空。
+        """
+        if status == STATUS_COMPLETED:
+            return []
+        if status == STATUS_OVERDUE:
+            candidates = self.task_manager.get_overdue_occurrences()
+        elif query.get('due_from') and query.get('due_to'):
+            due_from = self._valid_due_date(query['due_from'])
+            due_to = self._valid_due_date(query['due_to'])
+            if due_from is None or due_to is None:
+                return []
+            candidates = self.task_manager.get_occurrences(due_from, due_to)
+        else:
+            return []
+        return [task for task in candidates if task_matches(task, query, status)]
+    
+    def _search(self, query: dict, status: Optional[str]) -> list:
+        candidates = []
+        
+        if status == STATUS_INCOMPLETE:
+            candidates.append(self.incomplete)
+        elif status == STATUS_COMPLETED:
+            candidates.append(self.completed)
+        elif status == STATUS_OVERDUE:
+            today = datetime.now().strftime('%Y-%m-%d')
+            candidates.append(self._due_range(None, today, inclusive_end=False) & self.incomplete)
+        
+        if query.get('category') is not None:
+            candidates.append(self.by_category.get(query['category'], set()))
+        if query.get('priority') is not None:
+            candidates.append(self.by_priority.get(query['priority'], set()))
+        for tag in query.get('tags', []):
+            candidates.append(self.by_tag.get(tag, set()))
+        if query.get('due_from') or query.get('due_to'):
+            candidates.append(self._due_range(query.get('due_from'), query.get('due_to')))
+        
+        text_terms = query.get('text', [])
+        for term in text_terms:
+            candidates.append(self._text_candidates(term))
+        
+        if not candidates:
+            return list(self.task_manager.tasks)
+        
+        # 小さい集合から順に積集合を取る
+        candidates.sort(key=len)
+        keys = set(candidates[0])
+        for other in candidates[1:]:
+            if not keys:
+                break
+            keys &= other
+        
+        # 3文字以上の語はグラムの一致だけでは確定しないので部分一致を確認する
+        long_terms = [term for term in text_terms if len(term) > 2]
+        if long_terms:
+            texts = self._texts
+            keys = {key for key in keys
+                    if all(term in texts[key] for term in long_terms)}
+        
+        # 通し番号順が一覧の並び順
+        return list(map(self._tasks.__getitem__, sorted(keys)))
+    
+    def matches(self, task: Task, query: dict, status: Optional[str] = None) -> bool:
+        """1件のタスクが条件に一致するか判定（差分更新用）"""
+        return task_matches(task, query, status)
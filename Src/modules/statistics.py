@@ -2,28 +2,58 @@
 統計分析モジュール
 """
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import json
-from modules.task import Task, TaskManager
+from modules.metrics import registry as metrics
+from modules.task import Task, TaskManager, TaskSnapshot
+
+metrics.describe("statistics_seconds", "統計の計算（method はメソッド名）")
 
 
 class TaskStatistics:
-    """タスク統計クラス"""
+    """
+    タスク統計クラス
+    
+    各メソッドは TaskManager のスナップショットから集計するため、別スレッドから呼んでもよい。
+    snapshot を渡すと複数の集計で同じ時点のタスクを使う。
+    アーカイブに移した完了済みタスクは、完了月・カテゴリごとの集計を足し込んで含める
+    （週別進捗と最近の完了数は直近7日のため、アーカイブのタスクは対象にならない）。
+    繰り返しの仮想の回は TaskManager.get_task_count_by_status と同じくカテゴリ別の件数に含めず、
+    get_recurrence_stats で数える（これからの回は終わりがないため期間を区切る）。
+    """
     
-    def __init__(self, task_manager: TaskManager):
+    def __init__(self, task_manager: TaskManager, include_archived: bool = True):
         self.task_manager = task_manager
+        self.include_archived = include_archived
+    
+    def _snapshot(self, snapshot: Optional[TaskSnapshot]) -> TaskSnapshot:
+        return snapshot if snapshot is not None else self.task_manager.snapshot()
+    
+    def _archived_buckets(self) -> List[Dict[str, Any]]:
+        """アーカイブのタスクの完了月・カテゴリごとの集計"""
+        if not self.include_archived:
+            return []
+        return self.task_manager.archive.buckets()
     
-    def get_productivity_stats(self) -> Dict[str, Any]:
+    @metrics.timed("statistics_seconds", method="get_productivity_stats")
+    def get_productivity_stats(self, snapshot: Optional[TaskSnapshot] = None) -> Dict[str, Any]:
         """生産性統計を取得"""
-        tasks = self.task_manager.tasks
-        completed_tasks = self.task_manager.get_completed_tasks()
+        tasks = self._snapshot(snapshot)
+        completed_tasks = tasks.get_completed_tasks()
+        archived = self._archived_buckets()
+        archived_count = sum(bucket['count'] for bucket in archived)
+        total_count = len(tasks) + archived_count
+        completed_count = len(completed_tasks) + archived_count
         
-        total_estimated_time = sum(task.estimated_time for task in tasks)
-        total_actual_time = sum(task.actual_time for task in completed_tasks)
-        total_pomodoros = sum(task.pomodoro_count for task in completed_tasks)
+        total_estimated_time = (sum(task.estimated_time for task in tasks)
+                                + sum(bucket['estimated_time'] for bucket in archived))
+        total_actual_time = (sum(task.actual_time for task in completed_tasks)
+                             + sum(bucket['actual_time'] for bucket in archived))
+        total_pomodoros = (sum(task.pomodoro_count for task in completed_tasks)
+                           + sum(bucket['pomodoros'] for bucket in archived))
         
         # 完了率
-        completion_rate = (len(completed_tasks) / len(tasks)) * 100 if tasks else 0
+        completion_rate = (completed_count / total_count) * 100 if total_count else 0
         
         # 時間効率性（実際時間 vs 予想時間）
         efficiency = 0
@@ -31,21 +61,24 @@ class TaskStatistics:
             efficiency = (total_estimated_time / total_actual_time) * 100
         
         return {
-            'total_tasks': len(tasks),
-            'completed_tasks': len(completed_tasks),
+            'total_tasks': total_count,
+            'completed_tasks': completed_count,
+            'archived_tasks': archived_count,
             'completion_rate': round(completion_rate, 1),
             'total_estimated_time': total_estimated_time,
             'total_actual_time': total_actual_time,
             'total_pomodoros': total_pomodoros,
             'efficiency': round(efficiency, 1),
-            'average_task_time': round(total_actual_time / len(completed_tasks), 1) if completed_tasks else 0
+            'average_task_time': round(total_actual_time / completed_count, 1) if completed_count else 0
         }
     
-    def get_category_stats(self) -> Dict[str, Dict[str, int]]:
+    @metrics.timed("statistics_seconds", method="get_category_stats")
+    def get_category_stats(self, snapshot: Optional[TaskSnapshot] = None) -> Dict[str, Dict[str, int]]:
         """カテゴリ別統計を取得"""
+        tasks = self._snapshot(snapshot)
         category_stats = {}
         
-        for task in self.task_manager.tasks:
+        for task in tasks:
             category = task.category
             if category not in category_stats:
                 category_stats[category] = {
@@ -64,30 +97,50 @@ class TaskStatistics:
             else:
                 category_stats[category]['in_progress'] += 1
         
+        for bucket in self._archived_buckets():
+            stats = category_stats.setdefault(bucket['category'], {
+                'total': 0,
+                'completed': 0,
+                'in_progress': 0,
+                'overdue': 0
+            })
+            stats['total'] += bucket['count']
+            stats['completed'] += bucket['count']
+        
         return category_stats
     
-    def get_priority_stats(self) -> Dict[str, Dict[str, int]]:
+    @metrics.timed("statistics_seconds", method="get_priority_stats")
+    def get_priority_stats(self, snapshot: Optional[TaskSnapshot] = None) -> Dict[str, Dict[str, int]]:
         """優先度別統計を取得"""
+        tasks = self._snapshot(snapshot)
         priority_stats = {'高': {'total': 0, 'completed': 0},
                          '中': {'total': 0, 'completed': 0},
                          '低': {'total': 0, 'completed': 0}}
         
-        for task in self.task_manager.tasks:
+        for task in tasks:
             priority = task.priority
             priority_stats[priority]['total'] += 1
             if task.completed:
                 priority_stats[priority]['completed'] += 1
         
+        for bucket in self._archived_buckets():
+            for priority, count in bucket['priorities'].items():
+                stats = priority_stats.setdefault(priority, {'total': 0, 'completed': 0})
+                stats['total'] += count
+                stats['completed'] += count
+        
         return priority_stats
     
-    def get_weekly_progress(self) -> List[Dict[str, Any]]:
+    @metrics.timed("statistics_seconds", method="get_weekly_progress")
+    def get_weekly_progress(self, snapshot: Optional[TaskSnapshot] = None) -> List[Dict[str, Any]]:
         """週別進捗を取得"""
+        tasks = self._snapshot(snapshot)
         weekly_data = []
         today = datetime.now().date()
         
         for i in range(7):
             date = today - timedelta(days=6-i)
-            day_tasks = [task for task in self.task_manager.tasks 
+            day_tasks = [task for task in tasks 
                         if datetime.fromisoformat(task.created_at).date() == date]
             completed_tasks = [task for task in day_tasks if task.completed]
             
@@ -101,29 +154,66 @@ class TaskStatistics:
         
         return weekly_data
     
-    def get_tag_usage(self) -> Dict[str, int]:
+    @metrics.timed("statistics_seconds", method="get_tag_usage")
+    def get_tag_usage(self, snapshot: Optional[TaskSnapshot] = None) -> Dict[str, int]:
         """タグ使用統計を取得"""
+        tasks = self._snapshot(snapshot)
         tag_count = {}
         
-        for task in self.task_manager.tasks:
+        for task in tasks:
             for tag in task.tags:
                 tag_count[tag] = tag_count.get(tag, 0) + 1
+        for bucket in self._archived_buckets():
+            for tag, count in bucket['tags'].items():
+                tag_count[tag] = tag_count.get(tag, 0) + count
         
         # 使用頻度順にソート
         return dict(sorted(tag_count.items(), key=lambda x: x[1], reverse=True))
     
+    @metrics.timed("statistics_seconds", method="get_recurrence_stats")
+    def get_recurrence_stats(self, snapshot: Optional[TaskSnapshot] = None, days: int = 7) -> Dict[str, int]:
+        """
+        繰り返しタスクの統計を取得
+        
+        series（繰り返し中のテンプレート数）, completed_occurrences（完了した回）,
+        overdue_occurrences（期限切れの仮想の回）, upcoming_occurrences（今日から days 日間の仮想の回）
+        """
+        tasks = self._snapshot(snapshot)
+        rules = tasks.rules
+        if not rules:
+            return {'series': 0, 'completed_occurrences': 0, 'overdue_occurrences': 0, 'upcoming_occurrences': 0}
+        from modules.recurrence import parse_occurrence_id
+        
+        templates = [tasks.get_task(template_id) for template_id in rules]
+        series = sum(1 for template in templates if template is not None and not template.completed)
+        completed_occurrences = 0
+        for task in tasks.get_completed_tasks():
+            parsed = parse_occurrence_id(task.id)
+            if parsed is not None and parsed[0] in rules:
+                completed_occurrences += 1
+        today = datetime.now().date()
+        return {
+            'series': series,
+            'completed_occurrences': completed_occurrences,
+            'overdue_occurrences': len(tasks.get_overdue_occurrences()),
+            'upcoming_occurrences': len(tasks.get_occurrences(today, today + timedelta(days=days - 1)))
+        }
+    
+    @metrics.timed("statistics_seconds", method="export_statistics")
     def export_statistics(self, filename: str = None) -> str:
         """統計データをJSONファイルにエクスポート"""
         if filename is None:
             filename = f"task_statistics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
+        snapshot = self.task_manager.snapshot()
         stats_data = {
             'generated_at': datetime.now().isoformat(),
-            'productivity': self.get_productivity_stats(),
-            'categories': self.get_category_stats(),
-            'priorities': self.get_priority_stats(),
-            'weekly_progress': self.get_weekly_progress(),
-            'tag_usage': self.get_tag_usage()
+            'productivity': self.get_productivity_stats(snapshot),
+            'categories': self.get_category_stats(snapshot),
+            'priorities': self.get_priority_stats(snapshot),
+            'weekly_progress': self.get_weekly_progress(snapshot),
+            'tag_usage': self.get_tag_usage(snapshot),
+            'recurrence': self.get_recurrence_stats(snapshot)
         }
         
         try:
@@ -133,39 +223,44 @@ class TaskStatistics:
         except Exception as e:
             raise Exception(f"統計データのエクスポートに失敗しました: {e}")
     
-    def get_task_trends(self) -> Dict[str, Any]:
+    @metrics.timed("statistics_seconds", method="get_task_trends")
+    def get_task_trends(self, snapshot: Optional[TaskSnapshot] = None) -> Dict[str, Any]:
         """タスクトレンド分析"""
-        if not self.task_manager.tasks:
+        tasks = self._snapshot(snapshot)
+        archived = self._archived_buckets()
+        if not tasks and not archived:
             return {}
         
         # 最近の完了傾向
-        recent_completed = len([task for task in self.task_manager.get_completed_tasks() 
+        completed_tasks = tasks.get_completed_tasks()
+        recent_completed = len([task for task in completed_tasks 
                                if (datetime.now() - datetime.fromisoformat(task.updated_at)).days <= 7])
         
-        # 平均完了時間
-        completed_tasks = self.task_manager.get_completed_tasks()
-        if completed_tasks:
-            avg_completion_time = sum(
-                (datetime.fromisoformat(task.updated_at) - datetime.fromisoformat(task.created_at)).days
-                for task in completed_tasks
-            ) / len(completed_tasks)
-        else:
-            avg_completion_time = 0
+        # 平均完了時間（アーカイブのタスクは完了した曜日を数えたもの＝日時が読めたものの数で割る）
+        completion_days = sum(
+            (datetime.fromisoformat(task.updated_at) - datetime.fromisoformat(task.created_at)).days
+            for task in completed_tasks
+        ) + sum(bucket['completion_days'] for bucket in archived)
+        completion_count = len(completed_tasks) + sum(sum(bucket['weekdays'].values()) for bucket in archived)
+        avg_completion_time = completion_days / completion_count if completion_count else 0
         
         return {
             'recent_completions': recent_completed,
             'average_completion_days': round(avg_completion_time, 1),
-            'most_productive_day': self._get_most_productive_day(),
-            'preferred_categories': list(self.get_category_stats().keys())[:3]
+            'most_productive_day': self._get_most_productive_day(completed_tasks, archived),
+            'preferred_categories': list(self.get_category_stats(tasks).keys())[:3]
         }
     
-    def _get_most_productive_day(self) -> str:
+    def _get_most_productive_day(self, completed_tasks: list, archived: list = ()) -> str:
         """最も生産性の高い曜日を取得"""
         day_completions = {}
         
-        for task in self.task_manager.get_completed_tasks():
+        for task in completed_tasks:
             day = datetime.fromisoformat(task.updated_at).strftime('%A')
             day_completions[day] = day_completions.get(day, 0) + 1
+        for bucket in archived:
+            for day, count in bucket['weekdays'].items():
+                day_completions[day] = day_completions.get(day, 0) + count
         
         if day_completions:
             return max(day_completions, key=day_completions.get)
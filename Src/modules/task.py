@@ -1,9 +1,47 @@
 """
 タスク管理アプリケーション用のタスククラス
 """
-from datetime import datetime
-from typing import Optional
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional, Union
+import functools
 import json
+import os
+import threading
+from modules.binary_store import BINARY_EXTENSION, FIELDS as STORED_FIELDS, SUMMARY_FIELDS, \
+    BinaryStoreWriter, BinaryTaskStore, can_reuse_heap, is_binary_store
+from modules.dependencies import DependencyCycleError, DependencyGraph, read_dependencies, \
+    write_dependencies
+from modules.file_lock import FileLock
+from modules.metrics import registry as metrics
+from modules.migrations import SCHEMA_VERSION, VERSION_KEY, UnsupportedVersionError, is_current, \
+    migrate_record, split_store, store_header
+
+
+MAX_TOMBSTONES = 10000  # 保持する削除記録の上限（超えた分は古い順に破棄）
+
+_UNCHANGED = object()  # Task.update で省略された項目（None と区別するため）
+
+BATCH_RESET_THRESHOLD = 1000  # 一括操作でこれより多く変わった場合は個別ではなく "reset" で通知する
+
+# 同期で反映できるタスクの項目
+SYNC_FIELDS = ['title', 'description', 'priority', 'due_date', 'category', 'tags',
+               'estimated_time', 'progress', 'pomodoro_count', 'actual_time', 'completed']
+
+metrics.describe("task_load_seconds", "データファイルの読み込み（JSONの解析とインデックスの構築を含む）")
+metrics.describe("task_json_decode_seconds", "データファイルのJSONの解析")
+metrics.describe("task_save_seconds", "タスクの保存（他のプロセスの変更の取り込みを含む）")
+metrics.describe("task_json_write_seconds", "タスクの辞書化とJSONの書き込み")
+metrics.describe("task_binary_write_seconds", "バイナリ形式のデータファイルの書き込み")
+metrics.describe("task_merge_seconds", "他のプロセスによる変更の取り込み")
+metrics.describe("task_snapshot_build_seconds", "スナップショットの作成")
+metrics.describe("task_index_rebuild_seconds", "内部インデックスの再構築")
+metrics.describe("task_index_updates_total", "内部インデックスへの登録・削除の件数")
+metrics.describe("task_index_remove_seconds", "一覧と内部インデックスからの削除（一覧の走査を含む）")
+metrics.describe("task_overdue_scan_seconds", "期限切れタスクの抽出（期限日の解析を含む）")
+metrics.describe("task_listener_seconds", "変更通知のリスナー呼び出し")
+metrics.describe("task_migrate_seconds", "古い形式のタスクの移行（まとめて移行する1回分）")
+metrics.describe("task_archive_move_seconds", "完了済みタスクのアーカイブへの移動（データファイルの保存を含む）")
 
 
 class Task:
@@ -39,6 +77,7 @@ class Task:
         self.completed = False
         self.created_at = datetime.now().isoformat()
         self.updated_at = datetime.now().isoformat()
+        self.revision = 0  # 最後に変更されたときの変更番号（TaskManager が設定）
     
     def _generate_id(self) -> str:
         """ユニークなIDを生成"""
@@ -50,17 +89,21 @@ class Task:
         self.updated_at = datetime.now().isoformat()
     
     def update(self, title: str = None, description: str = None, 
-               priority: str = None, due_date: str = None, category: str = None,
+               priority: str = None, due_date: Optional[str] = _UNCHANGED, category: str = None,
                tags: list = None, estimated_time: int = None, progress: int = None):
-        """タスク情報を更新"""
+        """
+        タスク情報を更新
+        
+        None の項目は変更しない。ただし due_date は None で期限日を削除し、省略すると変更しない。
+        """
         if title is not None:
             self.title = title
         if description is not None:
             self.description = description
         if priority is not None:
             self.priority = priority
-        if due_date is not None:
-            self.due_date = due_date
+        if due_date is not _UNCHANGED:
+            self.due_date = due_date or None
         if category is not None:
             self.category = category
         if tags is not None:
@@ -88,19 +131,27 @@ class Task:
             'actual_time': self.actual_time,
             'completed': self.completed,
             'created_at': self.created_at,
-            'updated_at': self.updated_at
+            'updated_at': self.updated_at,
+            'revision': self.revision,
+            VERSION_KEY: SCHEMA_VERSION
         }
     
     @classmethod
     def from_dict(cls, data: dict) -> 'Task':
-        """辞書からタスクオブジェクトを作成"""
+        """
+        辞書からタスクオブジェクトを作成
+        
+        古いスキーマの辞書（schema_version がないものなど）は現在のスキーマに移行してから読み込む。
+        現在のスキーマでも同期などで項目が欠けていることがあるため、ない項目は既定値にする。
+        """
+        data = migrate_record(data)
         task = cls(
             title=data['title'],
             description=data.get('description', ''),
             priority=data.get('priority', '中'),
             due_date=data.get('due_date'),
             category=data.get('category', '一般'),
-            tags=data.get('tags', []),
+            tags=list(data.get('tags') or []),
             estimated_time=data.get('estimated_time', 25),
             progress=data.get('progress', 0)
         )
@@ -108,8 +159,9 @@ class Task:
         task.pomodoro_count = data.get('pomodoro_count', 0)
         task.actual_time = data.get('actual_time', 0)
         task.completed = data.get('completed', False)
-        task.created_at = data.get('created_at', datetime.now().isoformat())
-        task.updated_at = data.get('updated_at', datetime.now().isoformat())
+        task.created_at = data.get('created_at', task.created_at)
+        task.updated_at = data.get('updated_at', task.updated_at)
+        task.revision = data.get('revision', 0)
         return task
     
     def get_priority_color(self) -> str:
@@ -168,31 +220,1393 @@ class Task:
     def get_estimated_pomodoros(self) -> int:
         """予想ポモドーロ数を計算"""
         return max(1, (self.estimated_time + 24) // 25)  # 25分単位で切り上げ
+    
+    def freeze(self) -> 'FrozenTask':
+        """スナップショット用の変更できないコピーを作成"""
+        return FrozenTask(self)
+
+
+class FrozenTask(Task):
+    """
+    スナップショット用の変更できないタスク
+    
+    元のタスクの属性をコピーして持つ（tags はタプル）。Task の読み取り用の
+    メソッドはそのまま使えるが、属性の変更は AttributeError になる。
+    """
+    
+    def __init__(self, task: Task):
+        data = dict(task.__dict__)
+        data['tags'] = tuple(task.tags)
+        object.__setattr__(self, '__dict__', data)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("スナップショットのタスクは変更できません")
+    
+    def __delattr__(self, name):
+        raise AttributeError("スナップショットのタスクは変更できません")
+    
+    def to_dict(self) -> dict:
+        data = super().to_dict()
+        data['tags'] = list(self.tags)
+        return data
+
+
+class StoredTask(Task):
+    """
+    バイナリ形式のデータファイルのレコードを参照するタスク
+    
+    作成時は id と revision だけを持ち、その他の属性は初めて参照したときにレコードから読み込む
+    （優先度・カテゴリ・期限日・タグ・数値・完了状態はまとめて、タイトルなどの文字列は個別に）。
+    属性を変更していなければ、保存時はレコードをデコードせずにそのまま写す。
+    """
+    
+    __slots__ = ('_store', '_record', '_changed')
+    
+    def __init__(self, store: BinaryTaskStore, record: int, task_id: str, revision: int):
+        object.__setattr__(self, '_store', store)
+        object.__setattr__(self, '_record', record)
+        object.__setattr__(self, '_changed', False)
+        self.__dict__.update(id=task_id, revision=revision)
+    
+    def __getattr__(self, name):
+        # まだ読み込んでいない属性を参照したときだけ呼ばれる
+        return _load_stored_field(self, name)
+    
+    def __setattr__(self, name, value):
+        object.__setattr__(self, '_changed', True)
+        object.__setattr__(self, name, value)
+    
+    def load(self):
+        """まだ読み込んでいない属性をまとめて読み込む（変更した属性はそのまま）"""
+        attributes = self.__dict__
+        if len(attributes) < len(STORED_FIELDS):
+            for name, value in self._store.read_fields(self._record).items():
+                attributes.setdefault(name, value)
+    
+    def to_dict(self) -> dict:
+        self.load()
+        return super().to_dict()
+    
+    def freeze(self) -> FrozenTask:
+        if not self._changed:
+            return FrozenStoredTask(self)
+        self.load()
+        return FrozenTask(self)
+
+
+class FrozenStoredTask(FrozenTask):
+    """変更していない StoredTask のスナップショット（同じレコードから遅延して読み込む）"""
+    
+    __slots__ = ('_store', '_record')
+    
+    def __init__(self, task: StoredTask):
+        object.__setattr__(self, '__dict__', {'id': task.id, 'revision': task.revision})
+        object.__setattr__(self, '_store', task._store)
+        object.__setattr__(self, '_record', task._record)
+    
+    def __getattr__(self, name):
+        return _load_stored_field(self, name, frozen=True)
+
+
+class RecordTask(Task):
+    """
+    古いスキーマのデータファイル（JSON）のレコードを参照するタスク
+    
+    作成時は id と revision だけを持ち、その他の属性は初めて参照したときに
+    レコードを現在のスキーマに移行してから設定する。変更していなければ、保存時は
+    読み込んだレコードをそのまま書き込む（移行した内容は次に変更したときに保存される）。
+    """
+    
+    __slots__ = ('_record', '_changed')
+    
+    def __init__(self, record: dict):
+        if 'title' not in record:
+            raise KeyError('title')
+        object.__setattr__(self, '_record', record)
+        object.__setattr__(self, '_changed', False)
+        self.__dict__.update(id=record['id'], revision=record.get('revision', 0))
+    
+    def __getattr__(self, name):
+        # まだ移行していない属性を参照したときだけ呼ばれる
+        return _load_record_field(self, name)
+    
+    def __setattr__(self, name, value):
+        object.__setattr__(self, '_changed', True)
+        object.__setattr__(self, name, value)
+    
+    def load(self):
+        """レコードを移行して、まだ設定していない属性をまとめて設定する（変更した属性はそのまま）"""
+        attributes = self.__dict__
+        if len(attributes) < len(STORED_FIELDS):
+            record = migrate_record(self._record)
+            for name in STORED_FIELDS:
+                attributes.setdefault(name, list(record['tags']) if name == 'tags' else record[name])
+    
+    def mark_migrated(self):
+        """移行した内容を次の保存で書き込むようにする（元のレコードは手放す）"""
+        self.load()
+        object.__setattr__(self, '_changed', True)
+        object.__setattr__(self, '_record', None)
+    
+    def to_dict(self) -> dict:
+        self.load()
+        return super().to_dict()
+    
+    def freeze(self) -> FrozenTask:
+        if not self._changed:
+            return FrozenRecordTask(self)
+        self.load()
+        return FrozenTask(self)
+
+
+class FrozenRecordTask(FrozenTask):
+    """変更していない RecordTask のスナップショット（保存時は元のレコードをそのまま書き込む）"""
+    
+    __slots__ = ('_record',)
+    
+    def __init__(self, task: RecordTask):
+        data = dict(task.__dict__)
+        if 'tags' in data:
+            data['tags'] = tuple(data['tags'])
+        object.__setattr__(self, '__dict__', data)
+        object.__setattr__(self, '_record', task._record)
+    
+    def __getattr__(self, name):
+        return _load_record_field(self, name, frozen=True)
+
+
+def _load_record_field(task, name: str, frozen: bool = False):
+    """RecordTask / FrozenRecordTask のまだ設定していない属性をレコードから移行して設定"""
+    if name not in STORED_FIELDS:
+        raise AttributeError(name)
+    record = migrate_record(task._record)
+    attributes = task.__dict__
+    for field in STORED_FIELDS:
+        if field not in attributes:
+            value = record[field]
+            if field == 'tags':
+                value = tuple(value) if frozen else list(value)
+            attributes[field] = value
+    return attributes[name]
+
+
+def task_from_record(record: dict) -> Task:
+    """データファイルのレコードからタスクを作成（古いスキーマのレコードは参照時に移行する）"""
+    if is_current(record):
+        return Task.from_dict(record)
+    return RecordTask(record)
+
+
+def store_record(task: Task) -> dict:
+    """データファイルに書き込むレコード（変更していない古いレコードはそのまま）"""
+    if isinstance(task, FrozenRecordTask):
+        return task._record
+    return task.to_dict()
+
+
+def _load_stored_field(task, name: str, frozen: bool = False):
+    """StoredTask / FrozenStoredTask のまだ読み込んでいない属性をレコードから読み込む"""
+    if name not in STORED_FIELDS:
+        raise AttributeError(name)
+    attributes = task.__dict__
+    if name in SUMMARY_FIELDS:
+        summary = task._store.read_summary(task._record)
+        if frozen:
+            summary['tags'] = tuple(summary['tags'])
+        summary.update(attributes)  # 変更した属性はそのまま
+        attributes.update(summary)
+        return attributes[name]
+    value = attributes[name] = task._store.read_field(task._record, name)
+    return value
+
+
+def _assign_fields(task: Task, data: dict):
+    """Task.to_dict の形の辞書で属性を上書き（StoredTask は変更ありとして記録される）"""
+    for name, value in data.items():
+        if name != VERSION_KEY:
+            setattr(task, name, value)
+
+
+class TaskSnapshot:
+    """
+    ある時点のタスク一覧（変更できない）
+    
+    変更されていないタスクの FrozenTask は前後のスナップショットで共有する。
+    ロックなしで別スレッドから読んでよい。
+    rules は作成時点の繰り返しの規則（テンプレートのID -> modules.recurrence.RecurrenceRule）。
+    """
+    
+    def __init__(self, version: int, tasks: tuple, rules: Optional[dict] = None):
+        self.version = version  # 作成時点の change_seq
+        self.tasks = tasks
+        self.rules = rules or {}
+        self._by_id = None
+    
+    def __iter__(self):
+        return iter(self.tasks)
+    
+    def __len__(self) -> int:
+        return len(self.tasks)
+    
+    def __getitem__(self, index):
+        return self.tasks[index]
+    
+    def get_task(self, task_id: str) -> Optional[FrozenTask]:
+        if self._by_id is None:
+            self._by_id = {task.id: task for task in self.tasks}
+        return self._by_id.get(task_id)
+    
+    def get_incomplete_tasks(self) -> list:
+        return [task for task in self.tasks if not task.completed]
+    
+    def get_completed_tasks(self) -> list:
+        return [task for task in self.tasks if task.completed]
+    
+    def get_overdue_tasks(self) -> list:
+        """期限切れのタスク（繰り返しの期限切れの仮想の回を含む）"""
+        return [task for task in self.tasks if task.is_overdue()] + self.get_overdue_occurrences()
+    
+    def get_occurrences(self, date_from, date_to) -> list:
+        """期限日が期間内（両端を含む）の繰り返しの仮想の回（期限日の順）"""
+        if not self.rules:
+            return []
+        from modules.recurrence import expand, parse_date
+        return list(expand(self.rules, self.get_task, self.get_task, parse_date(date_from), parse_date(date_to)))
+    
+    def get_overdue_occurrences(self) -> list:
+        """繰り返しの期限切れの仮想の回"""
+        if not self.rules:
+            return []
+        from modules.recurrence import expand_overdue
+        return list(expand_overdue(self.rules, self.get_task, self.get_task))
+
+
+def synchronized(method):
+    """TaskManager のロックを取ってメソッドを実行する（書き込みは1つずつ行う）"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            result = method(self, *args, **kwargs)
+            if self._snapshot_wanted:
+                self._publish_if_wanted()
+            return result
+    return wrapper
 
 
 class TaskManager:
-    """タスクの管理を行うクラス"""
+    """
+    タスクの管理を行うクラス
+    
+    変更は1つのロックで直列化する。別スレッドから読む場合は tasks を直接たどらず、
+    snapshot() で変更されないスナップショットを取得する。
+    """
     
-    def __init__(self):
+    def __init__(self, data_file: str = "tasks.json"):
         self.tasks = []
-        self.data_file = "tasks.json"
+        self.data_file = data_file
+        self._tasks_by_id = {}  # task.id -> Task
+        self._order = {}  # task.id -> 追加順の通し番号
+        self._next_order = 0
+        self._listeners = []
+        self.autosave = True  # False の場合は変更ごとに保存せず dirty にする（呼び出し側で保存）
+        self.dirty = False
+        
+        # 差分同期用。変更のたびに change_seq を1つ進め、タスクの revision に記録する
+        self.change_seq = 0
+        self._change_log = {}  # task.id -> 最後の変更番号（変更順に並べ直して保持）
+        self._tombstones = {}  # 削除したタスクの id -> 削除時の変更番号（変更番号順）
+        self.tombstone_floor = 0  # これより前のカーソルは削除記録が欠けているため全件同期が必要
+        
+        # トランザクション中は保存と通知を保留し、終了時にまとめて行う
+        self._tx_depth = 0
+        self._tx_events = []
+        self._tx_persist = False
+        self._tx_state = None  # 開始時点の変更番号など（ロールバック用）
+        self._tx_structure = None  # 最初に追加・削除したときの一覧と内部インデックスのコピー
+        self._tx_log_undo = {}  # task.id -> 変更前の (変更記録, 削除記録)
+        self._tx_task_snapshots = {}  # task.id -> 変更前のタスクの辞書
+        self._tx_graph_undo = []  # 依存関係の変更の取り消し（("add" または "remove", 辺のリスト)）
+        
+        self._lock = threading.RLock()  # 変更（トランザクション全体を含む）を直列化する
+        self._save_lock = threading.Lock()  # ファイルへの書き込みの順序を保つ
+        self._frozen = {}  # task.id -> FrozenTask（変更されるまでスナップショット間で共有）
+        self._snapshot = None  # 最新の状態のスナップショット（変更されたら None）
+        self._published = None  # 最後に公開したスナップショット
+        self._stale_ids = set()  # 最後に公開してから変更・追加したタスク
+        self._structure_changed = False  # 最後に公開してから削除や読み込みで並びが変わったか
+        self._positions = None  # task.id -> tasks 内の位置（並びが変わったら None）
+        self._snapshot_wanted = False  # 書き込み中に読み込み側が古いスナップショットを受け取ったか
+        
+        # 他のプロセスによる変更の検出用（データファイルのロック中に読み書きする）
+        self._disk_stat = None  # 最後に読み書きしたときのデータファイルの (更新時刻, サイズ, inode)
+        self._disk_base = {}  # task.id -> 最後に読み書きしたときのファイル上の updated_at
+        self.merge_conflicts = 0  # 双方で変更されていたタスクの数（累計）
+        # 新しいバージョンのアプリで保存されたデータファイルなど、上書きしてはいけない理由（None なら保存できる）
+        self.readonly_reason = None
+        
+        # 完了から archive_after_days 日経ったタスクは読み込み時にアーカイブへ移す（None は移さない）
+        self.archive_after_days = None
+        self._archive = None
+        self._recurrences = None  # 繰り返しの規則（modules.recurrence.RecurrenceStore）
+        
+        # タスク間の依存関係。データファイルの隣のファイルに保存する（dependencies_dirty なら次の保存で書き込む）
+        self._dependencies = DependencyGraph()
+        self.dependencies_dirty = False
+        self._critical_path = None  # (グラフの version, change_seq, 結果)
+    
+    def add_listener(self, callback: Callable[[str, Optional[Task]], None]):
+        """
+        変更通知のリスナーを登録
+        
+        コールバックは (event, task) で呼ばれる。event は
+        "added", "updated", "removed", "pomodoro_incremented"（ポモドーロ回数の増加。更新の一種）,
+        "reset"（全件再読み込みや一括追加、task は None）のいずれか。
+        """
+        self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[str, Optional[Task]], None]):
+        """変更通知のリスナーを解除"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
     
+    def _notify(self, event: str, task: Optional[Task] = None):
+        """リスナーに変更を通知（トランザクション中は終了時まで保留）"""
+        if self._tx_depth:
+            self._tx_events.append((event, task))
+            return
+        with metrics.time("task_listener_seconds", event=event):
+            for callback in list(self._listeners):
+                callback(event, task)
+    
+    def _persist(self):
+        """変更を保存（autosave が無効なら保存待ちとして記録するだけ）"""
+        if self._tx_depth:
+            self._tx_persist = True
+        elif self.autosave:
+            self.save_tasks()
+        else:
+            self.dirty = True
+    
+    @contextmanager
+    def transaction(self):
+        """
+        複数の変更をまとめて1回の保存と1回の通知で反映する
+        
+        ブロック内で例外が発生した場合は開始時点の状態に戻し、保存も通知もしない。
+        入れ子にした場合は最も外側のブロックでまとめて反映する。
+        
+        使い方:
+            with task_manager.transaction():
+                task_manager.update_task(task_id, priority="高")
+                task_manager.remove_task(other_id)
+        """
+        with self._lock:
+            yield from self._run_transaction()
+            if self._snapshot_wanted:
+                self._publish_if_wanted()
+    
+    def _run_transaction(self):
+        if self._tx_depth == 0:
+            self._tx_events = []
+            self._tx_persist = False
+            self._tx_task_snapshots = {}
+            self._tx_structure = None
+            self._tx_log_undo = {}
+            self._tx_graph_undo = []
+            self._tx_state = (self._next_order, self.change_seq, self.tombstone_floor, self.dirty)
+        
+        self._tx_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._tx_depth -= 1
+            if self._tx_depth == 0:
+                self._rollback()
+            raise
+        self._tx_depth -= 1
+        if self._tx_depth == 0:
+            self._commit()
+    
+    def _before_change(self, task: Task):
+        """トランザクション中なら変更前のタスクを記録（ロールバック用）"""
+        if self._tx_depth and task.id not in self._tx_task_snapshots:
+            self._tx_task_snapshots[task.id] = task.to_dict()
+    
+    def _before_structure_change(self):
+        """トランザクション中なら追加・削除の前の一覧と内部インデックスをコピー（最初の1回だけ）"""
+        if self._tx_depth and self._tx_structure is None:
+            self._tx_structure = (list(self.tasks), dict(self._tasks_by_id), dict(self._order))
+    
+    def _before_log_change(self, task_id: str):
+        """トランザクション中なら変更前の変更記録・削除記録を控える"""
+        if self._tx_depth and task_id not in self._tx_log_undo:
+            self._tx_log_undo[task_id] = (self._change_log.get(task_id), self._tombstones.get(task_id))
+    
+    def _record_graph_change(self, undo: str, edges: list):
+        """
+        依存関係の変更を保存待ちにし、トランザクション中なら取り消し方を控える
+        
+        undo は戻すときの操作（"add" なら edges を追加し直し、"remove" なら削除する）。
+        """
+        self.dependencies_dirty = True
+        if self._tx_depth:
+            self._tx_graph_undo.append((undo, edges))
+    
+    def _rollback_dependencies(self):
+        """トランザクション中の依存関係の変更を逆順に戻し、戻したタスクの完了状態を反映する"""
+        graph = self._dependencies
+        for undo, edges in reversed(self._tx_graph_undo):
+            for task_id, blocker_id in edges:
+                if undo == "remove":
+                    graph.remove_edge(task_id, blocker_id)
+                else:
+                    graph.add_edge(task_id, blocker_id, self._tasks_by_id[task_id].completed,
+                                   self._tasks_by_id[blocker_id].completed)
+        for task_id in self._tx_task_snapshots:
+            task = self._tasks_by_id.get(task_id)
+            if task is not None and task_id in graph:
+                graph.set_completed(task_id, task.completed)
+    
+    def _rollback(self):
+        """トランザクション開始時点の状態に戻す"""
+        self._next_order, self.change_seq, self.tombstone_floor, self.dirty = self._tx_state
+        if self._tx_structure is not None:
+            self.tasks, self._tasks_by_id, self._order = self._tx_structure
+        for task_id, data in self._tx_task_snapshots.items():
+            task = self._tasks_by_id.get(task_id)
+            if task is not None:
+                _assign_fields(task, Task.from_dict(data).to_dict())
+        self._rollback_dependencies()
+        
+        # 変更記録と削除記録を戻し、変更番号順に並べ直す
+        for task_id, (change, tombstone) in self._tx_log_undo.items():
+            for records, value in ((self._change_log, change), (self._tombstones, tombstone)):
+                records.pop(task_id, None)
+                if value is not None:
+                    records[task_id] = value
+        if self._tx_log_undo:
+            self._change_log = dict(sorted(self._change_log.items(), key=lambda item: item[1]))
+            self._tombstones = dict(sorted(self._tombstones.items(), key=lambda item: item[1]))
+        
+        self._frozen = {}
+        self._mark_structure_changed()
+        self._tx_state = None
+        self._tx_structure = None
+        self._tx_log_undo = {}
+        self._tx_graph_undo = []
+        self._tx_task_snapshots = {}
+        self._tx_events = []
+    
+    def _commit(self):
+        """保留していた保存と通知を1回ずつ行う"""
+        events = self._tx_events
+        persist = self._tx_persist
+        self._tx_state = None
+        self._tx_structure = None
+        self._tx_log_undo = {}
+        self._tx_graph_undo = []
+        self._tx_task_snapshots = {}
+        self._tx_events = []
+        
+        if persist:
+            self._persist()
+        
+        # タスクごとに最終的な変更だけを通知する（追加後の削除は通知しない）
+        final = {}
+        reset = False
+        for event, task in events:
+            if task is None:
+                reset = True
+                continue
+            previous = final.get(task.id)
+            if previous is None:
+                final[task.id] = (event, task)
+            elif previous[0] == "added":
+                if event == "removed":
+                    del final[task.id]
+                else:
+                    final[task.id] = ("added", task)
+            elif previous[0] == "removed" and event == "added":
+                final[task.id] = ("updated", task)
+            else:
+                final[task.id] = (event, task)
+        
+        if reset or len(final) > BATCH_RESET_THRESHOLD:
+            self._notify("reset")
+        else:
+            for event, task in final.values():
+                self._notify(event, task)
+    
+    def _record_change(self, task: Task):
+        """タスクの変更を記録（変更番号を進めて revision に設定）"""
+        self._before_log_change(task.id)
+        self.change_seq += 1
+        task.revision = self.change_seq
+        self._tombstones.pop(task.id, None)
+        self._change_log.pop(task.id, None)
+        self._change_log[task.id] = self.change_seq
+        self._mark_changed(task.id)
+        if task.id in self._dependencies:
+            self._dependencies.set_completed(task.id, task.completed)
+    
+    def _record_removal(self, task_id: str):
+        """タスクの削除を記録（削除記録は MAX_TOMBSTONES 件まで保持）"""
+        self._before_log_change(task_id)
+        self.change_seq += 1
+        self._change_log.pop(task_id, None)
+        self._change_log[task_id] = self.change_seq
+        self._tombstones[task_id] = self.change_seq
+        self._frozen.pop(task_id, None)
+        edges = self._dependencies.remove_node(task_id)
+        if edges:
+            self._record_graph_change("add", edges)
+        
+        while len(self._tombstones) > MAX_TOMBSTONES:
+            oldest_id = next(iter(self._tombstones))
+            self._before_log_change(oldest_id)
+            self.tombstone_floor = self._tombstones.pop(oldest_id)
+            self._change_log.pop(oldest_id, None)
+    
+    def _register(self, task: Task):
+        """内部インデックスにタスクを登録"""
+        self._tasks_by_id[task.id] = task
+        self._order[task.id] = self._next_order
+        self._next_order += 1
+    
+    @metrics.timed("task_index_rebuild_seconds")
+    def _rebuild_index(self):
+        """内部インデックスを再構築"""
+        self._tasks_by_id = {}
+        self._order = {}
+        self._next_order = 0
+        for task in self.tasks:
+            self._register(task)
+        self._frozen = {}
+        self._mark_structure_changed()
+    
+    def _mark_changed(self, task_id: str):
+        """タスクの変更・追加をスナップショットに反映する対象として記録"""
+        self._frozen.pop(task_id, None)
+        self._stale_ids.add(task_id)
+        self._snapshot = None
+    
+    def _mark_structure_changed(self):
+        """削除などで並びが変わったことを記録（次のスナップショットは全件から作る）"""
+        self._structure_changed = True
+        self._positions = None
+        self._snapshot = None
+    
+    def snapshot(self) -> TaskSnapshot:
+        """
+        現在のタスク一覧のスナップショットを取得
+        
+        変更がなければ同じスナップショットを返す。別スレッドが変更中（トランザクション中を含む）の
+        場合は待たずに直前に公開したスナップショットを返すため、読み込み側はロックで待たされない。
+        その場合は書き込み側が変更を終えたときに新しいスナップショットを公開する。
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        if not self._lock.acquire(blocking=self._published is None):
+            self._snapshot_wanted = True
+            return self._published
+        try:
+            return self._build_snapshot()
+        finally:
+            self._lock.release()
+    
+    @metrics.timed("task_snapshot_build_seconds")
+    def _build_snapshot(self) -> TaskSnapshot:
+        snapshot = TaskSnapshot(self.change_seq, tuple(self._build_snapshot_tasks()), self._rules())
+        # トランザクション中の途中の状態は他のスレッドに公開しない
+        if not self._tx_depth:
+            self._snapshot = self._published = snapshot
+            self._stale_ids = set()
+            self._structure_changed = False
+            self._snapshot_wanted = False
+        return snapshot
+    
+    def _publish_if_wanted(self):
+        """読み込み側が待っていれば、変更を終えた時点のスナップショットを公開"""
+        if self._snapshot is None and not self._tx_depth:
+            self._build_snapshot()
+    
+    def _freeze(self, task: Task) -> FrozenTask:
+        frozen_task = self._frozen.get(task.id)
+        if frozen_task is None:
+            frozen_task = self._frozen[task.id] = task.freeze()
+        return frozen_task
+    
+    def _build_snapshot_tasks(self) -> list:
+        """
+        スナップショットのタスク一覧を作る
+        
+        並びが変わっていなければ前回のスナップショットをコピーし、
+        変更したタスクの位置と末尾に追加したタスクだけを差し替える。
+        """
+        previous = self._published
+        if previous is None or self._structure_changed:
+            return [self._freeze(task) for task in self.tasks]
+        
+        tasks = list(previous.tasks)
+        if self._positions is None:
+            self._positions = {task.id: index for index, task in enumerate(tasks)}
+        positions = self._positions
+        for task_id in self._stale_ids:
+            index = positions.get(task_id)
+            if index is not None:
+                tasks[index] = self._freeze(self.tasks[index])
+        for index in range(len(tasks), len(self.tasks)):
+            task = self.tasks[index]
+            positions[task.id] = index
+            tasks.append(self._freeze(task))
+        return tasks
+    
+    def get_order(self, task_id: str) -> int:
+        """タスクの追加順（一覧の並び順）を取得"""
+        return self._order.get(task_id, -1)
+    
+    @synchronized
     def add_task(self, task: Task):
         """タスクを追加"""
+        self._before_structure_change()
         self.tasks.append(task)
-        self.save_tasks()
+        self._register(task)
+        metrics.inc("task_index_updates_total", op="add")
+        self._record_change(task)
+        self._persist()
+        self._notify("added", task)
+    
+    @synchronized
+    def add_tasks(self, tasks: list) -> int:
+        """
+        複数のタスクを一括追加（保存と通知は1回だけ行う）
+        
+        既に存在するIDのタスクはスキップし、追加した件数を返す。
+        """
+        added = 0
+        for task in tasks:
+            if task.id in self._tasks_by_id:
+                continue
+            self._before_structure_change()
+            self.tasks.append(task)
+            self._register(task)
+            self._record_change(task)
+            added += 1
+        
+        if added:
+            metrics.inc("task_index_updates_total", added, op="add")
+            self._persist()
+            self._notify("reset")
+        return added
+    
+    def _unregister(self, task_id: str) -> Optional[Task]:
+        """タスクを一覧と内部インデックスから外す"""
+        removed = self._unregister_many({task_id})
+        return removed[0] if removed else None
+    
+    @metrics.timed("task_index_remove_seconds")
+    def _unregister_many(self, task_ids: set) -> list:
+        """複数のタスクを一覧から1回の走査で外し、外したタスクを返す"""
+        removed = [self._tasks_by_id[task_id] for task_id in task_ids if task_id in self._tasks_by_id]
+        if not removed:
+            return []
+        self._before_structure_change()
+        self._mark_structure_changed()
+        self.tasks = [task for task in self.tasks if task.id not in task_ids]
+        for task in removed:
+            del self._tasks_by_id[task.id]
+            self._order.pop(task.id, None)
+            self._record_removal(task.id)
+        metrics.inc("task_index_updates_total", len(removed), op="remove")
+        return removed
     
+    @synchronized
     def remove_task(self, task_id: str):
         """タスクを削除"""
-        self.tasks = [task for task in self.tasks if task.id != task_id]
-        self.save_tasks()
+        task = self._unregister(task_id)
+        self._persist()
+        if task is not None:
+            self._notify("removed", task)
+            self._release_recurrences([task])
+    
+    @synchronized
+    def update_task(self, task_id: str, **fields) -> Optional[Task]:
+        """
+        タスク情報を更新（引数は Task.update と同じ。繰り返しの仮想の回は実体化してから更新）
+        
+        期限日は due_date=None で削除できる。
+        """
+        task = self.get_task(task_id) or self._materialize(task_id)
+        if task is None:
+            return None
+        self._before_change(task)
+        task.update(**fields)
+        self._record_change(task)
+        self._persist()
+        self._notify("updated", task)
+        return task
+    
+    @synchronized
+    def toggle_task_completion(self, task_id: str) -> Optional[Task]:
+        """タスクの完了状態を切り替え（繰り返しの仮想の回は実体化してから完了にする）"""
+        task = self.get_task(task_id) or self._materialize(task_id)
+        if task is None:
+            return None
+        self._before_change(task)
+        task.toggle_completion()
+        self._record_change(task)
+        self._persist()
+        self._notify("updated", task)
+        self._settle_recurrences([task])
+        return task
+    
+    @synchronized
+    def increment_pomodoro(self, task_id: str) -> Optional[Task]:
+        """タスクのポモドーロ回数を増加（繰り返しの仮想の回は実体化する）"""
+        task = self.get_task(task_id) or self._materialize(task_id)
+        if task is None:
+            return None
+        self._before_change(task)
+        task.increment_pomodoro()
+        self._record_change(task)
+        self._persist()
+        self._notify("pomodoro_incremented", task)
+        return task
+    
+    def _select(self, selection: Union[Iterable[str], Callable[[Task], bool]]) -> list:
+        """IDの集まり、または条件関数に一致するタスク"""
+        if callable(selection):
+            return [task for task in self.tasks if selection(task)]
+        return [task for task in map(self._tasks_by_id.get, dict.fromkeys(selection)) if task is not None]
+    
+    def _modify_tasks(self, tasks: list, apply: Callable[[Task], bool]) -> int:
+        """
+        タスクをまとめて変更（apply が True を返したタスクだけ変更として記録）
+        
+        変更件数を返す。保存と通知はトランザクションでまとめて1回行う。
+        """
+        changed = 0
+        with self.transaction():
+            for task in tasks:
+                self._before_change(task)
+                if apply(task):
+                    task.updated_at = datetime.now().isoformat()
+                    self._record_change(task)
+                    self._notify("updated", task)
+                    changed += 1
+            if changed:
+                self._persist()
+        return changed
+    
+    @synchronized
+    def complete_tasks(self, selection: Union[Iterable[str], Callable[[Task], bool]],
+                       completed: bool = True) -> int:
+        """
+        タスクをまとめて完了（completed=False なら未完了）にする
+        
+        selection はタスクIDの集まり、または Task を受け取って真偽値を返す条件関数。
+        変更した件数を返す（以下の一括操作も同様）。
+        """
+        def apply(task: Task) -> bool:
+            if task.completed == completed:
+                return False
+            task.completed = completed
+            return True
+        tasks = self._select(selection)
+        changed = self._modify_tasks(tasks, apply)
+        if changed:
+            self._settle_recurrences(tasks)
+        return changed
+    
+    @synchronized
+    def delete_tasks(self, selection: Union[Iterable[str], Callable[[Task], bool]]) -> int:
+        """タスクをまとめて削除"""
+        task_ids = {task.id for task in self._select(selection)}
+        with self.transaction():
+            removed = self._unregister_many(task_ids)
+            for task in removed:
+                self._notify("removed", task)
+            if removed:
+                self._persist()
+        self._release_recurrences(removed)
+        return len(removed)
+    
+    @synchronized
+    def retag_tasks(self, selection: Union[Iterable[str], Callable[[Task], bool]],
+                    add: Iterable[str] = (), remove: Iterable[str] = ()) -> int:
+        """タスクのタグをまとめて追加・削除"""
+        add = [tag for tag in add if tag]
+        remove = set(remove)
+        
+        def apply(task: Task) -> bool:
+            tags = [tag for tag in task.tags if tag not in remove]
+            tags.extend(tag for tag in add if tag not in tags)
+            if tags == task.tags:
+                return False
+            task.tags = tags
+            return True
+        return self._modify_tasks(self._select(selection), apply)
+    
+    @synchronized
+    def recategorize_tasks(self, selection: Union[Iterable[str], Callable[[Task], bool]],
+                           category: str) -> int:
+        """タスクのカテゴリをまとめて変更"""
+        def apply(task: Task) -> bool:
+            if task.category == category:
+                return False
+            task.category = category
+            return True
+        return self._modify_tasks(self._select(selection), apply)
+    
+    @synchronized
+    def reprioritize_tasks(self, selection: Union[Iterable[str], Callable[[Task], bool]],
+                           priority: str) -> int:
+        """タスクの優先度をまとめて変更"""
+        def apply(task: Task) -> bool:
+            if task.priority == priority:
+                return False
+            task.priority = priority
+            return True
+        return self._modify_tasks(self._select(selection), apply)
+    
+    @property
+    def archive_file(self) -> str:
+        """完了済みタスクのアーカイブファイル（tasks.json なら tasks.archive）"""
+        return os.path.splitext(self.data_file)[0] + ".archive"
+    
+    @property
+    def archive(self):
+        """完了済みタスクのアーカイブ（modules.archive.TaskArchive）"""
+        if self._archive is None or self._archive.path != self.archive_file:
+            from modules.archive import TaskArchive
+            self._archive = TaskArchive(self.archive_file)
+        return self._archive
+    
+    @synchronized
+    @metrics.timed("task_archive_move_seconds")
+    def archive_completed(self, older_than_days: Optional[int] = None) -> int:
+        """
+        完了してから指定日数が経ったタスクをアーカイブに移す
+        
+        完了日時として updated_at を使う。アーカイブへの追記が終わってから一覧から外すため、
+        途中で止まってもタスクは失われない（次回はアーカイブ済みのものを一覧から外すだけ）。
+        一覧から外した件数を返す。
+        
+        Args:
+            older_than_days (Optional[int]): 日数（None なら archive_after_days。どちらも None なら移さない）
+        """
+        days = older_than_days if older_than_days is not None else self.archive_after_days
+        if days is None:
+            return 0
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        tasks = [task for task in self.tasks if task.completed and (task.updated_at or "") < cutoff]
+        if not tasks:
+            return 0
+        self.archive.append(tasks)
+        with self.transaction():
+            removed = self._unregister_many({task.id for task in tasks})
+            for task in removed:
+                self._notify("removed", task)
+            if removed:
+                self._persist()
+        # 完了したテンプレートは繰り返しを止めたもので、規則は復元に備えて残す
+        self._release_recurrences(removed, remove_rules=False)
+        return len(removed)
+    
+    @synchronized
+    def restore_archived(self, task_ids: Iterable[str]) -> int:
+        """
+        アーカイブのタスクを一覧に戻し、戻した件数を返す
+        
+        戻したタスクは変更として記録し updated_at を現在にする（戻した直後の読み込みで
+        再びアーカイブへ移さないように）。一覧に保存してからアーカイブから外すため、
+        途中で止まった場合はアーカイブにも残る（次回の移動で一覧から外れる）。
+        """
+        tasks = [task for task in self.archive.get_tasks(task_ids) if task.id not in self._tasks_by_id]
+        if not tasks:
+            return 0
+        now = datetime.now().isoformat()
+        with self.transaction():
+            for task in tasks:
+                task.updated_at = now
+                self._before_structure_change()
+                self.tasks.append(task)
+                self._register(task)
+                self._record_change(task)
+                self._notify("added", task)
+            self._persist()
+        self.archive.mark_restored(task.id for task in tasks)
+        return len(tasks)
+    
+    @property
+    def recurrence_file(self) -> str:
+        """繰り返しの規則のファイル（tasks.json なら tasks.recurrence.json）"""
+        return os.path.splitext(self.data_file)[0] + ".recurrence.json"
+    
+    @property
+    def recurrences(self):
+        """繰り返しの規則（modules.recurrence.RecurrenceStore）"""
+        if self._recurrences is None or self._recurrences.path != self.recurrence_file:
+            from modules.recurrence import RecurrenceStore
+            self._recurrences = RecurrenceStore(self.recurrence_file)
+        return self._recurrences
+    
+    def _rules(self) -> dict:
+        return self.recurrences.rules
+    
+    def _template_snapshot(self, template_id: str) -> Optional[FrozenTask]:
+        task = self._tasks_by_id.get(template_id)
+        return task.freeze() if task is not None else None
+    
+    def _occurrence_done(self, template_id: str) -> Callable:
+        """日付の回が実体化済みで完了しているかを返す関数（RecurrenceRule.settle 用）"""
+        from modules.recurrence import occurrence_id
+        
+        def is_done(day) -> bool:
+            task = self._tasks_by_id.get(occurrence_id(template_id, day))
+            return task is not None and task.completed
+        return is_done
+    
+    def _update_rules(self, changes: dict):
+        """繰り返しの規則を変更して保存（スナップショットは作り直す）"""
+        self.recurrences.update(changes)
+        self._snapshot = None
+    
+    @synchronized
+    def set_recurrence(self, task_id: str, rule: 'RecurrenceRule') -> Optional['RecurrenceRule']:
+        """
+        タスクを繰り返しのテンプレートにする（既に規則があれば置き換える）
+        
+        各回の期限日は規則で決まるため、テンプレートの期限日は消す（呼び出し側で規則の開始日に使う）。
+        規則の変更はファイルにすぐ保存し、トランザクションで戻らない。
+        
+        Args:
+            task_id (str): テンプレートにするタスクのID
+            rule (modules.recurrence.RecurrenceRule): 繰り返しの規則
+        
+        Returns:
+            Optional[RecurrenceRule]: 保存した規則（処理済みの回まで pending_from を進めたもの）。
+            タスクがなければ None
+        """
+        task = self.get_task(task_id)
+        if task is None:
+            return None
+        rule = rule.settle(self._occurrence_done(task_id))
+        self._update_rules({task_id: rule})
+        if task.due_date is not None:
+            self._before_change(task)
+            task.due_date = None
+            task.updated_at = datetime.now().isoformat()
+            self._record_change(task)
+            self._persist()
+            self._notify("updated", task)
+        return rule
+    
+    @synchronized
+    def remove_recurrence(self, task_id: str) -> bool:
+        """繰り返しをやめる（実体化した回は通常のタスクとして残る）"""
+        if task_id not in self._rules():
+            return False
+        self._update_rules({task_id: None})
+        return True
+    
+    def get_recurrence(self, task_id: str) -> Optional['RecurrenceRule']:
+        """テンプレートの繰り返しの規則（なければ None）"""
+        return self._rules().get(task_id)
+    
+    @synchronized
+    def get_occurrences(self, date_from, date_to) -> list:
+        """
+        期限日が期間内（両端を含む）の繰り返しの仮想の回（期限日の順）
+        
+        実体化した回は通常のタスクとして tasks に含まれるため、ここには含めない。
+        
+        Args:
+            date_from, date_to (date | str): 期間（YYYY-MM-DD）
+        """
+        rules = self._rules()
+        if not rules:
+            return []
+        from modules.recurrence import expand, parse_date
+        return list(expand(rules, self._template_snapshot, self._tasks_by_id.get,
+                           parse_date(date_from), parse_date(date_to)))
+    
+    def get_overdue_occurrences(self) -> list:
+        """繰り返しの期限切れ（昨日まで）の仮想の回"""
+        rules = self._rules()
+        if not rules:
+            return []
+        from modules.recurrence import expand_overdue
+        return list(expand_overdue(rules, self._template_snapshot, self._tasks_by_id.get))
+    
+    def _materialize(self, task_id: str) -> Optional[Task]:
+        """
+        仮想の回のIDなら回を実体化して一覧に追加し、そのタスクを返す（保存は呼び出し側）
+        
+        回のIDでない・規則にない日付・処理済みの回なら None。
+        """
+        from modules.recurrence import materialize, parse_occurrence_id
+        parsed = parse_occurrence_id(task_id)
+        if parsed is None:
+            return None
+        template_id, day = parsed
+        rule = self._rules().get(template_id)
+        template = self._tasks_by_id.get(template_id)
+        if (rule is None or template is None or day < rule.pending_from
+                or day in rule.exdates or not rule.occurs_on(day)):
+            return None
+        task = materialize(template, day)
+        self._before_structure_change()
+        self.tasks.append(task)
+        self._register(task)
+        metrics.inc("task_index_updates_total", op="add")
+        self._record_change(task)
+        self._notify("added", task)
+        return task
+    
+    @synchronized
+    def materialize_occurrence(self, task_id: str) -> Optional[Task]:
+        """繰り返しの回を通常のタスクとして保存して返す（実体化済みならそのタスク）"""
+        task = self.get_task(task_id)
+        if task is None:
+            task = self._materialize(task_id)
+            if task is not None:
+                self._persist()
+        return task
+    
+    @synchronized
+    def skip_occurrence(self, task_id: str) -> bool:
+        """繰り返しの回をスキップする（実体化済みならそのタスクを削除する）"""
+        from modules.recurrence import parse_occurrence_id
+        parsed = parse_occurrence_id(task_id)
+        if parsed is None or parsed[0] not in self._rules():
+            return False
+        if task_id in self._tasks_by_id:
+            self.remove_task(task_id)
+        else:
+            self._release_recurrences([parsed])
+        return True
+    
+    def _settle_recurrences(self, tasks: Iterable[Task]):
+        """完了にした回の規則の pending_from を進める"""
+        rules = self._rules()
+        if not rules:
+            return
+        from modules.recurrence import parse_occurrence_id
+        template_ids = set()
+        for task in tasks:
+            parsed = parse_occurrence_id(task.id) if task.completed else None
+            if parsed is not None and parsed[0] in rules:
+                template_ids.add(parsed[0])
+        if template_ids:
+            self._update_rules({template_id: (lambda rule, is_done=self._occurrence_done(template_id):
+                                              rule and rule.settle(is_done))
+                                for template_id in template_ids})
+    
+    def _release_recurrences(self, removed: Iterable, remove_rules: bool = True):
+        """
+        削除・アーカイブしたタスクの繰り返しの記録を更新
+        
+        テンプレートなら規則を削除し（remove_rules=False なら残す）、回ならスキップとして
+        記録する（仮想の回として再び作らないように）。removed は Task または (テンプレートのID, 日付)。
+        """
+        rules = self._rules()
+        if not rules:
+            return
+        from modules.recurrence import parse_occurrence_id
+        changes = {}
+        skipped = {}
+        for item in removed:
+            if isinstance(item, tuple):
+                parsed = item
+            elif item.id in rules:
+                if remove_rules:
+                    changes[item.id] = None
+                continue
+            else:
+                parsed = parse_occurrence_id(item.id)
+            if parsed is not None and parsed[0] in rules:
+                skipped.setdefault(parsed[0], []).append(parsed[1])
+        for template_id, days in skipped.items():
+            if template_id not in changes:
+                changes[template_id] = (lambda rule, days=days, is_done=self._occurrence_done(template_id):
+                                        rule and rule.skip(days).settle(is_done))
+        if changes:
+            self._update_rules(changes)
+    
+    @property
+    def dependency_file(self) -> str:
+        """依存関係のファイル（tasks.json なら tasks.dependencies.json）"""
+        return os.path.splitext(self.data_file)[0] + ".dependencies.json"
+    
+    def _load_dependencies(self):
+        """依存関係のファイルを読み込む（存在しないタスクの辺は捨て、次の保存で書き直す）"""
+        try:
+            edges = read_dependencies(self.dependency_file)
+        except Exception as e:
+            print(f"依存関係の読み込み中にエラーが発生しました: {e}")
+            edges = []
+        tasks_by_id = self._tasks_by_id
+        valid = [(task_id, blocker_id) for task_id, blocker_id in edges
+                 if task_id in tasks_by_id and blocker_id in tasks_by_id]
+        self._dependencies, rejected = DependencyGraph.from_edges(
+            valid, lambda task_id: tasks_by_id[task_id].completed)
+        self.dependencies_dirty = self._dependencies.edge_count != len(edges)
+        if rejected:
+            print(f"循環している依存関係 {rejected}件を無視しました。")
+    
+    @synchronized
+    def get_dependency_data(self) -> dict:
+        """依存関係のファイルに書き込む内容"""
+        return self._dependencies.to_dict()
+    
+    @synchronized
+    def take_dependencies(self) -> Optional[dict]:
+        """
+        未保存の依存関係があれば書き込む内容を返し、保存済みとして記録する（なければ None）
+        
+        write_snapshot と組み合わせて使う。書き込めなかった場合は dependencies_dirty を True に戻す。
+        """
+        if not self.dependencies_dirty:
+            return None
+        self.dependencies_dirty = False
+        return self._dependencies.to_dict()
+    
+    @synchronized
+    def add_dependency(self, task_id: str, blocker_id: str) -> bool:
+        """
+        task_id のタスクが blocker_id のタスクにブロックされている、という依存関係を追加
+        
+        既にあれば False。どちらかのタスクがなければ KeyError、循環する場合は追加せずに
+        DependencyCycleError を送出する。
+        """
+        for required in (task_id, blocker_id):
+            if required not in self._tasks_by_id:
+                raise KeyError(required)
+        added = self._dependencies.add_edge(task_id, blocker_id, self._tasks_by_id[task_id].completed,
+                                            self._tasks_by_id[blocker_id].completed)
+        if added:
+            self._record_graph_change("remove", [(task_id, blocker_id)])
+            self._persist()
+        return added
+    
+    @synchronized
+    def add_dependencies(self, pairs: Iterable[tuple]) -> int:
+        """
+        (task_id, blocker_id) の依存関係をまとめて追加し、追加した数を返す
+        
+        1つでも追加できなければ（タスクがない・循環する）どれも追加せずに例外を送出する。
+        """
+        with self.transaction():
+            return sum(1 for task_id, blocker_id in pairs if self.add_dependency(task_id, blocker_id))
+    
+    @synchronized
+    def remove_dependency(self, task_id: str, blocker_id: str) -> bool:
+        """依存関係を削除（なければ False）"""
+        removed = self._dependencies.remove_edge(task_id, blocker_id)
+        if removed:
+            self._record_graph_change("add", [(task_id, blocker_id)])
+            self._persist()
+        return removed
+    
+    @synchronized
+    def get_blockers(self, task_id: str) -> list:
+        """task_id のタスクをブロックしているタスク（完了済みを含む、一覧の順）"""
+        return self._tasks_in_order(self._dependencies.blockers(task_id))
+    
+    @synchronized
+    def get_dependents(self, task_id: str) -> list:
+        """task_id のタスクがブロックしているタスク（一覧の順）"""
+        return self._tasks_in_order(self._dependencies.dependents(task_id))
+    
+    def _tasks_in_order(self, task_ids: set) -> list:
+        tasks = [self._tasks_by_id[task_id] for task_id in task_ids]
+        tasks.sort(key=lambda task: self._order[task.id])
+        return tasks
+    
+    def is_blocked(self, task_id: str) -> bool:
+        """未完了のタスクにブロックされているか"""
+        return self._dependencies.is_blocked(task_id)
+    
+    @property
+    def dependency_version(self) -> int:
+        """依存関係かその完了状態が変わるたびに増える番号（is_blocked の結果のキャッシュ用）"""
+        return self._dependencies.version
+    
+    @synchronized
+    def get_ready_tasks(self) -> list:
+        """すぐに着手できるタスク（未完了で、未完了のタスクにブロックされていないもの）"""
+        blocked = self._dependencies.blocked_ids()
+        return [task for task in self.tasks if not task.completed and task.id not in blocked]
+    
+    @synchronized
+    def get_topological_order(self) -> list:
+        """依存関係のあるタスクを、ブロックしているタスクが先になる順で返す"""
+        return [self._tasks_by_id[task_id] for task_id in self._dependencies.order()]
+    
+    @synchronized
+    def get_critical_path(self) -> dict:
+        """
+        未完了のタスクの見積もり時間（estimated_time）の合計が最大になる依存関係の経路
+        
+        {'tasks': ブロック元から順のタスク, 'total_time': 合計の分}。完了済みのタスクは 0 分として数える。
+        結果は依存関係とタスクが変わるまで使い回す。
+        """
+        key = (self._dependencies.version, self.change_seq)
+        if self._critical_path is None or self._critical_path[0] != key:
+            tasks_by_id = self._tasks_by_id
+            total, path = self._dependencies.critical_path(lambda task_id: tasks_by_id[task_id].estimated_time)
+            self._critical_path = (key, {'tasks': [tasks_by_id[task_id] for task_id in path],
+                                         'total_time': total})
+        result = self._critical_path[1]
+        return {'tasks': list(result['tasks']), 'total_time': result['total_time']}
+    
+    @synchronized
+    def get_changes(self, cursor: int = 0, limit: Optional[int] = None) -> dict:
+        """
+        カーソル以降の変更を取得（差分同期）
+        
+        Args:
+            cursor (int): クライアントが前回受け取った cursor（初回は 0）
+            limit (Optional[int]): 1回で返す変更の最大件数（残りは has_more で示す）
+        
+        Returns:
+            dict: tasks（変更されたタスクの辞書）, deleted（削除されたID）, cursor（次回渡す値）,
+            has_more, reset（True なら差分を作れないため tasks が全件。クライアントは手元を置き換える）
+        """
+        if cursor < self.tombstone_floor or cursor > self.change_seq or (cursor == 0 and self.change_seq):
+            return {
+                'reset': True,
+                'tasks': [task.to_dict() for task in self.tasks],
+                'deleted': [],
+                'cursor': self.change_seq,
+                'has_more': False
+            }
+        
+        # 変更ログは変更順なので、末尾からカーソルに達するまで読めばよい
+        changed = []
+        for task_id in reversed(self._change_log):
+            seq = self._change_log[task_id]
+            if seq <= cursor:
+                break
+            changed.append((seq, task_id))
+        changed.reverse()
+        
+        has_more = limit is not None and len(changed) > limit
+        if has_more:
+            changed = changed[:limit]
+        
+        tasks = []
+        deleted = []
+        for seq, task_id in changed:
+            task = self._tasks_by_id.get(task_id)
+            if task is None:
+                deleted.append(task_id)
+            else:
+                tasks.append(task.to_dict())
+        
+        return {
+            'reset': False,
+            'tasks': tasks,
+            'deleted': deleted,
+            'cursor': changed[-1][0] if has_more else self.change_seq,
+            'has_more': has_more
+        }
+    
+    @synchronized
+    def apply_changes(self, changes: list) -> dict:
+        """
+        クライアントの変更をまとめて反映（保存は1回だけ行う）
+        
+        各変更は {"op": "upsert" または "delete", "id": ..., "base_revision": ..., "task": {...}}。
+        base_revision はクライアントが最後に受け取ったそのタスクの revision（新規は 0）。
+        サーバー側で base_revision 以降に変更・削除されていれば反映せず競合として返す。
+        
+        Returns:
+            dict: applied（反映した {id, revision}）, conflicts（{id, reason, task}）, cursor
+        """
+        applied = []
+        conflicts = []
+        
+        with self.transaction():
+            self._apply_changes(changes, applied, conflicts)
+        return {'applied': applied, 'conflicts': conflicts, 'cursor': self.change_seq}
+    
+    def _apply_changes(self, changes: list, applied: list, conflicts: list):
+        for change in changes:
+            task_id = change.get('id')
+            op = change.get('op', 'upsert')
+            base_revision = change.get('base_revision') or 0
+            task = self._tasks_by_id.get(task_id) if task_id else None
+            
+            if task is not None and task.revision != base_revision:
+                conflicts.append({'id': task_id, 'reason': "modified", 'task': task.to_dict()})
+                continue
+            if task is None and base_revision and task_id in self._tombstones:
+                conflicts.append({'id': task_id, 'reason': "deleted", 'task': None})
+                continue
+            
+            if op == 'delete':
+                if task is not None:
+                    self._unregister(task_id)
+                    self._notify("removed", task)
+                    self._release_recurrences([task])
+                applied.append({'id': task_id, 'revision': self.change_seq})
+                continue
+            
+            data = change.get('task') or {}
+            if task is None:
+                if not task_id or not data.get('title'):
+                    conflicts.append({'id': task_id, 'reason': "invalid", 'task': None})
+                    continue
+                task = Task.from_dict({**data, 'id': task_id})
+                self._before_structure_change()
+                self.tasks.append(task)
+                self._register(task)
+                event = "added"
+            else:
+                # Task.update は None を「変更なし」と扱うため、期限日の削除なども反映できるよう直接設定する
+                self._before_change(task)
+                for name in SYNC_FIELDS:
+                    if name in data:
+                        setattr(task, name, data[name])
+                task.progress = max(0, min(100, task.progress))
+                task.updated_at = datetime.now().isoformat()
+                event = "updated"
+            
+            self._record_change(task)
+            self._notify(event, task)
+            applied.append({'id': task.id, 'revision': task.revision})
+        
+        if applied:
+            self._persist()
+    
+    @synchronized
+    def get_sync_state(self) -> dict:
+        """差分同期の状態（保存用）"""
+        return {
+            'change_seq': self.change_seq,
+            'tombstone_floor': self.tombstone_floor,
+            'tombstones': dict(self._tombstones)
+        }
+    
+    @property
+    def sync_file(self) -> str:
+        """差分同期の状態を保存するファイル（tasks.json なら tasks.sync.json）"""
+        base, ext = os.path.splitext(self.data_file)
+        if ext == BINARY_EXTENSION:
+            ext = '.json'
+        return f"{base}.sync{ext or '.json'}"
+    
+    @property
+    def binary_format(self) -> bool:
+        """データファイルをバイナリ形式で保存するか（拡張子が .tmdb）"""
+        return self.data_file.endswith(BINARY_EXTENSION)
     
     def get_task(self, task_id: str) -> Optional[Task]:
         """IDでタスクを取得"""
-        for task in self.tasks:
-            if task.id == task_id:
-                return task
-        return None
+        return self._tasks_by_id.get(task_id)
     
     def get_tasks_by_category(self, category: str) -> list:
         """カテゴリ別にタスクを取得"""
@@ -207,29 +1621,378 @@ class TaskManager:
         return [task for task in self.tasks if task.completed]
     
     def get_overdue_tasks(self) -> list:
-        """期限切れのタスクを取得"""
-        return [task for task in self.tasks if task.is_overdue()]
+        """期限切れのタスクを取得（繰り返しの期限切れの仮想の回を含む）"""
+        with metrics.time("task_overdue_scan_seconds"):
+            return [task for task in self.tasks if task.is_overdue()] + self.get_overdue_occurrences()
+    
+    @property
+    def lock_file(self) -> str:
+        """他のプロセスと読み書きを調停するロックファイル"""
+        return self.data_file + ".lock"
+    
+    def _store_lock(self) -> FileLock:
+        return FileLock(self.lock_file)
     
-    def save_tasks(self):
-        """タスクをJSONファイルに保存"""
+    def _file_state(self) -> Optional[tuple]:
+        """データファイルの (更新時刻, サイズ, inode)。ファイルがなければ None"""
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                tasks_data = [task.to_dict() for task in self.tasks]
-                json.dump(tasks_data, f, ensure_ascii=False, indent=2)
+            stat = os.stat(self.data_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def has_external_changes(self) -> bool:
+        """
+        最後に読み書きした後に、他のプロセスがデータファイルを変更したか
+        
+        stat だけで判定する（保存は一時ファイルを置き換えるため、保存のたびに inode も変わる）。
+        """
+        return self._file_state() != self._disk_stat
+    
+    def _read_tasks_data(self) -> list:
+        """
+        データファイルのタスクの辞書のリスト（ファイルがなければ空）
+        
+        先頭のヘッダーは除く。新しいバージョンのアプリで保存されたファイルなら
+        readonly_reason を設定して UnsupportedVersionError を送出する。
+        """
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f, metrics.time("task_json_decode_seconds"):
+                items = json.load(f)
+        except FileNotFoundError:
+            return []
+        try:
+            return split_store(items)[1]
+        except UnsupportedVersionError as e:
+            self.readonly_reason = str(e)
+            raise
+    
+    def _read_disk_entries(self) -> Iterable[tuple]:
+        """
+        データファイルの各タスクの (id, updated_at, Task を作る関数)
+        
+        バイナリ形式なら id と updated_at だけを読み、Task は取り込むタスクだけ作る。
+        """
+        if is_binary_store(self.data_file):
+            store = BinaryTaskStore(self.data_file)
+            return [(task_id, updated_at, functools.partial(self._stored_task, store, record))
+                    for record, task_id, updated_at in store.scan('updated_at')]
+        return [(data.get('id'), data.get('updated_at'), functools.partial(task_from_record, data))
+                for data in self._read_tasks_data() if isinstance(data, dict)]
+    
+    @staticmethod
+    def _stored_task(store: BinaryTaskStore, record: int) -> StoredTask:
+        return StoredTask(store, record, store.read_field(record, 'id'), store.read_field(record, 'revision'))
+    
+    @synchronized
+    def reload_if_changed(self) -> Optional[dict]:
+        """
+        他のプロセスがデータファイルを変更していれば、その変更をタスクごとに取り込む
+        
+        変更がなければ stat 1回で None を返す。取り込んだ場合は
+        {'added', 'updated', 'removed', 'conflicts'} の件数を返す。
+        ファイルは全体を読み直すが、Task を作り直すのは前回から updated_at が変わったタスクだけ。
+        """
+        if not self.has_external_changes():
+            return None
+        with self._store_lock().acquire(shared=True):
+            # ロックを待つ間にこのプロセスの保存が終わっていれば取り込むものはない
+            if not self.has_external_changes():
+                return None
+            return self._merge_disk()
+    
+    @metrics.timed("task_merge_seconds")
+    def _merge_disk(self) -> dict:
+        """
+        データファイルの内容をタスクごとに取り込む（データファイルのロック中に呼ぶ）
+        
+        前回読み書きしたときの updated_at と比べ、他のプロセスだけが変更したタスクは
+        ファイルの内容に合わせる。双方で変更していたタスクは updated_at が新しい方を残し、
+        conflicts として数える。
+        """
+        result = {'added': 0, 'updated': 0, 'removed': 0, 'conflicts': 0}
+        state = self._file_state()
+        try:
+            entries = self._read_disk_entries()
+        except Exception as e:
+            # 壊れたファイルは取り込まない（次の保存で上書きする）
+            print(f"タスクの読み込み中にエラーが発生しました: {e}")
+            self._disk_stat = state
+            return result
+        
+        base = self._disk_base
+        disk_base = {}
+        with self.transaction():
+            for task_id, disk_updated, disk_task in entries:
+                if not task_id:
+                    continue
+                disk_base[task_id] = disk_updated
+                if task_id in base and base[task_id] == disk_updated:
+                    continue  # 他のプロセスは変更していない
+                
+                task = self._tasks_by_id.get(task_id)
+                if task is None:
+                    if task_id in base:
+                        # こちらで削除したタスクを他のプロセスが変更していた（変更を残す）
+                        result['conflicts'] += 1
+                    task = disk_task()
+                    self._before_structure_change()
+                    self.tasks.append(task)
+                    self._register(task)
+                    self._record_change(task)
+                    self._notify("added", task)
+                    result['added'] += 1
+                    continue
+                
+                if task.updated_at != base.get(task_id):
+                    # 双方で変更していた
+                    result['conflicts'] += 1
+                    if (task.updated_at or "") >= (disk_updated or ""):
+                        continue
+                self._before_change(task)
+                _assign_fields(task, disk_task().to_dict())
+                self._record_change(task)
+                self._notify("updated", task)
+                result['updated'] += 1
+            
+            # 他のプロセスが削除したタスク（こちらで変更していれば残す）
+            removed_ids = set()
+            for task_id, base_updated in base.items():
+                task = self._tasks_by_id.get(task_id)
+                if task_id in disk_base or task is None:
+                    continue
+                if task.updated_at != base_updated:
+                    result['conflicts'] += 1
+                    continue
+                removed_ids.add(task_id)
+            for task in self._unregister_many(removed_ids):
+                self._notify("removed", task)
+                result['removed'] += 1
+        
+        self._disk_stat = state
+        self._disk_base = disk_base
+        self.merge_conflicts += result['conflicts']
+        return result
+    
+    @metrics.timed("task_save_seconds")
+    def save_tasks(self) -> bool:
+        """
+        タスクをJSONファイルに保存（失敗した場合は False を返し、保存待ちのままにする）
+        
+        保存中はデータファイルの排他ロックを取る。前回の読み書きの後に他のプロセスが
+        ファイルを変更していれば、その変更をタスクごとに取り込んでから書き込む。
+        呼び出し側が TaskManager のロックを持っていなければ、スナップショットを取った後の
+        書き込み中は他のスレッドの変更を妨げない。
+        readonly_reason が設定されていれば書き込まない。
+        """
+        self._lock.acquire()
+        locked = True
+        dependencies = None
+        try:
+            with self._save_lock, self._store_lock().acquire():
+                if self.has_external_changes():
+                    self._merge_disk()
+                if self.readonly_reason is not None:
+                    # 新しいバージョンのアプリが保存したファイルは上書きしない
+                    raise UnsupportedVersionError(self.readonly_reason)
+                snapshot = self.snapshot()
+                sync_state = self.get_sync_state()
+                dependencies = self.take_dependencies()
+                self.dirty = False
+                self._lock.release()
+                locked = False
+                self._write_snapshot(snapshot, sync_state, dependencies)
         except Exception as e:
             print(f"タスクの保存中にエラーが発生しました: {e}")
+            self.dirty = True
+            if dependencies is not None:
+                self.dependencies_dirty = True
+            return False
+        finally:
+            if locked:
+                self._lock.release()
+        return True
+    
+    def write_snapshot(self, snapshot: TaskSnapshot, sync_state: Optional[dict] = None,
+                       dependencies: Optional[dict] = None) -> bool:
+        """
+        スナップショットを保存（別スレッドから呼んでよい）
+        
+        dependencies（take_dependencies の結果）を渡すと依存関係のファイルも書き込む。
+        他のプロセスがデータファイルを変更していた場合は書き込まずに False を返す。
+        呼び出し側は reload_if_changed で取り込んでからやり直す。
+        上書きしてはいけないデータファイル（readonly_reason）にも書き込まずに False を返す。
+        """
+        if self.readonly_reason is not None:
+            return False
+        with self._save_lock, self._store_lock().acquire():
+            if self.has_external_changes():
+                return False
+            self._write_snapshot(snapshot, sync_state, dependencies)
+        return True
     
+    def _write_snapshot(self, snapshot: TaskSnapshot, sync_state: Optional[dict],
+                        dependencies: Optional[dict] = None):
+        """スナップショットを書き込み、次に他のプロセスの変更を検出するための状態を記録"""
+        if dependencies is not None:
+            # 依存関係は他のプロセスの変更と統合せず、最後に保存したものが残る
+            write_dependencies(self.dependency_file, dependencies)
+        if self.binary_format:
+            with metrics.time("task_binary_write_seconds"):
+                self.write_binary_data(snapshot, sync_state)
+            self._disk_stat = self._file_state()
+            # 書き込んだファイルを開き直し、updated_at は必要になったときにファイルから読む
+            self._disk_base = BinaryTaskStore(self.data_file).updated_at_map()
+            return
+        with metrics.time("task_json_write_seconds"):
+            records = [store_record(task) for task in snapshot]
+            self.write_tasks_data(records, sync_state)
+        self._disk_stat = self._file_state()
+        # 移行していないタスクの属性を読まないように、書き込んだレコードから記録する
+        self._disk_base = {record['id']: record.get('updated_at') for record in records}
+    
+    def write_binary_data(self, tasks: Iterable[Task], sync_state: Optional[dict] = None):
+        """
+        タスクをバイナリ形式で書き込む（write_tasks_data のバイナリ形式版）
+        
+        変更していない StoredTask のスナップショットは、元のファイルのレコードをそのまま写す。
+        """
+        if sync_state is not None:
+            self.write_tasks_data(None, sync_state)
+        tasks = list(tasks)
+        base = next((task._store for task in tasks if isinstance(task, FrozenStoredTask)), None)
+        if base is not None:
+            copied = sum(1 for task in tasks if isinstance(task, FrozenStoredTask) and task._store is base)
+            if not can_reuse_heap(base, copied):
+                base = None
+        writer = BinaryStoreWriter(base)
+        for task in tasks:
+            if isinstance(task, FrozenStoredTask):
+                writer.copy_record(task._store, task._record, task.revision)
+            else:
+                writer.add_task(task)
+        writer.write(self.data_file)
+    
+    def write_tasks_data(self, tasks_data: Optional[list], sync_state: Optional[dict] = None):
+        """
+        辞書化済みのタスクをファイルに書き込む
+        
+        一時ファイルに書いてから置き換えるため、書き込み中も読み込み側は
+        直前のファイルを読める。スナップショットを渡せば別スレッドから呼んでもよい。
+        sync_state を渡すと差分同期の状態をタスクより先に書き込む
+        （途中で止まっても記録済みの変更番号がタスクの revision を下回らないように）。
+        tasks_data が None なら差分同期の状態だけを書き込む。
+        データファイルの先頭には形式のバージョンを記録したヘッダーを置く。
+        """
+        files = [(self.data_file, [store_header()] + tasks_data, 2)] if tasks_data is not None else []
+        if sync_state is not None:
+            files.insert(0, (self.sync_file, sync_state, None))
+        
+        for filename, data, indent in files:
+            temp_file = filename + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=indent)
+            os.replace(temp_file, filename)
+    
+    @synchronized
+    @metrics.timed("task_load_seconds")
     def load_tasks(self):
-        """JSONファイルからタスクを読み込み"""
+        """
+        データファイルからタスクを読み込み
+        
+        バイナリ形式のファイル（形式は拡張子ではなく内容で判定）は id と revision だけを読み、
+        その他の属性は参照したときに読み込む。JSON の古いスキーマのレコードも同様に、
+        参照したときに現在のスキーマに移行する（get_outdated_ids）。archive_after_days が設定されていれば、
+        読み込んだ後に古い完了済みタスクをアーカイブへ移す。
+        """
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                tasks_data = json.load(f)
-                self.tasks = [Task.from_dict(data) for data in tasks_data]
-        except FileNotFoundError:
-            self.tasks = []
+            with self._store_lock().acquire(shared=True):
+                state = self._file_state()
+                if is_binary_store(self.data_file):
+                    store = BinaryTaskStore(self.data_file)
+                    self.tasks = [StoredTask(store, record, task_id, revision)
+                                  for record, task_id, revision in store.scan()]
+                    self._disk_base = store.updated_at_map()
+                else:
+                    records = self._read_tasks_data()
+                    self.tasks = [task_from_record(data) for data in records]
+                    self._disk_base = {data['id']: data.get('updated_at') for data in records}
+                self._disk_stat = state
         except Exception as e:
+            # 読み込めなかった場合、次の保存時にファイルの内容を取り込んでから書き込む
             print(f"タスクの読み込み中にエラーが発生しました: {e}")
             self.tasks = []
+            self._disk_stat = None
+            self._disk_base = {}
+        
+        self._rebuild_index()
+        self._load_dependencies()
+        self._load_sync_state()
+        self._notify("reset")
+        
+        if self.archive_after_days is not None:
+            try:
+                self.archive_completed()
+            except Exception as e:
+                print(f"完了済みタスクのアーカイブ中にエラーが発生しました: {e}")
+    
+    def _load_sync_state(self):
+        """差分同期の状態を読み込む（読み込めない場合は全件同期からやり直す）"""
+        state = {}
+        try:
+            with open(self.sync_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"同期情報の読み込み中にエラーが発生しました: {e}")
+        
+        max_revision = max((task.revision for task in self.tasks), default=0)
+        recorded_seq = state.get('change_seq', 0)
+        self.change_seq = max(recorded_seq, max_revision)
+        self._tombstones = {task_id: seq for task_id, seq
+                            in sorted(state.get('tombstones', {}).items(), key=lambda item: item[1])
+                            if task_id not in self._tasks_by_id}
+        if recorded_seq < max_revision or not state:
+            # 記録が古い・ないため、どの削除が欠けているか分からない
+            self.tombstone_floor = self.change_seq
+        else:
+            self.tombstone_floor = state.get('tombstone_floor', 0)
+        
+        entries = [(task.revision, task.id) for task in self.tasks]
+        entries.extend((seq, task_id) for task_id, seq in self._tombstones.items())
+        entries.sort()
+        self._change_log = {task_id: seq for seq, task_id in entries}
+    
+    @synchronized
+    def get_outdated_ids(self) -> list:
+        """古いスキーマのまま保存されているタスクのID（一覧の順）"""
+        return [task.id for task in self.tasks if isinstance(task, RecordTask) and not task._changed]
+    
+    @synchronized
+    @metrics.timed("task_migrate_seconds")
+    def migrate_tasks(self, task_ids: Iterable[str], persist: bool = True) -> int:
+        """
+        古いスキーマのタスクを移行し、次の保存で現在のスキーマで書き込むようにする
+        
+        内容は変わらないため変更番号は進めず、通知もしない。移行した件数を返す。
+        まとめて移行する場合は persist=False で少しずつ呼び、最後に1回保存する
+        （transfer.migrate_all_job）。
+        """
+        migrated = 0
+        for task in map(self._tasks_by_id.get, task_ids):
+            if isinstance(task, RecordTask) and not task._changed:
+                task.mark_migrated()
+                self._mark_changed(task.id)
+                migrated += 1
+        if migrated and persist:
+            self._persist()
+        return migrated
+    
+    @synchronized
+    def persist(self):
+        """変更を保存（autosave が無効なら保存待ちとして記録する）"""
+        self._persist()
     
     def get_categories(self) -> list:
         """利用可能なカテゴリのリストを取得"""
@@ -237,10 +2000,17 @@ class TaskManager:
         return sorted(list(categories))
     
     def get_task_count_by_status(self) -> dict:
-        """ステータス別のタスク数を取得"""
+        """
+        ステータス別のタスク数を取得
+        
+        件数は保存しているタスクだけを数え、繰り返しの期限切れの仮想の回は overdue_occurrences に分ける。
+        """
+        with metrics.time("task_overdue_scan_seconds"):
+            overdue = sum(1 for task in self.tasks if task.is_overdue())
         return {
             'total': len(self.tasks),
             'completed': len(self.get_completed_tasks()),
             'incomplete': len(self.get_incomplete_tasks()),
-            'overdue': len(self.get_overdue_tasks())
+            'overdue': overdue,
+            'overdue_occurrences': len(self.get_overdue_occurrences())
         }
\ No newline at end of file
@@ -0,0 +1,482 @@
+"""
+仮想化タスクリストウィジェット
+表示領域に入る行だけウィジェットを生成し、スクロールに合わせて再利用する
+"""
+import bisect
+from typing import Callable, Optional
+import customtkinter as ctk
+from modules.metrics import registry as metrics
+from modules.responsiveness import tracked
+from modules.task import Task
+
+
+ROW_HEIGHT = 104  # 1行の高さ（px、行間を含む）
+ROW_GAP = 8  # 行間（px）
+OVERSCAN = 3  # 表示領域の上下に余分に描画する行数
+SCROLL_STEP = ROW_HEIGHT // 2  # ホイール1回あたりのスクロール量（px）
+SHIFT_MASK = 0x0001  # クリックイベントの state の Shift キー
+CONTROL_MASK = 0x0004  # クリックイベントの state の Control キー
+
+metrics.describe("gui_row_create_seconds", "タスク行ウィジェットの新規作成（プールが空のとき）")
+metrics.describe("gui_row_bind_seconds", "タスク行へのタスクの表示内容の反映")
+metrics.describe("gui_list_render_seconds", "タスク一覧の表示範囲の行の配置")
+
+
+class TaskRow:
+    """再利用可能なタスク行ウィジェット"""
+    
+    def __init__(self, parent, fonts: dict, on_click: Callable):
+        self.task = None
+        self.selected = False
+        
+        # 行の高さを固定して仮想化の位置計算を単純にする
+        self.frame = ctk.CTkFrame(parent, height=ROW_HEIGHT - ROW_GAP)
+        self.frame.pack_propagate(False)
+        
+        info_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        info_frame.pack(fill="x", padx=15, pady=10)
+        
+        # タイトル行
+        title_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
+        title_frame.pack(fill="x")
+        
+        self.status_label = ctk.CTkLabel(title_frame, text="", font=fonts['status'])
+        self.status_label.pack(side="left")
+        
+        self.title_label = ctk.CTkLabel(title_frame, text="", font=fonts['title'], anchor="w")
+        self.title_label.pack(side="left", padx=(10, 0), fill="x", expand=True)
+        
+        self.priority_label = ctk.CTkLabel(title_frame, text="", font=fonts['priority'])
+        self.priority_label.pack(side="right")
+        
+        # 詳細情報行
+        self.details_label = ctk.CTkLabel(
+            info_frame,
+            text="",
+            font=fonts['details'],
+            text_color="gray",
+            anchor="w"
+        )
+        self.details_label.pack(fill="x", pady=(5, 0))
+        
+        # プログレスバー（進捗がある場合のみ表示）
+        self.progress_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
+        self.progress_label = ctk.CTkLabel(self.progress_frame, text="", font=fonts['progress'])
+        self.progress_label.pack(side="left")
+        self.progress_bar = ctk.CTkProgressBar(self.progress_frame, width=150, height=8)
+        self.progress_bar.pack(side="left", padx=(10, 0))
+        
+        self.desc_label = ctk.CTkLabel(
+            info_frame,
+            text="",
+            font=fonts['details'],
+            text_color="lightgray",
+            anchor="w"
+        )
+        self.desc_label.pack(fill="x", pady=(2, 0))
+        
+        # クリックイベントは生成時に一度だけ登録する
+        def bind_click_recursive(widget):
+            widget.bind("<Button-1>", lambda e: on_click(self, e))
+            for child in widget.winfo_children():
+                bind_click_recursive(child)
+        
+        bind_click_recursive(self.frame)
+    
+    @metrics.timed("gui_row_bind_seconds")
+    def bind_task(self, task, selected: bool):
+        """行の表示内容をタスクに合わせて更新"""
+        self.task = task
+        
+        self.status_label.configure(text="✅" if task.completed else "⭕")
+        
+        title_text = task.title
+        if task.completed:
+            title_text = f"~~{title_text}~~"
+        self.title_label.configure(text=title_text)
+        
+        self.priority_label.configure(
+            text=f"[{task.priority}]",
+            text_color=task.get_priority_color()
+        )
+        
+        details_text = ""
+        if task.category:
+            details_text += f"📁 {task.category}  "
+        if task.due_date:
+            details_text += f"📅 {task.due_date}  "
+            if task.is_overdue():
+                details_text += "⚠️ 期限切れ"
+        if task.pomodoro_count > 0:
+            details_text += f"  🍅 {task.pomodoro_count}ポモドーロ"
+        self.details_label.configure(text=details_text)
+        
+        if task.progress > 0:
+            progress_color = task.get_progress_color()
+            self.progress_label.configure(text=f"進捗: {task.progress}%", text_color=progress_color)
+            self.progress_bar.configure(progress_color=progress_color)
+            self.progress_bar.set(task.progress / 100)
+            self.progress_frame.pack(fill="x", pady=(5, 0), before=self.desc_label)
+        else:
+            self.progress_frame.pack_forget()
+        
+        if task.description:
+            desc = task.description
+            self.desc_label.configure(text=f"💭 {desc[:50]}..." if len(desc) > 50 else f"💭 {desc}")
+        else:
+            self.desc_label.configure(text="")
+        
+        self.set_selected(selected)
+    
+    def set_selected(self, selected: bool):
+        """選択状態の枠線を切り替え"""
+        if selected == self.selected:
+            return
+        self.selected = selected
+        if selected:
+            self.frame.configure(border_width=2, border_color="blue")
+        else:
+            self.frame.configure(border_width=0)
+
+
+class GroupHeaderRow:
+    """再利用可能なグループ見出し行"""
+    
+    def __init__(self, parent, fonts: dict):
+        self.task = None
+        self.frame = ctk.CTkFrame(parent, height=ROW_HEIGHT - ROW_GAP, fg_color="transparent")
+        self.frame.pack_propagate(False)
+        
+        self.label = ctk.CTkLabel(self.frame, text="", font=fonts['group'], anchor="sw")
+        self.label.pack(fill="both", expand=True, padx=10, pady=(0, 6))
+    
+    def bind_header(self, header):
+        """見出しの表示内容を更新"""
+        self.label.configure(text=f"▼ {header.name}（{header.count}件）")
+
+
+class VirtualTaskList(ctk.CTkFrame):
+    """表示領域分の行だけを描画する仮想化タスクリスト"""
+    
+    def __init__(self, parent, on_select: Optional[Callable] = None,
+                 order_key: Optional[Callable] = None, **kwargs):
+        """
+        Args:
+            parent: 親ウィジェット
+            on_select (Optional[Callable]): 選択変更時に呼ばれるコールバック（task または None）
+            order_key (Optional[Callable]): 挿入位置を決める並び順キー（task -> 比較可能な値）
+        """
+        super().__init__(parent, **kwargs)
+        self.on_select = on_select
+        self.order_key = order_key
+        
+        # 表示項目（タスクまたはグループ見出し）と、その行キー
+        # 行キーはタスクなら task.id、グループ内のタスクなら "見出しID/task.id"
+        self.items = []
+        self.keys = []
+        self.positions = {}  # 行キー -> 表示位置
+        self.task_lookup = {}  # task.id -> Task（表示中のタスク）
+        self.grouped = False
+        self.selected_id = None  # 最後にクリックしたタスク（範囲選択の起点）
+        self.selected_ids = set()  # 選択中のタスク（Ctrl/Shift クリックで複数選択）
+        self.scroll_offset = 0  # 先頭からのスクロール位置（px）
+        
+        # 行プール（行キー -> 行、未使用の行）
+        self.rows_by_key = {}
+        self.free_rows = []
+        self.free_headers = []
+        
+        # フォントは全行で共有する
+        self.fonts = {
+            'status': ctk.CTkFont(size=16),
+            'title': ctk.CTkFont(size=14, weight="bold"),
+            'priority': ctk.CTkFont(size=12, weight="bold"),
+            'details': ctk.CTkFont(size=11),
+            'progress': ctk.CTkFont(size=10),
+            'group': ctk.CTkFont(size=15, weight="bold")
+        }
+        
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent")
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.viewport.bind("<Configure>", lambda e: self._render())
+        self._bind_wheel(self.viewport)
+        
+        # タスクがない場合のメッセージ
+        self.empty_label = ctk.CTkLabel(
+            self.viewport,
+            text="📝 タスクがありません\n\n「新しいタスク」ボタンから\nタスクを追加してください",
+            font=ctk.CTkFont(size=16),
+            text_color="gray"
+        )
+    
+    @property
+    def task_count(self) -> int:
+        """表示中のタスク数（見出しを除く、重複表示は1件）"""
+        return len(self.task_lookup)
+    
+    def set_tasks(self, items: list):
+        """
+        表示する項目を設定（スクロール位置と選択状態は維持）
+        
+        items にはタスクと、グループ化表示の見出し（id, name, count を持つ）を混在できる。
+        """
+        self.items = list(items)
+        self.keys = []
+        self.task_lookup = {}
+        self.grouped = False
+        
+        group_prefix = ""
+        for item in self.items:
+            if isinstance(item, Task):
+                self.keys.append(group_prefix + item.id)
+                self.task_lookup[item.id] = item
+            else:
+                self.grouped = True
+                group_prefix = item.id + "/"
+                self.keys.append(item.id)
+        self.positions = {key: index for index, key in enumerate(self.keys)}
+        
+        visible_ids = self.selected_ids & self.task_lookup.keys()
+        if visible_ids != self.selected_ids:
+            self.selected_ids = visible_ids
+            if self.selected_id not in visible_ids:
+                self.selected_id = next(iter(visible_ids), None)
+            if self.on_select:
+                self.on_select(self.get_selected_task())
+        
+        self._clamp_offset()
+        self._render(force=True)
+    
+    def insert_task(self, task):
+        """タスクを並び順の位置に挿入（表示中なら該当行だけ更新、並び順が変われば移動）"""
+        if task.id in self.task_lookup:
+            if self._in_order(task):
+                self.refresh_task(task)
+            else:
+                self.move_task(task)
+            return
+        
+        if self.order_key is None:
+            index = len(self.items)
+        else:
+            index = bisect.bisect_right(self.items, self.order_key(task), key=self.order_key)
+        self.items.insert(index, task)
+        self.keys.insert(index, task.id)
+        self.task_lookup[task.id] = task
+        self._reindex(index)
+        self._render()
+    
+    def remove_task(self, task_id: str):
+        """タスクを一覧から取り除く"""
+        if self.task_lookup.pop(task_id, None) is None:
+            return
+        
+        index = self.positions.pop(task_id)
+        del self.items[index]
+        del self.keys[index]
+        self._reindex(index)
+        
+        if task_id in self.selected_ids:
+            self.selected_ids.discard(task_id)
+            if task_id == self.selected_id:
+                self.selected_id = next(iter(self.selected_ids), None)
+            if self.on_select:
+                self.on_select(self.get_selected_task())
+        
+        self._clamp_offset()
+        self._render()
+    
+    def move_task(self, task):
+        """並び順キーが変わったタスクを正しい位置へ移動"""
+        self.remove_task(task.id)
+        self.insert_task(task)
+    
+    def _in_order(self, task) -> bool:
+        """タスクが前後の項目との並び順を満たしているか"""
+        if self.order_key is None:
+            return True
+        index = self.positions[task.id]
+        key = self.order_key(task)
+        if index > 0 and self.order_key(self.items[index - 1]) > key:
+            return False
+        if index + 1 < len(self.items) and key > self.order_key(self.items[index + 1]):
+            return False
+        return True
+    
+    def refresh_task(self, task):
+        """表示中の行だけを再描画（行がなければ何もしない）"""
+        row = self.rows_by_key.get(task.id)
+        if row is not None:
+            row.bind_task(task, task.id in self.selected_ids)
+    
+    def _reindex(self, start: int):
+        """start 以降の表示位置を振り直す（ウィジェット操作は伴わない）"""
+        for index in range(start, len(self.keys)):
+            self.positions[self.keys[index]] = index
+    
+    def get_selected_task(self):
+        """選択中のタスクを取得（複数選択時は最後にクリックしたタスク）"""
+        return self.task_lookup.get(self.selected_id)
+    
+    def get_selected_tasks(self) -> list:
+        """選択中のタスクを一覧の並び順で取得"""
+        return [task for task in self.task_lookup.values() if task.id in self.selected_ids]
+    
+    def select(self, task_id: Optional[str]):
+        """タスクを1件だけ選択状態にする（None で選択解除）"""
+        self._set_selection({task_id} if task_id is not None else set(), task_id)
+    
+    def _set_selection(self, task_ids: set, anchor_id: Optional[str]):
+        """選択状態を設定し、表示中の行の見た目を更新"""
+        self.selected_ids = task_ids
+        self.selected_id = anchor_id
+        for row in self.rows_by_key.values():
+            if isinstance(row, TaskRow):
+                row.set_selected(row.task is not None and row.task.id in task_ids)
+        if self.on_select:
+            self.on_select(self.get_selected_task())
+    
+    def _on_row_click(self, row: TaskRow, event):
+        """行クリック時の処理（Ctrl で追加・解除、Shift で範囲選択）"""
+        if row.task is None:
+            return
+        task_id = row.task.id
+        
+        if event.state & SHIFT_MASK and self.selected_id in self.task_lookup:
+            # 起点からクリックした行までを選択（グループ化表示の重複行はタスク単位で扱う）
+            ids = [item.id for item in self.items if isinstance(item, Task)]
+            start, end = sorted((ids.index(self.selected_id), ids.index(task_id)))
+            selection = set(ids[start:end + 1])
+            if event.state & CONTROL_MASK:
+                selection |= self.selected_ids
+            self._set_selection(selection, self.selected_id)
+        elif event.state & CONTROL_MASK:
+            selection = set(self.selected_ids)
+            if task_id in selection:
+                selection.discard(task_id)
+                anchor_id = self.selected_id if self.selected_id in selection else next(iter(selection), None)
+            else:
+                selection.add(task_id)
+                anchor_id = task_id
+            self._set_selection(selection, anchor_id)
+        else:
+            self.select(task_id)
+    
+    def _bind_wheel(self, widget):
+        """マウスホイールのスクロールを登録"""
+        widget.bind("<MouseWheel>", self._on_mousewheel, add="+")
+        widget.bind("<Button-4>", lambda e: self.scroll_by(-SCROLL_STEP), add="+")
+        widget.bind("<Button-5>", lambda e: self.scroll_by(SCROLL_STEP), add="+")
+    
+    def _on_mousewheel(self, event):
+        """ホイール操作（Windows/macOS）"""
+        direction = -1 if event.delta > 0 else 1
+        self.scroll_by(direction * SCROLL_STEP)
+    
+    def _on_scrollbar(self, *args):
+        """スクロールバー操作"""
+        viewport_height = max(1, self.viewport.winfo_height())
+        if args[0] == "moveto":
+            self.scroll_offset = int(float(args[1]) * self._content_height())
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            step = viewport_height if args[2] == "pages" else SCROLL_STEP
+            self.scroll_offset += amount * step
+        self._clamp_offset()
+        self._render()
+    
+    def scroll_by(self, pixels: int):
+        """指定ピクセル分スクロール"""
+        self.scroll_offset += pixels
+        self._clamp_offset()
+        self._render()
+    
+    def _content_height(self) -> int:
+        return len(self.items) * ROW_HEIGHT
+    
+    def _clamp_offset(self):
+        max_offset = max(0, self._content_height() - self.viewport.winfo_height())
+        self.scroll_offset = max(0, min(self.scroll_offset, max_offset))
+    
+    def _acquire_row(self) -> TaskRow:
+        """未使用のタスク行を取得（なければ新規作成）"""
+        if self.free_rows:
+            return self.free_rows.pop()
+        with metrics.time("gui_row_create_seconds"):
+            row = TaskRow(self.viewport, self.fonts, self._on_row_click)
+            for widget in [row.frame] + list(self._iter_children(row.frame)):
+                self._bind_wheel(widget)
+        return row
+    
+    def _acquire_header(self) -> GroupHeaderRow:
+        """未使用の見出し行を取得（なければ新規作成）"""
+        if self.free_headers:
+            return self.free_headers.pop()
+        row = GroupHeaderRow(self.viewport, self.fonts)
+        for widget in [row.frame] + list(self._iter_children(row.frame)):
+            self._bind_wheel(widget)
+        return row
+    
+    def _iter_children(self, widget):
+        for child in widget.winfo_children():
+            yield child
+            yield from self._iter_children(child)
+    
+    @tracked
+    @metrics.timed("gui_list_render_seconds")
+    def _render(self, force: bool = False):
+        """表示領域の行を配置"""
+        viewport_height = self.viewport.winfo_height()
+        total = len(self.items)
+        
+        if total == 0:
+            self.empty_label.place(relx=0.5, rely=0.3, anchor="center")
+        else:
+            self.empty_label.place_forget()
+        
+        # 表示範囲（オーバースキャン込み）
+        first = self.scroll_offset // ROW_HEIGHT
+        visible_count = viewport_height // ROW_HEIGHT + 2
+        start = max(0, first - OVERSCAN)
+        end = min(total, first + visible_count + OVERSCAN)
+        visible_keys = set(self.keys[start:end])
+        
+        # 範囲外になった行をプールへ戻す
+        for key in list(self.rows_by_key):
+            if key not in visible_keys:
+                row = self.rows_by_key.pop(key)
+                row.frame.place_forget()
+                row.task = None
+                if isinstance(row, TaskRow):
+                    self.free_rows.append(row)
+                else:
+                    self.free_headers.append(row)
+        
+        for index in range(start, end):
+            item = self.items[index]
+            key = self.keys[index]
+            row = self.rows_by_key.get(key)
+            is_task = isinstance(item, Task)
+            
+            if row is None or force:
+                if row is None:
+                    row = self._acquire_row() if is_task else self._acquire_header()
+                    self.rows_by_key[key] = row
+                if is_task:
+                    row.bind_task(item, item.id in self.selected_ids)
+                else:
+                    row.bind_header(item)
+            y = index * ROW_HEIGHT - self.scroll_offset
+            row.frame.place(x=0, y=y, relwidth=1.0, height=ROW_HEIGHT - ROW_GAP)
+        
+        # スクロールバーの位置を更新
+        content_height = self._content_height()
+        if content_height > 0 and viewport_height > 0:
+            first_fraction = self.scroll_offset / content_height
+            last_fraction = min(1.0, (self.scroll_offset + viewport_height) / content_height)
+            self.scrollbar.set(first_fraction, last_fraction)
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -0,0 +1,261 @@
+"""
+タスクの並び替え・グループ化ビュー
+並び替えキーを事前計算し、並び順を TaskManager の変更通知で差分更新する
+"""
+import bisect
+import heapq
+import threading
+from itertools import compress
+from operator import attrgetter
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+from modules.task import Task, TaskManager
+
+
+PRIORITY_RANK = {"高": 0, "中": 1, "低": 2}
+
+# 並び替えの種類 -> 表示名
+SORT_OPTIONS = {
+    "added": "追加順",
+    "due_date": "期限日",
+    "priority": "優先度",
+    "progress": "進捗",
+    "estimated_time": "予想時間"
+}
+
+# グループ化の種類 -> 表示名
+GROUP_OPTIONS = {
+    "none": "なし",
+    "category": "カテゴリ",
+    "tag": "タグ"
+}
+
+NO_TAG_GROUP = "タグなし"
+
+UNLISTED = float('inf')  # 一覧にないタスク（繰り返しの仮想の回）の通し番号（同じキーなら後ろ）
+
+
+def _due_key(task: Task) -> tuple:
+    """期限日の並び替えキー（期限なし・不正な日付は最後）"""
+    if task.due_date:
+        try:
+            due = date.fromisoformat(task.due_date)
+        except ValueError:
+            # "2025-7-1" のような形式は is_overdue と同じく strptime で解釈する
+            try:
+                due = datetime.strptime(task.due_date, '%Y-%m-%d').date()
+            except ValueError:
+                return (1, 0)
+        return (0, due.toordinal())
+    return (1, 0)
+
+
+# 並び替えの種類 -> キー関数（追加順の通し番号は TaskView 側で末尾に付ける）
+SORT_KEY_FUNCTIONS: Dict[str, Callable[[Task], tuple]] = {
+    "added": lambda task: (),
+    "due_date": _due_key,
+    "priority": lambda task: (PRIORITY_RANK.get(task.priority, len(PRIORITY_RANK)),),
+    "progress": lambda task: (-task.progress,),  # 進捗が大きい順
+    "estimated_time": lambda task: (task.estimated_time,)  # 短い順
+}
+
+
+class GroupHeader:
+    """グループ化表示の見出し"""
+    
+    def __init__(self, name: str, count: int):
+        self.id = f"group:{name}"
+        self.name = name
+        self.count = count
+
+
+class TaskView:
+    """
+    事前計算した並び替えキーで一覧を並べるビュー
+    
+    変更通知は変更したスレッドから届くため、並び順の更新と並び替えはロックで1つずつ行う。
+    """
+    
+    def __init__(self, task_manager: TaskManager):
+        self.task_manager = task_manager
+        self._lock = threading.RLock()
+        self._tasks = {}  # 通し番号 -> Task
+        self._ordinals = {}  # task.id -> 通し番号
+        self._keys = {}  # 並び替えの種類 -> {task.id: キー}
+        self._orderings = {}  # 並び替えの種類 -> キーの昇順リスト
+        self._sorted_tasks = {}  # 並び替えの種類 -> (並び替え済みの全タスク, 通し番号)（変更時に破棄）
+        task_manager.add_listener(self._on_task_change)
+        with self._lock:
+            self._reset()
+    
+    def _reset(self):
+        """全タスクから再構築（並び順は使われたときに作る）"""
+        order = self.task_manager.get_order
+        self._ordinals = {task.id: order(task.id) for task in self.task_manager.tasks}
+        self._tasks = {self._ordinals[task.id]: task for task in self.task_manager.tasks}
+        self._keys = {}
+        self._orderings = {}
+        self._sorted_tasks = {}
+    
+    def _on_task_change(self, event: str, task: Optional[Task]):
+        """TaskManager の変更通知"""
+        with self._lock:
+            self._apply_change(event, task)
+    
+    def _apply_change(self, event: str, task: Optional[Task]):
+        if event == "reset":
+            self._reset()
+            return
+        
+        self._sorted_tasks = {}
+        if event == "removed":
+            for sort_by in self._orderings:
+                self._remove_key(sort_by, task.id)
+            self._tasks.pop(self._ordinals.pop(task.id, None), None)
+            return
+        
+        # added / updated: 事前計算済みのキーを作り直して挿入し直す
+        ordinal = self.task_manager.get_order(task.id)
+        self._tasks[ordinal] = task
+        self._ordinals[task.id] = ordinal
+        for sort_by in self._orderings:
+            self._remove_key(sort_by, task.id)
+            key = self._make_key(sort_by, task)
+            self._keys[sort_by][task.id] = key
+            bisect.insort(self._orderings[sort_by], key)
+    
+    def _make_key(self, sort_by: str, task: Task) -> tuple:
+        return SORT_KEY_FUNCTIONS[sort_by](task) + (self.task_manager.get_order(task.id),)
+    
+    def _remove_key(self, sort_by: str, task_id: str):
+        key = self._keys[sort_by].pop(task_id, None)
+        if key is None:
+            return
+        ordering = self._orderings[sort_by]
+        index = bisect.bisect_left(ordering, key)
+        if index < len(ordering) and ordering[index] == key:
+            del ordering[index]
+    
+    def _ensure_ordering(self, sort_by: str):
+        """並び順がまだなければ全件のキーを計算して作成"""
+        if sort_by in self._orderings:
+            return
+        make = SORT_KEY_FUNCTIONS[sort_by]
+        keys = {task.id: make(task) + (ordinal,) for ordinal, task in self._tasks.items()}
+        self._keys[sort_by] = keys
+        self._orderings[sort_by] = sorted(keys.values())
+    
+    def sort_key(self, sort_by: str) -> Callable[[Task], tuple]:
+        """事前計算済みキーを返す関数（一覧への差分挿入用）"""
+        with self._lock:
+            self._ensure_ordering(sort_by)
+            keys = self._keys[sort_by]
+        return lambda task: keys.get(task.id) or self._make_key(sort_by, task)
+    
+    def sort(self, tasks: list, sort_by: str = "added") -> list:
+        """
+        タスクを並び替え（tasks は TaskManager のタスクと繰り返しの仮想の回）
+        
+        件数が少なければキーで直接ソートし、多ければ維持している並び順から抜き出す。
+        一覧にない仮想の回はキーをその場で計算して並べ、同じキーなら一覧のタスクの後に置く。
+        """
+        if sort_by == "added":
+            return list(tasks)
+        with self._lock:
+            self._ensure_ordering(sort_by)
+            keys = self._keys[sort_by]
+            unlisted = [task for task in tasks if task.id not in keys]
+            if not unlisted:
+                return self._sort(tasks, sort_by)
+            listed = self._sort([task for task in tasks if task.id in keys], sort_by)
+            make = SORT_KEY_FUNCTIONS[sort_by]
+            unlisted_keys = {task.id: make(task) + (UNLISTED,) for task in unlisted}
+            unlisted.sort(key=lambda task: unlisted_keys[task.id])
+            return list(heapq.merge(listed, unlisted,
+                                    key=lambda task: keys.get(task.id) or unlisted_keys[task.id]))
+    
+    def _sort(self, tasks: list, sort_by: str) -> list:
+        keys = self._keys[sort_by]
+        ordering = self._orderings[sort_by]
+        
+        if len(tasks) * 8 < len(ordering):
+            return sorted(tasks, key=lambda task: keys[task.id])
+        
+        cached = self._sorted_tasks.get(sort_by)
+        if cached is None:
+            ordinals = [key[-1] for key in ordering]
+            cached = (list(map(self._tasks.__getitem__, ordinals)), ordinals)
+            self._sorted_tasks[sort_by] = cached
+        full, ordinals = cached
+        if len(tasks) == len(full):
+            return list(full)
+        
+        # 並び替え済みの全タスクから該当するものだけを抜き出す（通し番号で照合）
+        wanted = set(map(self._ordinals.__getitem__, map(attrgetter('id'), tasks)))
+        return list(compress(full, map(wanted.__contains__, ordinals)))
+    
+    def group(self, tasks: list, group_by: str = "none") -> List[tuple]:
+        """
+        並び替え済みのタスクをグループ化（グループ内の並び順は維持）
+        
+        Returns:
+            List[tuple]: (グループ名, タスクのリスト) のリスト（グループ名順）。
+            タグでグループ化した場合、複数のタグを持つタスクは各グループに含まれる
+        """
+        if group_by == "none":
+            return [("", list(tasks))]
+        
+        groups = {}
+        for task in tasks:
+            if group_by == "category":
+                names = [task.category]
+            else:
+                names = task.tags or [NO_TAG_GROUP]
+            for name in names:
+                groups.setdefault(name, []).append(task)
+        
+        return sorted(groups.items(), key=lambda item: (item[0] == NO_TAG_GROUP, item[0]))
+    
+    def arrange(self, tasks: list, sort_by: str = "added", group_by: str = "none") -> list:
+        """
+        一覧表示用に並び替え・グループ化したリストを作成
+        
+        グループ化する場合は各グループの先頭に GroupHeader を挟む。
+        """
+        sorted_tasks = self.sort(tasks, sort_by)
+        if group_by == "none":
+            return sorted_tasks
+        
+        items = []
+        for name, group_tasks in self.group(sorted_tasks, group_by):
+            items.append(GroupHeader(name, len(group_tasks)))
+            items.extend(group_tasks)
+        return items
+    
+    def page(self, tasks: list, page: int = 1, page_size: int = 50,
+             sort_by: str = "added", group_by: str = "none") -> dict:
+        """
+        ページ単位の結果を取得（API 向け）
+        
+        Returns:
+            dict: items（ページ内のタスク、group_by 指定時は groups も付く）と件数情報
+        """
+        sorted_tasks = self.sort(tasks, sort_by)
+        total = len(sorted_tasks)
+        page_size = max(1, page_size)
+        pages = max(1, (total + page_size - 1) // page_size)
+        page = max(1, min(page, pages))
+        
+        start = (page - 1) * page_size
+        page_tasks = sorted_tasks[start:start + page_size]
+        
+        result = {
+            'items': page_tasks,
+            'page': page,
+            'page_size': page_size,
+            'pages': pages,
+            'total': total
+        }
+        if group_by != "none":
+            result['groups'] = self.group(page_tasks, group_by)
+        return result
@@ -0,0 +1,255 @@
+"""
+インポート/エクスポートのバックグラウンド処理
+ファイルI/Oとシリアライズをワーカースレッドで行い、進捗とスループットを報告する
+"""
+import codecs
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
+from modules.migrations import check_header, is_store_header
+from modules.task import Task
+
+
+MIGRATION_BATCH_SIZE = 2000  # まとめて移行するときに1回のロックで移行する件数
+
+
+class TransferCancelled(Exception):
+    """転送処理がキャンセルされた"""
+
+
+class TransferJob:
+    """ワーカースレッドで実行する転送ジョブ"""
+    
+    def __init__(self, name: str, work: Callable[['TransferJob'], Any]):
+        """
+        Args:
+            name (str): ジョブ名（表示用）
+            work (Callable): ジョブ本体。引数にこのジョブを受け取り、結果を返す
+        """
+        self.name = name
+        self.work = work
+        
+        self.processed = 0  # 処理済み件数（またはバイト数）
+        self.total = 0  # 総件数（不明な場合は 0）
+        self.unit = "件"
+        self.started_at = None
+        self.finished_at = None
+        
+        self.result = None
+        self.error = None
+        self.done = False
+        
+        self._cancel_event = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """ジョブを開始"""
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def _run(self):
+        try:
+            self.result = self.work(self)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished_at = time.perf_counter()
+            self.done = True
+    
+    def cancel(self):
+        """キャンセルを要求"""
+        self._cancel_event.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+    
+    def check_cancelled(self):
+        """キャンセルされていれば TransferCancelled を送出"""
+        if self._cancel_event.is_set():
+            raise TransferCancelled(f"{self.name}はキャンセルされました")
+    
+    def report(self, processed: int, total: Optional[int] = None):
+        """進捗を記録（ワーカースレッドから呼ぶ）"""
+        self.processed = processed
+        if total is not None:
+            self.total = total
+    
+    def get_progress(self) -> dict:
+        """進捗情報を取得"""
+        end = self.finished_at or time.perf_counter()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        fraction = self.processed / self.total if self.total else 0.0
+        return {
+            'processed': self.processed,
+            'total': self.total,
+            'unit': self.unit,
+            'fraction': min(1.0, fraction),
+            'elapsed': elapsed,
+            'throughput': self.processed / elapsed if elapsed > 0 else 0.0
+        }
+
+
+def iter_json_array(f, job: Optional[TransferJob] = None, chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """
+    バイナリファイルのJSON配列を要素ごとに読み出す
+    
+    ファイル全体を読み込まずにチャンク単位でデコードする。job を渡すと
+    読み込んだバイト数を進捗として報告し、キャンセルを確認する。
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ""
+    pos = 0
+    bytes_read = 0
+    started = False
+    
+    while True:
+        if job is not None:
+            job.check_cancelled()
+        
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        bytes_read += len(chunk)
+        buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+        pos = 0
+        
+        while True:
+            # 空白と区切りのカンマを読み飛ばす
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer):
+                break
+            
+            if not started:
+                if buffer[pos] != '[':
+                    raise ValueError("タスクデータはJSON配列である必要があります")
+                started = True
+                pos += 1
+                continue
+            
+            if buffer[pos] == ']':
+                if job is not None:
+                    job.report(bytes_read)
+                return
+            
+            try:
+                obj, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                break  # 要素がチャンクをまたいでいるので続きを読む
+            yield obj
+        
+        if job is not None:
+            job.report(bytes_read)
+        
+        if eof:
+            raise ValueError("JSON配列が途中で終わっています")
+
+
+def read_tasks_file(filename: str, job: Optional[TransferJob] = None) -> tuple:
+    """
+    JSONファイルからタスクを1件ずつ読み込む
+    
+    Returns:
+        tuple: (タスクのリスト, 無効なためスキップした件数)
+    """
+    if job is not None:
+        job.unit = "バイト"
+        job.report(0, os.path.getsize(filename))
+    
+    tasks = []
+    skipped = 0
+    with open(filename, 'rb') as f:
+        for task_data in iter_json_array(f, job):
+            if is_store_header(task_data):
+                check_header(task_data)  # データファイルをそのまま読み込む場合
+                continue
+            try:
+                tasks.append(Task.from_dict(task_data))
+            except Exception:
+                skipped += 1  # 無効なタスクデータはスキップ
+    return tasks, skipped
+
+
+def write_tasks_file(tasks: list, filename: str, job: Optional[TransferJob] = None) -> int:
+    """
+    タスクをJSONファイルに1件ずつ書き出す（書き出し件数を返す）
+    
+    出力は一時ファイルに書き込み、完了時に置き換える。
+    キャンセル時は既存のファイルを残す。
+    """
+    if job is not None:
+        job.report(0, len(tasks))
+    
+    temp_filename = filename + ".tmp"
+    try:
+        with open(temp_filename, 'w', encoding='utf-8') as f:
+            f.write("[")
+            for index, task in enumerate(tasks):
+                if job is not None and index % 500 == 0:
+                    job.check_cancelled()
+                    job.report(index)
+                text = json.dumps(task.to_dict(), ensure_ascii=False, indent=2)
+                f.write(",\n  " if index else "\n  ")
+                f.write(text.replace("\n", "\n  "))
+            f.write("\n]" if tasks else "]")
+        os.replace(temp_filename, filename)
+    finally:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+    
+    if job is not None:
+        job.report(len(tasks))
+    return len(tasks)
+
+
+def import_tasks_job(filename: str) -> TransferJob:
+    """タスクを読み込むジョブを作成（結果は (タスクのリスト, スキップ件数)）"""
+    return TransferJob("インポート", lambda job: read_tasks_file(filename, job))
+
+
+def export_tasks_job(tasks: list, filename: str) -> TransferJob:
+    """タスクを書き出すジョブを作成（結果は書き出し件数）"""
+    tasks = list(tasks)
+    return TransferJob("エクスポート", lambda job: write_tasks_file(tasks, filename, job))
+
+
+def export_statistics_job(statistics, filename: str) -> TransferJob:
+    """統計データを書き出すジョブを作成（結果はファイル名）"""
+    def work(job: TransferJob):
+        job.report(0, 1)
+        result = statistics.export_statistics(filename)
+        job.report(1)
+        return result
+    
+    return TransferJob("統計エクスポート", work)
+
+
+def migrate_all_job(task_manager, batch_size: int = MIGRATION_BATCH_SIZE) -> TransferJob:
+    """
+    古いスキーマのタスクをすべて移行して保存するジョブを作成（結果は移行した件数）
+    
+    batch_size 件ずつ TaskManager のロックを取って移行するため、実行中も
+    他のスレッドの読み書きを長く妨げない。キャンセルした場合も移行済みの分は保存する。
+    """
+    def work(job: TransferJob) -> int:
+        task_ids = task_manager.get_outdated_ids()
+        job.report(0, len(task_ids))
+        migrated = 0
+        try:
+            for start in range(0, len(task_ids), batch_size):
+                job.check_cancelled()
+                migrated += task_manager.migrate_tasks(task_ids[start:start + batch_size], persist=False)
+                job.report(min(start + batch_size, len(task_ids)))
+        finally:
+            if migrated:
+                task_manager.persist()
+        return migrated
+    
+    return TransferJob("データ形式の移行", work)
@@ -0,0 +1,193 @@
+"""
+ワークスペースプール
+ワークスペースIDごとに TaskManager を開き、よく使うものをメモリ上に保持する。
+メモリの上限を超えたら最も長く使われていないものから保存して閉じる（LRU）
+"""
+import os
+import re
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Optional
+from modules.task import Task, TaskManager
+
+
+WORKSPACE_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+SIZE_SAMPLE = 200  # 1件あたりのメモリ量を見積もるときに測るタスク数
+WORKSPACE_OVERHEAD = 16 * 1024  # TaskManager 自体と内部インデックスの固定分の見積もり（バイト）
+
+
+def estimate_task_bytes(task: Task) -> int:
+    """タスク1件が使うメモリ量の見積もり（属性の辞書・文字列・タグのリスト）"""
+    size = sys.getsizeof(task) + sys.getsizeof(task.__dict__)
+    for value in task.__dict__.values():
+        size += sys.getsizeof(value)
+    size += sum(sys.getsizeof(tag) for tag in task.tags)
+    # TaskManager の id 索引と並び順の辞書の1件分
+    return size + 2 * 100
+
+
+def get_resident_memory() -> Optional[int]:
+    """プロセスの常駐メモリ量（バイト、取得できない環境では None）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class WorkspaceEntry:
+    """プール内のワークスペース"""
+
+    def __init__(self, task_manager: TaskManager, bytes_per_task: int):
+        self.task_manager = task_manager
+        self.bytes_per_task = bytes_per_task
+        self.pins = 0  # 使用中の数（0 より大きい間は追い出さない）
+
+    @property
+    def estimated_bytes(self) -> int:
+        return WORKSPACE_OVERHEAD + self.bytes_per_task * len(self.task_manager.tasks)
+
+
+class WorkspacePool:
+    """ワークスペースごとの TaskManager を LRU で保持するプール"""
+
+    def __init__(self, root_dir: str, memory_budget: int = 256 * 1024 * 1024,
+                 on_evict: Optional[Callable[[str, TaskManager], None]] = None):
+        """
+        Args:
+            root_dir (str): ワークスペースを置くディレクトリ（<root_dir>/<id>/tasks.json）
+            memory_budget (int): 保持するワークスペースのメモリ量の上限（バイト、見積もり）
+            on_evict (Optional[Callable]): 保存後、追い出す直前に (ワークスペースID, TaskManager) で呼ぶ関数
+        """
+        self.root_dir = root_dir
+        self.memory_budget = memory_budget
+        self.on_evict = on_evict
+        self._entries = OrderedDict()  # ワークスペースID -> WorkspaceEntry（古い順）
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flush_failures = 0
+        self.load_count = 0
+        self.load_total = 0.0  # 読み込みにかかった時間の合計（秒）
+        self.load_max = 0.0
+
+    def data_file(self, workspace_id: str) -> str:
+        """ワークスペースのデータファイル"""
+        if not WORKSPACE_ID_PATTERN.fullmatch(workspace_id):
+            raise ValueError(f"ワークスペースIDが正しくありません: {workspace_id!r}")
+        return os.path.join(self.root_dir, workspace_id, "tasks.json")
+
+    def get(self, workspace_id: str) -> TaskManager:
+        """
+        ワークスペースの TaskManager を取得（なければ読み込む）
+
+        返した TaskManager は後の get で追い出されることがある。
+        使用中に追い出されないようにするには open を使う。
+        """
+        entry = self._entries.get(workspace_id)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(workspace_id)
+            return entry.task_manager
+
+        self.misses += 1
+        entry = self._load(workspace_id)
+        self._entries[workspace_id] = entry
+        self._evict_over_budget()
+        return entry.task_manager
+
+    @contextmanager
+    def open(self, workspace_id: str):
+        """使用中は追い出さずに TaskManager を使う"""
+        task_manager = self.get(workspace_id)
+        entry = self._entries[workspace_id]
+        entry.pins += 1
+        try:
+            yield task_manager
+        finally:
+            entry.pins -= 1
+            self._evict_over_budget()
+
+    def _load(self, workspace_id: str) -> WorkspaceEntry:
+        data_file = self.data_file(workspace_id)
+        started = time.perf_counter()
+        os.makedirs(os.path.dirname(data_file), exist_ok=True)
+        task_manager = TaskManager(data_file=data_file)
+        task_manager.load_tasks()
+
+        sample = task_manager.tasks[:SIZE_SAMPLE]
+        bytes_per_task = (sum(map(estimate_task_bytes, sample)) // len(sample)) if sample else 0
+        elapsed = time.perf_counter() - started
+        self.load_count += 1
+        self.load_total += elapsed
+        self.load_max = max(self.load_max, elapsed)
+        return WorkspaceEntry(task_manager, bytes_per_task)
+
+    @property
+    def resident_bytes(self) -> int:
+        """保持しているワークスペースのメモリ量の見積もり"""
+        return sum(entry.estimated_bytes for entry in self._entries.values())
+
+    def _evict_over_budget(self):
+        """上限を超えている間、使われていない古いものから追い出す（最新の1件は残す）"""
+        resident = self.resident_bytes
+        for workspace_id in list(self._entries)[:-1]:
+            if resident <= self.memory_budget:
+                break
+            entry = self._entries[workspace_id]
+            if entry.pins:
+                continue
+            if self.evict(workspace_id):
+                resident -= entry.estimated_bytes
+
+    def evict(self, workspace_id: str) -> bool:
+        """
+        ワークスペースを保存して閉じる
+
+        保存に失敗した場合は変更を失わないようにメモリ上に残し、False を返す。
+        """
+        entry = self._entries.get(workspace_id)
+        if entry is None or entry.pins:
+            return False
+
+        task_manager = entry.task_manager
+        if task_manager.dirty and not task_manager.save_tasks():
+            self.flush_failures += 1
+            return False
+        if self.on_evict is not None:
+            self.on_evict(workspace_id, task_manager)
+
+        del self._entries[workspace_id]
+        self.evictions += 1
+        return True
+
+    def flush_all(self):
+        """保存待ちの変更があるワークスペースをすべて保存"""
+        for entry in self._entries.values():
+            if entry.task_manager.dirty:
+                entry.task_manager.save_tasks()
+
+    def close(self):
+        """すべてのワークスペースを保存して閉じる"""
+        self.flush_all()
+        self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """ヒット率・読み込み時間・メモリ量"""
+        requests = self.hits + self.misses
+        return {
+            'workspaces': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / requests * 100, 1) if requests else 0.0,
+            'evictions': self.evictions,
+            'flush_failures': self.flush_failures,
+            'load_avg_ms': round(self.load_total / self.load_count * 1000, 2) if self.load_count else 0.0,
+            'load_max_ms': round(self.load_max * 1000, 2),
+            'resident_bytes': self.resident_bytes,
+            'memory_budget': self.memory_budget,
+            'process_rss': get_resident_memory()
+        }
@@ -0,0 +1,785 @@
+"""
+ローカルHTTP/JSON APIサーバー
+TaskManager・PomodoroTimer・TaskStatistics を asyncio で公開する（Web版フロントエンド向け）
+
+使い方:
+    python Src/server.py --port 8765 --data tasks.json
+
+エンドポイント:
+    GET    /api/tasks                一覧（status, q, sort, group, page, page_size）
+    POST   /api/tasks                追加
+    GET    /api/tasks/{id}           取得
+    PATCH  /api/tasks/{id}           更新
+    DELETE /api/tasks/{id}           削除
+    POST   /api/tasks/{id}/toggle    完了状態の切り替え
+    POST   /api/tasks/{id}/pomodoro  ポモドーロ回数の増加
+    GET    /api/categories           カテゴリ一覧
+    GET    /api/statistics           統計
+    GET    /api/pomodoro             タイマーの状態
+    POST   /api/pomodoro/{action}    start / pause / resume / stop
+    GET    /api/sync                 cursor 以降の差分（cursor, limit）
+    POST   /api/sync                 クライアントの変更をまとめて反映し、差分を返す
+    GET    /api/events               変更のストリーム（Server-Sent Events）
+    GET    /metrics                  計測結果（Prometheus のテキスト形式。--metrics で計測を有効にする）
+
+タスクの操作はすべてイベントループのスレッドで行い、ファイルへの保存は
+変更をまとめてからスレッドプールで書き込むため、リクエストは書き込みを待たない。
+"""
+import asyncio
+import json
+import os
+import re
+import signal
+import sys
+import time
+from datetime import datetime
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# モジュールのパスを追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from modules.task import Task, TaskManager
+from modules.archive import archive_days_from_env, normalize_archive_days
+from modules.change_feed import ChangeFeed
+from modules.metrics import registry as metrics
+from modules.pomodoro import PomodoroTimer
+from modules.statistics import TaskStatistics
+from modules.search import TaskIndex, parse_query
+from modules.task_view import GROUP_OPTIONS, SORT_OPTIONS, TaskView
+
+
+STATUS_REASONS = {
+    200: "OK",
+    201: "Created",
+    204: "No Content",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error"
+}
+
+STATUS_FILTERS = ["未完了", "完了済み", "期限切れ"]
+PRIORITIES = ["高", "中", "低"]
+MAX_BODY_SIZE = 1 << 20  # 1 MB
+MAX_PAGE_SIZE = 500
+HEARTBEAT_INTERVAL = 15.0  # イベントがないときに接続維持のコメントを送る間隔（秒）
+
+metrics.describe("api_request_seconds", "APIリクエストの処理（handler はハンドラー名。送信は含まない）")
+metrics.describe("api_responses_total", "APIレスポンスの数（status はステータスコード）")
+
+
+class TextResponse:
+    """JSON 以外の本文を返すレスポンス"""
+
+    def __init__(self, body: str, content_type: str):
+        self.body = body
+        self.content_type = content_type
+
+
+class EventStream:
+    """変更フィードを Server-Sent Events として送り続けるレスポンス"""
+
+    def __init__(self, feed: ChangeFeed, cursor: Optional[int]):
+        """
+        Args:
+            cursor (Optional[int]): クライアントが受け取り済みの変更番号。
+                現在の change_seq と異なれば、取りこぼしがあるため最初に再同期を求める
+        """
+        self.feed = feed
+        self.cursor = cursor
+        self._ready = asyncio.Event()
+        self._stopped = False
+
+    def stop(self):
+        """サーバー停止時にストリームを終える"""
+        self._stopped = True
+        self._ready.set()
+
+    @staticmethod
+    def _resync_message(cursor: int) -> bytes:
+        """再同期の要求（クライアントは GET /api/sync?cursor=... で取り直して再接続する）"""
+        data = json.dumps({'cursor': cursor})
+        return f"event: resync\ndata: {data}\n\n".encode('utf-8')
+
+    async def run(self, writer: asyncio.StreamWriter):
+        """切断・切り離し・停止まで変更を送り続ける"""
+        subscription = self.feed.subscribe(self._ready.set)
+        try:
+            if self.cursor is not None and self.cursor != subscription.last_seq:
+                writer.write(self._resync_message(min(self.cursor, subscription.last_seq)))
+                await writer.drain()
+                return
+
+            writer.write(b": connected\n\n")
+            await writer.drain()
+            while not self._stopped:
+                try:
+                    await asyncio.wait_for(self._ready.wait(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    writer.write(b": ping\n\n")
+                    await writer.drain()
+                    continue
+                self._ready.clear()
+
+                events = subscription.pop_all()
+                if events:
+                    writer.write(b"".join(event.encode_sse() for event in events))
+                if subscription.needs_resync:
+                    writer.write(self._resync_message(subscription.last_seq))
+                    await writer.drain()
+                    return
+                # 送信が詰まっている間はここで待つ（その間のイベントはバッファに溜まる）
+                await writer.drain()
+        finally:
+            self.feed.unsubscribe(subscription)
+
+
+class HTTPError(Exception):
+    """エラーレスポンスとして返す例外"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """受信したリクエスト"""
+
+    def __init__(self, method: str, target: str, headers: dict, body: bytes):
+        url = urlsplit(target)
+        self.method = method
+        self.path = unquote(url.path)
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.headers = headers
+        self.body = body
+        self.params = {}  # パスから取り出した値（ルーティング時に設定）
+
+    def json(self) -> dict:
+        """本文をJSONオブジェクトとして取得"""
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError):
+            raise HTTPError(400, "本文が正しいJSONではありません")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "本文はJSONオブジェクトである必要があります")
+        return data
+
+    def int_param(self, name: str, default: int) -> int:
+        """クエリの整数パラメータを取得"""
+        value = self.query.get(name)
+        if value is None:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise HTTPError(400, f"{name} は整数で指定してください")
+
+
+def _validate_task_fields(data: dict, partial: bool) -> dict:
+    """
+    リクエストのタスク項目を検証して Task.update の引数に変換
+
+    Args:
+        partial (bool): True なら省略された項目は変更しない（更新用）
+    """
+    fields = {}
+
+    if 'title' in data or not partial:
+        title = data.get('title')
+        if not isinstance(title, str) or not title.strip():
+            raise HTTPError(400, "title は必須です")
+        fields['title'] = title.strip()
+
+    for name in ('description', 'category'):
+        if name in data:
+            if not isinstance(data[name], str):
+                raise HTTPError(400, f"{name} は文字列で指定してください")
+            fields[name] = data[name]
+
+    if 'priority' in data:
+        if data['priority'] not in PRIORITIES:
+            raise HTTPError(400, "priority は 高・中・低 のいずれかです")
+        fields['priority'] = data['priority']
+
+    if 'due_date' in data:
+        due_date = data['due_date']
+        if due_date:
+            try:
+                datetime.strptime(due_date, '%Y-%m-%d')
+            except (TypeError, ValueError):
+                raise HTTPError(400, "due_date はYYYY-MM-DD形式で指定してください")
+        fields['due_date'] = due_date or None
+
+    if 'tags' in data:
+        tags = data['tags']
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            raise HTTPError(400, "tags は文字列の配列で指定してください")
+        fields['tags'] = [tag.strip() for tag in tags if tag.strip()]
+
+    for name in ('estimated_time', 'progress'):
+        if name in data:
+            if not isinstance(data[name], int) or isinstance(data[name], bool):
+                raise HTTPError(400, f"{name} は整数で指定してください")
+            fields[name] = data[name]
+
+    return fields
+
+
+class TaskAPIServer:
+    """タスク管理のHTTP/JSON APIサーバー"""
+
+    def __init__(self, task_manager: TaskManager, host: str = "127.0.0.1",
+                 port: int = 8765, save_interval: float = 0.5, statistics_max_age: float = 1.0,
+                 reload_interval: float = 2.0):
+        """
+        Args:
+            task_manager (TaskManager): 読み込み済みのタスクマネージャー
+            save_interval (float): 変更をまとめてから保存するまでの待ち時間（秒）
+            reload_interval (float): 他のプロセスによるデータファイルの変更を確認する間隔（秒）
+            statistics_max_age (float): 変更があっても統計を再計算しない期間（秒）。
+                統計の計算は全件を走査するため、書き込みが続く間は一定間隔でのみ作り直す
+        """
+        self.task_manager = task_manager
+        self.host = host
+        self.port = port
+        self.save_interval = save_interval
+        self.reload_interval = reload_interval
+
+        # 保存はサーバー側でまとめて行う
+        task_manager.autosave = False
+        self.task_index = TaskIndex(task_manager)
+        self.task_view = TaskView(task_manager)
+        self.statistics = TaskStatistics(task_manager)
+        self.pomodoro_timer = PomodoroTimer()
+        self.pomodoro_task_id = None
+        self.pomodoro_timer.on_session_complete = self._on_session_complete_threadsafe
+        self.change_feed = ChangeFeed(task_manager)
+        self._streams = set()
+
+        self.statistics_max_age = statistics_max_age
+        self._statistics_cache = None
+        self._statistics_computed_at = 0.0
+        self._statistics_stale = True
+        task_manager.add_listener(self._on_task_change)
+
+        self._loop = None
+        self._server = None
+        self._save_requested = None
+        self._saver = None
+
+        self._routes = []
+        self.route("GET", r"/api/tasks", self.list_tasks)
+        self.route("POST", r"/api/tasks", self.create_task)
+        self.route("GET", r"/api/tasks/(?P<task_id>[^/]+)", self.get_task)
+        self.route("PATCH", r"/api/tasks/(?P<task_id>[^/]+)", self.update_task)
+        self.route("DELETE", r"/api/tasks/(?P<task_id>[^/]+)", self.delete_task)
+        self.route("POST", r"/api/tasks/(?P<task_id>[^/]+)/toggle", self.toggle_task)
+        self.route("POST", r"/api/tasks/(?P<task_id>[^/]+)/pomodoro", self.increment_pomodoro)
+        self.route("GET", r"/api/categories", self.get_categories)
+        self.route("GET", r"/api/statistics", self.get_statistics)
+        self.route("GET", r"/api/pomodoro", self.get_pomodoro)
+        self.route("POST", r"/api/pomodoro/(?P<action>start|pause|resume|stop)", self.control_pomodoro)
+        self.route("GET", r"/api/sync", self.get_changes)
+        self.route("POST", r"/api/sync", self.sync_changes)
+        self.route("GET", r"/api/events", self.stream_events)
+        self.route("GET", r"/metrics", self.get_metrics)
+
+    def route(self, method: str, pattern: str, handler):
+        """
+        エンドポイントを登録
+
+        handler は Request を受け取り (ステータス, JSON化できる値) を返す。
+        コルーチン関数でもよい。
+        """
+        self._routes.append((method, re.compile(pattern + r"/?"), handler))
+
+    # サーバーの起動・停止
+    async def start(self):
+        """待ち受けを開始"""
+        self._loop = asyncio.get_running_loop()
+        self._save_requested = asyncio.Event()
+        self._saver = asyncio.create_task(self._save_loop())
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, backlog=2048
+        )
+        # port=0 の場合は割り当てられたポートを記録
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"APIサーバーを起動しました: http://{self.host}:{self.port}/api/tasks")
+
+    async def close(self):
+        """待ち受けを停止し、未保存の変更を保存"""
+        self.pomodoro_timer.stop()
+        for stream in list(self._streams):
+            stream.stop()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._saver is not None:
+            self._saver.cancel()
+            try:
+                await self._saver
+            except asyncio.CancelledError:
+                pass
+        if self.task_manager.dirty:
+            self.task_manager.save_tasks()
+
+    # 保存
+    def _on_task_change(self, event: str, task: Optional[Task]):
+        """TaskManager の変更通知"""
+        self._statistics_stale = True
+        if self._save_requested is not None and self.task_manager.dirty:
+            self._save_requested.set()
+
+    async def _save_loop(self):
+        """
+        変更があれば少し待ってからまとめて保存
+
+        他のプロセスによる変更の取り込みとスナップショットの取得はイベントループ上で行い、
+        辞書化・JSONへの変換・書き込みはスレッドプールで行う。
+        変更がない間も reload_interval ごとに他のプロセスの変更を確認する。
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._save_requested.wait(), self.reload_interval)
+            except asyncio.TimeoutError:
+                self._reload_external_changes()
+                continue
+            await asyncio.sleep(self.save_interval)
+            self._save_requested.clear()
+            if not self.task_manager.dirty:
+                continue
+
+            self._reload_external_changes()
+            self.task_manager.dirty = False
+            snapshot = self.task_manager.snapshot()
+            sync_state = self.task_manager.get_sync_state()
+            dependencies = self.task_manager.take_dependencies()
+            try:
+                saved = await self._loop.run_in_executor(
+                    None, self.task_manager.write_snapshot, snapshot, sync_state, dependencies
+                )
+            except Exception as e:
+                print(f"タスクの保存中にエラーが発生しました: {e}")
+                self.task_manager.dirty = True
+                self.task_manager.dependencies_dirty |= dependencies is not None
+                continue
+            if not saved:
+                # 書き込む直前に他のプロセスが保存した（取り込んでから保存し直す）
+                self.task_manager.dirty = True
+                self.task_manager.dependencies_dirty |= dependencies is not None
+                self._save_requested.set()
+
+    def _reload_external_changes(self):
+        """他のプロセスによるデータファイルの変更を取り込む"""
+        try:
+            self.task_manager.reload_if_changed()
+        except Exception as e:
+            print(f"データファイルの再読み込み中にエラーが発生しました: {e}")
+
+    # HTTP
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """1つの接続でリクエストを順に処理（keep-alive 対応）"""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+
+                keep_alive = request.headers.get('connection', '').lower() != 'close'
+                status, payload = await self._dispatch(request)
+                if isinstance(payload, EventStream):
+                    await self._send_event_stream(payload, writer)
+                    break
+                writer.write(self._build_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            writer.write(self._build_response(e.status, {'error': e.message}, False))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        """リクエストを1件読み込む（接続が閉じられたら None）"""
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, target, version = request_line.decode('utf-8', 'replace').split()
+        except ValueError:
+            raise HTTPError(400, "リクエスト行が正しくありません")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if version == "HTTP/1.0" and headers.get('connection', '').lower() != 'keep-alive':
+            headers['connection'] = 'close'
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Content-Length が正しくありません")
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413, "本文が大きすぎます")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method.upper(), target, headers, body)
+
+    async def _dispatch(self, request: Request) -> tuple:
+        """リクエストをハンドラーに振り分け"""
+        if request.method == "OPTIONS":
+            return 204, None
+
+        path_matched = False
+        for method, pattern, handler in self._routes:
+            match = pattern.fullmatch(request.path)
+            if match is None:
+                continue
+            path_matched = True
+            if method != request.method:
+                continue
+
+            request.params = match.groupdict()
+            with metrics.time("api_request_seconds", handler=handler.__name__):
+                result = await self._call_handler(handler, request)
+            metrics.inc("api_responses_total", status=result[0])
+            return result
+
+        if path_matched:
+            return 405, {'error': f"{request.method} は使用できません"}
+        return 404, {'error': "エンドポイントが見つかりません"}
+
+    async def _call_handler(self, handler, request: Request) -> tuple:
+        """ハンドラーを呼び、例外をエラーレスポンスに変換"""
+        try:
+            result = handler(request)
+            if asyncio.iscoroutine(result):
+                result = await result
+            return result
+        except HTTPError as e:
+            return e.status, {'error': e.message}
+        except Exception as e:
+            print(f"リクエストの処理中にエラーが発生しました: {request.method} {request.path}: {e}")
+            return 500, {'error': "サーバー内部でエラーが発生しました"}
+
+    async def _send_event_stream(self, stream: EventStream, writer: asyncio.StreamWriter):
+        """ストリーミングのレスポンスを送る（終わったら接続を閉じる）"""
+        headers = [
+            "HTTP/1.1 200 OK",
+            "Content-Type: text/event-stream; charset=utf-8",
+            "Cache-Control: no-cache",
+            "Access-Control-Allow-Origin: *",
+            "Connection: close"
+        ]
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode('latin-1'))
+        self._streams.add(stream)
+        try:
+            await stream.run(writer)
+        finally:
+            self._streams.discard(stream)
+
+    @staticmethod
+    def _build_response(status: int, payload, keep_alive: bool) -> bytes:
+        """レスポンスのバイト列を作成"""
+        content_type = "application/json; charset=utf-8"
+        if isinstance(payload, TextResponse):
+            body = payload.body.encode('utf-8')
+            content_type = payload.content_type
+        elif payload is None:
+            body = b""
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers = [
+            f"HTTP/1.1 {status} {STATUS_REASONS.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            "Access-Control-Allow-Origin: *",
+            "Access-Control-Allow-Methods: GET, POST, PATCH, DELETE, OPTIONS",
+            "Access-Control-Allow-Headers: Content-Type",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"
+        ]
+        return ("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + body
+
+    # タスク
+    def _find_task(self, request: Request) -> Task:
+        task = self.task_manager.get_task(request.params['task_id'])
+        if task is None:
+            raise HTTPError(404, "タスクが見つかりません")
+        return task
+
+    def list_tasks(self, request: Request) -> tuple:
+        """タスクの一覧（検索・絞り込み・並び替え・ページ分割）"""
+        status = request.query.get('status') or None
+        if status is not None and status not in STATUS_FILTERS:
+            raise HTTPError(400, f"status は {'・'.join(STATUS_FILTERS)} のいずれかです")
+        sort_by = request.query.get('sort', 'added')
+        if sort_by not in SORT_OPTIONS:
+            raise HTTPError(400, f"sort は {', '.join(SORT_OPTIONS)} のいずれかです")
+        group_by = request.query.get('group', 'none')
+        if group_by not in GROUP_OPTIONS:
+            raise HTTPError(400, f"group は {', '.join(GROUP_OPTIONS)} のいずれかです")
+        page_size = min(MAX_PAGE_SIZE, request.int_param('page_size', 50))
+
+        tasks = self.task_index.search(parse_query(request.query.get('q', '')), status)
+        result = self.task_view.page(tasks, request.int_param('page', 1), page_size, sort_by, group_by)
+        result['items'] = [task.to_dict() for task in result['items']]
+        if 'groups' in result:
+            result['groups'] = [
+                {'name': name, 'count': len(group_tasks), 'ids': [task.id for task in group_tasks]}
+                for name, group_tasks in result['groups']
+            ]
+        return 200, result
+
+    def create_task(self, request: Request) -> tuple:
+        """タスクを追加"""
+        fields = _validate_task_fields(request.json(), partial=False)
+        if 'progress' in fields:
+            fields['progress'] = max(0, min(100, fields['progress']))
+        task = Task(**fields)
+        self.task_manager.add_task(task)
+        return 201, task.to_dict()
+
+    def get_task(self, request: Request) -> tuple:
+        """タスクを取得"""
+        return 200, self._find_task(request).to_dict()
+
+    def update_task(self, request: Request) -> tuple:
+        """タスクを更新（completed を指定すると完了状態も変更）"""
+        task = self._find_task(request)
+        data = request.json()
+        fields = _validate_task_fields(data, partial=True)
+        completed = data.get('completed')
+        if completed is not None and not isinstance(completed, bool):
+            raise HTTPError(400, "completed は真偽値で指定してください")
+
+        if fields:
+            self.task_manager.update_task(task.id, **fields)
+        if completed is not None and completed != task.completed:
+            self.task_manager.toggle_task_completion(task.id)
+        return 200, task.to_dict()
+
+    def delete_task(self, request: Request) -> tuple:
+        """タスクを削除"""
+        task = self._find_task(request)
+        self.task_manager.remove_task(task.id)
+        return 204, None
+
+    def toggle_task(self, request: Request) -> tuple:
+        """タスクの完了状態を切り替え"""
+        task = self._find_task(request)
+        self.task_manager.toggle_task_completion(task.id)
+        return 200, task.to_dict()
+
+    def increment_pomodoro(self, request: Request) -> tuple:
+        """タスクのポモドーロ回数を増加"""
+        task = self._find_task(request)
+        self.task_manager.increment_pomodoro(task.id)
+        return 200, task.to_dict()
+
+    def get_categories(self, request: Request) -> tuple:
+        """カテゴリ一覧"""
+        return 200, self.task_manager.get_categories()
+
+    # 統計
+    def get_statistics(self, request: Request) -> tuple:
+        """統計（変更がなければキャッシュを返し、変更があっても statistics_max_age 秒は再利用する）"""
+        now = time.monotonic()
+        if self._statistics_cache is None or (
+                self._statistics_stale and now - self._statistics_computed_at >= self.statistics_max_age):
+            self._statistics_stale = False
+            self._statistics_computed_at = now
+            snapshot = self.task_manager.snapshot()
+            self._statistics_cache = {
+                'status': self.task_manager.get_task_count_by_status(),
+                'productivity': self.statistics.get_productivity_stats(snapshot),
+                'categories': self.statistics.get_category_stats(snapshot),
+                'priorities': self.statistics.get_priority_stats(snapshot),
+                'weekly_progress': self.statistics.get_weekly_progress(snapshot),
+                'tag_usage': self.statistics.get_tag_usage(snapshot),
+                'trends': self.statistics.get_task_trends(snapshot)
+            }
+        return 200, self._statistics_cache
+
+    # 差分同期
+    def get_changes(self, request: Request) -> tuple:
+        """cursor 以降の変更（削除はIDのみ）"""
+        limit = request.int_param('limit', 0)
+        return 200, self.task_manager.get_changes(request.int_param('cursor', 0), limit or None)
+
+    def sync_changes(self, request: Request) -> tuple:
+        """
+        クライアントの変更をまとめて反映
+
+        本文は {"cursor": 前回の cursor, "changes": [...]}。changes の形式は
+        TaskManager.apply_changes を参照。応答の changes には反映した自分の変更も含まれる。
+        """
+        data = request.json()
+        cursor = data.get('cursor', 0)
+        changes = data.get('changes', [])
+        if not isinstance(cursor, int) or not isinstance(changes, list):
+            raise HTTPError(400, "cursor は整数、changes は配列で指定してください")
+
+        for change in changes:
+            if not isinstance(change, dict) or not isinstance(change.get('id'), str):
+                raise HTTPError(400, "各変更には id が必要です")
+            if change.get('op', 'upsert') not in ('upsert', 'delete'):
+                raise HTTPError(400, "op は upsert または delete です")
+            if not isinstance(change.get('base_revision', 0), int):
+                raise HTTPError(400, "base_revision は整数で指定してください")
+            task_data = change.get('task', {})
+            if not isinstance(task_data, dict):
+                raise HTTPError(400, "task はオブジェクトで指定してください")
+            _validate_task_fields(task_data, partial=True)
+            if not isinstance(task_data.get('completed', False), bool):
+                raise HTTPError(400, "completed は真偽値で指定してください")
+            for name in ('pomodoro_count', 'actual_time'):
+                value = task_data.get(name, 0)
+                if not isinstance(value, int) or isinstance(value, bool):
+                    raise HTTPError(400, f"{name} は整数で指定してください")
+
+        result = self.task_manager.apply_changes(changes)
+        result['changes'] = self.task_manager.get_changes(cursor)
+        return 200, result
+
+    def stream_events(self, request: Request) -> tuple:
+        """
+        変更のストリーム
+
+        added / updated / removed / pomodoro_incremented / reset のイベントを送る。
+        読み出しが遅れて取りこぼしが出た場合は resync を送って切断する。
+        再接続時は Last-Event-ID ヘッダーか cursor パラメータで受け取り済みの変更番号を渡す。
+        """
+        last_event_id = request.headers.get('last-event-id')
+        if last_event_id is not None:
+            try:
+                cursor = int(last_event_id)
+            except ValueError:
+                raise HTTPError(400, "Last-Event-ID が正しくありません")
+        elif 'cursor' in request.query:
+            cursor = request.int_param('cursor', 0)
+        else:
+            cursor = None
+        return 200, EventStream(self.change_feed, cursor)
+
+    def get_metrics(self, request: Request) -> tuple:
+        """計測結果（Prometheus のテキスト形式）"""
+        return 200, TextResponse(metrics.to_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+
+    # ポモドーロ
+    def _pomodoro_state(self) -> dict:
+        state = self.pomodoro_timer.get_session_info()
+        state['task_id'] = self.pomodoro_task_id
+        return state
+
+    def get_pomodoro(self, request: Request) -> tuple:
+        """タイマーの状態"""
+        return 200, self._pomodoro_state()
+
+    def control_pomodoro(self, request: Request) -> tuple:
+        """
+        タイマーを操作
+
+        start の本文には task_id（作業セッション完了時にポモドーロ回数を増やすタスク）、
+        work_minutes, break_minutes を指定できる。
+        """
+        action = request.params['action']
+        timer = self.pomodoro_timer
+
+        if action == "start":
+            data = request.json()
+            task_id = data.get('task_id')
+            if task_id is not None and self.task_manager.get_task(task_id) is None:
+                raise HTTPError(404, "タスクが見つかりません")
+            if timer.is_running:
+                raise HTTPError(409, "タイマーは既に動作中です")
+            for name, attribute in (('work_minutes', 'work_duration'), ('break_minutes', 'short_break')):
+                if name in data:
+                    minutes = data[name]
+                    if not isinstance(minutes, int) or isinstance(minutes, bool) or minutes <= 0:
+                        raise HTTPError(400, f"{name} は正の整数で指定してください")
+                    setattr(timer, attribute, minutes * 60)
+            if timer.current_session == "work" and not timer.session_count:
+                timer.remaining_time = timer.work_duration
+            self.pomodoro_task_id = task_id
+            timer.start()
+        elif action == "pause":
+            timer.pause()
+        elif action == "resume":
+            timer.resume()
+        else:
+            timer.stop()
+            self.pomodoro_task_id = None
+        return 200, self._pomodoro_state()
+
+    def _on_session_complete_threadsafe(self, session_type: str):
+        """タイマースレッドからの通知をイベントループに渡す"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._on_session_complete, session_type)
+
+    def _on_session_complete(self, session_type: str):
+        """作業セッション完了時に対象タスクのポモドーロ回数を増加"""
+        if session_type == "work" and self.pomodoro_task_id is not None:
+            self.task_manager.increment_pomodoro(self.pomodoro_task_id)
+
+
+async def serve(task_manager: TaskManager, host: str, port: int, save_interval: float):
+    """サーバーを起動し、SIGINT/SIGTERM を受けたら未保存の変更を保存して停止"""
+    server = TaskAPIServer(task_manager, host, port, save_interval)
+    stop_requested = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_requested.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows では Ctrl+C の KeyboardInterrupt で停止する
+
+    await server.start()
+    try:
+        await stop_requested.wait()
+    finally:
+        await server.close()
+        print("APIサーバーを停止しました")
+
+
+def main(argv=None) -> int:
+    """メイン関数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="タスクマスター Pro のローカルAPIサーバー")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けるアドレス（既定: 127.0.0.1）")
+    parser.add_argument("--port", type=int, default=8765, help="待ち受けるポート（既定: 8765）")
+    parser.add_argument("--data", default="tasks.json", help="タスクデータのファイル（既定: tasks.json）")
+    parser.add_argument("--save-interval", type=float, default=0.5,
+                        help="変更をまとめて保存するまでの待ち時間（秒）")
+    parser.add_argument("--metrics", action="store_true",
+                        help="処理時間を計測する（GET /metrics で Prometheus 形式で取得）")
+    parser.add_argument("--archive-days", type=int, default=None,
+                        help="完了から指定日数が経ったタスクを起動時にアーカイブへ移す"
+                             "（0 は移さない。既定: 環境変数 TASKMASTER_ARCHIVE_DAYS、なければ移さない）")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        metrics.enabled = True
+
+    task_manager = TaskManager(data_file=args.data)
+    task_manager.archive_after_days = (normalize_archive_days(args.archive_days)
+                                       if args.archive_days is not None else archive_days_from_env())
+    task_manager.load_tasks()
+    try:
+        asyncio.run(serve(task_manager, args.host, args.port, args.save_interval))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+完了済みタスクのアーカイブの効果の計測
+合成ワークロードのタスクを保存し、アーカイブに移す前と後で読み込み・保存・統計の
+所要時間とデータファイルの大きさを比べる。アーカイブの検索・集計・復元の時間も計測する。
+
+使い方:
+    python benchmarks/archive_bench.py --sizes 10000,100000 --days 30
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BENCH_DIR)
+from workload import generate_tasks
+from modules.search import parse_query
+from modules.statistics import TaskStatistics
+from modules.task import TaskManager
+
+
+def timed(func) -> float:
+    """func を1回実行した時間（ミリ秒）"""
+    t = time.perf_counter()
+    func()
+    return (time.perf_counter() - t) * 1000
+
+
+def bench_hot(data_file: str) -> dict:
+    """データファイルの読み込み・保存・統計"""
+    task_manager = TaskManager(data_file=data_file)
+    task_manager.autosave = False
+    result = {'file_bytes': os.path.getsize(data_file),
+              'load_tasks_ms': timed(task_manager.load_tasks),
+              'tasks': len(task_manager.tasks)}
+    result['save_ms'] = timed(task_manager.save_tasks)
+    statistics = TaskStatistics(task_manager)
+    result['statistics_ms'] = timed(lambda: (statistics.get_productivity_stats(),
+                                             statistics.get_category_stats(),
+                                             statistics.get_tag_usage()))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="完了済みタスクのアーカイブの効果の計測")
+    parser.add_argument("--sizes", default="10000,100000", help="タスク数（カンマ区切り）")
+    parser.add_argument("--days", type=int, default=30, help="完了から何日経ったタスクを移すか")
+    parser.add_argument("--format", choices=["json", "binary"], default="json", help="データファイルの形式")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(size) for size in args.sizes.split(",") if size):
+        with tempfile.TemporaryDirectory() as data_dir:
+            data_file = os.path.join(data_dir, "tasks.tmdb" if args.format == "binary" else "tasks.json")
+            writer = TaskManager(data_file=data_file)
+            writer.autosave = False
+            writer.add_tasks(generate_tasks(size, seed=args.seed))
+            writer.save_tasks()
+            del writer
+
+            entry = {'tasks': size, 'before': bench_hot(data_file)}
+            task_manager = TaskManager(data_file=data_file)
+            task_manager.load_tasks()
+            entry['archive_ms'] = timed(lambda: task_manager.archive_completed(args.days))
+            archive = task_manager.archive
+            entry['archived'] = len(archive)
+            entry['archive_bytes'] = os.path.getsize(archive.path) if archive.exists() else 0
+            entry['after'] = bench_hot(data_file)
+
+            # 別のインスタンスから開き、索引ファイルの読み込みを含めて計測する
+            task_manager = TaskManager(data_file=data_file)
+            task_manager.load_tasks()
+            archive = task_manager.archive
+            entry['archive_summary_ms'] = timed(archive.summary)
+            found = []
+            entry['archive_search_ms'] = timed(lambda: found.extend(archive.search(parse_query("@仕事 資料"))))
+            entry['archive_search_hits'] = len(found)
+            entry['restore_ms'] = timed(lambda: task_manager.restore_archived([task.id for task in found[:10]]))
+            results.append(entry)
+
+        if not args.json:
+            before, after = entry['before'], entry['after']
+            print(f"{size}件  アーカイブに移した件数: {entry['archived']}（{entry['archive_ms']:.0f} ms、"
+                  f"{entry['archive_bytes'] / 1024 / 1024:.2f} MB）")
+            for key, label, unit, scale in (
+                    ('tasks', "データファイルのタスク数", "件", 1),
+                    ('file_bytes', "データファイルの大きさ", "MB", 1 / 1024 / 1024),
+                    ('load_tasks_ms', "load_tasks", "ms", 1),
+                    ('save_ms', "save_tasks", "ms", 1),
+                    ('statistics_ms', "統計（生産性・カテゴリ・タグ）", "ms", 1)):
+                print(f"  {before[key] * scale:12.2f} → {after[key] * scale:12.2f} {unit:<4} {label}")
+            print(f"  アーカイブの集計 {entry['archive_summary_ms']:.1f} ms  "
+                  f"検索 {entry['archive_search_ms']:.1f} ms（{entry['archive_search_hits']}件）  "
+                  f"10件の復元 {entry['restore_ms']:.1f} ms")
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
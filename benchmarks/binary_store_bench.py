@@ -0,0 +1,118 @@
+"""
+データファイルの形式（JSON / バイナリ）の比較
+合成ワークロードのタスクを両方の形式で保存し、開く・読み込む・1件引く・集計する・
+1件変更して保存する、の所要時間と読み込み後のメモリ量を比べる。
+
+使い方:
+    python benchmarks/binary_store_bench.py --sizes 10000,100000,1000000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BENCH_DIR)
+from workload import generate_tasks
+from modules.binary_store import BinaryTaskStore
+from modules.task import TaskManager
+
+LOOKUPS = 1000  # get_task で引く ID の数
+
+
+def timed(func) -> float:
+    """func を1回実行した時間（ミリ秒）"""
+    t = time.perf_counter()
+    func()
+    return (time.perf_counter() - t) * 1000
+
+
+def load_memory(data_file: str) -> int:
+    """load_tasks で確保したバイト数（tracemalloc）"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        task_manager = TaskManager(data_file=data_file)
+        task_manager.load_tasks()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_format(data_file: str, ids: list) -> dict:
+    result = {'file_bytes': os.path.getsize(data_file)}
+    if data_file.endswith(".tmdb"):
+        store = None
+
+        def open_store():
+            nonlocal store
+            store = BinaryTaskStore(data_file)
+        result['open_ms'] = timed(open_store)
+        result['find_us'] = timed(lambda: [store.find(task_id) for task_id in ids]) * 1000 / len(ids)
+
+    task_manager = TaskManager(data_file=data_file)
+    task_manager.autosave = False
+    result['load_tasks_ms'] = timed(task_manager.load_tasks)
+    result['get_task_us'] = timed(lambda: [task_manager.get_task(task_id).title for task_id in ids]) * 1000 / len(ids)
+    result['count_by_status_ms'] = timed(task_manager.get_task_count_by_status)
+
+    def update_and_save():
+        task_manager.update_task(ids[0], title="変更したタスク")
+        task_manager.save_tasks()
+    result['update_and_save_ms'] = timed(update_and_save)
+    result['touch_all_ms'] = timed(lambda: [task.to_dict() for task in task_manager.tasks])
+    del task_manager
+    result['load_bytes'] = load_memory(data_file)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="データファイルの形式（JSON / バイナリ）の比較")
+    parser.add_argument("--sizes", default="10000,100000", help="タスク数（カンマ区切り）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(size) for size in args.sizes.split(",") if size):
+        with tempfile.TemporaryDirectory() as data_dir:
+            tasks = generate_tasks(size, seed=args.seed)
+            ids = [task.id for task in random.Random(args.seed).sample(tasks, min(LOOKUPS, size))]
+            entry = {'tasks': size}
+            for name, filename in (("json", "tasks.json"), ("binary", "tasks.tmdb")):
+                writer = TaskManager(data_file=os.path.join(data_dir, filename))
+                writer.autosave = False
+                writer.add_tasks(tasks)
+                entry[f"{name}_write_ms"] = timed(writer.save_tasks)
+                del writer
+            del tasks
+            gc.collect()
+            for name, filename in (("json", "tasks.json"), ("binary", "tasks.tmdb")):
+                entry[name] = bench_format(os.path.join(data_dir, filename), ids)
+            results.append(entry)
+
+        if not args.json:
+            print(f"{size}件  （保存: JSON {entry['json_write_ms']:.0f} ms / バイナリ {entry['binary_write_ms']:.0f} ms）")
+            for key, label, unit, scale in (
+                    ('file_bytes', "ファイルサイズ", "MB", 1 / 1024 / 1024),
+                    ('load_tasks_ms', "load_tasks", "ms", 1),
+                    ('load_bytes', "読み込み後のメモリ", "MB", 1 / 1024 / 1024),
+                    ('get_task_us', "get_task（タイトルを読む）", "µs/件", 1),
+                    ('count_by_status_ms', "get_task_count_by_status（初回）", "ms", 1),
+                    ('update_and_save_ms', "1件変更して保存", "ms", 1),
+                    ('touch_all_ms', "全件を辞書化（全属性を読み込む）", "ms", 1)):
+                print(f"  {entry['json'][key] * scale:12.2f} / {entry['binary'][key] * scale:12.2f} {unit:<6} {label}")
+            print(f"  {'':>12}   {entry['binary']['open_ms']:12.2f} ms     バイナリのファイルを開く")
+            print(f"  {'':>12}   {entry['binary']['find_us']:12.2f} µs/件  ID 索引で1件引く")
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+変更フィードの配信（ファンアウト）のベンチマーク
+多数の購読者に変更を配信したときの書き込み側の所要時間と、
+購読者に届くまでの遅延（p50/p99）を表示する
+
+使い方:
+    # 同一プロセス内で ChangeFeed を直接購読（配信処理そのものの計測）
+    python benchmarks/change_feed_bench.py --mode inprocess --subscribers 1000
+
+    # APIサーバーを起動し、/api/events に SSE で接続して計測
+    python benchmarks/change_feed_bench.py --mode http --subscribers 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BENCH_DIR)
+from load_test import HTTPClient, generate_tasks, percentile, spawn_server
+from modules.change_feed import ChangeFeed
+from modules.task import TaskManager
+
+
+def summarize(latencies: list, writer_times: list, elapsed: float, changes: int,
+              subscribers: int, dropped: int) -> dict:
+    latencies.sort()
+    writer_times.sort()
+    return {
+        'subscribers': subscribers,
+        'changes': changes,
+        'deliveries': len(latencies),
+        'dropped_subscribers': dropped,
+        'elapsed_s': round(elapsed, 3),
+        'deliveries_per_s': round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        'delivery_p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'delivery_p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'writer_p50_ms': round(percentile(writer_times, 0.50) * 1000, 3),
+        'writer_p99_ms': round(percentile(writer_times, 0.99) * 1000, 3)
+    }
+
+
+async def run_inprocess(subscribers: int, changes: int, slow: int, buffer_size: int) -> dict:
+    """
+    ChangeFeed を直接購読して計測
+
+    slow 件の購読者は読み出しを止めたままにし、あふれて切り離されても
+    書き込み側が待たされないことを確認する。
+    """
+    task_manager = TaskManager(data_file=os.devnull)
+    task_manager.autosave = False
+    task_manager.add_tasks(generate_tasks(100))
+    feed = ChangeFeed(task_manager, buffer_size=buffer_size)
+    task_ids = [task.id for task in task_manager.tasks]
+
+    published_at = {}
+    latencies = []
+
+    async def consume(subscription, ready: asyncio.Event):
+        while True:
+            await ready.wait()
+            ready.clear()
+            now = time.perf_counter()
+            for event in subscription.pop_all():
+                latencies.append(now - published_at[event.seq])
+            if subscription.needs_resync:
+                return
+
+    consumers = []
+    active = []
+    for i in range(subscribers):
+        ready = asyncio.Event()
+        subscription = feed.subscribe(ready.set)
+        if i >= slow:
+            active.append(subscription)
+            consumers.append(asyncio.create_task(consume(subscription, ready)))
+
+    writer_times = []
+    started = time.perf_counter()
+    for i in range(changes):
+        t = time.perf_counter()
+        published_at[task_manager.change_seq + 1] = t
+        task_manager.update_task(task_ids[i % len(task_ids)], progress=i % 101)
+        writer_times.append(time.perf_counter() - t)
+        if i % 10 == 9:
+            await asyncio.sleep(0)  # 購読者に処理の機会を与える
+    # 読み出している購読者がすべて受け取るまで待つ
+    while any(subscription.buffer for subscription in active):
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+
+    for consumer in consumers:
+        consumer.cancel()
+    return summarize(latencies, writer_times, elapsed, changes, subscribers, feed.dropped)
+
+
+async def read_sse(reader: asyncio.StreamReader, on_event):
+    """SSE のイベントを読み、(event, data) ごとに on_event を呼ぶ"""
+    while True:
+        block = await reader.readuntil(b"\n\n")
+        event = None
+        data = None
+        for line in block.decode('utf-8').splitlines():
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: "):
+                data = line[6:]
+        if event is not None and on_event(event, data):
+            return
+
+
+async def run_http(port: int, subscribers: int, changes: int) -> dict:
+    """APIサーバーの /api/events に SSE で接続して計測"""
+    client = HTTPClient("127.0.0.1", port)
+    await client.connect()
+    _, body = await client.request("GET", "/api/tasks?page_size=100")
+    task_ids = [item['id'] for item in json.loads(body)['items']]
+
+    sent_at = {}  # 変更番号 -> PATCH を送った時刻
+    latencies = []
+    resyncs = []
+    connected = 0
+    all_connected = asyncio.Event()
+
+    async def subscribe():
+        nonlocal connected
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /api/events HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+        await reader.readuntil(b"\r\n\r\n")  # レスポンスヘッダー
+        await reader.readuntil(b"\n\n")  # ": connected"
+        connected += 1
+        if connected == subscribers:
+            all_connected.set()
+        received = 0
+
+        def on_event(event, data):
+            nonlocal received
+            if event == "resync":
+                resyncs.append(data)
+                return True
+            seq = json.loads(data)['seq']
+            latencies.append(time.perf_counter() - sent_at[seq])
+            received += 1
+            return received >= changes
+
+        try:
+            await read_sse(reader, on_event)
+        finally:
+            writer.close()
+
+    readers = [asyncio.create_task(subscribe()) for _ in range(subscribers)]
+    await asyncio.wait_for(all_connected.wait(), 60)
+
+    # 現在の change_seq を取得（以降の PATCH の変更番号は 1 ずつ増える）
+    _, body = await client.request("GET", "/api/sync?cursor=0&limit=1")
+    seq = json.loads(body)['cursor']
+
+    writer_times = []
+    started = time.perf_counter()
+    for i in range(changes):
+        seq += 1
+        t = time.perf_counter()
+        sent_at[seq] = t
+        await client.request("PATCH", f"/api/tasks/{task_ids[i % len(task_ids)]}", {'progress': i % 101})
+        writer_times.append(time.perf_counter() - t)
+    await asyncio.wait_for(asyncio.gather(*readers), 120)
+    elapsed = time.perf_counter() - started
+    client.close()
+
+    return summarize(latencies, writer_times, elapsed, changes, subscribers, len(resyncs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="変更フィードのファンアウトのベンチマーク")
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--changes", type=int, default=200, help="配信する変更の数")
+    parser.add_argument("--slow", type=int, default=10,
+                        help="inprocess: 読み出さない購読者の数（切り離されることを確認）")
+    parser.add_argument("--buffer-size", type=int, default=64, help="inprocess: 購読者ごとのバッファ上限")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    if args.mode == "inprocess":
+        result = asyncio.run(run_inprocess(args.subscribers, args.changes, args.slow, args.buffer_size))
+    else:
+        with tempfile.TemporaryDirectory() as data_dir:
+            process, port = spawn_server(100, data_dir)
+            try:
+                result = asyncio.run(run_http(port, args.subscribers, args.changes))
+            finally:
+                process.terminate()
+                process.wait()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"購読者: {result['subscribers']}  変更: {result['changes']}  配信: {result['deliveries']}  "
+          f"切り離し: {result['dropped_subscribers']}")
+    print(f"配信遅延 p50: {result['delivery_p50_ms']} ms  p99: {result['delivery_p99_ms']} ms  "
+          f"（{result['deliveries_per_s']} 件/秒）")
+    print(f"書き込み p50: {result['writer_p50_ms']} ms  p99: {result['writer_p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
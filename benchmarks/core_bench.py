@@ -0,0 +1,227 @@
+"""
+タスク本体（TaskManager・TaskStatistics）のベンチマーク
+合成ワークロードのタスクを件数ごとに生成し、保存・読み込み・検索・統計の各処理の
+所要時間を計測して JSON で出力する。前回の結果と比較して遅くなった処理を表示できる。
+
+使い方:
+    # 計測して結果を保存（既定: 1000 / 10000 / 100000 / 1000000 件）
+    python benchmarks/core_bench.py --output bench.json
+
+    # 前回の結果と比較（しきい値より遅くなった処理があれば終了コード 1）
+    python benchmarks/core_bench.py --sizes 1000,10000 --compare bench.json --threshold 1.2
+
+期限切れの件数は実行した日付で変わるため、別の日の結果と比較するときは
+--base-date に同じ日付を渡してタスクを生成すること（既定は実行した日）。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BENCH_DIR)
+from workload import CATEGORIES, generate_tasks
+from modules.statistics import TaskStatistics
+from modules.task import TaskManager
+
+GET_TASK_LOOKUPS = 1000  # get_task の1回の計測で引く ID の数
+
+
+def measure(func, min_runs: int, min_seconds: float, max_seconds: float) -> dict:
+    """
+    func を繰り返し実行して所要時間（ミリ秒）を集計
+
+    min_runs 回実行するか max_seconds を超えるまで繰り返し、速い処理は
+    合計が min_seconds に達するまで回数を増やす（最大 1000 回）。
+    """
+    times = []
+    total = 0.0
+    while True:
+        t = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - t
+        times.append(elapsed)
+        total += elapsed
+        if total >= max_seconds or len(times) >= 1000:
+            break
+        if len(times) >= min_runs and total >= min_seconds:
+            break
+    return {
+        'runs': len(times),
+        'min_ms': round(min(times) * 1000, 4),
+        'median_ms': round(statistics.median(times) * 1000, 4),
+        'mean_ms': round(total / len(times) * 1000, 4)
+    }
+
+
+def git_revision() -> str:
+    """計測したコードのコミット（取得できなければ空文字）"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip()
+    except Exception:
+        return ""
+
+
+def bench_size(size: int, args, base_date: date) -> dict:
+    """1つの件数で全ての処理を計測"""
+    def run(func, heavy: bool = False) -> dict:
+        # 保存・読み込みは1回が重いため、最低回数を減らす
+        return measure(func, 1 if heavy and size >= 100000 else args.repeat,
+                       args.min_seconds, args.max_seconds)
+
+    result = {'tasks': size, 'operations': {}}
+    operations = result['operations']
+
+    t = time.perf_counter()
+    tasks = generate_tasks(size, seed=args.seed, base_date=base_date)
+    result['generate_s'] = round(time.perf_counter() - t, 3)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        data_file = os.path.join(data_dir, "tasks.json")
+        task_manager = TaskManager(data_file=data_file)
+        task_manager.autosave = False
+        task_manager.add_tasks(tasks)
+        del tasks
+
+        def save():
+            task_manager.dirty = True
+            task_manager.save_tasks()
+
+        operations['save_tasks'] = run(save, heavy=True)
+        result['file_bytes'] = os.path.getsize(data_file)
+
+        # 保存したファイルを新しい TaskManager で読み込む（生成したタスクは手放す）
+        del task_manager
+        task_manager = TaskManager(data_file=data_file)
+        task_manager.autosave = False
+        operations['load_tasks'] = run(task_manager.load_tasks, heavy=True)
+        result['loaded_tasks'] = len(task_manager.tasks)
+
+        rng = random.Random(args.seed)
+        ids = [task.id for task in rng.sample(task_manager.tasks, min(GET_TASK_LOOKUPS, size))]
+        ids.append("task_missing")
+
+        def lookup():
+            for task_id in ids:
+                task_manager.get_task(task_id)
+
+        operations['get_task'] = run(lookup)
+        operations['get_task']['per_call_us'] = round(
+            operations['get_task']['median_ms'] * 1000 / len(ids), 3)
+        operations['get_tasks_by_category'] = run(
+            lambda: [task_manager.get_tasks_by_category(category) for category in CATEGORIES])
+        operations['get_incomplete_tasks'] = run(task_manager.get_incomplete_tasks)
+        operations['get_completed_tasks'] = run(task_manager.get_completed_tasks)
+        operations['get_overdue_tasks'] = run(task_manager.get_overdue_tasks)
+        operations['get_task_count_by_status'] = run(task_manager.get_task_count_by_status)
+        result['counts'] = task_manager.get_task_count_by_status()
+
+        statistics_ = TaskStatistics(task_manager)
+        t = time.perf_counter()
+        task_manager.snapshot()
+        result['first_snapshot_ms'] = round((time.perf_counter() - t) * 1000, 3)
+        for name in ("get_productivity_stats", "get_category_stats", "get_priority_stats",
+                     "get_weekly_progress", "get_tag_usage", "get_task_trends"):
+            operations[f"statistics.{name}"] = run(getattr(statistics_, name))
+        export_file = os.path.join(data_dir, "statistics.json")
+        operations['statistics.export_statistics'] = run(lambda: statistics_.export_statistics(export_file))
+    return result
+
+
+def compare(current: dict, previous: dict, threshold: float) -> list:
+    """
+    前回の結果と最小値を比べて表示し、しきい値より遅くなった処理の一覧を返す
+    （中央値より他のプロセスの影響を受けにくいため最小値で比べる）
+    """
+    previous_sizes = {str(entry['tasks']): entry for entry in previous.get('results', [])}
+    regressions = []
+    print(f"前回: {previous.get('meta', {}).get('timestamp', '?')}  "
+          f"（{previous.get('meta', {}).get('git_revision') or '不明なコミット'}）")
+    for entry in current['results']:
+        before = previous_sizes.get(str(entry['tasks']))
+        if before is None:
+            print(f"{entry['tasks']}件: 前回の結果がありません")
+            continue
+        print(f"\n{entry['tasks']}件")
+        for name, now in entry['operations'].items():
+            old = before['operations'].get(name)
+            if old is None or not old['min_ms']:
+                continue
+            ratio = now['min_ms'] / old['min_ms']
+            mark = ""
+            if ratio > threshold:
+                mark = "  ← 遅くなりました"
+                regressions.append((entry['tasks'], name, ratio))
+            elif ratio < 1 / threshold:
+                mark = "  ← 速くなりました"
+            print(f"  {name:<36} {old['min_ms']:>11.3f} → {now['min_ms']:>11.3f} ms  ×{ratio:.2f}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="タスク本体のベンチマーク")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="タスク数（カンマ区切り）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-date", help="タスク生成で「今日」とみなす日付（YYYY-MM-DD）")
+    parser.add_argument("--repeat", type=int, default=5, help="各処理の最低実行回数")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="速い処理を繰り返す合計秒数")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="1つの処理を繰り返す最大秒数")
+    parser.add_argument("--output", help="結果のJSONを書き込むファイル")
+    parser.add_argument("--compare", help="比較する前回の結果（JSONファイル）")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="前回の最小値の何倍を超えたら遅くなったとみなすか")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで標準出力に出力")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    base_date = date.fromisoformat(args.base_date) if args.base_date else date.today()
+    current = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'base_date': base_date.isoformat()
+        },
+        'results': []
+    }
+
+    for size in sizes:
+        entry = bench_size(size, args, base_date)
+        current['results'].append(entry)
+        if not args.json:
+            print(f"{size}件（生成 {entry['generate_s']} 秒、ファイル {entry['file_bytes'] / 1024 / 1024:.1f} MB）")
+            for name, timing in entry['operations'].items():
+                print(f"  {name:<36} 中央値 {timing['median_ms']:>11.3f} ms  "
+                      f"最小 {timing['min_ms']:>11.3f} ms  （{timing['runs']}回）")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(current, ensure_ascii=False, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        if previous['meta'].get('base_date') != current['meta']['base_date']:
+            print(f"注意: 前回とタスク生成の基準日が違います（{previous['meta'].get('base_date')}）",
+                  file=sys.stderr)
+        regressions = compare(current, previous, args.threshold)
+        if regressions:
+            print(f"\n遅くなった処理: {len(regressions)} 件（しきい値 ×{args.threshold}）")
+            sys.exit(1)
+        print("\n遅くなった処理はありませんでした")
+
+
+if __name__ == "__main__":
+    main()
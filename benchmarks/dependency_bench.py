@@ -0,0 +1,152 @@
+"""
+タスクの依存関係の計測
+合成ワークロードのタスクに、隠れた順序に沿ったランダムな依存関係（非巡回）を
+ランダムな順で追加し、辺ごとの追加（順序の維持と循環の検出）・循環する辺の拒否・
+着手可能なタスクの抽出・クリティカルパス・保存と読み込みの所要時間を計る。
+比較として、辺ごとに深さ優先探索で循環を調べ、トポロジカル順序を全体から作り直す
+素朴な方法の時間も（一部の辺で）計る。
+
+使い方:
+    python benchmarks/dependency_bench.py --tasks 100000 --edges 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BENCH_DIR)
+from workload import generate_tasks
+from modules.task import DependencyCycleError, TaskManager
+
+
+def timed(func) -> float:
+    """func を1回実行した時間（ミリ秒）"""
+    t = time.perf_counter()
+    func()
+    return (time.perf_counter() - t) * 1000
+
+
+def make_edges(task_ids: list, count: int, seed: int) -> list:
+    """隠れた順序で前にあるタスクがブロックする辺（近いものほど多い）"""
+    rnd = random.Random(seed)
+    ranked = list(task_ids)
+    rnd.shuffle(ranked)
+    edges = set()
+    while len(edges) < count:
+        blocker = rnd.randrange(len(ranked) - 1)
+        task = min(len(ranked) - 1, blocker + 1 + int(rnd.expovariate(1 / 50)))
+        edges.add((ranked[task], ranked[blocker]))
+    edges = list(edges)
+    rnd.shuffle(edges)
+    return edges
+
+
+def naive_insert(dependents: dict, indegree: dict, task_id: str, blocker_id: str) -> list:
+    """素朴な方法: task_id から blocker_id に着くかを探索し、辺を加えて順序を作り直す"""
+    seen = {task_id}
+    stack = [task_id]
+    while stack:
+        node = stack.pop()
+        if node == blocker_id:
+            raise DependencyCycleError([blocker_id, task_id, blocker_id])
+        for dependent in dependents.get(node, ()):
+            if dependent not in seen:
+                seen.add(dependent)
+                stack.append(dependent)
+    dependents.setdefault(blocker_id, []).append(task_id)
+    indegree[task_id] = indegree.get(task_id, 0) + 1
+    remaining = dict(indegree)
+    ready = [node for node in dependents if not remaining.get(node)]
+    order = []
+    while ready:
+        node = ready.pop()
+        order.append(node)
+        for dependent in dependents.get(node, ()):
+            remaining[dependent] -= 1
+            if not remaining[dependent]:
+                ready.append(dependent)
+    return order
+
+
+def main():
+    parser = argparse.ArgumentParser(description="タスクの依存関係の計測")
+    parser.add_argument("--tasks", type=int, default=100000, help="タスク数")
+    parser.add_argument("--edges", type=int, default=100000, help="依存関係の数")
+    parser.add_argument("--naive", type=int, default=20, help="素朴な方法で追加する辺の数（最後の辺から）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    result = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        task_manager = TaskManager(data_file=os.path.join(data_dir, "tasks.json"))
+        task_manager.autosave = False
+        task_manager.add_tasks(generate_tasks(args.tasks, seed=args.seed))
+        task_ids = [task.id for task in task_manager.tasks]
+        edges = make_edges(task_ids, args.edges, args.seed)
+
+        result['add_ms'] = timed(lambda: [task_manager.add_dependency(*edge) for edge in edges])
+        result['add_us_per_edge'] = result['add_ms'] * 1000 / len(edges)
+        result['order_ok'] = task_manager._dependencies.check()
+
+        # 既存の辺を逆向きにすると必ず循環する
+        reversed_edges = [(blocker_id, task_id) for task_id, blocker_id in rnd.sample(edges, 1000)]
+        rejected = 0
+        start = time.perf_counter()
+        for edge in reversed_edges:
+            try:
+                task_manager.add_dependency(*edge)
+            except DependencyCycleError:
+                rejected += 1
+        result['reject_us_per_edge'] = (time.perf_counter() - start) * 1e6 / len(reversed_edges)
+        result['rejected'] = rejected
+
+        dependents = {}
+        indegree = {}
+        samples = edges[-args.naive:]
+        for task_id, blocker_id in edges[:-args.naive]:
+            dependents.setdefault(blocker_id, []).append(task_id)
+            indegree[task_id] = indegree.get(task_id, 0) + 1
+        naive_ms = timed(lambda: [naive_insert(dependents, indegree, *edge) for edge in samples])
+        result['naive_us_per_edge'] = naive_ms * 1000 / len(samples)
+
+        ready = []
+        result['ready_ms'] = timed(lambda: ready.extend(task_manager.get_ready_tasks()))
+        result['ready'] = len(ready)
+        path = {}
+        result['critical_ms'] = timed(lambda: path.update(task_manager.get_critical_path()))
+        result['critical_cached_ms'] = timed(task_manager.get_critical_path)
+        result['critical_tasks'] = len(path['tasks'])
+        result['critical_minutes'] = path['total_time']
+        task_manager.toggle_task_completion(path['tasks'][0].id)
+        result['critical_after_change_ms'] = timed(task_manager.get_critical_path)
+
+        result['save_ms'] = timed(task_manager.save_tasks)
+        result['file_bytes'] = os.path.getsize(task_manager.dependency_file)
+        loaded = TaskManager(data_file=task_manager.data_file)
+        result['load_ms'] = timed(loaded.load_tasks)
+        result['loaded_edges'] = loaded._dependencies.edge_count
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    print(f"タスク {args.tasks}件、依存関係 {args.edges}件")
+    print(f"  辺の追加: {result['add_us_per_edge']:.1f} µs/件（合計 {result['add_ms']:.0f} ms、"
+          f"順序の検証: {'OK' if result['order_ok'] else 'NG'}）")
+    print(f"  循環する辺の拒否: {result['reject_us_per_edge']:.1f} µs/件（{result['rejected']}件）")
+    print(f"  素朴な方法（辺ごとに探索して順序を作り直す）: {result['naive_us_per_edge']:.0f} µs/件")
+    print(f"  着手可能なタスク: {result['ready_ms']:.1f} ms（{result['ready']}件）")
+    print(f"  クリティカルパス: {result['critical_ms']:.1f} ms（{result['critical_tasks']}件、"
+          f"{result['critical_minutes']}分）、キャッシュ {result['critical_cached_ms']:.3f} ms、"
+          f"完了後 {result['critical_after_change_ms']:.1f} ms")
+    print(f"  保存: {result['save_ms']:.0f} ms（依存関係のファイル {result['file_bytes'] / 1024 / 1024:.1f} MB）")
+    print(f"  読み込み: {result['load_ms']:.0f} ms（{result['loaded_edges']}件）")
+
+
+if __name__ == "__main__":
+    main()
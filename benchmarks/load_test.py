@@ -0,0 +1,213 @@
+"""
+APIサーバーの負荷試験
+多数のクライアントから同時にリクエストを送り、レイテンシ（p50/p99）と
+秒間リクエスト数を表示する
+
+使い方:
+    # 一時データでサーバーを起動して計測（既定: 1000クライアント）
+    python benchmarks/load_test.py --spawn --tasks 5000
+
+    # 起動済みのサーバーに対して計測
+    python benchmarks/load_test.py --port 8765 --clients 1000 --requests 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BENCH_DIR)
+from workload import CATEGORIES, SRC_DIR, generate_tasks
+
+
+class HTTPClient:
+    """keep-alive で1本の接続を使い回す最小限のクライアント"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method: str, path: str, payload=None) -> tuple:
+        """リクエストを送り (ステータス, 本文) を返す"""
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode('utf-8') + body)
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("サーバーが接続を閉じました")
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        return status, await self.reader.readexactly(length) if length else b""
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def choose_request(rng: random.Random, task_ids: list) -> tuple:
+    """実際の利用に近い比率でリクエストを選ぶ（読み込み中心）"""
+    r = rng.random()
+    if r < 0.45:
+        return "GET", f"/api/tasks?page={rng.randint(1, 5)}&page_size=20", None
+    if r < 0.60:
+        query = rng.choice(["%23重要", "%40仕事", "レポート", "!高"])
+        return "GET", f"/api/tasks?q={query}&sort=due_date&page_size=20", None
+    if r < 0.75:
+        return "GET", f"/api/tasks/{rng.choice(task_ids)}", None
+    if r < 0.88:
+        return "PATCH", f"/api/tasks/{rng.choice(task_ids)}", {'progress': rng.randint(0, 100)}
+    if r < 0.93:
+        return "POST", "/api/tasks", {'title': "負荷試験のタスク", 'category': rng.choice(CATEGORIES)}
+    if r < 0.97:
+        return "POST", f"/api/tasks/{rng.choice(task_ids)}/pomodoro", None
+    return "GET", "/api/statistics", None
+
+
+async def run_client(host: str, port: int, requests: int, task_ids: list,
+                     seed: int, start_event: asyncio.Event, latencies: list, errors: list):
+    """1クライアント分のリクエストを順に送る"""
+    rng = random.Random(seed)
+    client = HTTPClient(host, port)
+    try:
+        await client.connect()
+        await start_event.wait()
+        for _ in range(requests):
+            method, path, payload = choose_request(rng, task_ids)
+            started = time.perf_counter()
+            status, _ = await client.request(method, path, payload)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors.append(status)
+    except (ConnectionError, OSError, asyncio.IncompleteReadError) as e:
+        errors.append(type(e).__name__)
+    finally:
+        client.close()
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_load_test(host: str, port: int, clients: int, requests: int, seed: int) -> dict:
+    """負荷試験を実行して結果を返す"""
+    client = HTTPClient(host, port)
+    await client.connect()
+    _, body = await client.request("GET", "/api/tasks?page_size=500")
+    client.close()
+    task_ids = [item['id'] for item in json.loads(body)['items']]
+    if not task_ids:
+        raise RuntimeError("サーバーにタスクがありません（--spawn --tasks で生成できます）")
+
+    latencies = []
+    errors = []
+    start_event = asyncio.Event()
+    workers = [
+        asyncio.create_task(run_client(host, port, requests, task_ids, seed + i,
+                                       start_event, latencies, errors))
+        for i in range(clients)
+    ]
+    # 全クライアントの接続を待ってから一斉に開始する
+    await asyncio.sleep(0.5)
+    started = time.perf_counter()
+    start_event.set()
+    await asyncio.gather(*workers)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'elapsed_s': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0
+    }
+
+
+def spawn_server(task_count: int, data_dir: str) -> tuple:
+    """一時データでサーバーを別プロセスで起動し (プロセス, ポート) を返す"""
+    data_file = os.path.join(data_dir, "tasks.json")
+    with open(data_file, 'w', encoding='utf-8') as f:
+        json.dump([task.to_dict() for task in generate_tasks(task_count)], f, ensure_ascii=False)
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(SRC_DIR, "server.py"), "--port", str(port), "--data", data_file],
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, port
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("サーバーの起動に失敗しました")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="APIサーバーの負荷試験")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=1000, help="同時接続クライアント数")
+    parser.add_argument("--requests", type=int, default=20, help="クライアントあたりのリクエスト数")
+    parser.add_argument("--spawn", action="store_true", help="一時データでサーバーを起動して計測")
+    parser.add_argument("--tasks", type=int, default=5000, help="--spawn 時に生成するタスク数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    process = None
+    with tempfile.TemporaryDirectory() as data_dir:
+        port = args.port
+        if args.spawn:
+            process, port = spawn_server(args.tasks, data_dir)
+        try:
+            result = asyncio.run(run_load_test(args.host, port, args.clients, args.requests, args.seed))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"クライアント数: {result['clients']}  リクエスト数: {result['requests']}  "
+              f"エラー: {result['errors']}")
+        print(f"p50: {result['p50_ms']} ms  p99: {result['p99_ms']} ms  最大: {result['max_ms']} ms")
+        print(f"スループット: {result['rps']} req/s（{result['elapsed_s']} 秒）")
+
+
+if __name__ == "__main__":
+    main()
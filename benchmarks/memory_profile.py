@@ -0,0 +1,47 @@
+"""
+メモリ使用量の計測（合成ワークロード）
+合成したタスクのデータファイルを作り、件数ごとのメモリ使用量と内訳を表示する。
+実際のデータファイルを計測する場合は `python Src/cli.py --data tasks.json memory` を使う。
+
+使い方:
+    python benchmarks/memory_profile.py --sizes 1000,10000,100000
+    python benchmarks/memory_profile.py --sizes 1000,10000 --json > memory.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BENCH_DIR)
+from workload import generate_tasks
+from modules.memory_report import build_report, format_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="メモリ使用量の計測（合成ワークロード）")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="タスク数（カンマ区切り）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--gui", action="store_true", help="GUI の行ウィジェットも計測する")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    with tempfile.TemporaryDirectory() as data_dir:
+        # 最大件数のデータを1つ作り、先頭から各件数分を計測する
+        data_file = os.path.join(data_dir, "tasks.json")
+        with open(data_file, 'w', encoding='utf-8') as f:
+            json.dump([task.to_dict() for task in generate_tasks(max(sizes), seed=args.seed)],
+                      f, ensure_ascii=False, indent=2)
+        report = build_report(data_file, sizes, include_gui=args.gui)
+
+    report['data_file'] = f"合成データ（seed={args.seed}）"
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
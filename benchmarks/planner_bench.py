@@ -0,0 +1,138 @@
+"""
+ポモドーロの作業枠への計画（DayPlanner）の計測
+合成ワークロードのタスクをすべて未完了にして候補とし、初回の計画（候補の情報の作成を含む）・
+変更がないときの再計画・割り当てに影響しない変更と影響する変更の後の再計画・
+タスクを分けない場合（貪欲法と動的計画法）の所要時間を計る。
+比較として、計画のたびに全タスクから価値を計算して並べ替える素朴な方法の時間も計る。
+
+使い方:
+    python benchmarks/planner_bench.py --tasks 10000 --hours 8
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BENCH_DIR)
+from workload import generate_tasks
+from modules.planner import PRIORITY_WEIGHTS, DayPlanner, _due_ordinal, remaining_pomodoros, slot_value
+from modules.task import TaskManager
+
+
+def measure(func, repeat: int) -> float:
+    """func を repeat 回実行した時間の中央値（ミリ秒）"""
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - t) * 1000)
+    return statistics.median(times)
+
+
+def naive_plan(task_manager: TaskManager, capacity: int, today: int) -> tuple:
+    """素朴な方法: 全タスクの価値を計算して並べ替え、上から枠を埋める（間に合わないタスクも求める）"""
+    candidates = []
+    for task in task_manager.tasks:
+        if not task.completed:
+            due = _due_ordinal(task.due_date)
+            value = slot_value(PRIORITY_WEIGHTS.get(task.priority, 1), due, today)
+            candidates.append((-value, due, task_manager.get_order(task.id), task, remaining_pomodoros(task)))
+    candidates.sort(key=lambda candidate: candidate[:3])
+    chosen = {}
+    for _, _, _, task, remaining in candidates:
+        if capacity <= 0:
+            break
+        chosen[task.id] = min(remaining, capacity)
+        capacity -= chosen[task.id]
+    overflow = [task for _, due, _, task, remaining in candidates
+                if due <= today and chosen.get(task.id, 0) < remaining]
+    return chosen, overflow
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ポモドーロの作業枠への計画の計測")
+    parser.add_argument("--tasks", type=int, default=10000, help="候補のタスク数")
+    parser.add_argument("--hours", type=float, default=8, help="計画する時間")
+    parser.add_argument("--repeat", type=int, default=20, help="各計測の繰り返し回数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    result = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        task_manager = TaskManager(data_file=os.path.join(data_dir, "tasks.json"))
+        task_manager.autosave = False
+        tasks = generate_tasks(args.tasks, seed=args.seed)
+        for task in tasks:
+            task.completed = False
+        task_manager.add_tasks(tasks)
+        planner = DayPlanner(task_manager)
+
+        t = time.perf_counter()
+        plan = planner.plan(args.hours, start)
+        result['first_ms'] = (time.perf_counter() - t) * 1000
+        result['slots'] = len(plan.slots)
+        result['planned_tasks'] = len(plan.assignments)
+        result['overflow'] = len(plan.overflow)
+        result['cached_ms'] = measure(lambda: planner.plan(args.hours, start), args.repeat)
+
+        # 割り当てていない価値の低いタスクの変更（割り当てはそのまま使える）
+        selected = {task.id for task, _, _ in plan.assignments}
+        others = [task for task in task_manager.tasks if task.id not in selected
+                  and task.priority == "低" and not task.due_date]
+
+        def unrelated_change():
+            task_manager.update_task(rnd.choice(others).id, progress=rnd.randrange(0, 90, 10))
+            planner.plan(args.hours, start)
+        result['unrelated_change_ms'] = measure(unrelated_change, args.repeat)
+
+        # 割り当てたタスクの進捗の変更（割り当てを作り直す）
+        def planned_change():
+            task = planner.plan(args.hours, start).assignments[0][0]
+            task_manager.update_task(task.id, progress=min(90, task.progress + 10))
+            planner.plan(args.hours, start)
+        result['planned_change_ms'] = measure(planned_change, args.repeat)
+
+        def whole_greedy():
+            planner._selection = None
+            planner.plan(args.hours, start, whole=True, exact_limit=0)
+        result['whole_greedy_ms'] = measure(whole_greedy, args.repeat)
+
+        small = TaskManager(data_file=os.path.join(data_dir, "small.json"))
+        small.autosave = False
+        small.add_tasks(tasks[:200])
+        small_planner = DayPlanner(small)
+
+        def whole_exact():
+            small_planner._selection = None
+            small_planner.plan(args.hours, start, whole=True)
+        result['whole_exact_200_ms'] = measure(whole_exact, args.repeat)
+
+        capacity = len(plan.slots)
+        result['naive_ms'] = measure(lambda: naive_plan(task_manager, capacity, start.toordinal()), args.repeat)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    print(f"候補 {args.tasks}件、{args.hours}時間（作業枠 {result['slots']}個、割り当て {result['planned_tasks']}件、"
+          f"今日までの期限に間に合わない {result['overflow']}件）")
+    for key, label in (('first_ms', "初回（候補の情報の作成を含む）"),
+                       ('cached_ms', "変更がないときの再計画"),
+                       ('unrelated_change_ms', "割り当てに影響しない変更の後"),
+                       ('planned_change_ms', "割り当てたタスクの変更の後"),
+                       ('whole_greedy_ms', "タスクを分けない（貪欲法）"),
+                       ('whole_exact_200_ms', "タスクを分けない（動的計画法、候補 200件）"),
+                       ('naive_ms', "素朴な方法（毎回すべてのタスクから計算する）")):
+        print(f"  {result[key]:8.2f} ms  {label}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+繰り返しタスクの遅延展開の計測
+合成ワークロードのタスクの一部を繰り返しのテンプレートにし、各回を仮想のまま扱う場合と、
+期間内のすべての回をタスクとして保存した場合（素朴な実装）とで、データファイルの大きさ・
+保存・期限切れの抽出・期間内の回の取得・統計の所要時間を比べる。
+
+使い方:
+    python benchmarks/recurrence_bench.py --tasks 10000 --series 500 --days 365
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BENCH_DIR)
+from workload import generate_tasks
+from modules.recurrence import RecurrenceRule, materialize
+from modules.statistics import TaskStatistics
+from modules.task import TaskManager
+
+
+def timed(func) -> float:
+    """func を1回実行した時間（ミリ秒）"""
+    t = time.perf_counter()
+    func()
+    return (time.perf_counter() - t) * 1000
+
+
+def make_rules(templates: list, days: int, seed: int) -> dict:
+    """テンプレートごとの規則（開始日は今日から days 日前まで、未処理の回は直近2週間）"""
+    rnd = random.Random(seed)
+    today = date.today()
+    rules = {}
+    for index, template in enumerate(templates):
+        start = today - timedelta(days=rnd.randrange(days))
+        frequency = ("daily", "weekly", "monthly")[index % 3]
+        rule = RecurrenceRule(frequency, start, interval=rnd.randint(1, 3),
+                              weekdays=(0, 3) if frequency == "weekly" else ())
+        rules[template.id] = rule.replace(pending_from=max(start, today - timedelta(days=14)))
+    return rules
+
+
+def bench(task_manager: TaskManager) -> dict:
+    today = date.today()
+    statistics = TaskStatistics(task_manager, include_archived=False)
+    result = {'tasks': len(task_manager.tasks),
+              'save_ms': timed(task_manager.save_tasks),
+              'file_bytes': os.path.getsize(task_manager.data_file)}
+    overdue = []
+    result['overdue_ms'] = timed(lambda: overdue.extend(task_manager.get_overdue_tasks()))
+    result['overdue'] = len(overdue)
+    result['window_ms'] = timed(lambda: task_manager.get_occurrences(today, today + timedelta(days=29)))
+    result['statistics_ms'] = timed(lambda: (statistics.get_category_stats(), statistics.get_recurrence_stats()))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="繰り返しタスクの遅延展開の計測")
+    parser.add_argument("--tasks", type=int, default=10000, help="通常のタスク数")
+    parser.add_argument("--series", type=int, default=500, help="繰り返しのテンプレート数")
+    parser.add_argument("--days", type=int, default=365, help="繰り返しの開始日の範囲（今日から何日前まで）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    today = date.today()
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        for name in ("lazy", "materialized"):
+            task_manager = TaskManager(data_file=os.path.join(data_dir, f"{name}.json"))
+            task_manager.autosave = False
+            task_manager.add_tasks(generate_tasks(args.tasks, seed=args.seed))
+            templates = random.Random(args.seed).sample(task_manager.tasks, min(args.series, args.tasks))
+            for template in templates:
+                template.completed = False
+                template.due_date = None
+            rules = make_rules(templates, args.days, args.seed)
+            if name == "lazy":
+                task_manager.recurrences.update(rules)
+            else:
+                # 素朴な実装: 開始日から30日後までのすべての回をタスクとして保存し、処理済みの回は完了にする
+                occurrences = []
+                for template in templates:
+                    rule = rules[template.id]
+                    for day in rule.iter_dates(None, today + timedelta(days=29)):
+                        task = materialize(template, day)
+                        task.completed = day < rule.pending_from
+                        occurrences.append(task)
+                task_manager.add_tasks(occurrences)
+            results[name] = bench(task_manager)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    lazy, materialized = results['lazy'], results['materialized']
+    print(f"通常のタスク {args.tasks}件、繰り返し {args.series}件（遅延展開 / すべての回を保存）")
+    for key, label, unit, scale in (
+            ('tasks', "データファイルのタスク数", "件", 1),
+            ('file_bytes', "データファイルの大きさ", "MB", 1 / 1024 / 1024),
+            ('save_ms', "save_tasks", "ms", 1),
+            ('overdue', "期限切れの件数", "件", 1),
+            ('overdue_ms', "get_overdue_tasks", "ms", 1),
+            ('window_ms', "30日間の仮想の回の取得", "ms", 1),
+            ('statistics_ms', "統計（カテゴリ・繰り返し）", "ms", 1)):
+        print(f"  {lazy[key] * scale:12.2f} / {materialized[key] * scale:12.2f} {unit:<4} {label}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+TaskManager のスナップショットのストレステスト
+複数の書き込みスレッドと読み込みスレッドを同時に動かし、
+読み込み側が常に一貫した状態を見ていることを確認して、スループットを表示する
+
+確認する内容:
+    - ペアにしたタスクの進捗率の合計が常に 100（1つのトランザクションで両方を変更する）
+    - タスク数が変わらない（削除と追加を1つのトランザクションで行う）
+    - スナップショットの version とポモドーロ数の合計が減らない
+    - 保存したファイルもペアの合計が 100 になっている
+
+使い方:
+    python benchmarks/snapshot_stress.py --tasks 10000 --writers 4 --readers 4 --seconds 5
+    python benchmarks/snapshot_stress.py --format binary  # バイナリ形式から遅延読み込みしたタスクで確認
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BENCH_DIR)
+from load_test import generate_tasks, percentile
+from modules.statistics import TaskStatistics
+from modules.task import Task, TaskManager, TaskSnapshot
+
+
+def check_pairs(snapshot: TaskSnapshot, pair_count: int) -> int:
+    """ペアの進捗率の合計が 100 でない数"""
+    broken = 0
+    for i in range(pair_count):
+        if snapshot.get_task(f"pair_{i}_a").progress + snapshot.get_task(f"pair_{i}_b").progress != 100:
+            broken += 1
+    return broken
+
+
+def setup(task_manager: TaskManager, task_count: int, pair_count: int):
+    """ペアのタスクと入れ替え用のタスクを追加"""
+    tasks = generate_tasks(task_count - pair_count * 2)
+    for i in range(pair_count):
+        first = Task(title=f"ペア {i} A", progress=50)
+        first.id = f"pair_{i}_a"
+        second = Task(title=f"ペア {i} B", progress=50)
+        second.id = f"pair_{i}_b"
+        tasks.extend([first, second])
+    task_manager.add_tasks(tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="スナップショットのストレステスト")
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--pairs", type=int, default=100)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--save-interval", type=float, default=0.1, help="保存スレッドの保存間隔（秒）")
+    parser.add_argument("--format", choices=["json", "binary"], default="json", help="データファイルの形式")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        filename = "tasks.tmdb" if args.format == "binary" else "tasks.json"
+        task_manager = TaskManager(data_file=os.path.join(data_dir, filename))
+        task_manager.autosave = False
+        setup(task_manager, args.tasks, args.pairs)
+        if args.format == "binary":
+            # 保存して読み込み直し、遅延読み込みのタスク（StoredTask）を対象にする
+            task_manager.save_tasks()
+            task_manager.load_tasks()
+        task_count = len(task_manager.tasks)
+        churn_ids = [task.id for task in task_manager.tasks[:args.tasks // 10]]
+        statistics = TaskStatistics(task_manager)
+        task_manager.snapshot()  # 読み込み直後と同じく、最初のスナップショットを公開しておく
+
+        stop = threading.Event()
+        errors = []
+        counts = {'writes': [], 'reads': [], 'saves': 0}  # スレッドごとの回数
+        snapshot_times = []
+        versions = set()
+
+        def writer(seed: int):
+            rng = random.Random(seed)
+            writes = 0
+            while not stop.is_set():
+                kind = rng.random()
+                if kind < 0.6:
+                    i = rng.randrange(args.pairs)
+                    progress = rng.randint(0, 100)
+                    with task_manager.transaction():
+                        task_manager.update_task(f"pair_{i}_a", progress=progress)
+                        task_manager.update_task(f"pair_{i}_b", progress=100 - progress)
+                elif kind < 0.9:
+                    task_manager.increment_pomodoro(f"pair_{rng.randrange(args.pairs)}_a")
+                else:
+                    # 入れ替え用のタスクを削除して同じ ID で追加し直す（件数は変わらない）
+                    # ポモドーロ数の合計が減らないよう、元のタスクの回数を引き継ぐ
+                    task_id = rng.choice(churn_ids)
+                    with task_manager.transaction():
+                        old = task_manager.get_task(task_id)
+                        if old and task_manager.delete_tasks([task_id]):
+                            task = Task(title=f"入れ替え {writes}")
+                            task.id = task_id
+                            task.pomodoro_count = old.pomodoro_count
+                            task_manager.add_task(task)
+                writes += 1
+            counts['writes'].append(writes)
+
+        def reader():
+            reads = 0
+            last_version = -1
+            last_pomodoros = -1
+            local_times = []
+            while not stop.is_set():
+                t = time.perf_counter()
+                snapshot = task_manager.snapshot()
+                local_times.append(time.perf_counter() - t)
+                versions.add(snapshot.version)
+
+                if len(snapshot) != task_count:
+                    errors.append(f"タスク数が {len(snapshot)} 件になっています")
+                if snapshot.version < last_version:
+                    errors.append(f"version が {last_version} から {snapshot.version} に戻りました")
+                broken = check_pairs(snapshot, args.pairs)
+                if broken:
+                    errors.append(f"進捗率の合計が 100 でないペアが {broken} 組あります")
+                pomodoros = sum(task.pomodoro_count for task in snapshot)
+                if pomodoros < last_pomodoros:
+                    errors.append(f"ポモドーロ数の合計が {last_pomodoros} から {pomodoros} に減りました")
+                statistics.get_productivity_stats(snapshot)
+
+                last_version = snapshot.version
+                last_pomodoros = pomodoros
+                reads += 1
+            counts['reads'].append(reads)
+            snapshot_times.extend(local_times)
+
+        def saver():
+            while not stop.wait(args.save_interval):
+                if task_manager.save_tasks():
+                    counts['saves'] += 1
+
+        threads = [threading.Thread(target=writer, args=(seed,)) for seed in range(args.writers)]
+        threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+        threads.append(threading.Thread(target=saver))
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        try:
+            task_manager.snapshot()[0].progress = 0
+            errors.append("スナップショットのタスクを変更できてしまいました")
+        except AttributeError:
+            pass
+
+        # 最後の保存内容もペアの合計が 100 になっているか
+        task_manager.save_tasks()
+        saved_manager = TaskManager(data_file=task_manager.data_file)
+        saved_manager.load_tasks()
+        saved = saved_manager.snapshot()
+        broken = check_pairs(saved, args.pairs)
+        if broken or len(saved) != task_count:
+            errors.append(f"保存したファイルが一貫していません（{len(saved)}件、壊れたペア {broken} 組）")
+
+    snapshot_times.sort()
+    writes = sum(counts['writes'])
+    reads = sum(counts['reads'])
+    result = {
+        'tasks': task_count,
+        'writers': args.writers,
+        'readers': args.readers,
+        'elapsed_s': round(elapsed, 3),
+        'writes': writes,
+        'writes_per_s': round(writes / elapsed, 1),
+        'reads': reads,
+        'reads_per_s': round(reads / elapsed, 1),
+        'snapshots_built': len(versions),
+        'snapshot_p50_ms': round(percentile(snapshot_times, 0.50) * 1000, 3),
+        'snapshot_p99_ms': round(percentile(snapshot_times, 0.99) * 1000, 3),
+        'saves': counts['saves'],
+        'errors': len(errors)
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"タスク: {task_count}件  書き込み: {args.writers}スレッド  読み込み: {args.readers}スレッド  "
+              f"{result['elapsed_s']} 秒")
+        print(f"書き込み: {result['writes']} 回（{result['writes_per_s']} 回/秒）  "
+              f"読み込み: {result['reads']} 回（{result['reads_per_s']} 回/秒）  保存: {result['saves']} 回")
+        print(f"スナップショット取得 p50: {result['snapshot_p50_ms']} ms  p99: {result['snapshot_p99_ms']} ms  "
+              f"（異なる version: {result['snapshots_built']}）")
+    for error in errors[:10]:
+        print(f"不整合: {error}", file=sys.stderr)
+    if errors:
+        sys.exit(1)
+    if not args.json:
+        print("不整合はありませんでした")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+計測用のタスクを生成する（合成ワークロード）
+同じ seed と base_date からは常に同じタスクを生成する。
+
+実際の使い方に近づけるため、カテゴリごとにタイトル・タグの語彙を分け、
+作成日は最近のものほど多く、古いタスクほど完了している割合が高くなるようにしている。
+期限日は作成日からの日数で決めるため、base_date より前の期限（期限切れ候補）も含まれる。
+"""
+import os
+import random
+import string
+import sys
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Src")
+sys.path.append(SRC_DIR)
+from modules.task import Task
+
+
+# カテゴリと出現比率
+CATEGORY_WEIGHTS = {
+    "仕事": 35, "勉強": 15, "私用": 14, "家事": 10, "健康": 9, "趣味": 9, "一般": 8
+}
+CATEGORIES = list(CATEGORY_WEIGHTS)
+
+# カテゴリごとのタイトルのひな形と語彙
+TITLE_TEMPLATES = {
+    "仕事": ["{client}向け{document}の作成", "{document}のレビュー", "{meeting}の準備",
+             "{client}への{contact}", "{document}を{client}に提出", "{meeting}の議事録をまとめる"],
+    "勉強": ["{subject}の{material}を進める", "{subject}の復習", "{exam}の過去問を解く",
+             "{subject}のノート整理", "{material}の第{number}章を読む"],
+    "私用": ["{place}の予約", "{person}への{gift}を買う", "{paperwork}の手続き",
+             "{person}に{contact}", "{place}に行く"],
+    "家事": ["{room}の掃除", "{item}の買い出し", "洗濯と{chore}", "{item}の整理", "{chore}"],
+    "健康": ["{exercise}を{minutes}分", "{checkup}の予約", "{exercise}の記録をつける", "睡眠時間の見直し"],
+    "趣味": ["{hobby}の{hobby_task}", "{book}を読む", "{hobby}の道具を手入れ", "{hobby}の予定を立てる"],
+    "一般": ["{paperwork}の確認", "メールの整理", "{item}の注文", "来週の予定を確認"]
+}
+VOCABULARY = {
+    "client": ["A社", "B商事", "C製作所", "本社", "営業部", "新規顧客", "取引先"],
+    "document": ["企画書", "見積書", "報告書", "提案資料", "議事録", "仕様書", "請求書", "週報"],
+    "meeting": ["定例会議", "打ち合わせ", "プレゼン", "面談", "キックオフ", "振り返り会"],
+    "contact": ["メール返信", "電話連絡", "お礼の連絡", "日程調整"],
+    "subject": ["英語", "数学", "統計学", "Python", "簿記", "TOEIC", "歴史", "物理"],
+    "material": ["問題集", "参考書", "オンライン講座", "単語帳", "演習問題"],
+    "exam": ["資格試験", "期末試験", "模擬試験", "検定"],
+    "place": ["歯医者", "美容院", "レストラン", "市役所", "銀行", "実家"],
+    "person": ["母", "父", "友人", "同僚", "先輩", "祖母"],
+    "gift": ["誕生日プレゼント", "お土産", "お祝い"],
+    "paperwork": ["確定申告", "住所変更", "保険", "年金", "パスポート更新"],
+    "room": ["キッチン", "浴室", "リビング", "玄関", "ベランダ", "冷蔵庫"],
+    "item": ["日用品", "食材", "洗剤", "本棚", "衣類", "書類"],
+    "chore": ["アイロンがけ", "ゴミ出し", "布団干し", "植物の水やり"],
+    "exercise": ["ジョギング", "筋トレ", "ヨガ", "ストレッチ", "水泳", "ウォーキング"],
+    "checkup": ["健康診断", "歯科検診", "人間ドック"],
+    "hobby": ["写真", "ギター", "料理", "イラスト", "家庭菜園", "プログラミング"],
+    "hobby_task": ["練習", "作品づくり", "新しいレシピ", "発表会の準備"],
+    "book": ["小説", "ビジネス書", "漫画の新刊", "技術書"],
+    "minutes": ["15", "30", "45", "60"],
+    "number": ["1", "2", "3", "4", "5", "6", "7", "8"]
+}
+
+# カテゴリごとのタグと、どのカテゴリにも付くタグ
+CATEGORY_TAGS = {
+    "仕事": ["会議", "資料", "顧客", "社内", "プロジェクトA", "プロジェクトB"],
+    "勉強": ["資格", "英語", "復習", "オンライン"],
+    "私用": ["予約", "手続き", "家族", "買い物"],
+    "家事": ["掃除", "買い物", "週末"],
+    "健康": ["運動", "習慣", "通院"],
+    "趣味": ["読書", "練習", "週末"],
+    "一般": ["確認", "連絡"]
+}
+COMMON_TAGS = ["重要", "急ぎ", "毎週", "後で"]
+TAG_COUNT_WEIGHTS = [30, 35, 22, 10, 3]  # タグ 0〜4 個の比率
+
+DESCRIPTIONS = ["{document}の内容を確認する", "必要なものを事前にリストアップする",
+                "{person}に相談してから決める", "前回の続きから進める", "締め切りに注意"]
+
+PRIORITIES = ["高", "中", "低"]
+PRIORITY_WEIGHTS = [20, 50, 30]
+ESTIMATED_TIMES = [25, 50, 75, 100, 150, 200]
+ESTIMATED_TIME_WEIGHTS = [30, 30, 15, 12, 8, 5]
+
+HISTORY_DAYS = 365  # 作成日の範囲（base_date から遡る日数）
+NO_DUE_DATE_RATIO = 0.25
+BASE_COMPLETION_RATIO = 0.2  # 作成したばかりのタスクが完了している割合
+AGED_COMPLETION_RATIO = 0.9  # 作成から HISTORY_DAYS 経ったタスクが完了している割合
+
+
+_template_fields = {}  # ひな形 -> 含まれる {名前} の一覧
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    """ひな形の {名前} を語彙から選んだ語で置き換える"""
+    fields = _template_fields.get(template)
+    if fields is None:
+        fields = _template_fields[template] = [name for _, name, _, _ in string.Formatter().parse(template) if name]
+    return template.format(**{name: rng.choice(VOCABULARY[name]) for name in fields})
+
+
+def generate_task(index: int, rng: random.Random, base: datetime) -> Task:
+    """1件のタスクを生成"""
+    category = rng.choices(CATEGORIES, CATEGORY_WEIGHTS.values())[0]
+    title = _fill(rng.choice(TITLE_TEMPLATES[category]), rng)
+    description = _fill(rng.choice(DESCRIPTIONS), rng) if rng.random() < 0.6 else ""
+
+    tag_count = rng.choices(range(len(TAG_COUNT_WEIGHTS)), TAG_COUNT_WEIGHTS)[0]
+    candidates = CATEGORY_TAGS[category] + COMMON_TAGS
+    tags = rng.sample(candidates, min(tag_count, len(candidates)))
+
+    # 作成日は最近のものほど多い（指数分布）
+    age_days = min(rng.expovariate(1 / 60), HISTORY_DAYS - 1)
+    created = base - timedelta(days=age_days, seconds=rng.randrange(86400))
+
+    due_date = None
+    if rng.random() >= NO_DUE_DATE_RATIO:
+        due_date = (created.date() + timedelta(days=int(rng.gammavariate(2, 7)))).isoformat()
+
+    completion_ratio = BASE_COMPLETION_RATIO + (AGED_COMPLETION_RATIO - BASE_COMPLETION_RATIO) * min(
+        1.0, age_days / 90)
+    completed = rng.random() < completion_ratio
+    estimated_time = rng.choices(ESTIMATED_TIMES, ESTIMATED_TIME_WEIGHTS)[0]
+
+    task = Task(
+        title=title,
+        description=description,
+        priority=rng.choices(PRIORITIES, PRIORITY_WEIGHTS)[0],
+        due_date=due_date,
+        category=category,
+        tags=tags,
+        estimated_time=estimated_time,
+        progress=100 if completed else rng.randrange(0, 100, 10)
+    )
+    task.id = f"task_bench_{index:07d}"
+    task.completed = completed
+    if completed or task.progress:
+        pomodoros = max(1, round(estimated_time / 25 * rng.uniform(0.5, 1.6)))
+        if not completed:
+            pomodoros = pomodoros * task.progress // 100
+        task.pomodoro_count = pomodoros
+        task.actual_time = pomodoros * 25
+    task.created_at = created.isoformat()
+    updated = created + timedelta(days=rng.uniform(0, min(age_days, 30)))
+    task.updated_at = min(updated, base).isoformat()
+    return task
+
+
+def generate_tasks(count: int, seed: int = 0, base_date: Optional[date] = None) -> list:
+    """
+    計測用のタスクを生成
+
+    Args:
+        count (int): 生成する件数
+        seed (int): 乱数の種（同じ値なら同じタスクを生成する）
+        base_date (Optional[date]): 「今日」とみなす日付（既定: 実行した日）。
+            期限切れの判定は実行時の日付で行われるため、比較する計測では揃えること
+    """
+    rng = random.Random(seed)
+    base = datetime.combine(base_date or date.today(), datetime.min.time()) + timedelta(hours=18)
+    return [generate_task(index, rng, base) for index in range(count)]
@@ -0,0 +1,91 @@
+"""
+ワークスペースプールのベンチマーク
+偏りのあるアクセス（一部のワークスペースに集中）を再現し、
+ヒット率・読み込み時間・メモリ量を表示する
+
+使い方:
+    python benchmarks/workspace_pool_bench.py --workspaces 200 --budget-mb 32
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BENCH_DIR)
+from load_test import generate_tasks
+from modules.workspace import WorkspacePool
+
+
+def create_workspaces(pool: WorkspacePool, count: int, min_tasks: int, max_tasks: int, seed: int):
+    """ワークスペースのデータファイルを作成"""
+    rng = random.Random(seed)
+    for i in range(count):
+        data_file = pool.data_file(f"user{i:05d}")
+        os.makedirs(os.path.dirname(data_file), exist_ok=True)
+        tasks = generate_tasks(rng.randint(min_tasks, max_tasks), seed=i)
+        with open(data_file, 'w', encoding='utf-8') as f:
+            json.dump([task.to_dict() for task in tasks], f, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ワークスペースプールのベンチマーク")
+    parser.add_argument("--workspaces", type=int, default=200)
+    parser.add_argument("--min-tasks", type=int, default=50)
+    parser.add_argument("--max-tasks", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--budget-mb", type=float, default=32)
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="変更を伴うアクセスの割合")
+    parser.add_argument("--zipf", type=float, default=1.1, help="アクセスの偏り（大きいほど集中）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) ** args.zipf for rank in range(args.workspaces)]
+    workspace_ids = [f"user{i:05d}" for i in range(args.workspaces)]
+    rng.shuffle(workspace_ids)
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        pool = WorkspacePool(root_dir, memory_budget=int(args.budget_mb * 1024 * 1024))
+        create_workspaces(pool, args.workspaces, args.min_tasks, args.max_tasks, args.seed)
+
+        access_times = []
+        started = time.perf_counter()
+        for workspace_id in rng.choices(workspace_ids, weights, k=args.requests):
+            t = time.perf_counter()
+            with pool.open(workspace_id) as task_manager:
+                # サーバーと同じく変更ごとには保存せず、追い出し時にまとめて保存する
+                task_manager.autosave = False
+                if task_manager.tasks and rng.random() < args.write_ratio:
+                    task = rng.choice(task_manager.tasks)
+                    task_manager.update_task(task.id, progress=rng.randint(0, 100))
+            access_times.append(time.perf_counter() - t)
+        elapsed = time.perf_counter() - started
+        stats = pool.get_stats()
+        pool.close()
+
+    access_times.sort()
+    stats['requests'] = args.requests
+    stats['elapsed_s'] = round(elapsed, 3)
+    stats['access_p50_ms'] = round(access_times[len(access_times) // 2] * 1000, 3)
+    stats['access_p99_ms'] = round(access_times[int(len(access_times) * 0.99)] * 1000, 3)
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return
+    print(f"リクエスト: {stats['requests']}  ヒット率: {stats['hit_rate']}%  "
+          f"（ヒット {stats['hits']} / ミス {stats['misses']}）  追い出し: {stats['evictions']}")
+    print(f"読み込み 平均: {stats['load_avg_ms']} ms  最大: {stats['load_max_ms']} ms  "
+          f"アクセス p50: {stats['access_p50_ms']} ms  p99: {stats['access_p99_ms']} ms")
+    rss = stats['process_rss']
+    print(f"保持中のメモリ（見積もり）: {stats['resident_bytes'] / 1024 / 1024:.1f} MB / "
+          f"上限 {stats['memory_budget'] / 1024 / 1024:.1f} MB"
+          + (f"  プロセスRSS: {rss / 1024 / 1024:.1f} MB" if rss else ""))
+
+
+if __name__ == "__main__":
+    main()